@@ -14,7 +14,7 @@ from .manager import (
     tear_down_custom_logger_system,
     is_initialized,
     is_queue_mode,
-    # 占位函数（未实现）
+    # 配置快照
     init_custom_logger_system_with_params,
     init_custom_logger_system_from_serializable_config,
     get_logger_init_params,
@@ -22,6 +22,8 @@ from .manager import (
 )
 
 from .logger import CustomLogger
+from .level_control import set_log_levels, override_log_levels
+from .pool import get_pool_initializer, create_process_pool_executor, create_process_pool
 
 from .types import (
     DEBUG, INFO, WARNING, ERROR, CRITICAL, EXCEPTION,
@@ -42,6 +44,13 @@ __all__ = [
     'tear_down_custom_logger_system',
     'is_initialized',
     'is_queue_mode',
+    'set_log_levels',
+    'override_log_levels',
+    
+    # 进程池初始化
+    'get_pool_initializer',
+    'create_process_pool_executor',
+    'create_process_pool',
     
     # 日志级别常量
     'DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL', 'EXCEPTION',
@@ -50,7 +59,7 @@ __all__ = [
     # 级别处理函数
     'parse_level_name', 'get_level_name',
     
-    # 占位函数（未实现）
+    # 配置快照
     'init_custom_logger_system_with_params',
     'init_custom_logger_system_from_serializable_config',
     'get_logger_init_params',
@@ -0,0 +1,275 @@
+# src/custom_logger/compression.py
+"""
+轮转分段后台压缩模块
+
+轮转产生的分段（例如full.0001.log）提交到一个小的ProcessPoolExecutor中压缩，
+压缩的CPU开销不会出现在写入线程，也不会与日志路径争抢GIL。
+压缩进程以spawn方式启动：写入线程所在进程有多个线程持有锁，fork出的子进程可能死锁。
+每个会话目录维护一个compression_manifest.json记录各分段的状态。
+"""
+from __future__ import annotations
+
+import gzip
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+# 清单文件名
+MANIFEST_FILE_NAME = "compression_manifest.json"
+
+# 默认并发压缩上限
+DEFAULT_COMPRESSION_WORKERS = 1
+
+# 编解码器 -> 文件扩展名
+CODEC_EXTENSIONS = {
+    "gzip": ".gz",
+    "zstd": ".zst",
+    "lz4": ".lz4",
+}
+
+
+def _import_codec(codec: str) -> Any:
+    """导入可选压缩库，不可用时返回None"""
+    try:
+        if codec == "zstd":
+            import zstandard
+            return zstandard
+        if codec == "lz4":
+            import lz4.frame
+            return lz4.frame
+    except ImportError:
+        return None
+    return gzip
+
+
+def available_codecs() -> list:
+    """当前环境可用的编解码器"""
+    return [codec for codec in CODEC_EXTENSIONS if _import_codec(codec) is not None]
+
+
+def resolve_codec(codec: Optional[str]) -> Optional[str]:
+    """解析配置的编解码器
+
+    Args:
+        codec: "gzip"/"zstd"/"lz4"，None、空字符串或"none"表示不压缩
+
+    Returns:
+        Optional[str]: 实际使用的编解码器，请求的库不可用时回退到gzip
+    """
+    if not codec or str(codec).lower() == "none":
+        return None
+
+    codec = str(codec).lower()
+    if codec not in CODEC_EXTENSIONS:
+        raise ValueError(f"不支持的压缩格式: {codec}，可选: {', '.join(CODEC_EXTENSIONS)}")
+
+    if _import_codec(codec) is None:
+        try:
+            print(f"压缩库{codec}不可用，回退到gzip", file=sys.stderr)
+        except (ValueError, AttributeError):
+            pass
+        return "gzip"
+    return codec
+
+
+def compress_segment(path: str, codec: str = "gzip") -> Dict[str, Any]:
+    """压缩单个分段并删除原文件（在压缩进程中执行）
+
+    先写入临时文件再重命名，避免中断时留下不完整的压缩文件。
+
+    Returns:
+        Dict[str, Any]: 原始字节数、压缩后字节数与输出路径
+    """
+    output_path = path + CODEC_EXTENSIONS[codec]
+    temp_path = output_path + ".tmp"
+    original_bytes = os.path.getsize(path)
+
+    with open(path, 'rb') as src:
+        if codec == "zstd":
+            zstandard = _import_codec("zstd")
+            with open(temp_path, 'wb') as dst:
+                zstandard.ZstdCompressor().copy_stream(src, dst)
+        elif codec == "lz4":
+            lz4_frame = _import_codec("lz4")
+            with lz4_frame.open(temp_path, 'wb') as dst:
+                shutil.copyfileobj(src, dst, 1 << 20)
+        else:
+            with gzip.open(temp_path, 'wb') as dst:
+                shutil.copyfileobj(src, dst, 1 << 20)
+
+    os.replace(temp_path, output_path)
+    os.remove(path)
+    return {
+        "output": os.path.basename(output_path),
+        "original_bytes": original_bytes,
+        "compressed_bytes": os.path.getsize(output_path),
+    }
+
+
+def open_segment(path: str):
+    """以二进制只读方式打开分段，自动识别压缩格式
+
+    Args:
+        path: 未压缩分段路径；不存在时依次尝试各压缩扩展名
+    """
+    if os.path.exists(path):
+        return open(path, 'rb')
+
+    for codec, ext in CODEC_EXTENSIONS.items():
+        compressed_path = path + ext
+        if not os.path.exists(compressed_path):
+            continue
+        if codec == "zstd":
+            zstandard = _import_codec("zstd")
+            return zstandard.ZstdDecompressor().stream_reader(open(compressed_path, 'rb'), closefd=True)
+        if codec == "lz4":
+            return _import_codec("lz4").open(compressed_path, 'rb')
+        return gzip.open(compressed_path, 'rb')
+
+    raise FileNotFoundError(path)
+
+
+class SegmentCompressor:
+    """分段压缩器
+
+    Args:
+        session_dir: 会话目录（清单文件所在目录）
+        codec: 编解码器
+        max_workers: 并发压缩进程数上限
+    """
+
+    def __init__(self, session_dir: str, codec: str = "gzip", max_workers: int = DEFAULT_COMPRESSION_WORKERS):
+        self.session_dir = session_dir
+        self.codec = codec
+        self.max_workers = max(1, max_workers)
+        self.manifest_path = os.path.join(session_dir, MANIFEST_FILE_NAME)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()  # 保护清单和_futures（完成回调在执行器线程中执行）
+        self._manifest: Dict[str, Any] = self._load_manifest()
+        pass
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        """加载已有清单（同一会话目录重复初始化时保留历史记录）"""
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if isinstance(manifest.get("segments"), dict):
+                return manifest
+        except (OSError, ValueError):
+            pass
+        return {"codec": self.codec, "segments": {}}
+
+    def _save_manifest(self) -> None:
+        """原子写入清单（调用方持有锁）"""
+        temp_path = self.manifest_path + ".tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._manifest, f, ensure_ascii=False, indent=2)
+            os.replace(temp_path, self.manifest_path)
+        except Exception as e:
+            try:
+                print(f"写入压缩清单失败: {e}", file=sys.stderr)
+            except (ValueError, AttributeError):
+                pass
+        return
+
+    def _update(self, name: str, **fields: Any) -> None:
+        """更新清单中单个分段的记录"""
+        with self._lock:
+            record = self._manifest["segments"].setdefault(name, {})
+            record.update(fields)
+            record["updated_at"] = datetime.now().isoformat(timespec='seconds')
+            self._save_manifest()
+        return
+
+    def submit(self, path: str) -> None:
+        """提交分段压缩（写入线程调用，只做提交不做压缩）"""
+        name = os.path.basename(path)
+        try:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            self._update(name, status="pending", codec=self.codec)
+            future = self._executor.submit(compress_segment, path, self.codec)
+        except Exception as e:
+            self._update(name, status="failed", error=str(e))
+            return
+
+        # 先登记再注册回调：已完成的future会在add_done_callback中立即回调
+        with self._lock:
+            self._futures[name] = future
+        future.add_done_callback(lambda f, segment=name: self._on_done(segment, f))
+        return
+
+    def _on_done(self, name: str, future: Future) -> None:
+        """压缩完成回调（在执行器的管理线程中调用）"""
+        with self._lock:
+            if self._futures.get(name) is future:
+                del self._futures[name]
+        if future.cancelled():
+            return  # 保持pending状态，留待后续处理
+
+        error = future.exception()
+        if error is not None:
+            self._update(name, status="failed", error=str(error))
+        else:
+            self._update(name, status="done", **future.result())
+        return
+
+    def pending(self) -> list:
+        """尚未完成的分段"""
+        with self._lock:
+            return sorted(self._futures)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """关闭压缩器
+
+        Args:
+            wait: True时等待所有压缩完成；False时取消排队中的任务，
+                  未完成的分段在清单中保持pending状态
+        """
+        if self._executor is None:
+            return
+
+        if wait:
+            self._executor.shutdown(wait=True)
+        else:
+            with self._lock:
+                futures = list(self._futures.values())
+            for future in futures:
+                future.cancel()
+            self._executor.shutdown(wait=False)
+            with self._lock:
+                self._manifest["interrupted_at"] = datetime.now().isoformat(timespec='seconds')
+                self._save_manifest()
+
+        self._executor = None
+        return
+
+
+def create_compressor(cfg: Any, session_dir: str) -> Optional[SegmentCompressor]:
+    """根据logger配置创建压缩器，未启用压缩时返回None"""
+    from .config import get_logger_option
+
+    try:
+        codec = resolve_codec(get_logger_option(cfg, 'compression', ""))
+    except ValueError as e:
+        # 写入器初始化期间不能抛出异常，否则写入线程退出、之后的日志全部丢失
+        try:
+            print(f"{e}，不压缩轮转分段", file=sys.stderr)
+        except (ValueError, AttributeError):
+            pass
+        return None
+    if codec is None:
+        return None
+    max_workers = get_logger_option(cfg, 'compression_workers', DEFAULT_COMPRESSION_WORKERS)
+    return SegmentCompressor(session_dir, codec=codec, max_workers=max_workers)
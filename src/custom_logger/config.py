@@ -24,6 +24,42 @@ DEFAULT_CONFIG = {
         "module_levels": {},
         "show_call_chain": False,  # 控制是否显示调用链
         "show_debug_call_stack": False,  # 控制是否显示调试调用链
+        "thread_field": "",  # 进程字段附加线程信息：name为线程名，id为操作系统线程号，both为两者，空表示不附加
+        "console_thread": False,  # 控制台输出由后台线程按批写出，日志调用不等待stdout/stderr
+        "console_queue_size": 10000,  # 控制台写入线程的队列容量（条）
+        "console_overflow": "block",  # 控制台队列已满时：block等待空间，drop丢弃并在stderr提示丢弃条数
+        "console_refresh_rate": 10.0,  # 倒计时和进度条的最高刷新频率（Hz），0表示不限制
+        "console_rate_limit": 0,  # 每个logger每秒最多输出到控制台的行数，超出的行只写文件，0表示不限制
+        "console_summary_interval": 5.0,  # 控制台限流时输出省略条数汇总的间隔（秒）
+        "max_module_files": 64,  # 同时保持打开的模块文件组上限（LRU淘汰），0表示不限制
+        "write_batch_size": 256,  # 写入线程每批最多合并的日志条数（每个文件每批只写入和刷新一次）
+        "index_mode": False,  # 索引模式：只写full.log，warning和模块视图由full.idx重建
+        "rotation_max_bytes": 0,  # 单个日志文件达到该字节数后轮转为{stem}.0001.log，0表示不按大小轮转
+        "rotation_interval": 0.0,  # 按墙上时钟对齐的轮转间隔（秒），0表示不按时间轮转
+        "compression": "",  # 轮转分段的后台压缩格式：gzip/zstd/lz4，空表示不压缩
+        "compression_workers": 1,  # 并发压缩进程数上限
+        "compression_wait_on_close": True,  # 关闭时等待压缩完成；False时未完成的分段记录在清单中
+        "retention_max_age_days": 0.0,  # 删除早于该天数的会话目录，0表示不限制
+        "retention_max_total_bytes": 0,  # 每个实验保留的会话总字节数上限，0表示不限制
+        "retention_max_sessions": 0,  # 每个实验保留的会话数上限，0表示不限制
+        "queue_batch_size": 1,  # worker发送端批量条数，1表示逐条发送
+        "queue_batch_bytes": 65536,  # worker发送端批量字节上限
+        "queue_batch_interval": 0.05,  # worker发送端定时刷新间隔（秒）
+        "queue_wire_format": "entry",  # 队列传输格式：entry逐条pickle QueueLogEntry，compact为紧凑bytes帧
+        "worker_shards": False,  # worker直接写入会话目录下的full.w{id}.log，主程序关闭时合并为full.log和warning.log
+        "queue_spill": False,  # 队列已满时worker将日志写入会话目录下的溢出文件，后台回放
+        "queue_spill_max_bytes": 268435456,  # 每个worker溢出文件中未回放数据的上限（字节），超出后计数丢弃
+        "queue_receive_batch": 1024,  # 接收端每批最多取出的日志条数
+        "queue_worker_files": False,  # 队列模式接收端额外按worker写入worker_{id}.log
+        "queue_reorder_window": 0.0,  # 接收端按发送时间重排的窗口（秒），0表示按到达顺序写入
+        "queue_reorder_max_entries": 100000,  # 重排窗口最多缓存的日志条数
+        "queue_stats_interval": 10.0,  # 接收端写入会话目录下log_stats.json（按worker的条数、丢弃和延迟统计）的间隔（秒），0表示不写入
+        "queue_heartbeat_interval": 5.0,  # worker空闲时发送心跳的间隔（秒），接收端连续3个间隔没有消息时写入静默记录，0表示不发送
+        "queue_server_process": False,  # 队列模式接收端运行在独立的日志服务进程中，主程序也只作为发送端
+        "queue_level_control": False,  # 主程序创建级别控制通道（queue_info.level_control），set_log_levels的修改广播给worker
+        "level_poll_interval": 0.5,  # worker检查级别变更的间隔（秒）
+        "socket_aggregator": False,  # 主程序启动本地socket汇聚，worker可按地址连接（无需传递队列对象）
+        "socket_address": "",  # socket地址（unix:/path或tcp:127.0.0.1:port），为空时自动选择并写回配置
     },
 }
 
@@ -568,10 +604,6 @@ def _create_log_dir(cfg) -> str:
         current_time = datetime.now()
         first_start_time_str = current_time.isoformat()
 
-    # 从is_debug模块导入调试状态，debug模式添加debug层
-    if is_debug():
-        base_dir = os.path.join(str(base_dir), "debug")
-
     # 解析第一次启动时间
     try:
         first_start = datetime.fromisoformat(first_start_time_str)
@@ -583,7 +615,7 @@ def _create_log_dir(cfg) -> str:
     time_str = first_start.strftime("%H%M%S")
 
     # 构建完整路径：base_dir/{debug}/{项目名}/{实验名}/{启动日期yyyy-mm-dd}/{启动时间HHMMSS}
-    log_dir = os.path.join(str(base_dir), str(project_name), str(experiment_name), date_str, time_str)
+    log_dir = os.path.join(_join_project_dir(base_dir, project_name), str(experiment_name), date_str, time_str)
 
     # 创建目录
     os.makedirs(log_dir, exist_ok=True)
@@ -591,6 +623,21 @@ def _create_log_dir(cfg) -> str:
     return log_dir
 
 
+def _join_project_dir(base_dir: Any, project_name: Any) -> str:
+    """项目目录：base_dir/{debug}/project_name（从is_debug模块导入调试状态，debug模式添加debug层）"""
+    if is_debug():
+        base_dir = os.path.join(str(base_dir), "debug")
+    return os.path.join(str(base_dir), str(project_name))
+
+
+def get_project_log_dir(cfg) -> Optional[str]:
+    """_create_log_dir布局中的项目目录：base_dir/{debug}/project_name，配置中没有base_dir时返回None"""
+    base_dir = getattr(cfg, 'base_dir', None)
+    if not base_dir:
+        return None
+    return _join_project_dir(base_dir, getattr(cfg, 'project_name', 'my_project'))
+
+
 def get_config() -> Any:
     """获取配置"""
     global _direct_config_object
@@ -657,44 +704,131 @@ def _convert_confignode_to_dict(obj) -> dict:
         return obj
 
 
-def get_console_level(module_name: str) -> int:
-    """获取全局控制台日志级别"""
+def get_logger_option(cfg: Any, option_name: str, default: Any) -> Any:
+    """读取cfg.logger下的配置项
+
+    兼容字典与对象两种logger配置格式，缺失、为None或类型与默认值不符时返回默认值
+    （避免Mock等对象返回的占位值进入运行时参数）。
+
+    Args:
+        cfg: 根配置对象
+        option_name: 配置项名称
+        default: 默认值，同时决定期望的类型
+
+    Returns:
+        Any: 配置值或默认值
+    """
+    logger_obj = getattr(cfg, 'logger', None)
+    if logger_obj is None:
+        return default
+
+    if isinstance(logger_obj, dict):
+        value = logger_obj.get(option_name, default)
+    else:
+        value = getattr(logger_obj, option_name, default)
+
+    if value is None or default is None:
+        return default if value is None else value
+
+    if isinstance(default, bool) or not isinstance(default, (int, float)):
+        return value if isinstance(value, type(default)) else default
+
+    # 数值类型：允许int/float互通，但排除bool
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return default
+    return type(default)(value)
+
+
+def _get_field(obj: Any, name: str, default: Any) -> Any:
+    """兼容字典与对象读取字段"""
+    if isinstance(obj, dict):
+        return obj.get(name, default)
+    return getattr(obj, name, default)
+
+
+def _get_level(module_name: str, level_key: str, default_level: str) -> int:
+    """读取模块级别（module_levels中有设置时）或全局级别
+
+    Args:
+        module_name: 模块名称
+        level_key: console_level或file_level
+        default_level: 没有logger配置时使用的级别名称
+    """
     global _direct_config_object
-    
+
     # 检查系统是否已初始化
     if _direct_config_object is None:
         raise RuntimeError("日志系统未初始化，请先调用 init_custom_logger_system()")
-    
+
     # 从直接传入的config对象获取logger配置
     logger_obj = getattr(_direct_config_object, 'logger', None)
     if logger_obj is None:
         # 使用默认配置
-        return parse_level_name('info')
-    
-    # 只返回全局控制台级别，不处理模块特定配置
-    global_level = getattr(logger_obj, 'global_console_level', 'info')
-    
+        return parse_level_name(default_level)
+
+    # 模块特定级别：module_levels = {name: {"console_level": ..., "file_level": ...}}
+    module_levels = _get_field(logger_obj, 'module_levels', None)
+    if isinstance(module_levels, dict) and module_name in module_levels:
+        module_level = _get_field(module_levels[module_name], level_key, None)
+        if isinstance(module_level, str):
+            return parse_level_name(module_level)
+
+    global_level = _get_field(logger_obj, f'global_{level_key}', default_level)
+
     return parse_level_name(global_level)
 
 
+def get_console_level(module_name: str) -> int:
+    """获取模块的控制台日志级别（module_levels未设置时为全局级别）"""
+    return _get_level(module_name, 'console_level', 'info')
+
+
 def get_file_level(module_name: str) -> int:
-    """获取全局文件日志级别"""
-    global _direct_config_object
-    
-    # 检查系统是否已初始化
-    if _direct_config_object is None:
-        raise RuntimeError("日志系统未初始化，请先调用 init_custom_logger_system()")
-    
-    # 从直接传入的config对象获取logger配置
-    logger_obj = getattr(_direct_config_object, 'logger', None)
+    """获取模块的文件日志级别（module_levels未设置时为全局级别）"""
+    return _get_level(module_name, 'file_level', 'debug')
+
+
+def get_level_settings(cfg: Any) -> dict:
+    """读取cfg.logger中的级别设置快照（全局级别和module_levels，值均为基本类型）"""
+    logger_obj = getattr(cfg, 'logger', None)
+    module_levels = _get_field(logger_obj, 'module_levels', None) if logger_obj is not None else None
+    return {
+        'global_console_level': get_logger_option(cfg, 'global_console_level', 'info'),
+        'global_file_level': get_logger_option(cfg, 'global_file_level', 'debug'),
+        'module_levels': {
+            name: {key: value for key, value in dict(levels).items() if key in ('console_level', 'file_level')}
+            for name, levels in module_levels.items() if isinstance(levels, dict)
+        } if isinstance(module_levels, dict) else {},
+    }
+
+
+def apply_level_settings(cfg: Any, settings: dict) -> None:
+    """将级别设置快照原地写入cfg.logger（已创建的logger下一次调用即按新级别过滤）"""
+    logger_obj = getattr(cfg, 'logger', None)
     if logger_obj is None:
-        # 使用默认配置
-        return parse_level_name('debug')
-    
-    # 只返回全局文件级别，不处理模块特定配置
-    global_level = getattr(logger_obj, 'global_file_level', 'debug')
-    
-    return parse_level_name(global_level)
+        return
+
+    for name in ('global_console_level', 'global_file_level'):
+        if name in settings:
+            _ensure_attribute_value(logger_obj, name, settings[name])
+
+    if 'module_levels' in settings:
+        module_levels = _get_field(logger_obj, 'module_levels', None)
+        if isinstance(module_levels, dict):
+            module_levels.clear()
+            module_levels.update(settings['module_levels'])
+        else:
+            _ensure_attribute_value(logger_obj, 'module_levels', dict(settings['module_levels']))
+    return
+
+
+def _ensure_attribute_value(obj: Any, attr_name: str, value: Any) -> None:
+    """设置字典键或对象属性"""
+    if isinstance(obj, dict):
+        obj[attr_name] = value
+    else:
+        setattr(obj, attr_name, value)
+    return
 
 
 def init_config_from_object(config_object: Any) -> None:
@@ -773,6 +907,9 @@ def _ensure_logger_attributes(config_object: Any) -> None:
     _ensure_attribute(logger_obj, 'show_call_chain', False)
     _ensure_attribute(logger_obj, 'show_debug_call_stack', False)
     _ensure_attribute(logger_obj, 'enable_queue_mode', False)
+    _ensure_attribute(
+        logger_obj, 'queue_heartbeat_interval', DEFAULT_CONFIG['logger']['queue_heartbeat_interval']
+    )
     
     return
 
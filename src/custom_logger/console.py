@@ -0,0 +1,318 @@
+# src/custom_logger/console.py
+"""
+控制台写入线程
+
+默认情况下CustomLogger在调用线程中同步写控制台并flush，stdout是连接到慢速消费者的管道时
+（例如作业调度器捕获输出）日志调用会被阻塞。启用console_thread后，控制台文本放入有界队列，
+由后台线程写出：
+- 一次取出队列中的全部文本，同一流的连续文本合并为一次write和一次flush
+- 队列是单一FIFO，按流切换的顺序写出，stdout和stderr之间的先后顺序与调用顺序一致
+- 倒计时文本（\\r开头、不换行）同样按顺序写出
+- 队列已满时按console_overflow处理："block"等待空间，"drop"丢弃新文本并计数，
+  之后在stderr输出一次丢弃条数
+
+流对象在调用时确定（sys.stdout/sys.stderr的当前值），重定向同样生效。
+
+控制台限流（console_rate_limit）：每个logger每秒最多输出指定行数到控制台，超出的行只写文件
+（文件日志保持完整），每个汇总间隔在stderr输出一次被省略的条数。
+"""
+from __future__ import annotations
+
+import atexit
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, TextIO, Tuple
+
+from .formatter import create_system_log_line
+from .types import WARNING, get_level_name
+
+# 默认队列容量（条）和队列已满时的处理方式
+DEFAULT_CONSOLE_QUEUE_SIZE = 10000
+CONSOLE_OVERFLOW_BLOCK = "block"
+CONSOLE_OVERFLOW_DROP = "drop"
+CONSOLE_OVERFLOWS = (CONSOLE_OVERFLOW_BLOCK, CONSOLE_OVERFLOW_DROP)
+
+# 关闭时等待队列写完的时间（秒）
+CONSOLE_FLUSH_TIMEOUT = 5.0
+
+# 写入线程结束标记
+_STOP = object()
+
+# 控制台限流的计数窗口（秒）和默认汇总间隔（秒）
+CONSOLE_BUDGET_WINDOW = 1.0
+DEFAULT_CONSOLE_SUMMARY_INTERVAL = 5.0
+
+
+class ConsoleWriter:
+    """控制台写入线程
+
+    Args:
+        queue_size: 队列容量（条）
+        overflow: 队列已满时的处理方式，"block"或"drop"
+    """
+
+    def __init__(self, queue_size: int = DEFAULT_CONSOLE_QUEUE_SIZE, overflow: str = CONSOLE_OVERFLOW_BLOCK):
+        self.queue_size = max(1, queue_size)
+        self.overflow = overflow if overflow in CONSOLE_OVERFLOWS else CONSOLE_OVERFLOW_BLOCK
+        self.dropped = 0
+        self._dropped_reported = 0
+        self._start()
+        pass
+
+    def _start(self) -> None:
+        """创建队列并启动写入线程"""
+        self._pid = os.getpid()
+        self._queue: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        self._thread = threading.Thread(target=self._run, name="custom_logger_console", daemon=True)
+        self._thread.start()
+
+    def write(self, stream: TextIO, text: str) -> None:
+        """将文本放入队列（写入线程负责flush）"""
+        if self._pid != os.getpid():
+            # fork后的子进程中没有写入线程，重新创建
+            self._start()
+
+        if self.overflow == CONSOLE_OVERFLOW_DROP:
+            try:
+                self._queue.put_nowait((stream, text))
+            except queue.Full:
+                self.dropped += 1
+            return
+        self._queue.put((stream, text))
+
+    def flush(self, timeout: float = CONSOLE_FLUSH_TIMEOUT) -> bool:
+        """等待此前放入的文本全部写出
+
+        Returns:
+            bool: 是否在超时前写完
+        """
+        if not self._thread.is_alive():
+            return False
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def close(self, timeout: float = CONSOLE_FLUSH_TIMEOUT) -> None:
+        """写完队列中的文本后停止写入线程"""
+        if not self._thread.is_alive():
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        """写入循环：按批取出，同一流的连续文本合并写入"""
+        while True:
+            items = [self._queue.get()]
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = False
+            stream: Optional[TextIO] = None
+            parts: list = []
+            for item in items:
+                if item is _STOP:
+                    # 同一批中停止标记之后的文本（并发调用）仍然写出
+                    stop = True
+                    continue
+                if isinstance(item, threading.Event):
+                    # flush请求：先写出之前的文本
+                    self._write_run(stream, parts)
+                    stream, parts = None, []
+                    item.set()
+                    continue
+                if item[0] is not stream:
+                    self._write_run(stream, parts)
+                    stream, parts = item[0], []
+                parts.append(item[1])
+            self._write_run(stream, parts)
+            self._report_dropped()
+            if stop:
+                return
+
+    @staticmethod
+    def _write_run(stream: Optional[TextIO], parts: list) -> None:
+        """一次写出同一流的连续文本"""
+        if stream is None or not parts:
+            return
+        try:
+            stream.write(''.join(parts))
+            stream.flush()
+        except (ValueError, AttributeError, OSError):
+            pass
+
+    def _report_dropped(self) -> None:
+        """丢弃条数增加后在stderr输出一次"""
+        dropped = self.dropped
+        if dropped <= self._dropped_reported:
+            return
+        message = f"[custom_logger] 控制台输出过快，已丢弃{dropped - self._dropped_reported}行（文件日志完整）\n"
+        self._write_run(sys.stderr, [message])
+        self._dropped_reported = dropped
+
+
+class ConsoleBudget:
+    """控制台限流（按logger名称计数，线程安全）
+
+    Args:
+        max_lines: 每个logger每秒最多输出到控制台的行数
+        summary_interval: 从第一次省略到输出汇总的间隔（秒）
+        first_start_time: 程序启动时间，用于汇总行的用时字段
+    """
+
+    def __init__(
+            self,
+            max_lines: int,
+            summary_interval: float = DEFAULT_CONSOLE_SUMMARY_INTERVAL,
+            first_start_time: Optional[object] = None
+    ):
+        self.max_lines = max(1, int(max_lines))
+        self.summary_interval = max(0.0, summary_interval)
+        self.first_start_time = first_start_time
+        self._lock = threading.Lock()
+        # {logger名称: [窗口开始时间, 窗口内已输出行数]}
+        self._windows: Dict[str, list] = {}
+        # {logger名称: (第一次省略的时间, {级别名称: 省略条数})}
+        self._suppressed: Dict[str, Tuple[float, Dict[str, int]]] = {}
+        pass
+
+    def check(self, name: str, level_name: str, now: Optional[float] = None) -> Tuple[bool, List[str]]:
+        """判断该logger的这一行是否输出到控制台
+
+        Returns:
+            Tuple[bool, List[str]]: (是否输出到控制台, 到期需要输出的汇总行)
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            window = self._windows.get(name)
+            if window is None or now - window[0] >= CONSOLE_BUDGET_WINDOW:
+                window = self._windows[name] = [now, 0]
+            allowed = window[1] < self.max_lines
+            if allowed:
+                window[1] += 1
+            else:
+                counts = self._suppressed.setdefault(name, (now, {}))[1]
+                counts[level_name] = counts.get(level_name, 0) + 1
+
+            # 任意logger的调用都检查到期的汇总，洪水结束后也能及时输出
+            due = [key for key, (since, _) in self._suppressed.items() if now - since >= self.summary_interval]
+            summaries = [self._format_summary(key, self._suppressed.pop(key)[1]) for key in due]
+        return allowed, summaries
+
+    def drain(self) -> List[str]:
+        """取出所有尚未输出的汇总行（关闭时调用）"""
+        with self._lock:
+            suppressed, self._suppressed = self._suppressed, {}
+        return [self._format_summary(name, counts) for name, (_, counts) in suppressed.items()]
+
+    def _format_summary(self, name: str, counts: Dict[str, int]) -> str:
+        details = "、".join(f"{count}条{level_name}" for level_name, count in counts.items())
+        message = f"{name} 输出过快，{details}未输出到控制台（完整内容见full.log）"
+        return create_system_log_line(get_level_name(WARNING), message, self.first_start_time)
+
+
+# 全局控制台写入线程，未启用时为None
+_console_writer: Optional[ConsoleWriter] = None
+_exit_hook_installed = False
+
+# 全局控制台限流，未启用时为None
+_console_budget: Optional[ConsoleBudget] = None
+
+
+def init_console_writer(cfg: Any) -> Optional[ConsoleWriter]:
+    """按配置启动控制台写入线程（console_thread为False时不启动）"""
+    global _console_writer, _exit_hook_installed
+
+    from .config import get_logger_option
+
+    if _console_writer is not None or not get_logger_option(cfg, 'console_thread', False):
+        return _console_writer
+
+    _console_writer = ConsoleWriter(
+        get_logger_option(cfg, 'console_queue_size', DEFAULT_CONSOLE_QUEUE_SIZE),
+        get_logger_option(cfg, 'console_overflow', CONSOLE_OVERFLOW_BLOCK),
+    )
+    if not _exit_hook_installed:
+        _exit_hook_installed = True
+        atexit.register(shutdown_console_writer)
+    return _console_writer
+
+
+def init_console_budget(cfg: Any) -> Optional[ConsoleBudget]:
+    """按配置启用控制台限流（console_rate_limit为0时不启用）"""
+    global _console_budget
+
+    from .config import get_logger_option
+
+    max_lines = get_logger_option(cfg, 'console_rate_limit', 0)
+    _console_budget = ConsoleBudget(
+        max_lines,
+        get_logger_option(cfg, 'console_summary_interval', DEFAULT_CONSOLE_SUMMARY_INTERVAL),
+        getattr(cfg, 'first_start_time', None),
+    ) if max_lines and max_lines > 0 else None
+    return _console_budget
+
+
+def check_console_budget(name: str, level_name: str) -> Tuple[bool, List[str]]:
+    """按控制台限流判断是否输出到控制台，返回(是否输出, 到期的汇总行)；未启用时总是输出"""
+    budget = _console_budget
+    if budget is None:
+        return True, []
+    return budget.check(name, level_name)
+
+
+def shutdown_console_budget() -> None:
+    """输出尚未输出的限流汇总并停用控制台限流"""
+    global _console_budget
+
+    budget = _console_budget
+    _console_budget = None
+    if budget is not None:
+        for summary in budget.drain():
+            write_console(sys.stderr, summary + "\n")
+
+
+def get_console_writer() -> Optional[ConsoleWriter]:
+    """当前的控制台写入线程，未启用时返回None"""
+    return _console_writer
+
+
+def write_console(stream: TextIO, text: str) -> None:
+    """写控制台：启用写入线程时放入队列，否则直接写入并flush"""
+    writer = _console_writer
+    if writer is not None:
+        writer.write(stream, text)
+        return
+    try:
+        stream.write(text)
+        stream.flush()
+    except (ValueError, AttributeError, OSError):
+        pass
+
+
+def flush_console(timeout: float = CONSOLE_FLUSH_TIMEOUT) -> None:
+    """等待控制台写入线程写完已放入的文本"""
+    writer = _console_writer
+    if writer is not None:
+        writer.flush(timeout)
+
+
+def shutdown_console_writer() -> None:
+    """写完剩余文本并停止控制台写入线程"""
+    global _console_writer
+
+    writer = _console_writer
+    _console_writer = None
+    if writer is not None:
+        writer.close()
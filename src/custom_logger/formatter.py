@@ -3,12 +3,19 @@ from __future__ import annotations
 from datetime import datetime
 import os
 import sys
+import threading
 import traceback
 import inspect
-from typing import Tuple, Optional
+from typing import Any, Tuple, Optional
 
 start_time = datetime.now()
 
+# thread_field配置项的取值：线程名、线程ID（操作系统线程号）或两者
+THREAD_FIELD_MODES = ("name", "id", "both")
+
+# 每个线程缓存日志行开头的进程字段：(根配置对象, pid, 字段字符串)
+_thread_fields = threading.local()
+
 
 def _get_call_stack_info() -> str:
     """获取调用栈信息（用于调试）"""
@@ -94,7 +101,7 @@ def get_caller_info() -> Tuple[str, int]:
             normalized_filename = filename.replace('\\', '/').lower()
             is_custom_logger_file = (
                 'custom_logger' in normalized_filename and
-                (basename in ['logger.py', 'formatter.py', 'writer.py', 'config.py', 'manager.py'] or
+                (basename in ['logger.py', 'formatter.py', 'writer.py', 'config.py', 'manager.py', 'progress.py'] or
                  basename.startswith('module') or basename.startswith('internal'))  # 支持测试中的module*.py和internal*.py文件
             )
             
@@ -146,25 +153,46 @@ def get_caller_info() -> Tuple[str, int]:
         return "error", 0
 
 
+def _format_elapsed_seconds(total_seconds: float) -> str:
+    """将秒数格式化为H:MM:SS.ss"""
+    hours, remainder = divmod(int(total_seconds), 3_600)
+    minutes, seconds_int = divmod(remainder, 60)
+
+    # 计算带小数的秒数
+    fractional_seconds = total_seconds - (hours * 3_600 + minutes * 60)
+    return f"{hours}:{minutes:02d}:{fractional_seconds:05.2f}"
+
+
 def format_elapsed_time(start_time_iso: str, current_time: datetime) -> str:
     """格式化运行时长"""
     try:
         start_time_dt = datetime.fromisoformat(start_time_iso)
         elapsed = current_time - start_time_dt
-        total_seconds = elapsed.total_seconds()
+        return _format_elapsed_seconds(elapsed.total_seconds())
 
-        hours, remainder = divmod(int(total_seconds), 3_600)
-        minutes, seconds_int = divmod(remainder, 60)
+    except Exception:
+        return "0:00:00.00"
 
-        # 计算带小数的秒数
-        fractional_seconds = total_seconds - (hours * 3_600 + minutes * 60)
 
-        elapsed_str = f"{hours}:{minutes:02d}:{fractional_seconds:05.2f}"
-        return elapsed_str
+def format_elapsed_since(first_start_time: Optional[object], current_time: datetime) -> str:
+    """格式化自第一次启动以来的运行时长
 
-    except Exception:
+    Args:
+        first_start_time: datetime对象或ISO格式字符串，None时运行时长为0
+        current_time: 当前时间
+    """
+    if first_start_time is None:
         return "0:00:00.00"
 
+    # 如果first_start_time是datetime对象，直接计算时间差
+    try:
+        if isinstance(first_start_time, datetime):
+            return _format_elapsed_seconds((current_time - first_start_time).total_seconds())
+    except (TypeError, AttributeError):
+        pass
+    # 字符串格式（或类型检查失败时）按ISO格式解析
+    return format_elapsed_time(str(first_start_time), current_time)
+
 
 def format_pid(pid: int) -> str:
     """格式化进程ID"""
@@ -172,6 +200,34 @@ def format_pid(pid: int) -> str:
     return pid_str
 
 
+def format_process_field(cfg: Any) -> str:
+    """日志行开头的进程字段：进程ID，启用thread_field时附加线程名或线程ID
+
+    结果按线程缓存，配置对象或进程ID变化（重新初始化、fork）时重新生成；
+    线程名在该线程第一次输出日志之后修改不会反映到日志中。
+    """
+    pid = os.getpid()
+    cached = getattr(_thread_fields, 'value', None)
+    if cached is not None and cached[0] is cfg and cached[1] == pid:
+        return cached[2]
+
+    from .config import get_logger_option
+
+    field = format_pid(pid)
+    mode = get_logger_option(cfg, 'thread_field', "")
+    if mode in THREAD_FIELD_MODES:
+        if mode == "name":
+            tag = threading.current_thread().name
+        elif mode == "id":
+            tag = str(threading.get_native_id())
+        else:
+            tag = f"{threading.current_thread().name}/{threading.get_native_id()}"
+        # 字段位于方括号内，合并分片时按第一个右方括号定位
+        field = f"{field}:{tag.replace(']', ')')}"
+    _thread_fields.value = (cfg, pid, field)
+    return field
+
+
 def format_log_message(
         level_name: str,
         message: str,
@@ -210,31 +266,13 @@ def create_log_line(
     current_time = datetime.now()
 
     # 获取各个组件
-    pid_str = format_pid(os.getpid())
+    pid_str = format_process_field(cfg)
     caller_module, line_number = get_caller_info()
     timestamp = current_time.strftime('%Y-%m-%d %H:%M:%S')
 
     # 获取第一次启动时间并计算运行时长
-    first_start_time = getattr(cfg, 'first_start_time', None)
-    if first_start_time is not None:
-        # 如果first_start_time是datetime对象，直接计算时间差
-        try:
-            if isinstance(first_start_time, datetime):
-                elapsed = current_time - first_start_time
-                total_seconds = elapsed.total_seconds()
-                hours, remainder = divmod(int(total_seconds), 3_600)
-                minutes, seconds_int = divmod(remainder, 60)
-                fractional_seconds = total_seconds - (hours * 3_600 + minutes * 60)
-                elapsed_str = f"{hours}:{minutes:02d}:{fractional_seconds:05.2f}"
-            else:
-                # 如果是字符串格式，使用原有的format_elapsed_time函数
-                elapsed_str = format_elapsed_time(str(first_start_time), current_time)
-        except (TypeError, AttributeError):
-            # 如果类型检查失败，尝试字符串格式
-            elapsed_str = format_elapsed_time(str(first_start_time), current_time)
-    else:
-        elapsed_str = "0:00:00.00"
-    
+    elapsed_str = format_elapsed_since(getattr(cfg, 'first_start_time', None), current_time)
+
     formatted_message = format_log_message(level_name, message, module_name, args, kwargs)
 
     # 组装日志行，新格式：[PID | 模块名 : 行号]，模块名16位居中对齐，行号4位对齐，级别居中对齐10字符
@@ -243,6 +281,14 @@ def create_log_line(
     return log_line
 
 
+def create_system_log_line(level_name: str, message: str, first_start_time: Optional[object] = None) -> str:
+    """创建日志系统自身生成的日志行（如接收端的worker静默记录），格式与create_log_line相同"""
+    current_time = datetime.now()
+    elapsed_str = format_elapsed_since(first_start_time, current_time)
+    timestamp = current_time.strftime('%Y-%m-%d %H:%M:%S')
+    return f"[{format_pid(os.getpid()):>6} | {'custom_logger':^16} : {0:>4}] {timestamp} - {elapsed_str} - {level_name:^10} - {message}"
+
+
 def get_exception_info() -> Optional[str]:
     """获取异常信息"""
     try:
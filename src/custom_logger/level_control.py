@@ -0,0 +1,293 @@
+# src/custom_logger/level_control.py
+"""
+级别控制通道
+
+队列模式下worker按启动时序列化配置中的级别过滤日志。主程序调用set_log_levels修改
+全局或模块级别时，新级别快照写入LevelControl（共享内存中的JSON和版本号），
+每个worker的后台线程发现版本变化后把快照原地写入本进程的config.logger，
+之后的日志调用立即按新级别过滤，不再序列化和发送不需要的日志。
+
+快照总是完整的级别设置（全局级别和module_levels），晚启动或错过某次变更的worker
+读取最新版本即可。LevelControl与log_queue一样在创建子进程时传递（queue_info.level_control）。
+
+override_log_levels在当前线程（或asyncio任务）内临时覆盖级别，基于contextvars，
+不影响同一进程的其他线程：例如只为一个请求线程打开DEBUG，而不让所有线程的DEBUG日志
+进入共享的写入队列。
+"""
+from __future__ import annotations
+
+import json
+import multiprocessing as mp
+import sys
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from multiprocessing.context import BaseContext
+from typing import Any, Iterable, Iterator, Optional, Tuple, Union
+
+from .config import apply_level_settings, get_level_settings
+from .types import parse_level_name
+
+# 级别快照的共享内存容量（字节）
+DEFAULT_CONTROL_CAPACITY = 65536
+# worker检查版本号的默认间隔（秒）
+DEFAULT_POLL_INTERVAL = 0.5
+
+# 当前上下文的级别覆盖：(控制台级别, 文件级别, 适用的logger名称集合)，级别为None表示不覆盖，
+# 名称集合为None表示所有logger
+_level_override: ContextVar[Optional[tuple]] = ContextVar('custom_logger_level_override', default=None)
+
+
+class LevelControl:
+    """主程序到worker的级别广播通道
+
+    Args:
+        capacity: 级别快照JSON的最大字节数
+        context: multiprocessing上下文，缺省时使用默认上下文
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CONTROL_CAPACITY, context: Optional[BaseContext] = None):
+        context = context or mp.get_context()
+        self.capacity = capacity
+        # 版本号自带的锁同时保护快照内容
+        self._version = context.Value('Q', 0)
+        self._length = context.Value('I', 0, lock=False)
+        self._payload = context.Array('c', capacity, lock=False)
+        pass
+
+    @property
+    def version(self) -> int:
+        """当前快照版本，0表示尚未发布"""
+        return self._version.value
+
+    def publish(self, settings: dict) -> int:
+        """发布级别快照
+
+        Returns:
+            int: 新的版本号
+        """
+        data = json.dumps(settings, ensure_ascii=False).encode('utf-8')
+        if len(data) > self.capacity:
+            raise ValueError(f"级别设置过大: {len(data)} 字节，容量 {self.capacity} 字节")
+
+        with self._version.get_lock():
+            self._payload[:len(data)] = data
+            self._length.value = len(data)
+            self._version.value += 1
+            return self._version.value
+
+    def read(self) -> Tuple[int, dict]:
+        """读取当前版本号和级别快照"""
+        with self._version.get_lock():
+            version = self._version.value
+            data = self._payload[:self._length.value]
+        return version, json.loads(data.decode('utf-8')) if data else {}
+
+
+class LevelWatcher:
+    """worker端版本检查线程：发现新快照时原地更新配置中的级别"""
+
+    def __init__(self, control: LevelControl, cfg: Any, interval: float = DEFAULT_POLL_INTERVAL):
+        self.control = control
+        self.cfg = cfg
+        self.interval = max(0.01, interval)
+        self.applied_version = 0
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        pass
+
+    def start(self) -> None:
+        """应用已发布的快照并启动检查线程"""
+        if self._thread is not None:
+            return
+        self.check()
+        self._thread = threading.Thread(target=self._watch_loop, daemon=True)
+        self._thread.start()
+        return
+
+    def check(self) -> bool:
+        """检查一次版本号，有新快照时应用
+
+        Returns:
+            bool: 是否应用了新快照
+        """
+        if self.control.version == self.applied_version:
+            return False
+        version, settings = self.control.read()
+        apply_level_settings(self.cfg, settings)
+        self.applied_version = version
+        return True
+
+    def _watch_loop(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                try:
+                    print(f"应用级别设置失败: {e}", file=sys.stderr)
+                except (ValueError, AttributeError):
+                    pass
+        return
+
+    def stop(self) -> None:
+        """停止检查线程"""
+        self._stop_event.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout=1.0)
+        self._thread = None
+        return
+
+
+# 全局级别控制通道（主程序）和检查线程（worker）
+_level_control: Optional[LevelControl] = None
+_level_watcher: Optional[LevelWatcher] = None
+
+
+def get_level_control(queue_info: Any) -> Optional[LevelControl]:
+    """从queue_info读取级别控制通道"""
+    if queue_info is None:
+        return None
+    if isinstance(queue_info, dict):
+        control = queue_info.get('level_control')
+    else:
+        control = getattr(queue_info, 'level_control', None)
+    return control if isinstance(control, LevelControl) else None
+
+
+def init_level_control(config_object: Any) -> Optional[LevelControl]:
+    """主程序初始化级别控制通道
+
+    queue_info中已有level_control时直接使用；否则在启用queue_level_control时创建，
+    并写入queue_info，之后以该配置创建的worker进程都会收到。
+    """
+    global _level_control
+    from .config import get_logger_option
+
+    queue_info = getattr(config_object, 'queue_info', None)
+    control = get_level_control(queue_info)
+    if control is None and queue_info is not None and get_logger_option(config_object, 'queue_level_control', False):
+        control = LevelControl()
+        try:
+            if isinstance(queue_info, dict):
+                queue_info['level_control'] = control
+            else:
+                setattr(queue_info, 'level_control', control)
+        except Exception:
+            control = None
+
+    _level_control = control
+    return control
+
+
+def start_level_watcher(config_object: Any) -> Optional[LevelWatcher]:
+    """worker启动级别检查线程（queue_info中没有level_control时不启动）"""
+    global _level_watcher
+    from .config import get_logger_option
+
+    if _level_watcher is not None:
+        return _level_watcher
+
+    control = get_level_control(getattr(config_object, 'queue_info', None))
+    if control is None:
+        return None
+
+    interval = get_logger_option(config_object, 'level_poll_interval', DEFAULT_POLL_INTERVAL)
+    _level_watcher = LevelWatcher(control, config_object, interval)
+    _level_watcher.start()
+    return _level_watcher
+
+
+def shutdown_level_control() -> None:
+    """停止检查线程并释放级别控制通道"""
+    global _level_control, _level_watcher
+
+    if _level_watcher is not None:
+        _level_watcher.stop()
+        _level_watcher = None
+    _level_control = None
+    return
+
+
+def set_log_levels(
+        console_level: Optional[str] = None,
+        file_level: Optional[str] = None,
+        module_name: Optional[str] = None
+) -> None:
+    """修改日志级别，并广播给所有worker
+
+    Args:
+        console_level: 控制台级别名称，None表示不修改
+        file_level: 文件级别名称，None表示不修改
+        module_name: 模块名称；为None时修改全局级别，否则修改module_levels中该模块的级别
+    """
+    from .config import get_root_config
+
+    # 先校验级别名称，无效时抛出ValueError且不做任何修改
+    for level in (console_level, file_level):
+        if level is not None:
+            parse_level_name(level)
+
+    cfg = get_root_config()
+    settings = get_level_settings(cfg)
+    if module_name is None:
+        if console_level is not None:
+            settings['global_console_level'] = console_level
+        if file_level is not None:
+            settings['global_file_level'] = file_level
+    else:
+        module_level = settings['module_levels'].setdefault(module_name, {})
+        if console_level is not None:
+            module_level['console_level'] = console_level
+        if file_level is not None:
+            module_level['file_level'] = file_level
+
+    apply_level_settings(cfg, settings)
+    if _level_control is not None:
+        _level_control.publish(settings)
+    return
+
+
+def _to_level_value(level: Union[str, int, None]) -> Optional[int]:
+    if level is None or isinstance(level, int):
+        return level
+    return parse_level_name(level)
+
+
+@contextmanager
+def override_log_levels(
+        console_level: Union[str, int, None] = None,
+        file_level: Union[str, int, None] = None,
+        modules: Optional[Iterable[str]] = None
+) -> Iterator[None]:
+    """在当前线程（或asyncio任务）内临时覆盖日志级别
+
+    覆盖优先于get_logger参数、module_levels和全局级别，退出with块时恢复。
+    新线程不继承覆盖（需要时用contextvars.copy_context().run启动）。
+
+    Args:
+        console_level: 控制台级别，None表示不覆盖
+        file_level: 文件级别，None表示不覆盖
+        modules: 只覆盖这些logger，None表示所有logger
+    """
+    override = (
+        _to_level_value(console_level),
+        _to_level_value(file_level),
+        frozenset(modules) if modules is not None else None,
+    )
+    token = _level_override.set(override)
+    try:
+        yield
+    finally:
+        _level_override.reset(token)
+
+
+def get_level_override(name: str) -> Optional[tuple]:
+    """当前上下文对该logger的级别覆盖
+
+    Returns:
+        Optional[tuple]: (控制台级别, 文件级别)，没有覆盖时返回None
+    """
+    override = _level_override.get()
+    if override is None or (override[2] is not None and name not in override[2]):
+        return None
+    return override[0], override[1]
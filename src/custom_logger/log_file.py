@@ -0,0 +1,226 @@
+# src/custom_logger/log_file.py
+"""
+可轮转的日志文件
+
+按大小和/或时间间隔轮转：当前文件始终为{stem}{ext}（例如full.log），
+轮转时重命名为{stem}.{序号:04d}{ext}（例如full.0001.log）后重新打开。
+轮转只在写入线程内、写入前发生，不影响日志生产者。
+按大小轮转时在记录边界检查，除单条记录本身超过上限外，分段不会超过max_bytes。
+
+文件以二进制追加模式打开，文本中的换行按平台换行符（os.linesep）写入，与文本模式的输出一致。
+"""
+from __future__ import annotations
+
+import os
+import re
+import time
+from typing import Callable, List, Optional, Tuple
+
+# 写入文件时使用的换行符（Windows为\r\n）
+LINE_SEPARATOR = os.linesep
+
+
+def encode_text(text: str) -> bytes:
+    """将日志文本编码为写入文件的字节（UTF-8，换行转换为平台换行符）"""
+    if LINE_SEPARATOR != "\n":
+        text = text.replace("\n", LINE_SEPARATOR)
+    return text.encode('utf-8')
+
+
+def split_log_name(file_name: str) -> tuple[str, str]:
+    """拆分文件名为(stem, ext)，例如full.log -> (full, .log)"""
+    stem, ext = os.path.splitext(file_name)
+    return stem, ext
+
+
+def segment_path(path: str, number: int) -> str:
+    """获取轮转分段路径，例如full.log, 1 -> full.0001.log"""
+    directory, file_name = os.path.split(path)
+    stem, ext = split_log_name(file_name)
+    return os.path.join(directory, f"{stem}.{number:04d}{ext}")
+
+
+def _segment_numbers(path: str) -> List[int]:
+    """扫描目录，返回已有分段的序号（含已压缩的分段，例如full.0001.log.gz）"""
+    directory, file_name = os.path.split(path)
+    stem, ext = split_log_name(file_name)
+    pattern = re.compile(re.escape(stem) + r"\.(\d{4,})" + re.escape(ext) + r"(\.\w+)?$")
+
+    numbers = []
+    try:
+        with os.scandir(directory or '.') as entries:
+            for entry in entries:
+                match = pattern.match(entry.name)
+                if match:
+                    numbers.append(int(match.group(1)))
+    except OSError:
+        pass
+    return numbers
+
+
+def next_segment_number(path: str) -> int:
+    """扫描目录，返回下一个可用的分段序号"""
+    return max(_segment_numbers(path), default=0) + 1
+
+
+def find_segments(path: str) -> List[Tuple[int, str]]:
+    """已轮转的分段，按序号排序
+
+    Returns:
+        List[Tuple[int, str]]: (序号, 未压缩分段路径)，已压缩的分段用compression.open_segment读取
+    """
+    return [(number, segment_path(path, number)) for number in sorted(set(_segment_numbers(path)))]
+
+
+class LogFile:
+    """追加写入的日志文件，支持按大小/时间轮转
+
+    Args:
+        path: 当前文件路径
+        max_bytes: 单个文件的最大字节数，0表示不按大小轮转
+        interval: 时间轮转间隔（秒），按墙上时钟对齐，0表示不按时间轮转
+        on_rotate: 轮转完成后的回调，参数为(分段路径, 分段序号)
+    """
+
+    def __init__(
+            self,
+            path: str,
+            max_bytes: int = 0,
+            interval: float = 0.0,
+            on_rotate: Optional[Callable[[str, int], None]] = None
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self.on_rotate = on_rotate
+        self.rotations = 0
+        self._next_number: Optional[int] = None
+        self._file = None
+        self.size = 0
+        self._bucket = 0
+        self._open()
+        pass
+
+    def _interval_bucket(self, timestamp: float) -> int:
+        """时间所在的轮转区间编号"""
+        return int(timestamp // self.interval)
+
+    def _open(self) -> None:
+        """以二进制追加模式打开当前文件"""
+        self._file = open(self.path, 'ab')
+        self.size = self._file.tell()
+        if self.interval > 0:
+            # 已有内容时按最后写入时间归属区间，避免LRU重新打开后重置计时
+            timestamp = os.path.getmtime(self.path) if self.size > 0 else time.time()
+            self._bucket = self._interval_bucket(timestamp)
+        return
+
+    @property
+    def closed(self) -> bool:
+        """文件是否已关闭"""
+        return self._file is None or self._file.closed
+
+    def _should_rotate(self, incoming: int) -> bool:
+        """判断写入前是否需要轮转"""
+        if self.size == 0:
+            if self.interval > 0:
+                self._bucket = self._interval_bucket(time.time())
+            return False
+        if self.max_bytes > 0 and self.size + incoming > self.max_bytes:
+            return True
+        if self.interval > 0 and self._interval_bucket(time.time()) != self._bucket:
+            return True
+        return False
+
+    def rotate(self) -> Optional[str]:
+        """立即轮转当前文件
+
+        Returns:
+            Optional[str]: 分段路径，当前文件为空时不轮转并返回None
+        """
+        if self.size == 0:
+            return None
+
+        self._file.close()
+        if self._next_number is None:
+            self._next_number = next_segment_number(self.path)
+        number = self._next_number
+        rotated_path = segment_path(self.path, number)
+        os.replace(self.path, rotated_path)
+        self._next_number = number + 1
+        self.rotations += 1
+        self._open()
+
+        if self.on_rotate is not None:
+            self.on_rotate(rotated_path, number)
+        return rotated_path
+
+    def maybe_rotate(self, incoming: int) -> Optional[str]:
+        """写入incoming字节前按策略检查并轮转
+
+        Returns:
+            Optional[str]: 发生轮转时返回分段路径
+        """
+        if self._should_rotate(incoming):
+            return self.rotate()
+        return None
+
+    def write_bytes(self, data: bytes) -> int:
+        """写入字节数据，必要时先轮转
+
+        Returns:
+            int: 数据在当前文件（轮转后为新分段）中的偏移
+        """
+        self.maybe_rotate(len(data))
+        offset = self.size
+        self._file.write(data)
+        self.size += len(data)
+        return offset
+
+    def write(self, text: str) -> None:
+        """写入文本（UTF-8编码，平台换行符）"""
+        self.write_bytes(encode_text(text))
+        return
+
+    def write_records(self, records: List[str]) -> None:
+        """写入多条记录，尽量合并为一次写入
+
+        按大小轮转时在记录边界拆分：合并的记录会使当前分段超过max_bytes时，
+        先写出已合并的部分，下一组写入前轮转。
+        """
+        chunk: List[bytes] = []
+        chunk_size = 0
+        for record in records:
+            data = encode_text(record)
+            if chunk and self.max_bytes > 0 and self.size + chunk_size + len(data) > self.max_bytes:
+                self._write_chunk(chunk, chunk_size)
+                chunk, chunk_size = [], 0
+            if not chunk:
+                self.maybe_rotate(len(data))
+            chunk.append(data)
+            chunk_size += len(data)
+        if chunk:
+            self._write_chunk(chunk, chunk_size)
+        return
+
+    def _write_chunk(self, chunk: List[bytes], chunk_size: int) -> None:
+        """写入已合并的记录（调用方已完成轮转检查）"""
+        self._file.write(b''.join(chunk))
+        self.size += chunk_size
+        return
+
+    def tell(self) -> int:
+        """当前文件字节数"""
+        return self.size
+
+    def flush(self) -> None:
+        """刷新缓冲区"""
+        self._file.flush()
+        return
+
+    def close(self) -> None:
+        """关闭文件"""
+        if self._file is not None and not self._file.closed:
+            self._file.flush()
+            self._file.close()
+        return
@@ -0,0 +1,305 @@
+# src/custom_logger/log_index.py
+"""
+日志偏移索引模块
+
+索引模式下每条日志只写入一次full.log，同时在二进制索引文件中记录
+(字节偏移, 长度, 级别, 模块ID)。warning.log和各模块日志视图由读取器按需重建：
+
+    python -m custom_logger.log_index <session_dir> --warning
+    python -m custom_logger.log_index <session_dir> --module worker
+
+full.log轮转为full.0001.log时，索引同步轮转为full.0001.idx；读取器按序号依次读取各分段
+（含已压缩的full.NNNN.log.gz等）再读取当前文件。
+"""
+from __future__ import annotations
+
+import argparse
+import mmap
+import os
+import struct
+import sys
+from typing import Iterator, List, Optional, Tuple
+from .types import WARNING
+from .compression import open_segment
+from .log_file import find_segments, segment_path
+
+# 索引记录：偏移(u64) + 长度(u32) + 级别(u8) + 模块ID(u16)，小端无填充，共15字节
+INDEX_RECORD = struct.Struct('<QIBH')
+
+# 索引文件与模块名表文件名
+INDEX_FILE_NAME = "full.idx"
+INDEX_MODULES_FILE_NAME = "index_modules.txt"
+
+# 模块ID上限（u16）；该ID保留给超出上限的模块，模块名表中最多MAX_MODULE_ID个名称
+MAX_MODULE_ID = 0xFFFF
+
+# 超出模块数量上限的记录在视图中使用的模块名
+OTHER_MODULE = "(other)"
+
+# 没有logger名称的记录（接收端系统记录、旧格式队列记录）使用的模块名
+UNNAMED_MODULE = ""
+
+
+class LogIndexWriter:
+    """索引写入器（由FileWriter在写入线程中使用）"""
+
+    def __init__(self, session_dir: str):
+        self.session_dir = session_dir
+        self.index_file = None
+        self.modules_file = None
+        self.module_ids: dict[str, int] = {}
+        self._overflow_reported = False
+        self._open()
+        pass
+
+    def _open(self) -> None:
+        """打开索引文件并加载已有模块表"""
+        modules_path = os.path.join(self.session_dir, INDEX_MODULES_FILE_NAME)
+        if os.path.exists(modules_path):
+            with open(modules_path, 'r', encoding='utf-8') as f:
+                for module_id, name in enumerate(f.read().splitlines()):
+                    self.module_ids[name] = module_id
+
+        self.index_file = open(os.path.join(self.session_dir, INDEX_FILE_NAME), 'ab')
+        self.modules_file = open(modules_path, 'a', encoding='utf-8')
+        return
+
+    def get_module_id(self, logger_name: Optional[str]) -> int:
+        """获取模块ID，新模块追加到模块名表
+
+        没有名称的记录归入UNNAMED_MODULE；模块数量超过上限后新模块共用保留ID MAX_MODULE_ID
+        （视图中为OTHER_MODULE），不抛出异常，避免整批日志写入失败。
+        """
+        if logger_name is None:
+            logger_name = UNNAMED_MODULE
+        module_id = self.module_ids.get(logger_name)
+        if module_id is not None:
+            return module_id
+
+        module_id = len(self.module_ids)
+        if module_id >= MAX_MODULE_ID:
+            if not self._overflow_reported:
+                self._overflow_reported = True
+                try:
+                    print(f"索引模块数量超过上限 {MAX_MODULE_ID}，之后的新模块记为{OTHER_MODULE}", file=sys.stderr)
+                except (ValueError, AttributeError):
+                    pass
+            return MAX_MODULE_ID
+
+        self.modules_file.write(logger_name + '\n')
+        self.modules_file.flush()
+        self.module_ids[logger_name] = module_id
+        return module_id
+
+    def pack(self, offset: int, length: int, level_value: int, logger_name: Optional[str]) -> bytes:
+        """打包一条索引记录"""
+        module_id = self.get_module_id(logger_name)
+        return INDEX_RECORD.pack(offset, length, min(max(level_value, 0), 0xFF), module_id)
+
+    def write(self, records: bytes) -> None:
+        """写入已打包的索引记录"""
+        self.index_file.write(records)
+        self.index_file.flush()
+        return
+
+    def rotate(self, number: int) -> str:
+        """随full.log一起轮转索引文件：full.idx -> full.{序号}.idx
+
+        模块名表在整个会话内共享，不参与轮转。
+        """
+        index_path = os.path.join(self.session_dir, INDEX_FILE_NAME)
+        stem, ext = os.path.splitext(INDEX_FILE_NAME)
+        rotated_path = os.path.join(self.session_dir, f"{stem}.{number:04d}{ext}")
+
+        self.index_file.close()
+        os.replace(index_path, rotated_path)
+        self.index_file = open(index_path, 'ab')
+        return rotated_path
+
+    def close(self) -> None:
+        """关闭索引文件"""
+        for handle in (self.index_file, self.modules_file):
+            if handle:
+                try:
+                    handle.flush()
+                    handle.close()
+                except Exception:
+                    pass
+        self.index_file = None
+        self.modules_file = None
+        return
+
+
+class LogIndexReader:
+    """索引读取器：按级别和模块从full.log重建日志视图"""
+
+    def __init__(self, session_dir: str, log_file_name: str = "full.log", index_file_name: str = INDEX_FILE_NAME):
+        self.session_dir = session_dir
+        self.log_path = os.path.join(session_dir, log_file_name)
+        self.index_path = os.path.join(session_dir, index_file_name)
+        self.modules: List[str] = []
+
+        modules_path = os.path.join(session_dir, INDEX_MODULES_FILE_NAME)
+        if os.path.exists(modules_path):
+            with open(modules_path, 'r', encoding='utf-8') as f:
+                self.modules = f.read().splitlines()
+        pass
+
+    def _module_id(self, module: str) -> Optional[int]:
+        """模块名对应的ID，未知模块返回None"""
+        if module == OTHER_MODULE:
+            return MAX_MODULE_ID
+        if module in self.modules:
+            return self.modules.index(module)
+        return None
+
+    def _module_name(self, module_id: int) -> str:
+        if module_id == MAX_MODULE_ID:
+            return OTHER_MODULE
+        return self.modules[module_id] if module_id < len(self.modules) else f"module_{module_id}"
+
+    def segments(self) -> List[Tuple[str, str]]:
+        """(日志文件, 索引文件)对：已轮转的分段按序号排列，最后是当前文件"""
+        pairs = [
+            (log_path, segment_path(self.index_path, number))
+            for number, log_path in find_segments(self.log_path)
+        ]
+        pairs.append((self.log_path, self.index_path))
+        return pairs
+
+    def iter_records(
+            self,
+            min_level: Optional[int] = None,
+            module: Optional[str] = None,
+            index_path: Optional[str] = None
+    ) -> Iterator[Tuple[int, int, int, str]]:
+        """遍历单个索引文件的记录（偏移相对于对应的日志文件）
+
+        Args:
+            min_level: 最低级别（可选）
+            module: 模块名（可选）
+            index_path: 索引文件，默认为当前的full.idx
+
+        Yields:
+            Tuple[int, int, int, str]: (偏移, 长度, 级别, 模块名)
+        """
+        index_path = index_path or self.index_path
+        if not os.path.exists(index_path):
+            return
+
+        module_id = None
+        if module is not None:
+            module_id = self._module_id(module)
+            if module_id is None:
+                return
+
+        with open(index_path, 'rb') as f:
+            data = f.read()
+
+        # 忽略写入中断导致的不完整尾部记录
+        usable = len(data) - len(data) % INDEX_RECORD.size
+        for offset, length, level_value, record_module_id in INDEX_RECORD.iter_unpack(data[:usable]):
+            if min_level is not None and level_value < min_level:
+                continue
+            if module_id is not None and record_module_id != module_id:
+                continue
+            yield offset, length, level_value, self._module_name(record_module_id)
+
+    def iter_chunks(self, min_level: Optional[int] = None, module: Optional[str] = None) -> Iterator[bytes]:
+        """按分段顺序遍历匹配记录的原始字节
+
+        已被后台压缩的分段会整体解压到内存后读取。
+        """
+        for log_path, index_path in self.segments():
+            yield from self._iter_segment_chunks(log_path, index_path, min_level, module)
+
+    def _iter_segment_chunks(
+            self,
+            log_path: str,
+            index_path: str,
+            min_level: Optional[int],
+            module: Optional[str]
+    ) -> Iterator[bytes]:
+        """遍历单个分段中匹配记录的原始字节"""
+        if not os.path.exists(log_path):
+            try:
+                with open_segment(log_path) as f:
+                    data = f.read()
+            except FileNotFoundError:
+                return
+            for offset, length, _, _ in self.iter_records(min_level, module, index_path):
+                yield data[offset:offset + length]
+            return
+
+        if os.path.getsize(log_path) == 0:
+            return
+
+        with open(log_path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                for offset, length, _, _ in self.iter_records(min_level, module, index_path):
+                    yield mapped[offset:offset + length]
+
+    def write_view(self, output_path: str, min_level: Optional[int] = None, module: Optional[str] = None) -> int:
+        """将匹配的记录写入输出文件
+
+        Returns:
+            int: 写入的记录数
+        """
+        count = 0
+        with open(output_path, 'wb') as out:
+            for chunk in self.iter_chunks(min_level, module):
+                out.write(chunk)
+                count += 1
+        return count
+
+    def rebuild_warning_log(self, output_path: Optional[str] = None) -> int:
+        """重建warning.log（WARNING及以上级别）"""
+        if output_path is None:
+            output_path = os.path.join(self.session_dir, "warning.log")
+        return self.write_view(output_path, min_level=WARNING)
+
+    def rebuild_module_logs(self, module: str, output_dir: Optional[str] = None) -> Tuple[int, int]:
+        """重建指定模块的{name}_full.log和{name}_warning.log
+
+        Returns:
+            Tuple[int, int]: (full记录数, warning记录数)
+        """
+        output_dir = output_dir or self.session_dir
+        full_count = self.write_view(os.path.join(output_dir, f"{module}_full.log"), module=module)
+        warning_count = self.write_view(
+            os.path.join(output_dir, f"{module}_warning.log"), min_level=WARNING, module=module
+        )
+        return full_count, warning_count
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="根据full.idx重建warning.log或模块日志视图")
+    parser.add_argument("session_dir", help="会话日志目录")
+    parser.add_argument("--warning", action="store_true", help="重建warning.log")
+    parser.add_argument("--module", action="append", default=[], help="重建指定模块的日志，可重复")
+    parser.add_argument("--all-modules", action="store_true", help="重建所有模块的日志")
+    parser.add_argument("--output-dir", default=None, help="输出目录，默认为会话目录")
+    args = parser.parse_args(argv)
+
+    reader = LogIndexReader(args.session_dir)
+    output_dir = args.output_dir or args.session_dir
+    os.makedirs(output_dir, exist_ok=True)
+
+    if args.warning:
+        count = reader.rebuild_warning_log(os.path.join(output_dir, "warning.log"))
+        print(f"warning.log: {count} 条")
+
+    modules = [m for m in reader.modules if m != UNNAMED_MODULE] if args.all_modules else args.module
+    for module in modules:
+        full_count, warning_count = reader.rebuild_module_logs(module, output_dir)
+        print(f"{module}: full {full_count} 条, warning {warning_count} 条")
+
+    if not args.warning and not modules:
+        parser.print_help(sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
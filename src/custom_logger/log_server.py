@@ -0,0 +1,192 @@
+# src/custom_logger/log_server.py
+"""
+独立日志服务进程
+
+队列模式下接收器默认是主程序内的线程，与主程序的编排代码竞争GIL，主程序长时间
+持有GIL时日志出队停滞，worker队列可能被填满。启用logger.queue_server_process后，
+init_custom_logger_system启动一个独立进程运行QueueLogReceiver并持有所有日志文件，
+主程序本身和worker一样只作为发送端。
+
+关闭握手（tear_down_custom_logger_system）：
+1. 主程序关闭自身发送端，发送剩余日志
+2. 向每个队列放入停止信号，服务进程写完停止信号之前的日志后关闭文件并置位完成事件
+3. 主程序等待完成事件后join进程，超时则终止进程
+"""
+from __future__ import annotations
+
+import multiprocessing as mp
+import signal
+import sys
+from multiprocessing.context import BaseContext
+from types import SimpleNamespace
+from typing import Any, Optional
+
+from .queue_writer import STOP_SIGNAL, QueueLogReceiver, get_receiver_logger_options, get_receiver_options
+
+# 等待服务进程启动和完成关闭的默认超时（秒）
+DEFAULT_START_TIMEOUT = 30.0
+DEFAULT_STOP_TIMEOUT = 30.0
+
+
+def _log_server_main(
+        log_queue: Any, session_dir: str, logger_options: dict, first_start_time: Any, ready_event, done_event
+) -> None:
+    """日志服务进程入口"""
+    # Ctrl+C由主程序处理，服务进程等待关闭握手以免丢失日志
+    try:
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+    except (ValueError, OSError):
+        pass
+
+    try:
+        cfg = SimpleNamespace(logger=logger_options, first_start_time=first_start_time)
+        receiver = QueueLogReceiver(log_queue, session_dir, **get_receiver_options(cfg, session_dir))
+        ready_event.set()
+        receiver.run()
+    except Exception as e:
+        try:
+            print(f"日志服务进程异常: {e}", file=sys.stderr)
+        except (ValueError, AttributeError):
+            pass
+    finally:
+        done_event.set()
+    return
+
+
+class LogServerProcess:
+    """独立日志服务进程
+
+    Args:
+        log_queue: 日志队列或队列列表
+        session_dir: 会话日志目录
+        logger_options: 接收器用到的logger配置项（get_receiver_logger_options的结果）
+        context: multiprocessing上下文，缺省时使用默认上下文
+        first_start_time: 主程序启动时间，用于接收端生成的系统记录
+    """
+
+    def __init__(
+            self,
+            log_queue: Any,
+            session_dir: str,
+            logger_options: Optional[dict] = None,
+            context: Optional[BaseContext] = None,
+            first_start_time: Any = None
+    ):
+        self.log_queue = log_queue
+        self.session_dir = session_dir
+        self.logger_options = logger_options or {}
+        self.first_start_time = first_start_time
+        self._context = context or mp.get_context()
+        self._ready_event = self._context.Event()
+        self._done_event = self._context.Event()
+        self.process: Optional[mp.process.BaseProcess] = None
+        pass
+
+    @property
+    def log_queues(self) -> list:
+        """所有输入队列"""
+        return list(self.log_queue) if isinstance(self.log_queue, (list, tuple)) else [self.log_queue]
+
+    def start(self, timeout: float = DEFAULT_START_TIMEOUT) -> None:
+        """启动服务进程并等待接收器就绪"""
+        if self.process is not None:
+            return
+
+        # 压缩使用进程池，服务进程不能是daemon进程；退出时由关闭握手结束
+        self.process = self._context.Process(
+            target=_log_server_main,
+            args=(
+                self.log_queue, self.session_dir, self.logger_options, self.first_start_time,
+                self._ready_event, self._done_event
+            ),
+            name="custom_logger_server",
+        )
+        self.process.start()
+
+        if not self._ready_event.wait(timeout):
+            self.terminate()
+            raise RuntimeError(f"日志服务进程未能在{timeout}秒内启动")
+        if self._done_event.is_set():
+            self.process.join(timeout=5.0)
+            self.process = None
+            raise RuntimeError("日志服务进程启动后立即退出")
+        return
+
+    def is_alive(self) -> bool:
+        """服务进程是否在运行"""
+        return self.process is not None and self.process.is_alive()
+
+    def stop(self, timeout: float = DEFAULT_STOP_TIMEOUT) -> bool:
+        """关闭握手：发送停止信号，等待服务进程写完并关闭文件
+
+        Returns:
+            bool: 服务进程是否在超时前完成关闭
+        """
+        if self.process is None:
+            return True
+
+        for source in self.log_queues:
+            try:
+                source.put(STOP_SIGNAL, timeout=5.0)
+            except Exception:
+                pass
+
+        completed = self._done_event.wait(timeout)
+        self.process.join(timeout=5.0)
+        if self.process.is_alive():
+            completed = False
+            self.terminate()
+        else:
+            self.process = None
+
+        if not completed:
+            try:
+                print("日志服务进程未能在超时内完成关闭，部分日志可能丢失", file=sys.stderr)
+            except (ValueError, AttributeError):
+                pass
+        return completed
+
+    def terminate(self) -> None:
+        """强制终止服务进程"""
+        if self.process is None:
+            return
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout=5.0)
+        self.process = None
+        return
+
+
+# 全局日志服务进程（用于主程序）
+_log_server: Optional[LogServerProcess] = None
+
+
+def start_log_server(cfg: Any, log_queue: Any, session_dir: str) -> LogServerProcess:
+    """按配置启动日志服务进程"""
+    global _log_server
+
+    if _log_server is not None:
+        return _log_server
+
+    server = LogServerProcess(
+        log_queue, session_dir, get_receiver_logger_options(cfg), first_start_time=getattr(cfg, 'first_start_time', None)
+    )
+    server.start()
+    _log_server = server
+    return server
+
+
+def stop_log_server(timeout: float = DEFAULT_STOP_TIMEOUT) -> bool:
+    """关闭日志服务进程"""
+    global _log_server
+
+    if _log_server is None:
+        return True
+    server = _log_server
+    _log_server = None
+    return server.stop(timeout)
+
+
+def is_log_server_running() -> bool:
+    """日志服务进程是否在运行"""
+    return _log_server is not None and _log_server.is_alive()
@@ -11,6 +11,9 @@ from .types import (
 from .config import get_console_level, get_file_level
 from .formatter import create_log_line, get_exception_info
 from .writer import write_log_async
+from .level_control import get_level_override
+from .console import check_console_budget, get_console_writer
+from .progress import ProgressBar, get_progress_renderer
 
 start_time = datetime.now()
 
@@ -175,9 +178,18 @@ class Colors:
     PYCHARM_BRIGHT_RED = '\033[1;31m'  # 粗体红色，不用背景色
 
 
-# 检测终端类型和颜色支持
+# 检测终端类型（只读取环境变量）
 _TERMINAL_TYPE = _detect_terminal_type()
-_COLOR_SUPPORT = _enable_windows_ansi_support() if _TERMINAL_TYPE == 'cmd' else True
+
+# Windows CMD的ANSI支持检测会修改注册表和控制台模式，推迟到第一次向控制台输出颜色时；
+# None表示尚未检测
+_WINDOWS_ANSI_SUPPORT: Optional[bool] = None
+
+# 平台是否支持ANSI颜色（CMD在检测前为False）；是否实际输出颜色另按流判断，见_level_styles
+_COLOR_SUPPORT = _TERMINAL_TYPE != 'cmd'
+
+# 不是TTY时也支持ANSI颜色的IDE控制台
+_IDE_COLOR_TERMINALS = ('pycharm', 'vscode')
 
 # 存储ANSI设置提示信息
 _ANSI_SETUP_MESSAGE = None
@@ -205,6 +217,66 @@ def _get_level_colors():
 # 级别对应的颜色
 LEVEL_COLORS = _get_level_colors()
 
+# 每个输出流的级别样式表，第一次向该流输出时生成：{id(流): (流, {级别: (前缀, 后缀)})}
+_STREAM_STYLES: dict = {}
+
+
+def _get_windows_ansi_support() -> bool:
+    """启用并缓存Windows CMD的ANSI支持（只检测一次）"""
+    global _WINDOWS_ANSI_SUPPORT, _COLOR_SUPPORT
+
+    if _WINDOWS_ANSI_SUPPORT is None:
+        _WINDOWS_ANSI_SUPPORT = _enable_windows_ansi_support()
+        _COLOR_SUPPORT = _WINDOWS_ANSI_SUPPORT
+    return _WINDOWS_ANSI_SUPPORT
+
+
+def _color_enabled(stream: Any) -> bool:
+    """判断是否向该流输出ANSI颜色
+
+    NO_COLOR（非空）禁用颜色；FORCE_COLOR为0/false时禁用，为其他非空值时强制启用；
+    否则TERM=dumb时禁用，PyCharm/VS Code控制台之外要求流是TTY（重定向到文件或管道时不输出颜色）。
+    """
+    if os.environ.get('NO_COLOR'):
+        return False
+
+    force = os.environ.get('FORCE_COLOR', '').strip().lower()
+    if force in ('0', 'false'):
+        return False
+    if not force:
+        if os.environ.get('TERM') == 'dumb':
+            return False
+        if _TERMINAL_TYPE not in _IDE_COLOR_TERMINALS:
+            try:
+                if not stream.isatty():
+                    return False
+            except (AttributeError, ValueError, OSError):
+                return False
+
+    if _TERMINAL_TYPE == 'cmd':
+        return _get_windows_ansi_support()
+    return True
+
+
+def _level_styles(stream: Any) -> dict:
+    """该流的级别样式表{级别: (颜色前缀, 重置后缀)}，不输出颜色时为空字典
+
+    第一次向某个流输出时检测并缓存，之后每行只做一次字典查找。
+    """
+    cached = _STREAM_STYLES.get(id(stream))
+    if cached is not None and cached[0] is stream:
+        return cached[1]
+
+    if _color_enabled(stream):
+        styles = {level: (color, Colors.RESET) for level, color in LEVEL_COLORS.items()}
+    else:
+        styles = {}
+    # 流对象被替换（重定向、测试捕获）时旧条目失效，数量很少，超出时整体清空
+    if len(_STREAM_STYLES) >= 16:
+        _STREAM_STYLES.clear()
+    _STREAM_STYLES[id(stream)] = (stream, styles)
+    return styles
+
 
 class CustomLogger:
     """自定义日志器"""
@@ -230,7 +302,12 @@ class CustomLogger:
     @property
     def console_level(self) -> int:
         """获取控制台日志级别"""
-        # 优先使用构造函数传入的级别（通过get_logger参数设置）
+        # 当前线程的级别覆盖（override_log_levels）优先
+        override = get_level_override(self.name)
+        if override is not None and override[0] is not None:
+            return override[0]
+
+        # 其次使用构造函数传入的级别（通过get_logger参数设置）
         if self._console_level is not None:
             return self._console_level
         
@@ -241,7 +318,12 @@ class CustomLogger:
     @property
     def file_level(self) -> int:
         """获取文件日志级别"""
-        # 优先使用构造函数传入的级别（通过get_logger参数设置）
+        # 当前线程的级别覆盖（override_log_levels）优先
+        override = get_level_override(self.name)
+        if override is not None and override[1] is not None:
+            return override[1]
+
+        # 其次使用构造函数传入的级别（通过get_logger参数设置）
         if self._file_level is not None:
             return self._file_level
         
@@ -268,14 +350,21 @@ class CustomLogger:
             else:
                 output_stream = sys.stdout
 
-            # 只有在颜色支持确实可用时才添加颜色
-            if _COLOR_SUPPORT and level_value in LEVEL_COLORS:
-                colored_line = f"{LEVEL_COLORS[level_value]}{log_line}{Colors.RESET}"
-            else:
-                # 如果不支持颜色或该级别没有颜色配置，直接输出原始日志
-                colored_line = log_line
+            # 只有该流输出颜色且该级别有颜色配置时才添加颜色
+            style = _level_styles(output_stream).get(level_value)
+            colored_line = log_line if style is None else style[0] + log_line + style[1]
 
-            if countdown:
+            if not countdown:
+                # 显示进度条时日志行写在进度条块上方
+                renderer = get_progress_renderer()
+                if renderer.active and renderer.write_above(output_stream, f"{colored_line}\n"):
+                    return
+
+            console_writer = get_console_writer()
+            if console_writer is not None:
+                # 控制台写入线程负责按批写出和flush
+                console_writer.write(output_stream, f"\r{colored_line}" if countdown else f"{colored_line}\n")
+            elif countdown:
                 # 倒计时模式：使用\r在原位更新，不换行
                 output_stream.write(f"\r{colored_line}")
                 output_stream.flush()
@@ -325,6 +414,14 @@ class CustomLogger:
         except ValueError:
             level_name = f"LEVEL_{level_value}"
 
+        # 控制台限流：超出每秒行数的日志只写文件，到期的省略汇总输出到控制台
+        if should_console and not countdown:
+            should_console, summaries = check_console_budget(self.name, level_name)
+            for summary in summaries:
+                self._print_to_console(summary, WARNING)
+            if not should_console and not should_file:
+                return
+
         # 创建日志行
         log_line = create_log_line(level_name, message, self.name, args, kwargs)
 
@@ -339,11 +436,13 @@ class CustomLogger:
             if exception_info:
                 try:
                     # 异常信息也添加颜色（如果该级别有颜色）
-                    if _COLOR_SUPPORT and level_value in LEVEL_COLORS:
-                        colored_exception = f"{LEVEL_COLORS[level_value]}{exception_info}{Colors.RESET}"
-                        print(colored_exception, file=sys.stderr)
+                    style = _level_styles(sys.stderr).get(level_value)
+                    colored_exception = exception_info if style is None else style[0] + exception_info + style[1]
+                    console_writer = get_console_writer()
+                    if console_writer is not None:
+                        console_writer.write(sys.stderr, f"{colored_exception}\n")
                     else:
-                        print(exception_info, file=sys.stderr)
+                        print(colored_exception, file=sys.stderr)
                 except Exception:
                     pass
 
@@ -357,7 +456,7 @@ class CustomLogger:
                     if is_queue_mode():
                         # 队列模式：发送到队列
                         from .queue_writer import send_log_to_queue
-                        send_log_to_queue(log_line, level_value, exception_info)
+                        send_log_to_queue(log_line, level_value, exception_info, self.name)
                     else:
                         # 普通模式：使用异步写入器
                         write_log_async(log_line, level_value, self.name, exception_info)
@@ -416,7 +515,12 @@ class CustomLogger:
 
     # 倒计时专用方法
     def countdown_info(self, message: str, *args: Any, **kwargs: Any) -> None:
-        """倒计时信息级别日志（使用\\r在原位更新，不换行）"""
+        """倒计时信息级别日志（使用\\r在原位更新，不换行）
+
+        按console_refresh_rate限制刷新频率，刷新间隔内的调用不输出，只保留最新一帧
+        """
+        if not get_progress_renderer().countdown_due(self.name, (message, args, kwargs)):
+            return
         self._log(INFO, message, *args, countdown=True, **kwargs)
         return
 
@@ -426,8 +530,19 @@ class CustomLogger:
         Args:
             final_message: 可选的完成信息，如果提供则会在结束倒计时后立即输出
         """
+        pending = get_progress_renderer().end_countdown(self.name)
+        if pending is not None and not final_message:
+            # 限频丢弃的最后一帧在结束前输出，倒计时行停在最终状态
+            message, args, kwargs = pending
+            self._log(INFO, message, *args, countdown=True, **kwargs)
         try:
-            if final_message:
+            console_writer = get_console_writer()
+            if console_writer is not None:
+                # 经控制台写入线程输出，与之前的倒计时文本保持顺序
+                console_writer.write(sys.stdout, f"\r{' ' * 100}\r" if final_message else "\n")
+                if final_message:
+                    self.info(final_message)
+            elif final_message:
                 # 清除当前行并输出完成信息
                 print(f"\r{' ' * 100}\r", end='')  # 清除当前行
                 self.info(final_message)
@@ -436,4 +551,17 @@ class CustomLogger:
                 sys.stdout.flush()  # 确保立即输出
         except Exception:
             pass
-        return
\ No newline at end of file
+        return
+
+    def progress(self, total: Optional[float] = None, description: str = "", unit: str = "it") -> ProgressBar:
+        """创建进度条
+
+        Args:
+            total: 总数，None表示未知
+            description: 描述，缺省时使用logger名称
+            unit: 速率单位
+
+        Returns:
+            ProgressBar: 进度条句柄，update(n)累加进度，close()结束（也可用作上下文管理器）
+        """
+        return ProgressBar(self, total, description, unit)
\ No newline at end of file
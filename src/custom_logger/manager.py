@@ -2,15 +2,42 @@
 from __future__ import annotations
 
 import atexit
+import os
+import signal
+import threading
+from multiprocessing import util as mp_util
 from typing import Optional, Any
-from .config import init_config_from_object, get_config
+from .config import init_config_from_object, get_config, get_root_config
 from .writer import init_writer, shutdown_writer
-from .queue_writer import init_queue_sender, init_queue_receiver, shutdown_queue_writer
+from .queue_writer import (
+    has_pending_queue_logs, init_queue_sender, init_queue_receiver, shutdown_queue_receiver, shutdown_queue_sender
+)
 from .logger import CustomLogger
+from .retention import clear_session_active, mark_session_active, start_retention
+from .socket_transport import SocketLogClient, get_socket_address, start_socket_server, stop_socket_server
+from .log_server import start_log_server, stop_log_server
+from .level_control import init_level_control, start_level_watcher, shutdown_level_control
+from .shards import merge_shards, shard_file_name
+from .snapshot import build_config_snapshot, config_from_snapshot
+from .console import init_console_budget, init_console_writer, shutdown_console_budget, shutdown_console_writer
+from .progress import init_progress, shutdown_progress
 
 # 全局状态
 _initialized = False
 _queue_mode = False  # 标记是否为队列模式
+_shard_merge_dir: Optional[str] = None  # worker分片模式下主程序关闭时合并分片的会话目录
+_exit_finalizer_installed = False
+_previous_signal_handlers: dict = {}  # 安装退出信号处理前的处理方式，关闭日志系统时恢复
+
+# worker退出时关闭日志系统的终结器优先级：低于发送端刷新（100），高于队列自身的关闭（10）
+TEARDOWN_EXIT_PRIORITY = 50
+
+# 收到终止信号时等待剩余日志写出的时间（秒）：进程管理器通常在宽限期后发送SIGKILL，
+# 终止信号的处理不能明显推迟退出
+SIGNAL_FLUSH_TIMEOUT = 0.5
+
+# 按原信号结束前先写出剩余日志的信号（仅在仍为默认处理方式时安装）
+EXIT_SIGNALS = ("SIGTERM", "SIGHUP")
 
 
 def init_custom_logger_system(config_object: Any) -> None:
@@ -24,7 +51,7 @@ def init_custom_logger_system(config_object: Any) -> None:
     Raises:
         ValueError: 如果config_object为None或缺少必要属性
     """
-    global _initialized, _queue_mode
+    global _initialized, _queue_mode, _shard_merge_dir
 
     if _initialized:
         return
@@ -76,7 +103,8 @@ def init_custom_logger_system(config_object: Any) -> None:
 
                 if log_queue is not None:
                     # 启用队列模式：主程序作为日志接收器
-                    init_queue_receiver(log_queue, log_dir)
+                    _init_main_queue_receiver(config_object, log_queue, log_dir)
+                    _start_socket_sink(config_object, log_queue)
                     _queue_mode = True
                     print("主程序启用队列模式（配置启用），日志接收器已初始化")
                 else:
@@ -95,23 +123,43 @@ def init_custom_logger_system(config_object: Any) -> None:
 
                 if log_queue is not None:
                     # 启用队列模式：主程序作为日志接收器（向后兼容）
-                    init_queue_receiver(log_queue, log_dir)
+                    _init_main_queue_receiver(config_object, log_queue, log_dir)
+                    _start_socket_sink(config_object, log_queue)
                     _queue_mode = True
                     print("主程序启用队列模式（自动检测），日志接收器已初始化")
                 else:
                     # 普通模式：使用异步写入器
-                    init_writer()
-                    _queue_mode = False
+                    _queue_mode = _init_main_file_output(config_object, log_dir)
             else:
                 # 普通模式：使用异步写入器
-                init_writer()
-                _queue_mode = False
+                _queue_mode = _init_main_file_output(config_object, log_dir)
+
+        # 级别控制通道：set_log_levels的修改广播给worker
+        init_level_control(config_object)
+
+        # 控制台写入线程（console_thread）、控制台限流和倒计时/进度条刷新频率
+        init_console_writer(config_object)
+        init_console_budget(config_object)
+        init_progress(config_object)
+
+        # worker分片模式：关闭时把worker的full.w{id}.log合并到full.log和warning.log
+        from .config import get_logger_option
+        if get_logger_option(config_object, 'worker_shards', False):
+            _shard_merge_dir = log_dir
 
         # 注册退出时清理
         atexit.register(tear_down_custom_logger_system)
 
         _initialized = True
 
+        # 后台执行会话保留清理（当前会话和其他仍在运行的会话不会被删除）
+        try:
+            mark_session_active(log_dir)
+            start_retention(config_object, log_dir)
+        except Exception as e:
+            import sys
+            print(f"启动日志保留清理失败: {e}", file=sys.stderr)
+
     except Exception as e:
         # 避免在测试环境中输出到可能已关闭的stderr
         try:
@@ -186,8 +234,11 @@ def init_custom_logger_system_for_worker(
             else:
                 enable_queue_mode = getattr(logger_config, 'enable_queue_mode', False)
 
+        # 分片模式优先：worker直接写入自己的分片文件，不经过队列
+        if _init_worker_shard(serializable_config_object, log_dir, worker_id):
+            _queue_mode = False
         # 如果配置中明确指定了enable_queue_mode，则使用该配置
-        if enable_queue_mode:
+        elif enable_queue_mode:
             # 检查队列信息
             queue_info = getattr(serializable_config_object, 'queue_info', None)
             if queue_info is not None:
@@ -202,8 +253,12 @@ def init_custom_logger_system_for_worker(
                     init_queue_sender(log_queue, worker_id)
                     _queue_mode = True
                     print(f"Worker {worker_id}: 启用队列模式（配置启用），日志发送器已初始化")
+                elif _init_worker_socket_sender(serializable_config_object, worker_id):
+                    _queue_mode = True
                 else:
                     raise ValueError("配置启用队列模式但未提供queue_info.log_queue")
+            elif _init_worker_socket_sender(serializable_config_object, worker_id):
+                _queue_mode = True
             else:
                 raise ValueError("配置启用队列模式但未提供queue_info")
         else:
@@ -221,19 +276,32 @@ def init_custom_logger_system_for_worker(
                     init_queue_sender(log_queue, worker_id)
                     _queue_mode = True
                     print(f"Worker {worker_id}: 启用队列模式（自动检测），日志发送器已初始化")
+                elif _init_worker_socket_sender(serializable_config_object, worker_id):
+                    _queue_mode = True
                 else:
                     # 如果没有队列，使用普通异步写入器
                     init_writer()
                     _queue_mode = False
                     print(f"Worker {worker_id}:  logger没有队列，使用普通写入模式")
+            elif _init_worker_socket_sender(serializable_config_object, worker_id):
+                _queue_mode = True
             else:
                 # 如果没有队列信息，使用普通异步写入器
                 init_writer()
                 _queue_mode = False
                 print(f"Worker {worker_id}: logger没有队列，使用普通写入模式")
 
+        # 主程序提供级别控制通道时，后台线程接收级别变更
+        start_level_watcher(serializable_config_object)
+
+        # 控制台写入线程（console_thread）、控制台限流和倒计时/进度条刷新频率
+        init_console_writer(serializable_config_object)
+        init_console_budget(serializable_config_object)
+        init_progress(serializable_config_object)
+
         # 注册退出时清理
         atexit.register(tear_down_custom_logger_system)
+        _install_worker_exit_handlers()
 
         _initialized = True
 
@@ -250,6 +318,160 @@ def init_custom_logger_system_for_worker(
     return
 
 
+def _install_worker_exit_handlers() -> None:
+    """worker进程退出时尽量写出剩余日志
+
+    multiprocessing子进程退出时不执行atexit，注册终结器关闭日志系统；在主线程中为仍是默认
+    处理方式的终止信号安装处理函数。SIGKILL和段错误等无法处理，由接收端的静默记录覆盖。
+    """
+    global _exit_finalizer_installed
+
+    if not _exit_finalizer_installed:
+        _exit_finalizer_installed = True
+        mp_util.Finalize(None, tear_down_custom_logger_system, exitpriority=TEARDOWN_EXIT_PRIORITY)
+
+    if threading.current_thread() is not threading.main_thread():
+        return
+    for name in EXIT_SIGNALS:
+        signum = getattr(signal, name, None)
+        if signum is None:
+            continue
+        try:
+            if signal.getsignal(signum) is signal.SIG_DFL:
+                signal.signal(signum, _flush_on_signal)
+                _previous_signal_handlers[signum] = signal.SIG_DFL
+        except (ValueError, OSError):
+            pass
+    return
+
+
+def _restore_signal_handlers() -> None:
+    """恢复安装退出信号处理前的处理方式（只能在主线程中调用）"""
+    for signum, handler in list(_previous_signal_handlers.items()):
+        try:
+            if signal.getsignal(signum) is _flush_on_signal:
+                signal.signal(signum, handler)
+        except (ValueError, OSError):
+            pass
+    _previous_signal_handlers.clear()
+    return
+
+
+def _flush_before_exit() -> None:
+    """写出批量缓存和溢出日志，并等待队列后台线程写入管道"""
+    shutdown_queue_sender(wait_queue=True)
+    tear_down_custom_logger_system()
+    return
+
+
+def _flush_on_signal(signum, frame) -> None:
+    """终止信号处理：写出剩余日志后按原信号结束进程，退出码不变
+
+    队列模式下发送端没有未写入管道的日志时直接结束，不等待关闭。
+    """
+    _restore_signal_handlers()
+    if _queue_mode and not has_pending_queue_logs():
+        os.kill(os.getpid(), signum)
+        return
+    # 信号可能在主线程持有日志锁时到达，在单独线程中关闭并限时等待，避免死锁
+    flusher = threading.Thread(target=_flush_before_exit, name="custom_logger_signal_flush", daemon=True)
+    flusher.start()
+    flusher.join(SIGNAL_FLUSH_TIMEOUT)
+    os.kill(os.getpid(), signum)
+    return
+
+
+def _init_main_queue_receiver(config_object: Any, log_queue: Any, log_dir: str) -> None:
+    """初始化主程序队列模式的接收端
+
+    启用queue_server_process时，接收器和所有日志文件由独立的日志服务进程持有，
+    主程序自身和worker一样经队列发送日志。
+    """
+    from .config import get_logger_option
+
+    if not get_logger_option(config_object, 'queue_server_process', False):
+        init_queue_receiver(log_queue, log_dir)
+        return
+
+    server = start_log_server(config_object, log_queue, log_dir)
+    init_queue_sender(log_queue, "main")
+    print(f"主程序启用独立日志服务进程，PID: {server.process.pid}")
+    return
+
+
+def _init_main_file_output(config_object: Any, log_dir: str) -> bool:
+    """初始化主程序普通模式的文件输出
+
+    启用socket汇聚时，主程序自身和worker的日志都经汇聚服务端由队列接收器写入。
+
+    Returns:
+        bool: 是否为队列模式
+    """
+    from .config import get_logger_option
+
+    if not get_logger_option(config_object, 'socket_aggregator', False):
+        init_writer()
+        return False
+
+    server = start_socket_server(config_object)
+    init_queue_receiver(server, log_dir)
+    init_queue_sender(server, "main")
+    print(f"主程序启用socket汇聚，监听地址: {server.address}")
+    return True
+
+
+def _start_socket_sink(config_object: Any, log_queue: Any) -> None:
+    """已有队列接收器时，socket汇聚收到的日志转入同一队列"""
+    from .config import get_logger_option
+
+    if get_logger_option(config_object, 'socket_aggregator', False):
+        if isinstance(log_queue, (list, tuple)):
+            log_queue = log_queue[0]
+        server = start_socket_server(config_object, sink=log_queue)
+        print(f"主程序启用socket汇聚，监听地址: {server.address}")
+    return
+
+
+def _request_shard_merge(log_dir: str) -> None:
+    """主程序关闭日志系统时合并worker分片（进程池自动选用分片模式时调用）"""
+    global _shard_merge_dir
+
+    _shard_merge_dir = log_dir
+    return
+
+
+def _init_worker_shard(serializable_config_object: Any, log_dir: str, worker_id: Optional[str]) -> bool:
+    """启用worker_shards时，worker用批量写入器直接写入full.w{id}.log
+
+    Returns:
+        bool: 是否已初始化分片写入
+    """
+    from .config import get_logger_option
+
+    if not get_logger_option(serializable_config_object, 'worker_shards', False):
+        return False
+
+    shard_id = worker_id or str(os.getpid())
+    init_writer(shard_id=shard_id)
+    print(f"Worker {worker_id}: 启用分片模式，直接写入 {os.path.join(log_dir, shard_file_name(shard_id))}")
+    return True
+
+
+def _init_worker_socket_sender(serializable_config_object: Any, worker_id: Optional[str]) -> bool:
+    """没有队列对象时，按配置或环境变量中的地址连接socket汇聚
+
+    Returns:
+        bool: 是否已初始化socket发送器
+    """
+    address = get_socket_address(serializable_config_object)
+    if not address:
+        return False
+
+    init_queue_sender(SocketLogClient(address), worker_id)
+    print(f"Worker {worker_id}: 连接socket汇聚 {address}，日志发送器已初始化")
+    return True
+
+
 def get_logger(
         name: str,
         console_level: Optional[str] = None,
@@ -303,19 +525,40 @@ def get_logger(
 
 def tear_down_custom_logger_system() -> None:
     """清理自定义日志系统"""
-    global _initialized, _queue_mode
+    global _initialized, _queue_mode, _shard_merge_dir
 
     if not _initialized:
         return
 
     try:
+        if threading.current_thread() is threading.main_thread():
+            _restore_signal_handlers()
+        # 结束仍在显示的进度条（最终状态写入文件），再写完控制台队列，之后的关闭提示按顺序输出
+        shutdown_progress()
+        shutdown_console_budget()
+        shutdown_console_writer()
+        shutdown_level_control()
+
         if _queue_mode:
-            # 关闭队列写入器
-            shutdown_queue_writer()
+            # 先发送主程序剩余的日志，再排空socket汇聚（转发到接收队列）
+            shutdown_queue_sender()
+            stop_socket_server()
+            # 主程序和socket汇聚的日志都已入队后，与日志服务进程完成关闭握手，最后停止本进程的接收器
+            stop_log_server()
+            shutdown_queue_receiver()
         else:
             # 关闭异步写入器
             shutdown_writer()
 
+        # 所有写入器关闭后合并worker分片
+        if _shard_merge_dir is not None:
+            merge_dir = _shard_merge_dir
+            _shard_merge_dir = None
+            count = merge_shards(merge_dir)
+            if count:
+                print(f"已合并{count}个worker分片到full.log和warning.log")
+
+        clear_session_active()
         _initialized = False
         _queue_mode = False
     except Exception as e:
@@ -349,74 +592,68 @@ def is_queue_mode() -> bool:
 
 
 # ============================================================================
-# 占位函数（未实现功能）
+# 配置快照（worker只传递扁平的日志配置，不传递完整的config对象）
 # ============================================================================
 
-def init_custom_logger_system_with_params(**params) -> None:
-    """使用参数初始化日志系统（占位函数）
-    
-    注意：此函数为占位实现，实际功能未开发。
-    项目约束：本项目彻底不使用config_manager，只用config_manager创建的对象。
-    
+def init_custom_logger_system_with_params(worker_id: str = None, **params) -> None:
+    """使用参数初始化worker日志系统
+
+    参数与get_logger_init_params()返回的字典相同：log_dir、first_start_time（必需）
+    以及任意logger配置项，传输对象log_queue、level_control可选。
+
     Args:
+        worker_id: worker进程ID，用于标识日志来源
         **params: 初始化参数
-        
+
     Raises:
-        NotImplementedError: 功能未实现
+        ValueError: 如果缺少必需参数或参数版本不支持
     """
-    raise NotImplementedError(
-        "init_custom_logger_system_with_params功能未实现。"
-        "请使用init_custom_logger_system()并传入config对象。"
-    )
+    init_custom_logger_system_from_serializable_config(params, worker_id)
+    return
 
 
-def init_custom_logger_system_from_serializable_config(config_dict: dict) -> None:
-    """从可序列化配置初始化日志系统（占位函数）
-    
-    注意：此函数为占位实现，实际功能未开发。
-    项目约束：本项目彻底不使用config_manager，只用config_manager创建的对象。
-    
+def init_custom_logger_system_from_serializable_config(config_dict: dict, worker_id: str = None) -> None:
+    """从可序列化配置快照初始化worker日志系统
+
     Args:
-        config_dict: 可序列化的配置字典
-        
+        config_dict: get_serializable_config()返回的配置快照
+        worker_id: worker进程ID，用于标识日志来源
+
     Raises:
-        NotImplementedError: 功能未实现
+        ValueError: 如果快照格式错误、版本不支持或缺少必要字段
     """
-    raise NotImplementedError(
-        "init_custom_logger_system_from_serializable_config功能未实现。"
-        "请使用init_custom_logger_system_for_worker()进行worker初始化。"
-    )
+    if _initialized:
+        return
+
+    init_custom_logger_system_for_worker(config_from_snapshot(config_dict), worker_id)
+    return
 
 
 def get_logger_init_params() -> dict:
-    """获取日志系统初始化参数（占位函数）
-    
-    注意：此函数为占位实现，实际功能未开发。
-    
+    """获取worker初始化参数（可直接用于init_custom_logger_system_with_params(**params)）
+
     Returns:
-        dict: 初始化参数字典
-        
+        dict: 初始化参数字典，内容与get_serializable_config()相同
+
     Raises:
-        NotImplementedError: 功能未实现
+        RuntimeError: 如果日志系统未初始化
     """
-    raise NotImplementedError(
-        "get_logger_init_params功能未实现。"
-        "日志系统配置应通过config对象传递。"
-    )
+    return get_serializable_config()
 
 
 def get_serializable_config() -> dict:
-    """获取可序列化的配置（占位函数）
-    
-    注意：此函数为占位实现，实际功能未开发。
-    
+    """获取当前日志配置的扁平快照，用于传递给worker进程
+
+    只包含log_dir、first_start_time、与默认值不同的logger配置项和queue_info中的传输对象，
+    不含传输对象时pickle后只有几百字节。
+
     Returns:
-        dict: 可序列化的配置字典
-        
+        dict: 可序列化的配置快照（带version字段）
+
     Raises:
-        NotImplementedError: 功能未实现
+        RuntimeError: 如果日志系统未初始化
     """
-    raise NotImplementedError(
-        "get_serializable_config功能未实现。"
-        "配置序列化应在主程序中处理。"
-    )
+    if not _initialized:
+        raise RuntimeError("日志系统未初始化，请先调用 init_custom_logger_system()")
+
+    return build_config_snapshot(get_root_config())
@@ -0,0 +1,104 @@
+# src/custom_logger/pool.py
+"""
+进程池初始化辅助
+
+concurrent.futures.ProcessPoolExecutor和multiprocessing.Pool都支持initializer/initargs，
+本模块在主程序中一次性生成worker用的配置快照，并返回对应的初始化函数和参数：
+
+    initializer, initargs = get_pool_initializer()
+    with ProcessPoolExecutor(initializer=initializer, initargs=initargs) as executor:
+        ...
+
+    executor = create_process_pool_executor(max_workers=8)
+    pool = create_process_pool(processes=8)  # 结束时调用close()和join()，terminate()只能尽量写出剩余日志
+
+每个worker进程在启动时初始化一次日志系统，worker_id按启动顺序自动分配（worker1、worker2……），
+进程退出时自动关闭日志系统。传输方式按主程序配置选择：queue_info.log_queue（mp.Queue或共享内存）
+优先，其次是socket汇聚；两者都没有时worker使用分片模式直接写入full.w{id}.log，
+主程序关闭日志系统时合并。
+"""
+from __future__ import annotations
+
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.context import BaseContext
+from typing import Any, Callable, Optional, Tuple
+
+# 自动分配的worker_id前缀
+DEFAULT_WORKER_PREFIX = "worker"
+
+
+def build_worker_snapshot(cfg: Any) -> dict:
+    """根据主程序配置生成worker用的配置快照（见snapshot.build_config_snapshot）
+
+    没有队列和socket汇聚时启用worker分片。
+    """
+    from .snapshot import build_config_snapshot
+    from .socket_transport import get_socket_address
+
+    snapshot = build_config_snapshot(cfg)
+    if 'log_queue' not in snapshot and not get_socket_address(cfg):
+        snapshot['worker_shards'] = True
+    return snapshot
+
+
+def pool_worker_initializer(snapshot: dict, counter: Any, worker_prefix: str) -> None:
+    """进程池worker初始化函数（在每个worker进程中执行一次）"""
+    from .manager import init_custom_logger_system_from_serializable_config
+
+    with counter.get_lock():
+        counter.value += 1
+        worker_number = counter.value
+
+    # worker初始化时注册退出终结器，进程池worker退出时同样会关闭日志系统
+    init_custom_logger_system_from_serializable_config(snapshot, f"{worker_prefix}{worker_number}")
+    return
+
+
+def get_pool_initializer(
+        worker_prefix: str = DEFAULT_WORKER_PREFIX,
+        context: Optional[BaseContext] = None
+) -> Tuple[Callable, tuple]:
+    """生成进程池的initializer和initargs（主程序初始化日志系统后调用）
+
+    Args:
+        worker_prefix: 自动分配的worker_id前缀
+        context: 进程池使用的multiprocessing上下文，缺省时使用默认上下文
+
+    Returns:
+        Tuple[Callable, tuple]: (initializer, initargs)
+    """
+    from .config import get_root_config
+    from .manager import _request_shard_merge
+
+    snapshot = build_worker_snapshot(get_root_config())
+    if snapshot.get('worker_shards'):
+        _request_shard_merge(snapshot['log_dir'])
+
+    counter = (context or mp.get_context()).Value('i', 0)
+    return pool_worker_initializer, (snapshot, counter, worker_prefix)
+
+
+def create_process_pool_executor(
+        max_workers: Optional[int] = None,
+        mp_context: Optional[BaseContext] = None,
+        worker_prefix: str = DEFAULT_WORKER_PREFIX,
+        **kwargs: Any
+) -> ProcessPoolExecutor:
+    """创建已配置日志初始化的ProcessPoolExecutor"""
+    initializer, initargs = get_pool_initializer(worker_prefix, mp_context)
+    return ProcessPoolExecutor(
+        max_workers=max_workers, mp_context=mp_context, initializer=initializer, initargs=initargs, **kwargs
+    )
+
+
+def create_process_pool(
+        processes: Optional[int] = None,
+        context: Optional[BaseContext] = None,
+        worker_prefix: str = DEFAULT_WORKER_PREFIX,
+        **kwargs: Any
+):
+    """创建已配置日志初始化的multiprocessing.Pool"""
+    context = context or mp.get_context()
+    initializer, initargs = get_pool_initializer(worker_prefix, context)
+    return context.Pool(processes=processes, initializer=initializer, initargs=initargs, **kwargs)
@@ -0,0 +1,281 @@
+# src/custom_logger/progress.py
+"""
+倒计时与进度条的限频渲染
+
+倒计时和进度条在控制台上原位刷新，按console_refresh_rate（默认10Hz）限制刷新频率：
+两次刷新之间的调用只更新状态，中间帧直接丢弃，循环中每次迭代调用也不会让终端成为瓶颈。
+
+logger.progress(total)返回ProgressBar，update(n)累加进度，显示百分比、速率和预计剩余时间。
+所有进度条由同一个ProgressRenderer在stdout上按块绘制（每个进度条一行），多个进度条同时
+更新时整块重绘，不会互相覆盖；进度条显示期间输出的日志行写在进度条块的上方。
+进度条结束时最终状态保留在控制台，并以INFO级别写入文件日志一次。
+stdout不是TTY（重定向到文件或管道）时不绘制中间状态，只在结束时输出最终状态。
+"""
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, TextIO
+
+from .console import write_console
+from .types import INFO
+
+# 默认刷新频率（Hz）
+DEFAULT_REFRESH_RATE = 10.0
+
+# 进度条宽度（字符）
+BAR_WIDTH = 20
+
+# ANSI控制：清除整行、清除到屏幕末尾
+CLEAR_LINE = "\x1b[2K"
+CLEAR_TO_END = "\x1b[J"
+
+
+def format_duration(seconds: Optional[float]) -> str:
+    """格式化时长为H:MM:SS（小于1小时时为MM:SS），未知时为?"""
+    if seconds is None:
+        return "?"
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes:02d}:{secs:02d}"
+
+
+def _is_interactive(stream: TextIO) -> bool:
+    try:
+        return stream.isatty()
+    except (AttributeError, ValueError, OSError):
+        return False
+
+
+class ProgressBar:
+    """进度条句柄（由CustomLogger.progress创建）
+
+    Args:
+        logger: 所属的CustomLogger，结束时经它写入文件日志
+        total: 总数，None表示未知（不显示百分比和剩余时间）
+        description: 描述，缺省时使用logger名称
+        unit: 速率单位
+        renderer: 渲染器
+    """
+
+    def __init__(
+            self,
+            logger: Any,
+            total: Optional[float],
+            description: str = "",
+            unit: str = "it",
+            renderer: Optional["ProgressRenderer"] = None
+    ):
+        self.logger = logger
+        self.total = total
+        self.description = description or logger.name
+        self.unit = unit
+        self.n = 0
+        self.started = time.monotonic()
+        self.finished: Optional[float] = None
+        self._renderer = renderer or get_progress_renderer()
+        self._renderer.add(self)
+        pass
+
+    def __enter__(self) -> "ProgressBar":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    @property
+    def elapsed(self) -> float:
+        """已用时间（秒）"""
+        return (self.finished or time.monotonic()) - self.started
+
+    @property
+    def rate(self) -> float:
+        """平均速率（每秒）"""
+        elapsed = self.elapsed
+        return self.n / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta(self) -> Optional[float]:
+        """预计剩余时间（秒），总数未知或尚无进度时为None"""
+        rate = self.rate
+        if not self.total or rate <= 0:
+            return None
+        return max(0.0, (self.total - self.n) / rate)
+
+    def update(self, n: float = 1) -> None:
+        """累加进度；距上次刷新不足一个刷新间隔时只更新计数"""
+        self.n += n
+        self._renderer.refresh()
+
+    def format(self) -> str:
+        """进度条文本"""
+        parts = [self.description]
+        if self.total:
+            fraction = min(1.0, max(0.0, self.n / self.total))
+            filled = int(fraction * BAR_WIDTH)
+            parts.append(f"{fraction * 100:3.0f}%|{'#' * filled}{'-' * (BAR_WIDTH - filled)}|")
+            parts.append(f"{self.n}/{self.total}")
+        else:
+            parts.append(f"{self.n}")
+        parts.append(f"[{format_duration(self.elapsed)}<{format_duration(self.eta)}, {self.rate:.1f}{self.unit}/s]")
+        return " ".join(parts)
+
+    def close(self) -> None:
+        """结束进度条：控制台保留最终状态，文件日志写入一次"""
+        if self.finished is not None:
+            return
+        self.finished = time.monotonic()
+        final = self.format()
+        self._renderer.finish(self, final)
+        try:
+            self.logger._log(INFO, final, do_print=False)
+        except Exception:
+            pass
+
+
+class ProgressRenderer:
+    """倒计时和进度条的限频渲染器（线程安全）
+
+    Args:
+        refresh_rate: 最高刷新频率（Hz），0表示不限制
+    """
+
+    def __init__(self, refresh_rate: float = DEFAULT_REFRESH_RATE):
+        self.interval = 0.0
+        self.set_refresh_rate(refresh_rate)
+        self._lock = threading.RLock()
+        self._bars: List[ProgressBar] = []
+        # 当前绘制的进度条行数，0表示没有进度条块
+        self._lines_drawn = 0
+        self._last_render = float('-inf')
+        # 倒计时：{logger名称: 上次输出时间}和被丢弃的最新一帧
+        self._countdown_last: Dict[str, float] = {}
+        self._countdown_pending: Dict[str, tuple] = {}
+        pass
+
+    def set_refresh_rate(self, refresh_rate: float) -> None:
+        """设置最高刷新频率（Hz）"""
+        self.interval = 1.0 / refresh_rate if refresh_rate > 0 else 0.0
+
+    @property
+    def active(self) -> bool:
+        """是否正在显示进度条块"""
+        return self._lines_drawn > 0
+
+    # ------------------------------------------------------------------
+    # 倒计时
+    # ------------------------------------------------------------------
+
+    def countdown_due(self, name: str, frame: tuple) -> bool:
+        """该logger的倒计时是否应输出这一帧；不输出时记录为待输出的最新帧"""
+        now = time.monotonic()
+        if now - self._countdown_last.get(name, float('-inf')) < self.interval:
+            self._countdown_pending[name] = frame
+            return False
+        self._countdown_last[name] = now
+        self._countdown_pending.pop(name, None)
+        return True
+
+    def end_countdown(self, name: str) -> Optional[tuple]:
+        """结束倒计时，返回被丢弃的最后一帧（没有时为None）"""
+        self._countdown_last.pop(name, None)
+        return self._countdown_pending.pop(name, None)
+
+    # ------------------------------------------------------------------
+    # 进度条
+    # ------------------------------------------------------------------
+
+    def add(self, bar: ProgressBar) -> None:
+        """添加进度条并立即绘制"""
+        with self._lock:
+            self._bars.append(bar)
+            self._last_render = time.monotonic()
+            self._draw()
+
+    def refresh(self) -> None:
+        """距上次绘制超过刷新间隔时重绘进度条块"""
+        now = time.monotonic()
+        if now - self._last_render < self.interval:
+            return
+        with self._lock:
+            self._last_render = now
+            self._draw()
+
+    def finish(self, bar: ProgressBar, final: str) -> None:
+        """移除进度条，最终状态保留在进度条块上方"""
+        with self._lock:
+            if bar not in self._bars:
+                return
+            self._bars.remove(bar)
+            self._draw(committed=final)
+
+    def write_above(self, stream: TextIO, text: str) -> bool:
+        """显示进度条块时，在块的上方输出文本并重绘进度条
+
+        Returns:
+            bool: 是否已输出（没有进度条块时返回False，由调用方正常输出）
+        """
+        with self._lock:
+            if not self._lines_drawn:
+                return False
+            out = sys.stdout
+            write_console(out, self._cursor_to_top() + CLEAR_TO_END)
+            self._lines_drawn = 0
+            write_console(stream, text)
+            self._draw()
+        return True
+
+    def close_all(self) -> None:
+        """结束所有进度条（关闭日志系统时调用）"""
+        with self._lock:
+            bars = list(self._bars)
+        for bar in bars:
+            bar.close()
+
+    def _cursor_to_top(self) -> str:
+        """从进度条块最后一行移动到第一行行首"""
+        if self._lines_drawn > 1:
+            return f"\x1b[{self._lines_drawn - 1}A\r"
+        return "\r"
+
+    def _draw(self, committed: Optional[str] = None) -> None:
+        """重绘进度条块（调用方持有锁）；committed为需要保留在块上方的最终状态"""
+        out = sys.stdout
+        if not _is_interactive(out):
+            # 非交互输出只写最终状态
+            if committed is not None:
+                write_console(out, committed + "\n")
+            return
+
+        lines = [bar.format() for bar in self._bars]
+        parts = [self._cursor_to_top() if self._lines_drawn else "\r"]
+        if committed is not None:
+            parts.append(f"{CLEAR_LINE}{committed}\n")
+        parts.append("\n".join(f"{CLEAR_LINE}{line}" for line in lines))
+        if len(lines) < self._lines_drawn - (1 if committed is not None else 0):
+            # 进度条减少时清除残留的行
+            parts.append(CLEAR_TO_END)
+        self._lines_drawn = len(lines)
+        write_console(out, ''.join(parts))
+
+
+# 全局渲染器，init_progress按配置设置刷新频率
+_renderer = ProgressRenderer()
+
+
+def get_progress_renderer() -> ProgressRenderer:
+    """全局倒计时与进度条渲染器"""
+    return _renderer
+
+
+def init_progress(cfg: Any) -> None:
+    """按配置设置刷新频率"""
+    from .config import get_logger_option
+
+    _renderer.set_refresh_rate(get_logger_option(cfg, 'console_refresh_rate', DEFAULT_REFRESH_RATE))
+
+
+def shutdown_progress() -> None:
+    """结束仍在显示的进度条"""
+    _renderer.close_all()
@@ -0,0 +1,336 @@
+# src/custom_logger/queue_stats.py
+"""
+队列模式接收端统计
+
+QueueLogReceiver按worker_id统计收到的日志条数和字节数、发送端报告的丢弃和溢出条数，
+以及从发送时间（created_ns）到写入完成的端到端延迟直方图。统计按批进行：每批日志在
+本地累加后只加锁合并一次，写入完成时间每批只取一次。
+
+发送端启用心跳时，接收端记录每个worker的心跳间隔和最后一次收到日志或控制记录的时间，
+超过HEARTBEAT_MISSES个间隔没有消息且未收到关闭通知的worker由check_liveness报告为静默。
+
+字节数按日志行和异常信息的字符数计算（ASCII日志与UTF-8字节数相同），不做编码。
+
+延迟直方图以毫秒为单位按2的幂分桶：第0桶为<1ms，第i桶为[2^(i-1), 2^i)ms，
+最后一桶为>=2^(LAG_BUCKETS-2)ms。统计定期写入会话目录下的log_stats.json（原子替换），
+也可以通过get_queue_stats()读取。
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from bisect import bisect_right
+from datetime import datetime
+from itertools import groupby
+from operator import attrgetter
+from typing import Dict, List, Optional, Tuple
+
+# 统计文件名
+STATS_FILE_NAME = "log_stats.json"
+
+# 发送端控制记录（状态报告等）使用的级别值和logger_name，接收端两者都匹配时才按控制记录处理，不写入文件
+CONTROL_LEVEL = 0
+CONTROL_LOGGER_NAME = "__control__"
+
+# 写入log_stats.json的默认间隔（秒）
+DEFAULT_STATS_INTERVAL = 10.0
+
+# 延迟直方图桶数：<1ms、<2ms、……、<65536ms、>=65536ms
+LAG_BUCKETS = 18
+
+# 连续错过多少个心跳间隔后判定worker静默
+HEARTBEAT_MISSES = 3
+
+# worker空闲时发送心跳的默认间隔（秒），与DEFAULT_CONFIG的queue_heartbeat_interval一致
+DEFAULT_HEARTBEAT_INTERVAL = 5.0
+
+
+def is_control_entry(entry) -> bool:
+    """是否为发送端控制记录"""
+    return entry.level_value == CONTROL_LEVEL and entry.logger_name == CONTROL_LOGGER_NAME
+
+
+def _bucket_label(index: int) -> str:
+    if index == LAG_BUCKETS - 1:
+        return f">={1 << (index - 1)}"
+    return f"<{1 << index}"
+
+
+LAG_BUCKET_LABELS = [_bucket_label(index) for index in range(LAG_BUCKETS)]
+
+_worker_id = attrgetter('worker_id')
+_created_ns = attrgetter('created_ns')
+_sequence = attrgetter('sequence')
+
+
+def _bucket_upper_ms(index: int) -> int:
+    return 1 << min(index, LAG_BUCKETS - 2)
+
+
+def _iso(epoch: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(epoch).isoformat(timespec='seconds') if epoch else None
+
+
+class WorkerStats:
+    """单个worker的累计统计"""
+
+    __slots__ = ('records', 'bytes', 'dropped', 'spilled', 'first_seen', 'last_seen',
+                 'lag_count', 'lag_total_ns', 'lag_max_ns', 'lag_buckets',
+                 'pid', 'heartbeat_interval', 'closed', 'silent_since',
+                 'next_sequence', 'sequence_missing', 'sequence_late')
+
+    def __init__(self, now: float):
+        self.records = 0
+        self.bytes = 0
+        self.dropped = 0
+        self.spilled = 0
+        self.first_seen = now
+        self.last_seen = now
+        self.lag_count = 0
+        self.lag_total_ns = 0
+        self.lag_max_ns = 0
+        self.lag_buckets = [0] * LAG_BUCKETS
+        self.pid: Optional[int] = None
+        self.heartbeat_interval = 0.0
+        self.closed = False
+        # 判定静默时的last_seen，恢复后清除
+        self.silent_since: Optional[float] = None
+        # 下一条应写入的发送端序号；按写入顺序统计缺失和晚于后续序号写入的日志
+        self.next_sequence: Optional[int] = None
+        self.sequence_missing = 0
+        self.sequence_late = 0
+
+    def observe_sequences(self, sequences: list) -> None:
+        """按写入顺序检查发送端序号
+
+        跳过的序号计入sequence_missing（丢失，或迟到超过重排窗口）；之后补写的序号计入
+        sequence_late并从缺失数中扣除。序号回到0表示同一worker_id的发送端重新启动。
+        """
+        expected = self.next_sequence
+        for sequence in sequences:
+            if expected is not None and sequence != expected and sequence != 0:
+                if sequence < expected:
+                    self.sequence_late += 1
+                    if self.sequence_missing:
+                        self.sequence_missing -= 1
+                    continue
+                self.sequence_missing += sequence - expected
+            expected = sequence + 1
+        self.next_sequence = expected
+
+    def _lag_percentile(self, fraction: float) -> Optional[int]:
+        """延迟分位数（所在桶的上界，毫秒）"""
+        if not self.lag_count:
+            return None
+        target = self.lag_count * fraction
+        seen = 0
+        for index, count in enumerate(self.lag_buckets):
+            seen += count
+            if count and seen >= target:
+                return _bucket_upper_ms(index)
+        return _bucket_upper_ms(LAG_BUCKETS - 1)
+
+    def to_dict(self) -> dict:
+        elapsed = self.last_seen - self.first_seen
+        return {
+            'records': self.records,
+            'bytes': self.bytes,
+            'records_per_second': round(self.records / elapsed, 1) if elapsed > 0 else None,
+            'dropped': self.dropped,
+            'spilled': self.spilled,
+            'first_seen': _iso(self.first_seen),
+            'last_seen': _iso(self.last_seen),
+            'pid': self.pid,
+            'heartbeat_interval': self.heartbeat_interval,
+            'closed': self.closed,
+            'silent': self.silent_since is not None,
+            'sequence_missing': self.sequence_missing,
+            'sequence_late': self.sequence_late,
+            'lag_ms': {
+                'count': self.lag_count,
+                'mean': round(self.lag_total_ns / self.lag_count / 1e6, 3) if self.lag_count else None,
+                'max': round(self.lag_max_ns / 1e6, 3),
+                'p50': self._lag_percentile(0.5),
+                'p99': self._lag_percentile(0.99),
+                'histogram': {
+                    label: count for label, count in zip(LAG_BUCKET_LABELS, self.lag_buckets) if count
+                },
+            },
+        }
+
+
+class ReceiverStats:
+    """接收端按worker的统计（线程安全，按批更新）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._workers: Dict[str, WorkerStats] = {}
+        self.started = time.time()
+        self.batches = 0
+
+    def _worker(self, worker_id: str, now: float) -> WorkerStats:
+        """取得worker统计（调用方持有锁）"""
+        stats = self._workers.get(worker_id)
+        if stats is None:
+            stats = self._workers[worker_id] = WorkerStats(now)
+        return stats
+
+    def observe_received(self, entries: list) -> list:
+        """统计收到的一批日志条数和字节数
+
+        Returns:
+            list: 其中的控制记录（见is_control_entry，不计入统计）
+        """
+        counts: Dict[Optional[str], List[int]] = {}
+        controls = []
+        last_id, current = None, None
+        for entry in entries:
+            if is_control_entry(entry):
+                controls.append(entry)
+                continue
+            worker_id = entry.worker_id
+            if worker_id != last_id or current is None:
+                last_id = worker_id
+                current = counts.get(worker_id)
+                if current is None:
+                    current = counts[worker_id] = [0, 0]
+            current[0] += 1
+            current[1] += len(entry.log_line) + (len(entry.exception_info) if entry.exception_info else 0)
+
+        now = time.time()
+        with self._lock:
+            self.batches += 1
+            for worker_id, (records, size) in counts.items():
+                stats = self._worker(worker_id or "unknown", now)
+                stats.records += records
+                stats.bytes += size
+                stats.last_seen = now
+        return controls
+
+    def observe_written(self, entries: list) -> None:
+        """统计一批已写入日志的端到端延迟和序号缺失（写入完成后调用）
+
+        每个worker的发送时间排序后按各桶边界二分计数，直方图的开销与批次大小基本无关。
+        """
+        now_ns = time.time_ns()
+        created: Dict[Optional[str], List[int]] = {}
+        sequences: Dict[Optional[str], List[int]] = {}
+        # 同一worker的日志在批次中连续出现（发送端按批入队），按连续段取出发送时间和序号
+        for worker_id, group in groupby(entries, _worker_id):
+            group = list(group)
+            numbers = [number for number in map(_sequence, group) if number is not None]
+            if numbers:
+                sequences.setdefault(worker_id, []).extend(numbers)
+            values = list(map(_created_ns, group))
+            if None in values:
+                values = [value for value in values if value is not None]
+            if worker_id in created:
+                created[worker_id].extend(values)
+            elif values:
+                created[worker_id] = values
+        lags = []
+        for worker_id, values in created.items():
+            values.sort()
+            count = len(values)
+            # 第i桶的下界为2^(i-1)ms：发送时间不晚于now - 下界的日志延迟不小于下界
+            buckets = [0] * LAG_BUCKETS
+            previous = count
+            for index in range(1, LAG_BUCKETS):
+                at_least = bisect_right(values, now_ns - (1 << (index - 1)) * 1_000_000)
+                buckets[index - 1] = previous - at_least
+                previous = at_least
+                if not at_least:
+                    break
+            buckets[LAG_BUCKETS - 1] = previous
+            lags.append((worker_id, count, max(0, now_ns * count - sum(values)), now_ns - values[0], buckets))
+        if not lags and not sequences:
+            return
+
+        now = now_ns / 1e9
+        with self._lock:
+            for worker_id, numbers in sequences.items():
+                self._worker(worker_id or "unknown", now).observe_sequences(numbers)
+            for worker_id, count, total_ns, max_ns, buckets in lags:
+                stats = self._worker(worker_id or "unknown", now)
+                stats.lag_count += count
+                stats.lag_total_ns += total_ns
+                stats.lag_max_ns = max(stats.lag_max_ns, max_ns)
+                stats.lag_buckets = [old + new for old, new in zip(stats.lag_buckets, buckets)]
+        return
+
+    def report_sender(self, worker_id: Optional[str], dropped: int, spilled: int, closed: bool = False) -> None:
+        """记录发送端报告的累计丢弃和溢出条数；closed表示发送端已正常关闭"""
+        now = time.time()
+        with self._lock:
+            stats = self._worker(worker_id or "unknown", now)
+            stats.dropped = max(stats.dropped, dropped)
+            stats.spilled = max(stats.spilled, spilled)
+            stats.last_seen = now
+            stats.closed = stats.closed or closed
+        return
+
+    def report_heartbeat(self, worker_id: Optional[str], pid: Optional[int], interval: float) -> None:
+        """记录发送端心跳"""
+        now = time.time()
+        with self._lock:
+            stats = self._worker(worker_id or "unknown", now)
+            stats.last_seen = now
+            stats.pid = pid
+            stats.heartbeat_interval = interval
+            # 同一worker_id重新启动
+            stats.closed = False
+        return
+
+    def check_liveness(self, now: Optional[float] = None) -> Tuple[list, list]:
+        """检查启用心跳的worker是否静默
+
+        Returns:
+            Tuple[list, list]: (新判定静默的[(worker_id, 最后消息时间, 心跳间隔, pid)],
+                                已恢复的[(worker_id, 静默秒数)])
+        """
+        now = time.time() if now is None else now
+        silent, resumed = [], []
+        with self._lock:
+            for worker_id, stats in self._workers.items():
+                if stats.silent_since is not None:
+                    if stats.last_seen > stats.silent_since:
+                        resumed.append((worker_id, stats.last_seen - stats.silent_since))
+                        stats.silent_since = None
+                    continue
+                interval = stats.heartbeat_interval
+                if interval > 0 and not stats.closed and now - stats.last_seen > interval * HEARTBEAT_MISSES:
+                    stats.silent_since = stats.last_seen
+                    silent.append((worker_id, stats.last_seen, interval, stats.pid))
+        return silent, resumed
+
+    def snapshot(self, **extra) -> dict:
+        """统计快照（可直接序列化为JSON）"""
+        with self._lock:
+            workers = {worker_id: stats.to_dict() for worker_id, stats in sorted(self._workers.items())}
+            batches = self.batches
+        return {
+            'updated': datetime.now().isoformat(timespec='seconds'),
+            'uptime_seconds': round(time.time() - self.started, 3),
+            'batches': batches,
+            'records': sum(worker['records'] for worker in workers.values()),
+            'bytes': sum(worker['bytes'] for worker in workers.values()),
+            'dropped': sum(worker['dropped'] for worker in workers.values()),
+            **extra,
+            'workers': workers,
+        }
+
+
+def write_stats_file(session_dir: str, stats: dict) -> str:
+    """将统计快照原子写入会话目录下的log_stats.json
+
+    Returns:
+        str: 统计文件路径
+    """
+    path = os.path.join(session_dir, STATS_FILE_NAME)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(stats, f, ensure_ascii=False, indent=2)
+    os.replace(temp_path, path)
+    return path
@@ -8,34 +8,247 @@
 """
 from __future__ import annotations
 
+import atexit
+import heapq
+import itertools
+import json
 import os
 import sys
 import threading
+import time
 import queue
 import multiprocessing as mp
-from typing import Optional, TextIO
-from dataclasses import dataclass
-from .types import WARNING
+import zlib
+from multiprocessing import util as mp_util
+from typing import Dict, List, Optional, Tuple
+from dataclasses import dataclass, field
+from .types import INFO, WARNING, ERROR
+from .log_file import LogFile
+from .compression import DEFAULT_COMPRESSION_WORKERS, SegmentCompressor, create_compressor
+from .writer import DEFAULT_MAX_MODULE_FILES, FileWriter, LogEntry
+from .formatter import create_system_log_line
+from .wire import WIRE_FORMAT_ENTRY, WIRE_FORMAT_COMPACT, encode_entries, decode_frame, is_frame
+from .spill import DEFAULT_SPILL_MAX_BYTES, SpillFile, spill_file_path
+from .queue_stats import (
+    CONTROL_LEVEL, CONTROL_LOGGER_NAME, DEFAULT_HEARTBEAT_INTERVAL, DEFAULT_STATS_INTERVAL, HEARTBEAT_MISSES,
+    ReceiverStats, is_control_entry, write_stats_file
+)
+
+
+# 发送端批量的默认字节上限和定时刷新间隔
+DEFAULT_BATCH_BYTES = 64 * 1024
+DEFAULT_BATCH_INTERVAL = 0.05
+
+# 接收端每批最多取出的日志条数
+DEFAULT_RECEIVE_BATCH = 1024
+
+# 重排窗口最多缓存的日志条数（超出时不等窗口到期，直接写出最早的日志）
+DEFAULT_REORDER_MAX_ENTRIES = 100_000
+
+# 溢出回放在队列仍满时的重试间隔（秒，指数退避）和退出时等待回放完成的时间
+SPILL_RETRY_MIN = 0.01
+SPILL_RETRY_MAX = 0.5
+SPILL_CLOSE_TIMEOUT = 5.0
+
+# 接收端检查worker心跳的间隔（秒）
+LIVENESS_CHECK_INTERVAL = 1.0
+
+STOP_SIGNAL = "STOP_LOGGING"
+
+# 接收器从config.logger读取的配置项及默认值
+RECEIVER_OPTION_DEFAULTS = {
+    'rotation_max_bytes': 0,
+    'rotation_interval': 0.0,
+    'compression': "",
+    'compression_workers': DEFAULT_COMPRESSION_WORKERS,
+    'compression_wait_on_close': True,
+    'max_module_files': DEFAULT_MAX_MODULE_FILES,
+    'index_mode': False,
+    'queue_worker_files': False,
+    'queue_receive_batch': DEFAULT_RECEIVE_BATCH,
+    'queue_reorder_window': 0.0,
+    'queue_reorder_max_entries': DEFAULT_REORDER_MAX_ENTRIES,
+    'queue_stats_interval': DEFAULT_STATS_INTERVAL,
+}
 
 
 @dataclass
 class QueueLogEntry:
-    """队列日志条目"""
+    """队列日志条目
+
+    sequence为发送端按worker单调递增的序号，created_ns为发送时的epoch时间（纳秒）：
+    接收端按序号恢复同一worker内的顺序并统计缺失的序号，按发送时间归并不同worker；
+    二者属于传输元数据，不参与条目比较。
+    """
     log_line: str
     level_value: int
     exception_info: Optional[str] = None
     worker_id: Optional[str] = None
     timestamp: Optional[str] = None
+    logger_name: Optional[str] = None
+    sequence: Optional[int] = field(default=None, compare=False)
+    created_ns: Optional[int] = field(default=None, compare=False)
+
+
+def make_control_entry(worker_id: Optional[str], kind: str, **fields) -> QueueLogEntry:
+    """构造发送端控制记录
+
+    log_line为JSON（kind字段区分类型）。发送端总是把控制记录编码为控制帧（wire.CONTROL_MAGIC），
+    与日志一样经队列、共享内存环或socket传输；接收端按is_control_entry识别后处理，不写入文件。
+    """
+    return QueueLogEntry(
+        log_line=json.dumps(dict(fields, kind=kind)),
+        level_value=CONTROL_LEVEL,
+        worker_id=worker_id,
+        logger_name=CONTROL_LOGGER_NAME,
+        created_ns=time.time_ns()
+    )
+
+
+def parse_control_entry(entry: QueueLogEntry) -> dict:
+    """解析控制记录内容，无法解析时返回空字典"""
+    try:
+        payload = json.loads(entry.log_line)
+    except ValueError:
+        return {}
+    return payload if isinstance(payload, dict) else {}
+
+
+def iter_queue_entries(item: object) -> list:
+    """将队列中取出的对象展开为QueueLogEntry列表
+
+    支持单个QueueLogEntry、list[QueueLogEntry]以及紧凑bytes帧，其他对象被忽略。
+    """
+    if isinstance(item, QueueLogEntry):
+        return [item]
+    if isinstance(item, list):
+        return [entry for entry in item if isinstance(entry, QueueLogEntry)]
+    if is_frame(item):
+        return decode_frame(item)
+    return []
+
+
+def _is_stop_signal(item: object) -> bool:
+    """是否为接收器停止信号"""
+    return isinstance(item, str) and item == STOP_SIGNAL
+
+
+def drain_queue(source, limit: int, timeout: float = 1.0) -> Tuple[List[QueueLogEntry], bool]:
+    """从队列贪婪地取出一批日志
+
+    先阻塞等待一个对象（超时抛出queue.Empty），再非阻塞地继续取出，
+    直到累计条数或取出的对象数达到limit、队列为空或遇到停止信号。
+
+    Returns:
+        Tuple[List[QueueLogEntry], bool]: (日志列表, 是否收到停止信号)
+    """
+    item = source.get(timeout=timeout)
+    entries: List[QueueLogEntry] = []
+    taken = 0
+    while True:
+        if _is_stop_signal(item):
+            return entries, True
+        entries.extend(iter_queue_entries(item))
+        taken += 1
+        if len(entries) >= limit or taken >= limit:
+            return entries, False
+        try:
+            item = source.get_nowait()
+        except queue.Empty:
+            return entries, False
+
+
+def select_queue(log_queue, worker_id: Optional[str]):
+    """多个队列（按worker分组）时，按worker_id稳定地选择其中一个"""
+    if not isinstance(log_queue, (list, tuple)):
+        return log_queue
+    if not log_queue:
+        return None
+    return log_queue[zlib.crc32(str(worker_id).encode('utf-8')) % len(log_queue)]
 
 
 class QueueLogSender:
-    """队列日志发送器（用于worker进程）"""
+    """队列日志发送器（用于worker进程）
+
+    batch_size大于1时启用发送端批量：日志先在本地累积，满足以下任一条件时
+    以list[QueueLogEntry]的形式一次放入队列：
+    - 累积条数达到batch_size
+    - 累积字节数达到batch_bytes
+    - 距上次发送超过batch_interval秒（由后台刷新线程触发）
+    - 出现ERROR及以上级别日志（立即发送）
+    进程退出时通过atexit和multiprocessing终结器发送剩余日志。
+
+    wire_format为"compact"时，单条或一批日志编码为wire模块的bytes帧发送，
+    默认"entry"直接发送QueueLogEntry，兼容只识别QueueLogEntry的接收端。
+
+    指定spill_dir时，队列已满的日志追加到spill_dir下的溢出文件（见spill模块），
+    由后台线程在队列有空间后按顺序回放，日志调用不会阻塞；溢出文件达到spill_max_bytes
+    或未启用溢出时才丢弃，丢弃条数记录在dropped中。
+    丢弃或溢出计数变化后，下一次成功入队时和关闭时附带一条状态控制记录，报告累计值。
+
+    heartbeat_interval大于0时，后台线程启动时发送一条带pid和间隔的心跳控制记录，之后只在
+    一个间隔内没有成功入队任何日志时再发送（队列已满时跳过），关闭时发送关闭控制记录，
+    接收端据此区分正常退出和进程异常终止。
+    """
     
-    def __init__(self, log_queue: mp.Queue, worker_id: str = None):
+    def __init__(
+            self,
+            log_queue: mp.Queue,
+            worker_id: str = None,
+            batch_size: int = 1,
+            batch_bytes: int = DEFAULT_BATCH_BYTES,
+            batch_interval: float = DEFAULT_BATCH_INTERVAL,
+            wire_format: str = WIRE_FORMAT_ENTRY,
+            spill_dir: Optional[str] = None,
+            spill_max_bytes: int = DEFAULT_SPILL_MAX_BYTES,
+            heartbeat_interval: float = DEFAULT_HEARTBEAT_INTERVAL
+    ):
         self.log_queue = log_queue
         self.worker_id = worker_id or "unknown"
+        self.compact = wire_format == WIRE_FORMAT_COMPACT
+        self.batch_size = batch_size
+        self.batch_bytes = batch_bytes
+        self.batch_interval = batch_interval
+        self._batch: list[QueueLogEntry] = []
+        self._batch_bytes = 0
+        # itertools.count的next()在GIL下是原子的，多线程发送时序号也不重复
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._flusher_thread: Optional[threading.Thread] = None
+        self._flusher_stop = threading.Event()
+        self._exit_hook_installed = False
+        # 溢出文件和回放线程在第一次队列已满时创建
+        self.spill_dir = spill_dir
+        self.spill_max_bytes = spill_max_bytes
+        self._spill: Optional[SpillFile] = None
+        self._replay_thread: Optional[threading.Thread] = None
+        self._replay_wakeup = threading.Event()
+        self._replay_stop = threading.Event()
+        self.spilled = 0
+        self.dropped = 0
+        self._dropped_reported = 0
+        # 已经报告给接收端的(dropped, spilled)
+        self._status_sent = (0, 0)
+        # 最后一次成功入队的时间，心跳线程只在空闲时发送
+        self.heartbeat_interval = heartbeat_interval
+        self._last_put = time.monotonic()
+        self._heartbeat_thread: Optional[threading.Thread] = None
+        self._heartbeat_stop = threading.Event()
+        if heartbeat_interval > 0 and log_queue is not None:
+            self._start_heartbeat()
+
+    @property
+    def batching(self) -> bool:
+        """是否启用发送端批量"""
+        return self.batch_size > 1
     
-    def send_log(self, log_line: str, level_value: int, exception_info: Optional[str] = None) -> None:
+    def send_log(
+            self,
+            log_line: str,
+            level_value: int,
+            exception_info: Optional[str] = None,
+            logger_name: Optional[str] = None
+    ) -> None:
         """发送日志到队列"""
         if self.log_queue is None:
             return
@@ -45,147 +258,680 @@ class QueueLogSender:
                 log_line=log_line,
                 level_value=level_value,
                 exception_info=exception_info,
-                worker_id=self.worker_id
+                worker_id=self.worker_id,
+                logger_name=logger_name,
+                sequence=next(self._sequence),
+                created_ns=time.time_ns()
             )
-            self.log_queue.put_nowait(entry)
+            if not self.batching:
+                self._put_batch([entry])
+                return
+
+            with self._lock:
+                self._batch.append(entry)
+                self._batch_bytes += len(log_line) + (len(exception_info) if exception_info else 0)
+                should_flush = (
+                    level_value >= ERROR or
+                    len(self._batch) >= self.batch_size or
+                    self._batch_bytes >= self.batch_bytes
+                )
+                batch = self._take_batch() if should_flush else None
+
+            if batch:
+                self._put_batch(batch)
+            elif self._flusher_thread is None:
+                self._start_flusher()
+        except Exception as e:
+            try:
+                print(f"Worker {self.worker_id}: 发送日志到队列失败: {e}", file=sys.stderr)
+            except (ValueError, AttributeError):
+                pass
+
+    def _take_batch(self) -> list[QueueLogEntry]:
+        """取出当前累积的日志（调用方持有锁）"""
+        batch = self._batch
+        self._batch = []
+        self._batch_bytes = 0
+        return batch
+
+    def _put_batch(self, batch: list[QueueLogEntry]) -> None:
+        """将一批日志放入队列；队列已满时写入溢出文件或计数丢弃"""
+        # 溢出文件尚未回放完时新日志也写入溢出文件，保持顺序
+        if self._spill is not None and self._spill.pending:
+            self._spill_batch(batch)
+            return
+
+        if self.compact:
+            item = encode_entries(batch, self.worker_id)
+        else:
+            item = batch if self.batching else batch[0]
+        try:
+            self.log_queue.put_nowait(item)
+        except queue.Full:
+            if self.spill_dir:
+                self._spill_batch(batch)
+            else:
+                self._count_dropped(len(batch))
+            return
+
+        self._last_put = time.monotonic()
+        if self._status_sent != (self.dropped, self.spilled):
+            self._send_status()
+
+    def _send_control(self, kind: str, **fields) -> bool:
+        """发送一条控制记录
+
+        Returns:
+            bool: 是否已入队（队列已满时返回False）
+        """
+        # 无论传输格式都单独编码为控制帧：只识别QueueLogEntry或日志帧的旧接收端会忽略它
+        entry = make_control_entry(self.worker_id, kind, **fields)
+        item = encode_entries([entry], self.worker_id, control=True)
+        try:
+            self.log_queue.put_nowait(item)
         except queue.Full:
+            return False
+        return True
+
+    def _send_status(self, kind: str = "status") -> None:
+        """向接收端报告累计的丢弃和溢出条数（队列已满时留到下一次）"""
+        status = (self.dropped, self.spilled)
+        if self._send_control(kind, dropped=status[0], spilled=status[1]):
+            self._status_sent = status
+
+    def _start_heartbeat(self) -> None:
+        """启动心跳线程"""
+        self._heartbeat_thread = threading.Thread(
+            target=self._heartbeat_loop, name="custom_logger_heartbeat", daemon=True
+        )
+        self._heartbeat_thread.start()
+
+    def _heartbeat_loop(self) -> None:
+        """心跳循环：第一次心跳告知接收端pid和间隔，之后只在空闲一个间隔以上时发送"""
+        pid = os.getpid()
+        announced = False
+        while True:
+            if not announced or time.monotonic() - self._last_put >= self.heartbeat_interval:
+                try:
+                    if self._send_control("heartbeat", pid=pid, interval=self.heartbeat_interval):
+                        announced = True
+                except Exception:
+                    pass
+            if self._heartbeat_stop.wait(self.heartbeat_interval):
+                break
+
+    def _spill_batch(self, batch: list[QueueLogEntry]) -> None:
+        """将一批日志追加到溢出文件并唤醒回放线程"""
+        if self._spill is None:
+            with self._lock:
+                if self._spill is None:
+                    self._spill = SpillFile(spill_file_path(self.spill_dir, self.worker_id), self.spill_max_bytes)
+            self._start_replay()
+
+        try:
+            written = self._spill.append(encode_entries(batch, self.worker_id))
+        except OSError as e:
+            written = False
             try:
-                print(f"Worker {self.worker_id}: 日志队列已满，丢弃日志", file=sys.stderr)
+                print(f"Worker {self.worker_id}: 写入溢出文件失败: {e}", file=sys.stderr)
             except (ValueError, AttributeError):
                 pass
-        except Exception as e:
+
+        if written:
+            self.spilled += len(batch)
+            self._replay_wakeup.set()
+        else:
+            self._count_dropped(len(batch))
+
+    def _count_dropped(self, count: int) -> None:
+        """记录丢弃的日志条数，只在第一次丢弃时输出提示"""
+        if self.dropped == 0:
             try:
-                print(f"Worker {self.worker_id}: 发送日志到队列失败: {e}", file=sys.stderr)
+                print(f"Worker {self.worker_id}: 日志队列已满，开始丢弃日志（关闭时输出丢弃总数）", file=sys.stderr)
             except (ValueError, AttributeError):
                 pass
+        self.dropped += count
 
+    def _start_replay(self) -> None:
+        """启动溢出回放线程并安装退出钩子"""
+        with self._lock:
+            if self._replay_thread is not None:
+                return
+            self._replay_thread = threading.Thread(
+                target=self._replay_loop, name="custom_logger_spill_replay", daemon=True
+            )
+            self._replay_thread.start()
+        atexit.register(self.close)
+        mp_util.Finalize(self, self.close, exitpriority=100)
 
-class QueueLogReceiver:
-    """队列日志接收器（用于主程序）"""
-    
-    def __init__(self, log_queue: mp.Queue, session_dir: str):
-        self.log_queue = log_queue
-        self.session_dir = session_dir
-        self.full_log_file: Optional[TextIO] = None
-        self.warning_log_file: Optional[TextIO] = None
-        self._receiver_thread: Optional[threading.Thread] = None
-        self._stop_event = threading.Event()
-        self._init_files()
-    
-    def _init_files(self) -> None:
-        """初始化日志文件"""
+    def _replay_one(self, block_timeout: Optional[float] = None) -> bool:
+        """回放溢出文件中的下一帧
+
+        Returns:
+            bool: 是否回放了一帧（没有数据或队列已满时返回False）
+        """
+        frame = self._spill.peek()
+        if frame is None:
+            return False
+        item = frame if self.compact else decode_frame(frame)
         try:
-            # 规范化路径，确保使用正确的分隔符
-            normalized_session_dir = os.path.normpath(self.session_dir)
-            os.makedirs(normalized_session_dir, exist_ok=True)
+            if block_timeout is None:
+                self.log_queue.put_nowait(item)
+            else:
+                self.log_queue.put(item, timeout=block_timeout)
+        except queue.Full:
+            return False
+        self._spill.consume(frame)
+        self._last_put = time.monotonic()
+        return True
 
-            full_log_path = os.path.join(normalized_session_dir, "full.log")
-            warning_log_path = os.path.join(normalized_session_dir, "warning.log")
+    def _replay_loop(self) -> None:
+        """后台回放循环：队列仍满时指数退避"""
+        delay = SPILL_RETRY_MIN
+        while not self._replay_stop.is_set():
+            try:
+                if self._replay_one():
+                    delay = SPILL_RETRY_MIN
+                    continue
+            except Exception as e:
+                try:
+                    print(f"Worker {self.worker_id}: 回放溢出日志失败: {e}", file=sys.stderr)
+                except (ValueError, AttributeError):
+                    pass
+            if not self._spill.pending:
+                self._replay_wakeup.wait(1.0)
+                self._replay_wakeup.clear()
+            else:
+                self._replay_stop.wait(delay)
+                delay = min(delay * 2, SPILL_RETRY_MAX)
 
-            self.full_log_file = open(full_log_path, 'a', encoding='utf-8', buffering=1)
-            self.warning_log_file = open(warning_log_path, 'a', encoding='utf-8', buffering=1)
+    def has_pending(self) -> bool:
+        """是否还有未写入管道的日志（批量缓存、溢出文件或mp.Queue后台线程的缓冲）"""
+        if self._batch or (self._spill is not None and self._spill.pending):
+            return True
+        return bool(getattr(self.log_queue, '_buffer', None))
 
-        except Exception as e:
+    def flush(self) -> None:
+        """立即发送累积的日志"""
+        if not self.batching or self.log_queue is None:
+            return
+
+        with self._lock:
+            batch = self._take_batch()
+        if batch:
+            try:
+                self._put_batch(batch)
+            except Exception as e:
+                try:
+                    print(f"Worker {self.worker_id}: 发送日志到队列失败: {e}", file=sys.stderr)
+                except (ValueError, AttributeError):
+                    pass
+
+    def _start_flusher(self) -> None:
+        """启动定时刷新线程并安装退出钩子"""
+        with self._lock:
+            if self._flusher_thread is not None:
+                return
+            self._flusher_thread = threading.Thread(
+                target=self._flusher_loop, name="custom_logger_sender_flush", daemon=True
+            )
+            self._flusher_thread.start()
+
+        if not self._exit_hook_installed:
+            self._exit_hook_installed = True
+            atexit.register(self.flush)
+            # multiprocessing子进程退出时不执行atexit，使用终结器兜底；
+            # 优先级高于队列自身的关闭终结器，保证在队列关闭前发送
+            mp_util.Finalize(self, self.flush, exitpriority=100)
+
+    def _flusher_loop(self) -> None:
+        """定时刷新循环"""
+        while not self._flusher_stop.wait(self.batch_interval):
+            self.flush()
+
+    def close(self) -> None:
+        """发送剩余日志并停止刷新和心跳线程；启用溢出时等待溢出日志回放完成"""
+        self._flusher_stop.set()
+        if self._flusher_thread is not None and self._flusher_thread.is_alive():
+            self._flusher_thread.join(timeout=1.0)
+        self._flusher_thread = None
+        self._heartbeat_stop.set()
+        if self._heartbeat_thread is not None and self._heartbeat_thread.is_alive():
+            self._heartbeat_thread.join(timeout=1.0)
+        self._heartbeat_thread = None
+        self.flush()
+        self._close_spill()
+        # 启用心跳时总是发送关闭记录，接收端不再等待该worker的心跳
+        if self.log_queue is not None and (self.heartbeat_interval > 0 or self._status_sent != (self.dropped, self.spilled)):
+            try:
+                self._send_status("close" if self.heartbeat_interval > 0 else "status")
+            except Exception:
+                pass
+
+        if self.dropped > self._dropped_reported:
+            self._dropped_reported = self.dropped
             try:
-                print(f"无法创建日志文件: {e}", file=sys.stderr)
+                print(f"Worker {self.worker_id}: 共丢弃{self.dropped}条日志", file=sys.stderr)
             except (ValueError, AttributeError):
                 pass
+
+    def _close_spill(self) -> None:
+        """停止回放线程，在当前线程回放剩余的溢出日志后关闭溢出文件"""
+        if self._spill is None:
+            return
+
+        self._replay_stop.set()
+        self._replay_wakeup.set()
+        if self._replay_thread is not None and self._replay_thread.is_alive():
+            self._replay_thread.join(timeout=1.0)
+
+        deadline = time.time() + SPILL_CLOSE_TIMEOUT
+        try:
+            while self._spill.pending and time.time() < deadline:
+                self._replay_one(block_timeout=max(0.01, deadline - time.time()))
+        except Exception:
+            pass
+
+        if self._spill.pending:
+            try:
+                print(f"Worker {self.worker_id}: 溢出日志未能全部回放，保留在{self._spill.path}", file=sys.stderr)
+            except (ValueError, AttributeError):
+                pass
+        self._spill.close()
+
+
+class ReorderBuffer:
+    """按发送时间重排的有界窗口
+
+    每个worker的日志按序号保存在各自的小顶堆中（溢出回放、多个传输通道时同一worker的日志
+    也可能乱序到达），全局堆中保存各worker序号最小的日志的发送时间，按堆顶做k路归并：
+    发送时间早于"当前时间 - window"的日志才写出，因此迟到不超过window的日志仍能按序号和
+    时间顺序排入，写出延迟不超过window。缓存超过max_entries条时不等窗口到期，直接写出最早的日志。
+    没有序号的日志（旧版本发送端、接收端生成的记录）单独成组按到达顺序，没有发送时间的按到达时间处理。
+    """
+
+    def __init__(self, window: float, max_entries: int = DEFAULT_REORDER_MAX_ENTRIES):
+        self.window_ns = int(window * 1_000_000_000)
+        self.max_entries = max(1, max_entries)
+        # (worker, 是否没有序号) -> [(序号, 入堆序号, 日志)]小顶堆
+        self._streams: Dict[tuple, list] = {}
+        # (队首发送时间, 入堆序号, 组, 队首日志)，入堆序号使发送时间相同时按到达顺序；
+        # 队首被序号更小的日志取代后旧元素失效，取出时跳过
+        self._heap: list = []
+        self._tiebreak = itertools.count()
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def push(self, entries: list) -> None:
+        """加入一批日志"""
+        now = time.time_ns()
+        for entry in entries:
+            if entry.created_ns is None:
+                entry.created_ns = now
+            key = (entry.worker_id or "", entry.sequence is None)
+            stream = self._streams.get(key)
+            if stream is None:
+                stream = self._streams[key] = []
+            tiebreak = next(self._tiebreak)
+            heapq.heappush(stream, (entry.sequence or 0, tiebreak, entry))
+            if stream[0][2] is entry:
+                heapq.heappush(self._heap, (entry.created_ns, tiebreak, key, entry))
+            self._count += 1
+
+    def pop_ready(self, flush: bool = False) -> list:
+        """按时间顺序取出窗口已到期的日志；flush=True时取出全部"""
+        watermark = time.time_ns() - self.window_ns
+        heap, streams = self._heap, self._streams
+        ready = []
+        while heap:
+            created_ns, _, key, head = heap[0]
+            stream = streams.get(key)
+            if stream is None or stream[0][2] is not head:
+                heapq.heappop(heap)  # 失效的队首
+                continue
+            if not (flush or created_ns <= watermark or self._count > self.max_entries):
+                break
+            heapq.heappop(heap)
+            ready.append(heapq.heappop(stream)[2])
+            self._count -= 1
+            if stream:
+                _, tiebreak, entry = stream[0]
+                heapq.heappush(heap, (entry.created_ns, tiebreak, key, entry))
+            else:
+                del streams[key]
+        return ready
+
+
+class QueueLogReceiver:
+    """队列日志接收器（用于主程序）
+
+    写入委托给writer.FileWriter：与普通模式相同地生成full/warning和模块文件，
+    共用模块文件句柄缓存、轮转、压缩以及按文件合并的批量写入。
+    worker_files=True时另外按worker_id写入worker_{id}.log。
+
+    接收按批进行：一次阻塞get后非阻塞地继续取出，直到receive_batch条或队列为空，
+    整批交给写入器，每个文件一次写入。log_queue可以是队列列表（每组worker一个队列），
+    此时每个队列由独立的读取线程取出，单个写入线程合并写入，某一组的大量日志不会
+    阻塞其他组的出队。
+
+    reorder_window大于0时，写入前经过ReorderBuffer按发送时间重排，full.log按时间顺序输出，
+    写出延迟不超过reorder_window秒。
+
+    stats记录按worker的条数、字节数、发送端报告的丢弃数和端到端延迟（见queue_stats模块），
+    stats_interval大于0时每隔stats_interval秒和关闭时写入会话目录下的log_stats.json。
+
+    发送端启用心跳时，每隔LIVENESS_CHECK_INTERVAL秒检查一次：连续HEARTBEAT_MISSES个间隔
+    没有消息且未发送关闭记录的worker，写入一条"worker X silent since T"的WARNING记录
+    （full.log和warning.log），之后再收到消息时写入一条恢复记录。
+    first_start_time用于这些记录的运行时长字段。
+    """
     
+    def __init__(
+            self,
+            log_queue: mp.Queue,
+            session_dir: str,
+            rotation_max_bytes: int = 0,
+            rotation_interval: float = 0.0,
+            compressor: Optional[SegmentCompressor] = None,
+            wait_compression_on_close: bool = True,
+            max_module_files: int = DEFAULT_MAX_MODULE_FILES,
+            index_mode: bool = False,
+            worker_files: bool = False,
+            receive_batch: int = DEFAULT_RECEIVE_BATCH,
+            reorder_window: float = 0.0,
+            reorder_max_entries: int = DEFAULT_REORDER_MAX_ENTRIES,
+            stats_interval: float = DEFAULT_STATS_INTERVAL,
+            first_start_time: Optional[object] = None
+    ):
+        self.log_queues = list(log_queue) if isinstance(log_queue, (list, tuple)) else [log_queue]
+        self.log_queue = self.log_queues[0]
+        self.session_dir = session_dir
+        self.receive_batch = max(1, receive_batch)
+        self.writer: Optional[FileWriter] = FileWriter(
+            session_dir,
+            max_module_files=max_module_files,
+            index_mode=index_mode,
+            rotation_max_bytes=rotation_max_bytes,
+            rotation_interval=rotation_interval,
+            compressor=compressor,
+            wait_compression_on_close=wait_compression_on_close,
+            worker_files=worker_files
+        )
+        self._reorder: Optional[ReorderBuffer] = (
+            ReorderBuffer(reorder_window, reorder_max_entries) if reorder_window > 0 else None
+        )
+        # 启用重排时，队列空闲期间也要按窗口写出到期的日志
+        self._poll_timeout = min(1.0, max(0.01, reorder_window / 2)) if self._reorder else 1.0
+        self._receiver_thread: Optional[threading.Thread] = None
+        self._reader_threads: List[threading.Thread] = []
+        # 多队列时读取线程交给写入线程的批次，None表示某个读取线程已结束
+        self._batches: Optional[queue.Queue] = None
+        self._stop_event = threading.Event()
+        self.stats = ReceiverStats()
+        self.stats_interval = stats_interval
+        self._next_stats_write = time.monotonic() + stats_interval
+        self.first_start_time = first_start_time
+        self._next_liveness_check = time.monotonic() + LIVENESS_CHECK_INTERVAL
+
+    @property
+    def full_log_file(self) -> Optional[LogFile]:
+        """全局完整日志文件"""
+        return self.writer.full_log_file if self.writer else None
+
+    @property
+    def warning_log_file(self) -> Optional[LogFile]:
+        """全局警告日志文件"""
+        return self.writer.warning_log_file if self.writer else None
+
     def start_receiving(self) -> None:
         """开始接收队列日志"""
         if self._receiver_thread is not None:
             return
-        
-        self._receiver_thread = threading.Thread(target=self._receive_loop, daemon=True)
+
+        if len(self.log_queues) == 1:
+            self._receiver_thread = threading.Thread(target=self._receive_loop, daemon=True)
+            self._receiver_thread.start()
+            return
+
+        self._start_readers()
+        self._receiver_thread = threading.Thread(target=self._merge_loop, daemon=True)
         self._receiver_thread.start()
+
+    def _start_readers(self) -> None:
+        """多队列时为每个队列启动读取线程"""
+        # 有界批次队列：写入跟不上时读取线程阻塞，背压传回各自的队列
+        self._batches = queue.Queue(maxsize=len(self.log_queues) * 4)
+        self._reader_threads = [
+            threading.Thread(target=self._reader_loop, args=(source,), daemon=True)
+            for source in self.log_queues
+        ]
+        for thread in self._reader_threads:
+            thread.start()
+
+    def run(self) -> None:
+        """在当前线程运行接收循环，直到每个队列都收到停止信号（用于独立日志服务进程）"""
+        if len(self.log_queues) == 1:
+            self._receive_loop()
+            return
+
+        self._start_readers()
+        self._merge_loop()
     
     def stop_receiving(self) -> None:
-        """停止接收队列日志"""
+        """停止接收队列日志（停止信号之前已入队的日志会先写入）"""
         if self._receiver_thread is None:
             return
         
         self._stop_event.set()
         
-        # 发送停止信号到队列
-        try:
-            self.log_queue.put_nowait("STOP_LOGGING")
-        except Exception:
-            pass
+        # 发送停止信号到每个队列
+        for source in self.log_queues:
+            try:
+                source.put_nowait(STOP_SIGNAL)
+            except Exception:
+                pass
         
         # 等待线程结束
-        if self._receiver_thread.is_alive():
-            self._receiver_thread.join(timeout=5.0)
+        for thread in self._reader_threads + [self._receiver_thread]:
+            if thread.is_alive():
+                thread.join(timeout=5.0)
         
         self._receiver_thread = None
+        self._reader_threads = []
         self._stop_event.clear()
+
+    def _report_error(self, e: Exception) -> None:
+        try:
+            print(f"处理队列日志时出错: {e}", file=sys.stderr)
+        except (ValueError, AttributeError):
+            pass
     
     def _receive_loop(self) -> None:
-        """接收循环"""
+        """单队列接收循环：按批取出并写入"""
         try:
-            while not self._stop_event.is_set():
+            while True:
                 try:
-                    # 从队列获取日志条目
-                    entry = self.log_queue.get(timeout=1.0)
-                    
-                    # 检查停止信号
-                    if entry == "STOP_LOGGING":
-                        break
-                    
-                    # 处理日志条目
-                    if isinstance(entry, QueueLogEntry):
-                        self._write_log_entry(entry)
-                    
+                    entries, stop = drain_queue(self.log_queue, self.receive_batch, self._poll_timeout)
                 except queue.Empty:
+                    if self._stop_event.is_set():
+                        break
+                    self._deliver([])
                     continue
                 except Exception as e:
-                    try:
-                        print(f"处理队列日志时出错: {e}", file=sys.stderr)
-                    except (ValueError, AttributeError):
-                        pass
+                    self._report_error(e)
+                    if self._stop_event.is_set():
+                        break
+                    continue
+
+                self._deliver(entries)
+                # 停止后继续写完停止信号之前的日志，取不到有效日志时结束
+                if stop or (self._stop_event.is_set() and not entries):
+                    break
         
         finally:
             self._close_files()
-    
-    def _write_log_entry(self, entry: QueueLogEntry) -> None:
-        """写入日志条目"""
+
+    def _reader_loop(self, source) -> None:
+        """多队列读取线程：按批取出，交给写入线程"""
         try:
-            # 写入完整日志
-            if self.full_log_file:
-                self.full_log_file.write(entry.log_line + '\n')
-                if entry.exception_info:
-                    self.full_log_file.write(entry.exception_info + '\n')
-                self.full_log_file.flush()
-
-            # 写入警告日志（WARNING及以上级别）
-            if entry.level_value >= WARNING and self.warning_log_file:
-                self.warning_log_file.write(entry.log_line + '\n')
-                if entry.exception_info:
-                    self.warning_log_file.write(entry.exception_info + '\n')
-                self.warning_log_file.flush()
+            while True:
+                try:
+                    entries, stop = drain_queue(source, self.receive_batch)
+                except queue.Empty:
+                    if self._stop_event.is_set():
+                        break
+                    continue
+                except Exception as e:
+                    self._report_error(e)
+                    if self._stop_event.is_set():
+                        break
+                    continue
 
-        except Exception as e:
-            try:
-                print(f"写入日志文件失败: {e}", file=sys.stderr)
-            except (ValueError, AttributeError):
-                pass
-    
-    def _close_files(self) -> None:
-        """关闭文件"""
+                if entries:
+                    self._batches.put(entries)
+                if stop or (self._stop_event.is_set() and not entries):
+                    break
+        finally:
+            self._batches.put(None)
+
+    def _merge_loop(self) -> None:
+        """多队列写入线程：合并各读取线程的批次写入"""
+        finished = 0
         try:
-            if self.full_log_file:
-                self.full_log_file.close()
-                self.full_log_file = None
+            while finished < len(self.log_queues):
+                try:
+                    item = self._batches.get(timeout=self._poll_timeout)
+                except queue.Empty:
+                    self._deliver([])
+                    continue
 
-            if self.warning_log_file:
-                self.warning_log_file.close()
-                self.warning_log_file = None
+                batch: List[QueueLogEntry] = []
+                while True:
+                    if item is None:
+                        finished += 1
+                    else:
+                        batch.extend(item)
+                    if len(batch) >= self.receive_batch:
+                        break
+                    try:
+                        item = self._batches.get_nowait()
+                    except queue.Empty:
+                        break
+                self._deliver(batch)
+        except Exception as e:
+            self._report_error(e)
+        finally:
+            self._close_files()
+
+    def _deliver(self, entries: list) -> None:
+        """写入一批日志；启用重排时先进入重排窗口，只写出到期的部分"""
+        if entries:
+            controls = self.stats.observe_received(entries)
+            if controls:
+                entries = [entry for entry in entries if not is_control_entry(entry)]
+                self._handle_controls(controls)
+
+        if self._reorder is None:
+            self._write_entries(entries)
+        else:
+            if entries:
+                self._reorder.push(entries)
+            self._write_entries(self._reorder.pop_ready())
+
+        now = time.monotonic()
+        if now >= self._next_liveness_check:
+            self._next_liveness_check = now + LIVENESS_CHECK_INTERVAL
+            self._check_liveness()
+        if self.stats_interval > 0 and now >= self._next_stats_write:
+            self._write_stats()
+
+    def _handle_controls(self, controls: list) -> None:
+        """处理发送端控制记录"""
+        for entry in controls:
+            payload = parse_control_entry(entry)
+            kind = payload.get('kind')
+            if kind in ("status", "close"):
+                self.stats.report_sender(
+                    entry.worker_id, payload.get('dropped', 0), payload.get('spilled', 0), closed=kind == "close"
+                )
+            elif kind == "heartbeat":
+                self.stats.report_heartbeat(entry.worker_id, payload.get('pid'), payload.get('interval', 0.0))
+
+    def _check_liveness(self, now: Optional[float] = None) -> None:
+        """为新判定静默和已恢复的worker写入系统记录"""
+        silent, resumed = self.stats.check_liveness(now)
+        records = []
+        for worker_id, last_seen, interval, pid in silent:
+            since = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(last_seen))
+            message = (
+                f"worker {worker_id} silent since {since}："
+                f"连续{HEARTBEAT_MISSES}个心跳间隔（{interval:g}秒）没有收到日志或心跳，进程可能已异常退出（pid {pid}）"
+            )
+            records.append(self._system_entry(worker_id, WARNING, "WARNING", message))
+        for worker_id, seconds in resumed:
+            message = f"worker {worker_id} resumed：静默{seconds:.1f}秒后重新收到消息"
+            records.append(self._system_entry(worker_id, INFO, "INFO", message))
+        if not records:
+            return
+
+        if self._reorder is None:
+            self._write_entries(records)
+        else:
+            self._reorder.push(records)
 
+    def _system_entry(self, worker_id: str, level_value: int, level_name: str, message: str) -> QueueLogEntry:
+        """接收端生成的日志记录"""
+        return QueueLogEntry(
+            log_line=create_system_log_line(level_name, message, self.first_start_time),
+            level_value=level_value,
+            worker_id=worker_id,
+            created_ns=time.time_ns()
+        )
+
+    def get_stats(self) -> dict:
+        """按worker的接收统计快照"""
+        return self.stats.snapshot(
+            session_dir=self.session_dir,
+            reorder_pending=len(self._reorder) if self._reorder is not None else 0
+        )
+
+    def _write_stats(self) -> None:
+        """写入log_stats.json"""
+        self._next_stats_write = time.monotonic() + self.stats_interval
+        try:
+            write_stats_file(self.session_dir, self.get_stats())
         except Exception as e:
             try:
-                print(f"关闭日志文件失败: {e}", file=sys.stderr)
+                print(f"写入日志统计失败: {e}", file=sys.stderr)
             except (ValueError, AttributeError):
                 pass
 
+    def _write_entries(self, entries: list) -> None:
+        """将一批QueueLogEntry交给文件写入器"""
+        if not entries or self.writer is None:
+            return
+        self.writer.write_batch([
+            LogEntry(entry.log_line, entry.level_value, entry.logger_name, entry.exception_info, entry.worker_id)
+            for entry in entries
+        ])
+        self.stats.observe_written(entries)
+    
+    def _write_log_entry(self, entry: QueueLogEntry) -> None:
+        """写入日志条目"""
+        self._write_entries([entry])
+    
+    def _close_files(self) -> None:
+        """关闭文件"""
+        if self._reorder is not None:
+            self._write_entries(self._reorder.pop_ready(flush=True))
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+        if self.stats_interval > 0:
+            self._write_stats()
+
 
 # 全局队列日志发送器（用于worker进程）
 _queue_log_sender: Optional[QueueLogSender] = None
@@ -200,8 +946,55 @@ def init_queue_sender(log_queue: mp.Queue, worker_id: str = None) -> None:
     
     if _queue_log_sender is not None:
         return
+
+    # 批量参数从已初始化的配置读取，读取失败时不批量
+    options = {}
+    try:
+        from .config import get_root_config, get_logger_option
+        cfg = get_root_config()
+        options = {
+            'batch_size': get_logger_option(cfg, 'queue_batch_size', 1),
+            'batch_bytes': get_logger_option(cfg, 'queue_batch_bytes', DEFAULT_BATCH_BYTES),
+            'batch_interval': get_logger_option(cfg, 'queue_batch_interval', DEFAULT_BATCH_INTERVAL),
+            'wire_format': get_logger_option(cfg, 'queue_wire_format', WIRE_FORMAT_ENTRY),
+            'spill_max_bytes': get_logger_option(cfg, 'queue_spill_max_bytes', DEFAULT_SPILL_MAX_BYTES),
+            'heartbeat_interval': get_logger_option(cfg, 'queue_heartbeat_interval', DEFAULT_HEARTBEAT_INTERVAL),
+        }
+        # 溢出文件写入会话目录
+        if get_logger_option(cfg, 'queue_spill', False):
+            paths = getattr(cfg, 'paths', None)
+            options['spill_dir'] = paths.get('log_dir') if isinstance(paths, dict) else getattr(paths, 'log_dir', None)
+    except Exception:
+        pass
     
-    _queue_log_sender = QueueLogSender(log_queue, worker_id)
+    # 按worker分组的多个队列时，每个worker固定使用其中一个
+    _queue_log_sender = QueueLogSender(select_queue(log_queue, worker_id), worker_id, **options)
+
+
+def get_receiver_logger_options(cfg) -> dict:
+    """读取接收器用到的logger配置项（值均为基本类型，可传给日志服务进程）"""
+    from .config import get_logger_option
+
+    return {name: get_logger_option(cfg, name, default) for name, default in RECEIVER_OPTION_DEFAULTS.items()}
+
+
+def get_receiver_options(cfg, session_dir: str) -> dict:
+    """根据logger配置生成QueueLogReceiver的构造参数"""
+    options = get_receiver_logger_options(cfg)
+    return {
+        'rotation_max_bytes': options['rotation_max_bytes'],
+        'rotation_interval': options['rotation_interval'],
+        'compressor': create_compressor(cfg, session_dir),
+        'wait_compression_on_close': options['compression_wait_on_close'],
+        'max_module_files': options['max_module_files'],
+        'index_mode': options['index_mode'],
+        'worker_files': options['queue_worker_files'],
+        'receive_batch': options['queue_receive_batch'],
+        'reorder_window': options['queue_reorder_window'],
+        'reorder_max_entries': options['queue_reorder_max_entries'],
+        'stats_interval': options['queue_stats_interval'],
+        'first_start_time': getattr(cfg, 'first_start_time', None),
+    }
 
 
 def init_queue_receiver(log_queue: mp.Queue, session_dir: str) -> None:
@@ -210,23 +1003,86 @@ def init_queue_receiver(log_queue: mp.Queue, session_dir: str) -> None:
     
     if _queue_log_receiver is not None:
         return
+
+    # 轮转与压缩参数从已初始化的配置读取，读取失败时使用默认值
+    options = {}
+    try:
+        from .config import get_root_config
+        options = get_receiver_options(get_root_config(), session_dir)
+    except Exception:
+        pass
     
-    _queue_log_receiver = QueueLogReceiver(log_queue, session_dir)
+    _queue_log_receiver = QueueLogReceiver(log_queue, session_dir, **options)
     _queue_log_receiver.start_receiving()
 
 
-def send_log_to_queue(log_line: str, level_value: int, exception_info: Optional[str] = None) -> None:
+def send_log_to_queue(
+        log_line: str,
+        level_value: int,
+        exception_info: Optional[str] = None,
+        logger_name: Optional[str] = None
+) -> None:
     """发送日志到队列（worker进程调用）"""
     if _queue_log_sender is not None:
-        _queue_log_sender.send_log(log_line, level_value, exception_info)
+        _queue_log_sender.send_log(log_line, level_value, exception_info, logger_name)
 
 
-def shutdown_queue_writer() -> None:
-    """关闭队列写入器"""
-    global _queue_log_sender, _queue_log_receiver
-    
+def get_queue_stats() -> dict:
+    """获取队列模式接收端按worker的统计
+
+    Returns:
+        dict: 条数、字节数、丢弃数和端到端延迟等；本进程没有接收器时返回空字典
+    """
+    receiver = _queue_log_receiver
+    if receiver is None:
+        return {}
+    return receiver.get_stats()
+
+
+def has_pending_queue_logs() -> bool:
+    """本进程的队列发送器是否还有未写入管道的日志"""
+    return _queue_log_sender is not None and _queue_log_sender.has_pending()
+
+
+def shutdown_queue_sender(wait_queue: bool = False) -> None:
+    """关闭本进程的队列发送器（发送剩余的批量日志）
+
+    Args:
+        wait_queue: 关闭发送器后关闭mp.Queue并等待其后台线程把数据写入管道
+                    （进程即将被信号结束时使用，正常退出由队列自身的终结器完成）
+    """
+    global _queue_log_sender
+
+    if _queue_log_sender is not None:
+        _queue_log_sender.close()
+        log_queue = _queue_log_sender.log_queue
+        if wait_queue and hasattr(log_queue, 'join_thread'):
+            try:
+                log_queue.close()
+                log_queue.join_thread()
+            except Exception:
+                pass
+
+    _queue_log_sender = None
+
+
+def shutdown_queue_receiver() -> None:
+    """停止队列接收器（停止信号之前已入队的日志会先写入）
+
+    socket汇聚等向接收队列转发日志的来源需在此之前停止，否则之后到达的日志会丢失。
+    """
+    global _queue_log_receiver
+
     if _queue_log_receiver is not None:
         _queue_log_receiver.stop_receiving()
         _queue_log_receiver = None
-    
-    _queue_log_sender = None 
\ No newline at end of file
+
+
+def shutdown_queue_writer(wait_queue: bool = False) -> None:
+    """关闭队列写入器（先关闭发送器，再停止接收器）
+
+    Args:
+        wait_queue: 见shutdown_queue_sender
+    """
+    shutdown_queue_sender(wait_queue)
+    shutdown_queue_receiver()
\ No newline at end of file
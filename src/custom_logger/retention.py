@@ -0,0 +1,374 @@
+# src/custom_logger/retention.py
+"""
+会话目录保留与清理模块
+
+日志目录结构为 base_dir/{debug}/project/experiment/yyyy-mm-dd/HHMMSS，
+按实验（experiment）分组应用保留规则：
+- 最大保留天数
+- 最大总字节数
+- 最大会话数
+会话时间从目录名解析，目录遍历使用os.scandir，当前会话始终保留。
+主程序初始化时在会话目录写入活动标记（pid和主机名），关闭时删除；
+其他进程清理时跳过仍在运行的会话，并发运行的实验不会互相删除正在写入的会话。
+"""
+from __future__ import annotations
+
+import os
+import shutil
+import socket
+import sys
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+# 会话活动标记文件名
+ACTIVE_MARKER_FILE = "session.active"
+
+# 后台清理线程
+_retention_thread: Optional[threading.Thread] = None
+
+# 当前进程写入的活动标记路径
+_active_marker: Optional[str] = None
+
+
+@dataclass
+class RetentionPolicy:
+    """保留策略，各项为0表示不限制"""
+    max_age_days: float = 0.0
+    max_total_bytes: int = 0
+    max_sessions: int = 0
+
+    def is_enabled(self) -> bool:
+        """是否启用了任意规则"""
+        return self.max_age_days > 0 or self.max_total_bytes > 0 or self.max_sessions > 0
+
+
+@dataclass
+class SessionInfo:
+    """会话目录信息"""
+    path: str
+    experiment_dir: str
+    started: datetime
+    size_bytes: int
+    active: bool = False  # 是否有仍在运行的进程写入
+    reason: Optional[str] = None  # 计划删除的原因
+
+
+@dataclass
+class RetentionReport:
+    """保留计划（dry-run报告）"""
+    project_dir: str
+    policy: RetentionPolicy
+    kept: List[SessionInfo] = field(default_factory=list)
+    to_delete: List[SessionInfo] = field(default_factory=list)
+
+    @property
+    def reclaimed_bytes(self) -> int:
+        """计划释放的字节数"""
+        return sum(session.size_bytes for session in self.to_delete)
+
+    def format(self) -> str:
+        """格式化为可读文本"""
+        lines = [
+            f"日志保留计划: {self.project_dir}",
+            f"  保留会话: {len(self.kept)}，删除会话: {len(self.to_delete)}，释放: {self.reclaimed_bytes:,} 字节",
+        ]
+        for session in self.to_delete:
+            lines.append(f"  - {session.path} ({session.size_bytes:,} 字节, {session.reason})")
+        return "\n".join(lines)
+
+
+def _dir_size(path: str) -> int:
+    """使用os.scandir递归统计目录字节数（每个文件只stat一次）"""
+    total = 0
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        total += _dir_size(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        total += entry.stat(follow_symlinks=False).st_size
+                except OSError:
+                    continue
+    except OSError:
+        pass
+    return total
+
+
+def _scan_subdirs(path: str) -> List[os.DirEntry]:
+    """列出子目录"""
+    try:
+        with os.scandir(path) as entries:
+            return [entry for entry in entries if entry.is_dir(follow_symlinks=False)]
+    except OSError:
+        return []
+
+
+def mark_session_active(session_dir: str) -> None:
+    """在会话目录写入活动标记（主程序初始化时调用）
+
+    自定义log_dir（不是.../yyyy-mm-dd/HHMMSS布局）不会被清理，不写标记。
+    """
+    global _active_marker
+
+    if get_project_dir(session_dir) is None:
+        return
+    marker = os.path.join(session_dir, ACTIVE_MARKER_FILE)
+    try:
+        with open(marker, 'w', encoding='utf-8') as f:
+            f.write(f"{os.getpid()} {socket.gethostname()}")
+    except OSError as e:
+        try:
+            print(f"写入会话活动标记失败 {marker}: {e}", file=sys.stderr)
+        except (ValueError, AttributeError):
+            pass
+        return
+    _active_marker = marker
+    return
+
+
+def clear_session_active() -> None:
+    """删除当前进程写入的活动标记（主程序关闭时调用）"""
+    global _active_marker
+
+    if _active_marker is None:
+        return
+    try:
+        os.remove(_active_marker)
+    except OSError:
+        pass
+    _active_marker = None
+    return
+
+
+def is_session_active(session_dir: str) -> bool:
+    """会话是否仍有进程在写入
+
+    没有活动标记，或标记中的进程在本机已退出（被强制结束时标记残留）时返回False；
+    标记来自其他主机或无法解析时按活动处理，不删除。
+    """
+    from .shm_ring import _pid_alive
+
+    try:
+        with open(os.path.join(session_dir, ACTIVE_MARKER_FILE), 'r', encoding='utf-8') as f:
+            content = f.read().split()
+    except FileNotFoundError:
+        return False
+    except OSError:
+        return True
+
+    try:
+        pid, host = int(content[0]), content[1]
+    except (IndexError, ValueError):
+        return True
+    if host != socket.gethostname():
+        return True
+    return _pid_alive(pid)
+
+
+def scan_sessions(project_dir: str) -> Dict[str, List[SessionInfo]]:
+    """扫描项目目录下的所有会话
+
+    Args:
+        project_dir: base_dir/{debug}/project 目录
+
+    Returns:
+        Dict[str, List[SessionInfo]]: {实验目录: 按开始时间升序排列的会话}
+    """
+    sessions: Dict[str, List[SessionInfo]] = {}
+    for experiment in _scan_subdirs(project_dir):
+        experiment_sessions = []
+        for date_entry in _scan_subdirs(experiment.path):
+            for time_entry in _scan_subdirs(date_entry.path):
+                try:
+                    started = datetime.strptime(f"{date_entry.name} {time_entry.name}", "%Y-%m-%d %H%M%S")
+                except ValueError:
+                    continue  # 不是会话目录
+                experiment_sessions.append(
+                    SessionInfo(
+                        path=time_entry.path,
+                        experiment_dir=experiment.path,
+                        started=started,
+                        size_bytes=_dir_size(time_entry.path),
+                        active=is_session_active(time_entry.path),
+                    )
+                )
+        if experiment_sessions:
+            experiment_sessions.sort(key=lambda session: session.started)
+            sessions[experiment.path] = experiment_sessions
+    return sessions
+
+
+def get_project_dir(session_dir: str) -> Optional[str]:
+    """由会话目录推导项目目录（向上三级：时间/日期/实验）
+
+    会话目录不是.../yyyy-mm-dd/HHMMSS布局（例如自定义的log_dir）时返回None。
+    """
+    path = os.path.normpath(session_dir)
+    date_dir, time_name = os.path.split(path)
+    try:
+        datetime.strptime(f"{os.path.basename(date_dir)} {time_name}", "%Y-%m-%d %H%M%S")
+    except ValueError:
+        return None
+    return os.path.dirname(os.path.dirname(date_dir))
+
+
+def _same_dir(left: str, right: str) -> bool:
+    return os.path.normcase(os.path.abspath(left)) == os.path.normcase(os.path.abspath(right))
+
+
+def plan_retention(
+        project_dir: str,
+        policy: RetentionPolicy,
+        current_session_dir: Optional[str] = None,
+        now: Optional[datetime] = None
+) -> RetentionReport:
+    """计算保留计划，不删除任何文件
+
+    Args:
+        project_dir: 项目目录
+        policy: 保留策略
+        current_session_dir: 当前会话目录（始终保留，其他仍在运行的会话同样保留）
+        now: 当前时间（默认datetime.now()）
+
+    Returns:
+        RetentionReport: 保留计划
+    """
+    now = now or datetime.now()
+    current = os.path.normcase(os.path.normpath(current_session_dir)) if current_session_dir else None
+    report = RetentionReport(project_dir=project_dir, policy=policy)
+
+    for experiment_sessions in scan_sessions(project_dir).values():
+        kept: List[SessionInfo] = []
+        for session in experiment_sessions:
+            is_current = current is not None and os.path.normcase(os.path.normpath(session.path)) == current
+            is_current = is_current or session.active
+            if (not is_current and policy.max_age_days > 0 and
+                    now - session.started > timedelta(days=policy.max_age_days)):
+                session.reason = f"超过{policy.max_age_days:g}天"
+                report.to_delete.append(session)
+            else:
+                kept.append(session)
+
+        # 会话数和总字节数规则：从最旧的会话开始删除
+        total_bytes = sum(session.size_bytes for session in kept)
+        remaining = len(kept)
+        survivors = []
+        for session in kept:
+            is_current = current is not None and os.path.normcase(os.path.normpath(session.path)) == current
+            is_current = is_current or session.active
+            over_count = policy.max_sessions > 0 and remaining > policy.max_sessions
+            over_bytes = policy.max_total_bytes > 0 and total_bytes > policy.max_total_bytes
+            if not is_current and (over_count or over_bytes):
+                session.reason = f"超过{policy.max_sessions}个会话" if over_count else f"超过{policy.max_total_bytes:,}字节"
+                report.to_delete.append(session)
+                remaining -= 1
+                total_bytes -= session.size_bytes
+            else:
+                survivors.append(session)
+        report.kept.extend(survivors)
+
+    return report
+
+
+def apply_retention(report: RetentionReport) -> int:
+    """执行保留计划，删除会话目录并清理空的日期目录
+
+    Returns:
+        int: 成功删除的会话数
+    """
+    deleted = 0
+    for session in report.to_delete:
+        try:
+            shutil.rmtree(session.path)
+            deleted += 1
+        except OSError as e:
+            try:
+                print(f"删除日志会话失败 {session.path}: {e}", file=sys.stderr)
+            except (ValueError, AttributeError):
+                pass
+            continue
+
+        date_dir = os.path.dirname(session.path)
+        try:
+            os.rmdir(date_dir)  # 仅在目录为空时成功
+        except OSError:
+            pass
+    return deleted
+
+
+def get_retention_policy(cfg: Any) -> RetentionPolicy:
+    """从logger配置读取保留策略"""
+    from .config import get_logger_option
+
+    return RetentionPolicy(
+        max_age_days=get_logger_option(cfg, 'retention_max_age_days', 0.0),
+        max_total_bytes=get_logger_option(cfg, 'retention_max_total_bytes', 0),
+        max_sessions=get_logger_option(cfg, 'retention_max_sessions', 0),
+    )
+
+
+def get_retention_report(session_dir: str, policy: RetentionPolicy) -> RetentionReport:
+    """dry-run：返回当前会话所在项目的保留计划
+
+    Args:
+        session_dir: 当前会话目录（config.paths.log_dir）
+        policy: 保留策略
+
+    Raises:
+        ValueError: 会话目录不是base_dir/{debug}/project/experiment/yyyy-mm-dd/HHMMSS布局
+    """
+    project_dir = get_project_dir(session_dir)
+    if project_dir is None:
+        raise ValueError(f"日志目录不是按日期/时间创建的会话目录: {session_dir}")
+    return plan_retention(project_dir, policy, current_session_dir=session_dir)
+
+
+def _retention_worker(session_dir: str, policy: RetentionPolicy) -> None:
+    """后台清理线程主函数"""
+    try:
+        report = get_retention_report(session_dir, policy)
+        if report.to_delete:
+            deleted = apply_retention(report)
+            print(f"日志保留清理: 删除{deleted}个会话，释放{report.reclaimed_bytes:,}字节")
+    except Exception as e:
+        try:
+            print(f"日志保留清理失败: {e}", file=sys.stderr)
+        except (ValueError, AttributeError):
+            pass
+    return
+
+
+def start_retention(cfg: Any, session_dir: str) -> Optional[threading.Thread]:
+    """按配置在后台线程中执行一次保留清理
+
+    Returns:
+        Optional[threading.Thread]: 未启用任何规则时返回None
+    """
+    global _retention_thread
+
+    from .config import get_project_log_dir
+
+    policy = get_retention_policy(cfg)
+    if not policy.is_enabled():
+        return None
+
+    # 只清理_create_log_dir创建的目录树：会话目录必须位于base_dir/{debug}/project_name下，
+    # 自定义log_dir时不向上推导项目目录，避免扫描和删除无关目录
+    project_dir = get_project_dir(session_dir)
+    expected_dir = get_project_log_dir(cfg)
+    if project_dir is None or expected_dir is None or not _same_dir(project_dir, expected_dir):
+        try:
+            print(f"日志目录不在base_dir/project_name/实验/日期/时间布局下，跳过会话保留清理: {session_dir}",
+                  file=sys.stderr)
+        except (ValueError, AttributeError):
+            pass
+        return None
+
+    _retention_thread = threading.Thread(
+        target=_retention_worker, args=(session_dir, policy), name="custom_logger_retention", daemon=True
+    )
+    _retention_thread.start()
+    return _retention_thread
@@ -0,0 +1,236 @@
+# src/custom_logger/shards.py
+"""
+worker分片日志与合并
+
+分片模式（logger.worker_shards）下每个worker不经过队列，直接用批量写入器写入
+会话目录下自己的full.w{id}.log，各worker之间没有IPC和共享文件，磁盘吞吐随worker数增长。
+主程序在tear_down_custom_logger_system时（或按需调用）把分片按时间流式k路归并为
+full.log和warning.log：
+
+    python -m custom_logger.shards <session_dir> [--keep-shards]
+
+排序键为(日志行中相对first_start_time的耗时字段, 输入序号)：耗时字段各进程共用同一起点，
+精度0.01秒，耗时相同时主程序在前、分片按文件名顺序，每一路内的顺序不变。
+主程序自己的full.log同样作为一路输入；每一路先读已轮转的分段（full.0001.log等，
+含已压缩的分段）再读当前文件，合并后已并入的分段（以及重新生成warning.log时旧的warning分段）被删除。
+会话目录存在full.idx（索引模式）时合并的同时重建full.idx，warning.log与索引模式一样按需重建，
+合并时不生成。
+"""
+from __future__ import annotations
+
+import argparse
+import heapq
+import itertools
+import os
+import re
+import sys
+from typing import Iterator, List, Optional, Tuple
+from .compression import CODEC_EXTENSIONS, open_segment
+from .log_file import find_segments, segment_path
+from .log_index import INDEX_FILE_NAME, UNNAMED_MODULE, LogIndexWriter
+from .types import WARNING, parse_level_name
+
+# 分片文件名：full.w{worker_id}.log
+SHARD_PREFIX = "full.w"
+SHARD_SUFFIX = ".log"
+
+# 日志行头："[  pid | module : line] 2025-01-01 12:00:00 - 0:12:34.56 -    INFO    - 消息"
+# 进程字段可能附加含"|"的线程名，模块字段按" : 行号]"后缀之前最后一个" | "定位
+LINE_PATTERN = re.compile(
+    rb'^\[[^\]]* \| ([^\]]*) : *\d+\] \d{4}-\d\d-\d\d \d\d:\d\d:\d\d - (\d+):(\d\d):(\d\d(?:\.\d+)?) - +(\S+) +- '
+)
+
+# 读取分段的块大小（解压流不一定支持按行读取）
+READ_CHUNK_SIZE = 1 << 20
+
+
+def shard_file_name(worker_id: str) -> str:
+    """worker分片文件名（去掉路径分隔符）"""
+    safe_id = str(worker_id).replace('/', '_').replace('\\', '_')
+    return f"{SHARD_PREFIX}{safe_id}{SHARD_SUFFIX}"
+
+
+def find_shards(session_dir: str) -> List[str]:
+    """会话目录下的所有分片文件（按文件名排序）"""
+    try:
+        names = os.listdir(session_dir)
+    except FileNotFoundError:
+        return []
+    return [
+        os.path.join(session_dir, name) for name in sorted(names)
+        if name.startswith(SHARD_PREFIX) and name.endswith(SHARD_SUFFIX) and not _is_segment_name(name)
+    ]
+
+
+def _is_segment_name(name: str) -> bool:
+    """是否为轮转分段文件名（例如full.w1.0001.log）"""
+    stem = name[:-len(SHARD_SUFFIX)]
+    return re.search(r'\.\d{4,}$', stem) is not None
+
+
+def _parse_level(name: bytes) -> int:
+    try:
+        return parse_level_name(name.decode('ascii', errors='replace'))
+    except ValueError:
+        return 0
+
+
+def _iter_lines(f) -> Iterator[bytes]:
+    """按块读取并拆分为行（保留换行符）"""
+    rest = b''
+    while True:
+        chunk = f.read(READ_CHUNK_SIZE)
+        if not chunk:
+            break
+        lines = (rest + chunk).split(b'\n')
+        rest = lines.pop()
+        for line in lines:
+            yield line + b'\n'
+    if rest:
+        yield rest
+
+
+def iter_records(path: str) -> Iterator[Tuple[float, int, str, bytes]]:
+    """逐条读取日志文件，返回(耗时秒数, 级别, 模块名, 原始字节)
+
+    文件不存在时读取已压缩的同名分段。不以日志行头开始的行（异常堆栈等）归入上一条记录。
+    """
+    key, level, module, parts = 0.0, 0, UNNAMED_MODULE, []
+    with open_segment(path) as f:
+        for line in _iter_lines(f):
+            match = LINE_PATTERN.match(line)
+            if match is None:
+                parts.append(line)
+                continue
+            if parts:
+                yield key, level, module, b''.join(parts)
+            module_name, hours, minutes, seconds, level_name = match.groups()
+            key = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+            level = _parse_level(level_name)
+            module = module_name.decode('utf-8', errors='replace').strip()
+            parts = [line]
+    if parts:
+        yield key, level, module, b''.join(parts)
+
+
+def _input_paths(path: str) -> List[str]:
+    """一路输入的所有文件：已轮转的分段（按序号）和当前文件"""
+    paths = [segment for _, segment in find_segments(path)]
+    if os.path.exists(path):
+        paths.append(path)
+    return paths
+
+
+def _iter_input(order: int, path: str) -> Iterator[Tuple[float, int, int, str, bytes]]:
+    """按顺序读取一路输入，记录附加输入序号作为耗时相同时的排序键"""
+    for key, level, module, data in itertools.chain.from_iterable(iter_records(p) for p in _input_paths(path)):
+        yield key, order, level, module, data
+
+
+def _remove_file(path: str) -> None:
+    """删除分段文件（含已压缩的同名文件）"""
+    for candidate in [path] + [path + ext for ext in CODEC_EXTENSIONS.values()]:
+        try:
+            os.remove(candidate)
+        except FileNotFoundError:
+            pass
+        except OSError:
+            pass
+    return
+
+
+def merge_shards(session_dir: str, remove_shards: bool = True) -> int:
+    """把分片和已有的full.log（含轮转分段）按时间归并为full.log和warning.log
+
+    全程流式读写，内存占用与分片数成正比。索引模式下重建full.idx，不生成warning.log。
+
+    Args:
+        session_dir: 会话日志目录
+        remove_shards: 合并完成后是否删除分片
+
+    Returns:
+        int: 合并的分片数
+    """
+    shards = find_shards(session_dir)
+    if not shards:
+        return 0
+
+    full_path = os.path.join(session_dir, "full.log")
+    index_path = os.path.join(session_dir, INDEX_FILE_NAME)
+    index_mode = os.path.exists(index_path)
+    main_segments = find_segments(full_path)
+    inputs = [full_path] + shards
+    records = heapq.merge(
+        *(_iter_input(order, path) for order, path in enumerate(inputs)),
+        key=lambda record: (record[0], record[1])
+    )
+
+    warning_path = os.path.join(session_dir, "warning.log")
+    warning_segments = []
+    if index_mode:
+        _merge_indexed(session_dir, full_path, index_path, records)
+    else:
+        # 主程序已轮转的warning分段中的记录同样来自full分段，合并后只保留新的warning.log
+        warning_segments = find_segments(warning_path)
+        full_tmp = full_path + ".merging"
+        warning_tmp = warning_path + ".merging"
+        with open(full_tmp, 'wb') as full_out, open(warning_tmp, 'wb') as warning_out:
+            for _, _, level, _, data in records:
+                full_out.write(data)
+                if level >= WARNING:
+                    warning_out.write(data)
+        os.replace(full_tmp, full_path)
+        os.replace(warning_tmp, warning_path)
+
+    # 主程序的轮转分段已并入full.log（和warning.log）
+    for number, path in main_segments:
+        _remove_file(path)
+        _remove_file(segment_path(index_path, number))
+    for _, path in warning_segments:
+        _remove_file(path)
+
+    if remove_shards:
+        for shard in shards:
+            for path in _input_paths(shard):
+                _remove_file(path)
+    return len(shards)
+
+
+def _merge_indexed(
+        session_dir: str,
+        full_path: str,
+        index_path: str,
+        records: Iterator[Tuple[float, int, int, str, bytes]]
+) -> None:
+    """索引模式的合并：写入full.log的同时重建full.idx（模块名表沿用并追加）"""
+    index_writer = LogIndexWriter(session_dir)
+    full_tmp = full_path + ".merging"
+    index_tmp = index_path + ".merging"
+    try:
+        offset = 0
+        with open(full_tmp, 'wb') as full_out, open(index_tmp, 'wb') as index_out:
+            for _, _, level, module, data in records:
+                full_out.write(data)
+                index_out.write(index_writer.pack(offset, len(data), level, module))
+                offset += len(data)
+    finally:
+        index_writer.close()
+    os.replace(full_tmp, full_path)
+    os.replace(index_tmp, index_path)
+    return
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="将worker分片full.w{id}.log按时间合并为full.log和warning.log")
+    parser.add_argument("session_dir", help="会话日志目录")
+    parser.add_argument("--keep-shards", action="store_true", help="合并后保留分片文件")
+    args = parser.parse_args(argv)
+
+    count = merge_shards(args.session_dir, remove_shards=not args.keep_shards)
+    print(f"合并分片: {count} 个")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,455 @@
+# src/custom_logger/shm_ring.py
+"""
+共享内存环形缓冲区传输
+
+同一主机上的worker可以用ShmLogTransport代替mp.Queue作为queue_info.log_queue：
+- 每个worker独占一个单生产者/单消费者环形缓冲区（multiprocessing.shared_memory）
+- 日志编码为wire模块的紧凑帧直接拷入共享内存，不经过pickle和管道
+- 接收端空闲时设置等待标志，worker写入后通过Event“门铃”唤醒
+- 接收端按批轮询所有环形缓冲区
+- 停止信号写入共享控制区，任意进程（例如关闭独立日志服务进程的主程序）放入的停止信号
+  都能被接收端看到；接收端取完所有环中的数据后才返回停止信号
+- 槽位头记录占用进程的pid：被SIGKILL、崩溃或按maxtasksperchild回收的worker没有释放的槽位，
+  在槽位不足时由新进程回收；槽位全部被存活进程占用时，新进程改用内部的mp.Queue发送
+
+ShmLogTransport实现了QueueLogSender/QueueLogReceiver用到的put_nowait/get接口，
+与mp.Queue一样只能在创建进程时传给子进程（fork和spawn均可）。
+"""
+from __future__ import annotations
+
+import atexit
+import collections
+import multiprocessing as mp
+import os
+import queue
+import struct
+import sys
+import threading
+import time
+from multiprocessing import shared_memory
+from multiprocessing.context import BaseContext
+from multiprocessing import util as mp_util
+from typing import Any, Deque, Optional
+
+from .wire import encode_entries, is_frame
+
+# 控制区：magic, 槽位数, 每个环的容量, 接收端等待标志, 停止标志
+CONTROL_HEADER = struct.Struct('<IIIII')
+WAITING_OFFSET = 12
+STOP_OFFSET = 16
+# 每个槽位：占用进程pid, 保留, 写位置(u64), 读位置(u64)
+SLOT_HEADER = struct.Struct('<IIQQ')
+# 每条记录的长度前缀
+RECORD_LENGTH = struct.Struct('<I')
+
+SHM_MAGIC = 0x434C5352  # "CLSR"
+WRAP_MARKER = 0xFFFFFFFF
+STOP_SIGNAL = "STOP_LOGGING"
+
+# 默认槽位数和每个环的容量
+DEFAULT_SLOTS = 64
+DEFAULT_RING_BYTES = 1 << 20
+
+# 阻塞put等待接收端腾出空间时的轮询间隔（秒），指数退避
+PUT_RETRY_MIN = 0.001
+PUT_RETRY_MAX = 0.05
+
+# 同一进程内的日志线程、刷新线程和心跳线程共用一个环，写入需要串行；fork后在子进程中重建
+_write_lock = threading.Lock()
+
+
+def _reset_write_lock() -> None:
+    global _write_lock
+    _write_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_write_lock)
+
+
+def _attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """附加到已有共享内存，避免子进程的resource_tracker在退出时误删"""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+    return shm
+
+
+def _pid_alive(pid: int) -> bool:
+    """进程是否存活（无法判断时按存活处理，不回收其槽位）"""
+    if os.name == 'nt':
+        return True  # Windows上os.kill会结束目标进程
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+class ShmLogTransport:
+    """共享内存环形缓冲区日志传输
+
+    Args:
+        slots: 槽位数（同时写日志的worker进程上限）
+        ring_bytes: 每个环形缓冲区的字节数
+        batch_limit: 接收端每轮从每个环最多取出的帧数
+        context: multiprocessing上下文，需与创建worker进程的上下文一致
+    """
+
+    def __init__(
+            self,
+            slots: int = DEFAULT_SLOTS,
+            ring_bytes: int = DEFAULT_RING_BYTES,
+            batch_limit: int = 256,
+            context: Optional[BaseContext] = None,
+    ):
+        self.slots = slots
+        self.ring_bytes = ring_bytes
+        self.batch_limit = batch_limit
+        self._slot_offset = CONTROL_HEADER.size
+        self._data_offset = self._slot_offset + SLOT_HEADER.size * slots
+        size = self._data_offset + ring_bytes * slots
+
+        self._shm = shared_memory.SharedMemory(create=True, size=size)
+        self._owner_pid = os.getpid()
+        context = context or mp.get_context()
+        self._claim_lock = context.Lock()
+        self._doorbell = context.Event()
+        # 槽位用尽时的后备队列（与mp.Queue模式相同的路径）
+        self._overflow = context.Queue()
+        CONTROL_HEADER.pack_into(self._shm.buf, 0, SHM_MAGIC, slots, ring_bytes, 0, 0)
+        for slot in range(slots):
+            SLOT_HEADER.pack_into(self._shm.buf, self._slot_offset + slot * SLOT_HEADER.size, 0, 0, 0, 0)
+
+        self._init_local_state()
+        atexit.register(self.unlink)
+        pass
+
+    def _init_local_state(self) -> None:
+        """初始化进程本地状态（不参与序列化）"""
+        self._slot: Optional[int] = None
+        self._slot_pid: Optional[int] = None
+        self._pending: Deque[bytes] = collections.deque()
+        self._next_slot = 0
+        self._overflow_pid: Optional[int] = None
+        return
+
+    def __getstate__(self) -> dict:
+        """序列化共享内存名称以及锁和门铃（仅在创建子进程时有效）"""
+        return {
+            'name': self._shm.name,
+            'slots': self.slots,
+            'ring_bytes': self.ring_bytes,
+            'batch_limit': self.batch_limit,
+            'owner_pid': self._owner_pid,
+            'claim_lock': self._claim_lock,
+            'doorbell': self._doorbell,
+            'overflow': self._overflow,
+        }
+
+    def __setstate__(self, state: dict) -> None:
+        """在子进程中附加到共享内存"""
+        self.slots = state['slots']
+        self.ring_bytes = state['ring_bytes']
+        self.batch_limit = state['batch_limit']
+        self._owner_pid = state['owner_pid']
+        self._claim_lock = state['claim_lock']
+        self._doorbell = state['doorbell']
+        self._overflow = state['overflow']
+        self._slot_offset = CONTROL_HEADER.size
+        self._data_offset = self._slot_offset + SLOT_HEADER.size * self.slots
+        self._shm = _attach_shared_memory(state['name'])
+        self._init_local_state()
+        return
+
+    @property
+    def name(self) -> str:
+        """共享内存名称"""
+        return self._shm.name
+
+    # ------------------------------------------------------------------
+    # 槽位头读写
+    # ------------------------------------------------------------------
+
+    def _slot_header_offset(self, slot: int) -> int:
+        return self._slot_offset + slot * SLOT_HEADER.size
+
+    def _read_slot(self, slot: int) -> tuple:
+        return SLOT_HEADER.unpack_from(self._shm.buf, self._slot_header_offset(slot))
+
+    def _set_owner(self, slot: int, pid: int) -> None:
+        struct.pack_into('<I', self._shm.buf, self._slot_header_offset(slot), pid)
+
+    def _set_write_pos(self, slot: int, position: int) -> None:
+        struct.pack_into('<Q', self._shm.buf, self._slot_header_offset(slot) + 8, position)
+
+    def _set_read_pos(self, slot: int, position: int) -> None:
+        struct.pack_into('<Q', self._shm.buf, self._slot_header_offset(slot) + 16, position)
+
+    def _set_waiting(self, waiting: bool) -> None:
+        struct.pack_into('<I', self._shm.buf, WAITING_OFFSET, 1 if waiting else 0)
+
+    def _is_waiting(self) -> bool:
+        return struct.unpack_from('<I', self._shm.buf, WAITING_OFFSET)[0] == 1
+
+    def _set_stop(self, stop: bool) -> None:
+        struct.pack_into('<I', self._shm.buf, STOP_OFFSET, 1 if stop else 0)
+
+    def _is_stop_requested(self) -> bool:
+        return struct.unpack_from('<I', self._shm.buf, STOP_OFFSET)[0] == 1
+
+    # ------------------------------------------------------------------
+    # 生产者（worker进程）
+    # ------------------------------------------------------------------
+
+    def _find_slot(self) -> Optional[int]:
+        """查找空闲槽位，没有时回收占用进程已退出的槽位（调用方持有_claim_lock）"""
+        owners = [self._read_slot(slot)[0] for slot in range(self.slots)]
+        for slot, owner in enumerate(owners):
+            if owner == 0:
+                return slot
+        for slot, owner in enumerate(owners):
+            if not _pid_alive(owner):
+                # 环中未读取的数据保留，新进程从原写位置继续写入
+                return slot
+        return None
+
+    def _claim_slot(self) -> Optional[int]:
+        """为当前进程占用一个槽位，槽位全部被存活进程占用时返回None（改用后备队列）"""
+        pid = os.getpid()
+        with self._claim_lock:
+            slot = self._find_slot()
+            if slot is not None:
+                self._set_owner(slot, pid)
+
+        if slot is None:
+            self._overflow_pid = pid
+            try:
+                print(f"共享内存日志槽位已用尽（{self.slots}个），进程{pid}改用队列发送日志", file=sys.stderr)
+            except (ValueError, AttributeError):
+                pass
+            return None
+
+        self._slot = slot
+        self._slot_pid = pid
+        atexit.register(self.release_slot)
+        # multiprocessing子进程退出时不执行atexit
+        mp_util.Finalize(self, self.release_slot, exitpriority=50)
+        return slot
+
+    def release_slot(self) -> None:
+        """释放当前进程占用的槽位（未读取的数据保留给接收端）"""
+        if self._slot is None or self._slot_pid != os.getpid():
+            return
+        try:
+            self._set_owner(self._slot, 0)
+        except Exception:
+            pass
+        self._slot = None
+        return
+
+    def _write_frame(self, frame: bytes) -> None:
+        """将一帧写入本进程的环形缓冲区"""
+        need = RECORD_LENGTH.size + len(frame)
+        if need > self.ring_bytes:
+            raise ValueError(f"日志帧过大: {len(frame)} 字节，环形缓冲区容量 {self.ring_bytes} 字节")
+
+        with _write_lock:
+            pid = os.getpid()
+            if self._overflow_pid != pid and (self._slot is None or self._slot_pid != pid):
+                self._claim_slot()  # fork后的子进程需要重新占用槽位
+            if self._overflow_pid == pid:
+                self._overflow.put_nowait(frame)
+                if self._is_waiting():
+                    self._doorbell.set()
+                return
+            self._write_to_ring(self._slot, frame, need)
+        return
+
+    def _write_to_ring(self, slot: int, frame: bytes, need: int) -> None:
+        """写入一帧并发布写位置（调用方持有_write_lock）"""
+        capacity = self.ring_bytes
+        _, _, write_pos, read_pos = self._read_slot(slot)
+        offset = write_pos % capacity
+        skip = capacity - offset if offset + need > capacity else 0
+        if capacity - (write_pos - read_pos) < skip + need:
+            raise queue.Full
+
+        buf = self._shm.buf
+        base = self._data_offset + slot * capacity
+        if skip:
+            # 尾部空间不足，写入回绕标记后从头开始
+            if skip >= RECORD_LENGTH.size:
+                RECORD_LENGTH.pack_into(buf, base + offset, WRAP_MARKER)
+            offset = 0
+        RECORD_LENGTH.pack_into(buf, base + offset, len(frame))
+        start = base + offset + RECORD_LENGTH.size
+        buf[start:start + len(frame)] = frame
+
+        # 数据写完后再发布写位置
+        self._set_write_pos(slot, write_pos + skip + need)
+        if self._is_waiting():
+            self._doorbell.set()
+        return
+
+    def put_nowait(self, item: Any) -> None:
+        """写入日志（QueueLogEntry、其列表或紧凑帧），缓冲区满时抛出queue.Full"""
+        if isinstance(item, str):
+            if item == STOP_SIGNAL:
+                # 停止标志在共享控制区，接收端不在本进程时同样可见
+                self._set_stop(True)
+                self._doorbell.set()
+            return
+
+        if is_frame(item):
+            frame = bytes(item)
+        elif isinstance(item, list):
+            frame = encode_entries(item)
+        else:
+            frame = encode_entries((item,))
+        self._write_frame(frame)
+        return
+
+    def put(self, item: Any, block: bool = True, timeout: Optional[float] = None) -> None:
+        """与mp.Queue接口兼容的put
+
+        环形缓冲区已满时按block/timeout等待接收端取走数据（退避轮询），超时抛出queue.Full。
+        """
+        if not block:
+            self.put_nowait(item)
+            return
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        delay = PUT_RETRY_MIN
+        while True:
+            try:
+                self.put_nowait(item)
+                return
+            except queue.Full:
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise
+            wait_time = delay if deadline is None else min(delay, max(0.0, deadline - time.monotonic()))
+            time.sleep(wait_time)
+            delay = min(delay * 2, PUT_RETRY_MAX)
+
+    # ------------------------------------------------------------------
+    # 消费者（主程序接收线程）
+    # ------------------------------------------------------------------
+
+    def _drain_slot(self, slot: int) -> int:
+        """从单个环中最多取出batch_limit帧"""
+        _, _, write_pos, read_pos = self._read_slot(slot)
+        if write_pos == read_pos:
+            return 0
+
+        capacity = self.ring_bytes
+        buf = self._shm.buf
+        base = self._data_offset + slot * capacity
+        taken = 0
+        while read_pos < write_pos and taken < self.batch_limit:
+            offset = read_pos % capacity
+            remaining = capacity - offset
+            if remaining < RECORD_LENGTH.size:
+                read_pos += remaining
+                continue
+            length = RECORD_LENGTH.unpack_from(buf, base + offset)[0]
+            if length == WRAP_MARKER:
+                read_pos += remaining
+                continue
+            start = base + offset + RECORD_LENGTH.size
+            self._pending.append(bytes(buf[start:start + length]))
+            read_pos += RECORD_LENGTH.size + length
+            taken += 1
+
+        self._set_read_pos(slot, read_pos)
+        return taken
+
+    def _drain_overflow(self) -> int:
+        """从后备队列中最多取出batch_limit帧"""
+        taken = 0
+        while taken < self.batch_limit:
+            try:
+                self._pending.append(self._overflow.get_nowait())
+            except queue.Empty:
+                break
+            taken += 1
+        return taken
+
+    def drain(self) -> int:
+        """轮询所有环和后备队列，将可读帧放入本地待处理队列"""
+        total = 0
+        for offset in range(self.slots):
+            slot = (self._next_slot + offset) % self.slots
+            total += self._drain_slot(slot)
+        self._next_slot = (self._next_slot + 1) % self.slots
+        return total + self._drain_overflow()
+
+    def get(self, block: bool = True, timeout: Optional[float] = None) -> Any:
+        """取出一帧，无数据时等待门铃，超时抛出queue.Empty"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if self._pending:
+                return self._pending.popleft()
+            if self.drain():
+                continue
+            # 所有环都已取空后才返回停止信号，停止信号之前写入的日志不会丢失
+            if self._is_stop_requested():
+                self._set_stop(False)
+                return STOP_SIGNAL
+            if not block:
+                raise queue.Empty
+
+            # 设置等待标志后再检查一次，避免丢失唤醒
+            self._set_waiting(True)
+            try:
+                if self.drain() or self._is_stop_requested():
+                    continue
+                wait_time = 0.1 if deadline is None else min(0.1, deadline - time.monotonic())
+                if wait_time <= 0:
+                    raise queue.Empty
+                self._doorbell.wait(wait_time)
+                self._doorbell.clear()
+            finally:
+                self._set_waiting(False)
+
+    def get_nowait(self) -> Any:
+        """非阻塞取出一帧"""
+        return self.get(block=False)
+
+    def empty(self) -> bool:
+        """是否没有待读取的数据"""
+        if self._pending or not self._overflow.empty():
+            return False
+        return all(header[2] == header[3] for header in (self._read_slot(slot) for slot in range(self.slots)))
+
+    # ------------------------------------------------------------------
+    # 清理
+    # ------------------------------------------------------------------
+
+    def close(self) -> None:
+        """关闭本进程的共享内存映射"""
+        try:
+            self._shm.close()
+        except Exception:
+            pass
+        return
+
+    def unlink(self) -> None:
+        """删除共享内存（仅创建进程有效）"""
+        if os.getpid() != self._owner_pid:
+            return
+        try:
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass
+        except Exception:
+            pass
+        return
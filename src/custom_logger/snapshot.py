@@ -0,0 +1,150 @@
+# src/custom_logger/snapshot.py
+"""
+日志配置快照
+
+worker只需要会话目录、first_start_time、logger配置和传输对象，不需要完整的
+config_manager配置对象。快照是一个扁平的普通字典：
+
+    {
+        'version': 1,
+        'log_dir': '/logs/.../120000',
+        'first_start_time': datetime(...),
+        'global_console_level': 'warning',   # 只保留与DEFAULT_CONFIG['logger']不同的logger配置项
+        'module_levels': {...},
+        'log_queue': <mp.Queue>,              # 可选，queue_info中的传输对象
+        'level_control': <LevelControl>,      # 可选
+    }
+
+不含传输对象时pickle后只有几百字节，可以作为函数参数或通过任意方式传给worker，
+worker用config_from_snapshot重建配置对象后按init_custom_logger_system_for_worker初始化。
+快照格式变化时增加SNAPSHOT_VERSION，读取端拒绝比自己新的版本。
+"""
+from __future__ import annotations
+
+import copy
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Any, Optional
+
+from .config import DEFAULT_CONFIG, _convert_confignode_to_dict, get_level_settings
+
+# 快照格式版本
+SNAPSHOT_VERSION = 1
+
+# 快照顶层的非logger字段
+SNAPSHOT_FIELDS = ('version', 'log_dir', 'first_start_time')
+
+# queue_info中随快照传递的传输对象
+TRANSPORT_FIELDS = ('log_queue', 'level_control')
+
+# 只属于主程序的logger配置项（worker使用快照中的log_dir）
+MAIN_ONLY_OPTIONS = ('current_session_dir',)
+
+# 可以进入快照的logger配置值类型
+_PLAIN_TYPES = (str, int, float, bool)
+
+
+def _field(obj: Any, name: str) -> Any:
+    if isinstance(obj, dict):
+        return obj.get(name)
+    return getattr(obj, name, None)
+
+
+def _is_plain(value: Any) -> bool:
+    """基本类型及由基本类型组成的列表、字典"""
+    if isinstance(value, _PLAIN_TYPES):
+        return True
+    if isinstance(value, (list, tuple)):
+        return all(_is_plain(item) for item in value)
+    if isinstance(value, dict):
+        return all(isinstance(key, str) and _is_plain(item) for key, item in value.items())
+    return False
+
+
+def build_config_snapshot(cfg: Any) -> dict:
+    """根据配置对象生成扁平的日志配置快照
+
+    Args:
+        cfg: 根配置对象（已初始化的主程序配置或worker配置）
+
+    Returns:
+        dict: 配置快照
+
+    Raises:
+        ValueError: 如果缺少paths.log_dir
+    """
+    log_dir = _field(getattr(cfg, 'paths', None), 'log_dir')
+    if log_dir is None:
+        raise ValueError("配置对象必须包含paths.log_dir属性")
+
+    snapshot = {
+        'version': SNAPSHOT_VERSION,
+        'log_dir': str(log_dir),
+        'first_start_time': getattr(cfg, 'first_start_time', None),
+    }
+
+    logger_obj = getattr(cfg, 'logger', None)
+    logger = logger_obj if isinstance(logger_obj, dict) else _convert_confignode_to_dict(logger_obj)
+    defaults = DEFAULT_CONFIG['logger']
+    if isinstance(logger, dict):
+        for name, value in logger.items():
+            if name in MAIN_ONLY_OPTIONS or name == 'module_levels' or not _is_plain(value):
+                continue
+            if name in defaults and value == defaults[name] and type(value) is type(defaults[name]):
+                continue
+            snapshot[name] = copy.deepcopy(value)
+
+    module_levels = get_level_settings(cfg)['module_levels']
+    if module_levels:
+        snapshot['module_levels'] = module_levels
+
+    queue_info = getattr(cfg, 'queue_info', None)
+    if queue_info is not None:
+        for name in TRANSPORT_FIELDS:
+            value = _field(queue_info, name)
+            if value is not None:
+                snapshot[name] = value
+
+    return snapshot
+
+
+def config_from_snapshot(snapshot: dict) -> SimpleNamespace:
+    """根据配置快照重建配置对象（paths、first_start_time、logger字典和queue_info）
+
+    Args:
+        snapshot: build_config_snapshot生成的快照，缺少version时按当前版本处理
+
+    Returns:
+        SimpleNamespace: 可传给init_custom_logger_system_for_worker的配置对象
+
+    Raises:
+        ValueError: 如果快照不是字典、版本不支持或缺少log_dir、first_start_time
+    """
+    if not isinstance(snapshot, dict):
+        raise ValueError(f"配置快照必须是字典，当前类型: {type(snapshot).__name__}")
+
+    version = snapshot.get('version', SNAPSHOT_VERSION)
+    if isinstance(version, bool) or not isinstance(version, int) or not 1 <= version <= SNAPSHOT_VERSION:
+        raise ValueError(f"不支持的配置快照版本: {version}（支持1-{SNAPSHOT_VERSION}）")
+
+    log_dir = snapshot.get('log_dir')
+    if not log_dir:
+        raise ValueError("配置快照必须包含log_dir")
+
+    first_start_time: Optional[Any] = snapshot.get('first_start_time')
+    if isinstance(first_start_time, str):
+        first_start_time = datetime.fromisoformat(first_start_time)
+    if first_start_time is None:
+        raise ValueError("配置快照必须包含first_start_time")
+
+    reserved = SNAPSHOT_FIELDS + TRANSPORT_FIELDS
+    config = SimpleNamespace(
+        first_start_time=first_start_time,
+        paths={'log_dir': log_dir},
+        logger={name: copy.deepcopy(value) for name, value in snapshot.items() if name not in reserved},
+    )
+
+    queue_info = {name: snapshot[name] for name in TRANSPORT_FIELDS if snapshot.get(name) is not None}
+    if queue_info:
+        config.queue_info = queue_info
+    return config
@@ -0,0 +1,577 @@
+# src/custom_logger/socket_transport.py
+"""
+本地socket日志汇聚
+
+mp.Queue只能通过配置对象传给由主程序创建的子进程。由shell脚本或作业调度器启动的
+进程可以改为通过本地socket把日志发给主程序：
+- 主程序启动SocketLogServer，优先监听Unix域socket，不可用时回退到127.0.0.1的TCP端口
+- 监听地址写入config.logger.socket_address和环境变量CUSTOM_LOGGER_SOCKET，
+  worker从序列化的配置（或继承的环境变量）中读取地址并用SocketLogClient连接
+- 每帧为4字节长度前缀 + wire模块的紧凑帧（一帧包含一批日志）
+- 客户端把帧放入本地缓冲区，由后台线程发送；连接断开期间按退避间隔重连，
+  重连后从第一个未完整发送的帧开始补发，已完整发送的帧不会重复写入
+
+地址格式为"unix:/path/to/sock"或"tcp:127.0.0.1:port"。
+"""
+from __future__ import annotations
+
+import atexit
+import collections
+import os
+import queue
+import selectors
+import socket
+import stat
+import struct
+import sys
+import tempfile
+import threading
+import time
+from multiprocessing import util as mp_util
+from typing import Any, Deque, Optional, Tuple
+
+from .wire import encode_entries, is_frame
+
+FRAME_LENGTH = struct.Struct('<I')
+SOCKET_ENV_VAR = "CUSTOM_LOGGER_SOCKET"
+
+# 客户端默认本地缓冲上限与重连退避
+DEFAULT_CLIENT_BUFFER_BYTES = 8 * 1024 * 1024
+RECONNECT_MIN_DELAY = 0.1
+RECONNECT_MAX_DELAY = 5.0
+
+# 客户端关闭时等待本地缓冲发送完毕的时间（秒）
+CLIENT_CLOSE_TIMEOUT = 5.0
+
+# 服务端停止时继续读取已到达数据的时限与空闲判定（秒）
+SERVER_DRAIN_TIMEOUT = 2.0
+SERVER_DRAIN_IDLE = 0.05
+
+
+def parse_address(address: str) -> Tuple[int, Any]:
+    """解析地址字符串，返回(地址族, socket地址)"""
+    scheme, _, target = address.partition(':')
+    if scheme == 'unix' and target:
+        return socket.AF_UNIX, target
+    if scheme == 'tcp' and target:
+        host, _, port = target.rpartition(':')
+        return socket.AF_INET, (host or '127.0.0.1', int(port))
+    raise ValueError(f"无法识别的日志socket地址: {address}")
+
+
+def format_address(family: int, sock_address: Any) -> str:
+    """将socket地址格式化为地址字符串"""
+    if family == getattr(socket, 'AF_UNIX', None):
+        return f"unix:{sock_address}"
+    host, port = sock_address[:2]
+    return f"tcp:{host}:{port}"
+
+
+def _default_unix_path() -> str:
+    """Unix域socket路径（放在临时目录，避免超过sun_path长度限制）"""
+    return os.path.join(tempfile.gettempdir(), f"custom_logger_{os.getpid()}.sock")
+
+
+def _remove_stale_socket(path: str) -> None:
+    """删除上次运行遗留的Unix域socket文件；路径上是其他类型的文件时抛出FileExistsError"""
+    try:
+        mode = os.lstat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError(f"日志socket路径已存在且不是socket文件: {path}")
+    os.unlink(path)
+    return
+
+
+class SocketLogServer:
+    """本地socket日志汇聚服务端
+
+    收到的帧放入sink（如已有的mp.Queue）；未提供sink时放入内部队列，
+    此时服务端本身可作为QueueLogReceiver的队列使用。
+
+    Args:
+        address: 监听地址，为空时自动选择
+        sink: 帧的去向，需提供put_nowait方法
+    """
+
+    def __init__(self, address: Optional[str] = None, sink: Any = None):
+        self._requested_address = address
+        self._sink = sink
+        self._queue: queue.Queue = queue.Queue()
+        self._listener: Optional[socket.socket] = None
+        self._unix_path: Optional[str] = None
+        self._selector: Optional[selectors.BaseSelector] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._buffers: dict = {}
+        self.address: Optional[str] = None
+        self.connections_accepted = 0
+        self.frames_received = 0
+        pass
+
+    def _bind(self) -> socket.socket:
+        """按地址绑定监听socket，未指定地址时Unix域socket优先、TCP回退"""
+        if self._requested_address:
+            family, sock_address = parse_address(self._requested_address)
+            candidates = [(family, sock_address)]
+        else:
+            candidates = []
+            if hasattr(socket, 'AF_UNIX'):
+                candidates.append((socket.AF_UNIX, _default_unix_path()))
+            candidates.append((socket.AF_INET, ('127.0.0.1', 0)))
+
+        last_error: Optional[OSError] = None
+        for family, sock_address in candidates:
+            listener = socket.socket(family, socket.SOCK_STREAM)
+            try:
+                if family == getattr(socket, 'AF_UNIX', None):
+                    _remove_stale_socket(sock_address)
+                    listener.bind(sock_address)
+                    self._unix_path = sock_address
+                else:
+                    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                    listener.bind(sock_address)
+                listener.listen(128)
+                listener.setblocking(False)
+                self.address = format_address(family, listener.getsockname())
+                return listener
+            except OSError as e:
+                listener.close()
+                last_error = e
+        raise last_error if last_error is not None else OSError("无法创建日志socket")
+
+    def start(self) -> str:
+        """开始监听，返回地址字符串"""
+        if self._thread is not None:
+            return self.address
+
+        self._listener = self._bind()
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self._listener, selectors.EVENT_READ, None)
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._serve_loop, daemon=True)
+        self._thread.start()
+        return self.address
+
+    def _serve_loop(self) -> None:
+        """接受连接并读取帧；停止后排空已到达的数据再退出"""
+        while not self._stop_event.is_set():
+            try:
+                events = self._selector.select(timeout=0.2)
+            except (OSError, ValueError):
+                break
+            self._handle_events(events)
+
+        # 客户端已发出、尚在内核缓冲中的帧在停止前读完，直到一轮空闲或超过时限
+        deadline = time.monotonic() + SERVER_DRAIN_TIMEOUT
+        while time.monotonic() < deadline:
+            try:
+                events = self._selector.select(timeout=SERVER_DRAIN_IDLE)
+            except (OSError, ValueError):
+                break
+            if not events:
+                break
+            self._handle_events(events)
+        return
+
+    def _handle_events(self, events: list) -> None:
+        for key, _ in events:
+            if key.data is None:
+                self._accept()
+            else:
+                self._read(key.fileobj)
+        return
+
+    def _accept(self) -> None:
+        try:
+            conn, _ = self._listener.accept()
+        except OSError:
+            return
+        conn.setblocking(False)
+        self._buffers[conn] = bytearray()
+        self._selector.register(conn, selectors.EVENT_READ, True)
+        self.connections_accepted += 1
+        return
+
+    def _read(self, conn: socket.socket) -> None:
+        try:
+            data = conn.recv(256 * 1024)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            data = b''
+
+        if not data:
+            # 连接关闭，丢弃未完整到达的帧（客户端会在重连后完整重发）
+            self._drop_connection(conn)
+            return
+
+        buffer = self._buffers[conn]
+        buffer.extend(data)
+        position = 0
+        while len(buffer) - position >= FRAME_LENGTH.size:
+            length = FRAME_LENGTH.unpack_from(buffer, position)[0]
+            end = position + FRAME_LENGTH.size + length
+            if end > len(buffer):
+                break
+            self._deliver(bytes(buffer[position + FRAME_LENGTH.size:end]))
+            position = end
+        if position:
+            del buffer[:position]
+        return
+
+    def _deliver(self, frame: bytes) -> None:
+        self.frames_received += 1
+        try:
+            if self._sink is not None:
+                self._sink.put_nowait(frame)
+            else:
+                self._queue.put_nowait(frame)
+        except queue.Full:
+            try:
+                print("日志socket汇聚：队列已满，丢弃1帧日志", file=sys.stderr)
+            except (ValueError, AttributeError):
+                pass
+        return
+
+    def _drop_connection(self, conn: socket.socket) -> None:
+        try:
+            self._selector.unregister(conn)
+        except Exception:
+            pass
+        self._buffers.pop(conn, None)
+        try:
+            conn.close()
+        except OSError:
+            pass
+        return
+
+    # 作为QueueLogReceiver的队列使用
+    def put_nowait(self, item: Any) -> None:
+        """本进程直接放入日志（或停止信号）"""
+        self._queue.put_nowait(item)
+        return
+
+    def get(self, block: bool = True, timeout: Optional[float] = None) -> Any:
+        """取出一帧"""
+        return self._queue.get(block, timeout)
+
+    def get_nowait(self) -> Any:
+        """非阻塞取出一帧"""
+        return self._queue.get_nowait()
+
+    def stop(self) -> None:
+        """停止监听并关闭所有连接（已到达的帧先交给sink或内部队列）"""
+        if self._thread is None:
+            return
+
+        self._stop_event.set()
+        self._thread.join(timeout=SERVER_DRAIN_TIMEOUT + 5.0)
+        self._thread = None
+
+        for conn in list(self._buffers):
+            self._drop_connection(conn)
+        try:
+            self._selector.close()
+        except Exception:
+            pass
+        try:
+            self._listener.close()
+        except OSError:
+            pass
+        if self._unix_path:
+            try:
+                os.unlink(self._unix_path)
+            except OSError:
+                pass
+        return
+
+
+class SocketLogClient:
+    """本地socket日志汇聚客户端（worker进程使用）
+
+    提供与队列相同的put/put_nowait接口，可直接作为QueueLogSender的队列。
+    帧放入本地缓冲后由后台发送线程写入socket，日志调用方不等待网络。
+    只序列化地址，可随配置对象传给任意进程。
+
+    投递语义：已完整交给socket的帧不会重发；连接断开时只发送了一部分的帧由服务端丢弃，
+    重连后从该帧开始完整重发。断开前已写入但服务端尚未读取的帧可能丢失（至多一次）。
+
+    Args:
+        address: 服务端地址字符串
+        buffer_bytes: 本地缓冲的字节上限，超出时put_nowait抛出queue.Full
+    """
+
+    def __init__(self, address: str, buffer_bytes: int = DEFAULT_CLIENT_BUFFER_BYTES):
+        parse_address(address)
+        self.address = address
+        self.buffer_bytes = buffer_bytes
+        self._init_local_state()
+        pass
+
+    def _init_local_state(self) -> None:
+        self._sock: Optional[socket.socket] = None
+        # 待发送的帧（含长度前缀），_head_sent为队首帧已交给socket的字节数
+        self._pending: Deque[bytes] = collections.deque()
+        self._pending_bytes = 0
+        self._head_sent = 0
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._closing = False
+        self._abandon = False
+        self._next_attempt = 0.0
+        self._delay = RECONNECT_MIN_DELAY
+        self._pid = os.getpid()
+        self._hooks_registered = False
+        self._connected_once = False
+        self.reconnects = 0
+        self.frames_sent = 0
+        return
+
+    def __getstate__(self) -> dict:
+        return {'address': self.address, 'buffer_bytes': self.buffer_bytes}
+
+    def __setstate__(self, state: dict) -> None:
+        self.address = state['address']
+        self.buffer_bytes = state['buffer_bytes']
+        self._init_local_state()
+        return
+
+    def _register_exit_hooks(self) -> None:
+        """退出时补发本地缓冲（multiprocessing子进程退出时不执行atexit）"""
+        if self._hooks_registered:
+            return
+        self._hooks_registered = True
+        atexit.register(self.close)
+        mp_util.Finalize(self, self.close, exitpriority=50)
+        return
+
+    def _start_sender(self) -> None:
+        """启动后台发送线程（调用方持有锁）"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._closing = False
+        self._abandon = False
+        self._thread = threading.Thread(target=self._sender_loop, name="custom_logger_socket_client", daemon=True)
+        self._thread.start()
+        return
+
+    def _connect(self) -> bool:
+        """按退避间隔尝试连接（发送线程中调用）"""
+        now = time.monotonic()
+        if now < self._next_attempt:
+            return False
+        family, sock_address = parse_address(self.address)
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        try:
+            sock.settimeout(5.0)
+            sock.connect(sock_address)
+        except OSError:
+            sock.close()
+            self._next_attempt = now + self._delay
+            self._delay = min(self._delay * 2, RECONNECT_MAX_DELAY)
+            return False
+        if self._connected_once:
+            self.reconnects += 1
+        self._connected_once = True
+        self._sock = sock
+        self._delay = RECONNECT_MIN_DELAY
+        return True
+
+    def _disconnect(self) -> None:
+        """关闭连接，按退避间隔重连"""
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+        self._next_attempt = time.monotonic() + self._delay
+        return
+
+    def _advance(self, sent: int) -> None:
+        """记录已交给socket的字节数，移除完整发送的帧（调用方持有锁）"""
+        self._head_sent += sent
+        while self._pending and self._head_sent >= len(self._pending[0]):
+            frame = self._pending.popleft()
+            self._head_sent -= len(frame)
+            self._pending_bytes -= len(frame)
+            self.frames_sent += 1
+        self._cond.notify_all()
+        return
+
+    def _sender_loop(self) -> None:
+        """发送线程：连接、按已发送偏移续发缓冲中的帧"""
+        while True:
+            with self._cond:
+                while not self._pending and not self._closing:
+                    self._cond.wait()
+                if self._abandon or not self._pending:
+                    return
+                # 快照当前缓冲（只会在队尾追加），从队首帧的已发送偏移开始
+                data = b''.join(self._pending)
+                offset = self._head_sent
+
+            if self._sock is None and not self._connect():
+                with self._cond:
+                    if not self._abandon:
+                        self._cond.wait(max(0.0, self._next_attempt - time.monotonic()))
+                continue
+
+            view = memoryview(data)[offset:]
+            try:
+                while view:
+                    sent = self._sock.send(view)
+                    view = view[sent:]
+                    with self._cond:
+                        self._advance(sent)
+            except OSError:
+                # 只发送了一部分的队首帧会被服务端丢弃，重连后从该帧开头重发
+                self._disconnect()
+                with self._cond:
+                    self._head_sent = 0
+        return
+
+    @staticmethod
+    def _encode(item: Any) -> Optional[bytes]:
+        """将日志（QueueLogEntry、其列表或紧凑帧）编码为带长度前缀的帧，停止信号返回None"""
+        if isinstance(item, str):
+            return None
+        if is_frame(item):
+            frame = bytes(item)
+        elif isinstance(item, list):
+            frame = encode_entries(item)
+        else:
+            frame = encode_entries((item,))
+        return FRAME_LENGTH.pack(len(frame)) + frame
+
+    def put(self, item: Any, block: bool = True, timeout: Optional[float] = None) -> None:
+        """放入本地缓冲，由发送线程发送；缓冲已满时按block/timeout等待，超时抛出queue.Full"""
+        data = self._encode(item)
+        if data is None:
+            return
+        if len(data) > self.buffer_bytes:
+            raise queue.Full
+
+        if self._pid != os.getpid():
+            # fork后的子进程不能复用父进程的连接和发送线程
+            self._init_local_state()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._register_exit_hooks()
+            self._start_sender()
+            while self._pending_bytes + len(data) > self.buffer_bytes:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if not block or (remaining is not None and remaining <= 0):
+                    raise queue.Full
+                self._cond.wait(remaining)
+            self._pending.append(data)
+            self._pending_bytes += len(data)
+            self._cond.notify_all()
+        return
+
+    def put_nowait(self, item: Any) -> None:
+        """放入本地缓冲，缓冲已满时抛出queue.Full"""
+        self.put(item, block=False)
+        return
+
+    @property
+    def pending_bytes(self) -> int:
+        """尚未发送的本地缓冲字节数"""
+        return self._pending_bytes
+
+    def flush(self, timeout: float = CLIENT_CLOSE_TIMEOUT) -> bool:
+        """等待本地缓冲发送完毕
+
+        Returns:
+            bool: 是否在超时前发送完毕
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._next_attempt = 0.0
+            self._cond.notify_all()
+            while self._pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._thread is None or not self._thread.is_alive():
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self, timeout: float = CLIENT_CLOSE_TIMEOUT) -> None:
+        """在超时内发送剩余的本地缓冲，停止发送线程并关闭连接"""
+        if self._pid != os.getpid():
+            return
+        with self._cond:
+            self._closing = True
+        self.flush(timeout)
+        with self._cond:
+            unsent = len(self._pending)
+            self._abandon = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout=1.0)
+        if unsent:
+            try:
+                print(f"日志socket客户端：{unsent}帧日志未能发送", file=sys.stderr)
+            except (ValueError, AttributeError):
+                pass
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+        return
+
+
+# 全局socket汇聚服务端（用于主程序）
+_socket_server: Optional[SocketLogServer] = None
+
+
+def get_socket_address(cfg: Any) -> Optional[str]:
+    """从配置（或继承的环境变量）读取socket地址"""
+    from .config import get_logger_option
+
+    address = get_logger_option(cfg, 'socket_address', "")
+    return address or os.environ.get(SOCKET_ENV_VAR) or None
+
+
+def start_socket_server(cfg: Any, sink: Any = None) -> SocketLogServer:
+    """启动socket汇聚服务端，并把地址写回配置与环境变量"""
+    global _socket_server
+
+    if _socket_server is not None:
+        return _socket_server
+
+    from .config import get_logger_option
+
+    server = SocketLogServer(get_logger_option(cfg, 'socket_address', "") or None, sink=sink)
+    address = server.start()
+
+    logger_obj = getattr(cfg, 'logger', None)
+    try:
+        if isinstance(logger_obj, dict):
+            logger_obj['socket_address'] = address
+        elif logger_obj is not None:
+            setattr(logger_obj, 'socket_address', address)
+    except Exception:
+        pass
+    os.environ[SOCKET_ENV_VAR] = address
+
+    _socket_server = server
+    return server
+
+
+def stop_socket_server() -> None:
+    """停止socket汇聚服务端"""
+    global _socket_server
+
+    if _socket_server is None:
+        return
+    _socket_server.stop()
+    if os.environ.get(SOCKET_ENV_VAR) == _socket_server.address:
+        del os.environ[SOCKET_ENV_VAR]
+    _socket_server = None
+    return
@@ -0,0 +1,104 @@
+# src/custom_logger/spill.py
+"""
+worker端溢出文件
+
+队列已满时，发送端把日志编码为紧凑帧顺序追加到会话目录下的溢出文件，
+后台线程在队列有空间后按原顺序回放到队列，回放完毕后截断文件。
+溢出期间的新日志同样追加到溢出文件，保证同一worker的日志顺序。
+
+文件格式：每条记录为 长度(u32) + 紧凑帧（见wire模块）。
+"""
+from __future__ import annotations
+
+import os
+import re
+import struct
+import threading
+from typing import BinaryIO, Optional
+
+SPILL_RECORD = struct.Struct('<I')
+
+# 单个溢出文件中未回放数据的默认上限（字节），超出后只计数丢弃
+DEFAULT_SPILL_MAX_BYTES = 256 * 1024 * 1024
+
+
+def spill_file_path(spill_dir: str, worker_id: str, pid: Optional[int] = None) -> str:
+    """溢出文件路径：spill_{worker_id}_{pid}.bin"""
+    safe_id = re.sub(r'[^A-Za-z0-9_.-]', '_', str(worker_id))
+    return os.path.join(spill_dir, f"spill_{safe_id}_{pid or os.getpid()}.bin")
+
+
+class SpillFile:
+    """顺序追加、顺序读取的溢出文件（线程安全）"""
+
+    def __init__(self, path: str, max_bytes: int = DEFAULT_SPILL_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._file: Optional[BinaryIO] = None
+        self._read_pos = 0
+        self._write_pos = 0
+        self._closed = False
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> bool:
+        """是否有未回放的数据"""
+        return self._write_pos > self._read_pos
+
+    @property
+    def pending_bytes(self) -> int:
+        """未回放的字节数"""
+        return self._write_pos - self._read_pos
+
+    def append(self, frame: bytes) -> bool:
+        """追加一帧
+
+        Returns:
+            bool: 是否写入；未回放数据将超过max_bytes时返回False
+        """
+        size = SPILL_RECORD.size + len(frame)
+        with self._lock:
+            if self._closed:
+                return False
+            if self.max_bytes > 0 and self._write_pos - self._read_pos + size > self.max_bytes:
+                return False
+            if self._file is None:
+                self._file = open(self.path, 'w+b')
+            self._file.seek(self._write_pos)
+            self._file.write(SPILL_RECORD.pack(len(frame)))
+            self._file.write(frame)
+            self._write_pos += size
+            return True
+
+    def peek(self) -> Optional[bytes]:
+        """读取下一帧但不移动读取位置，没有数据时返回None"""
+        with self._lock:
+            if self._file is None or not self.pending:
+                return None
+            self._file.flush()
+            self._file.seek(self._read_pos)
+            (length,) = SPILL_RECORD.unpack(self._file.read(SPILL_RECORD.size))
+            return self._file.read(length)
+
+    def consume(self, frame: bytes) -> None:
+        """确认peek取出的帧已回放；全部回放后截断文件"""
+        with self._lock:
+            self._read_pos += SPILL_RECORD.size + len(frame)
+            if self._read_pos >= self._write_pos and self._file is not None:
+                self._file.seek(0)
+                self._file.truncate()
+                self._read_pos = self._write_pos = 0
+
+    def close(self) -> None:
+        """关闭文件；没有未回放数据时删除文件"""
+        with self._lock:
+            self._closed = True
+            if self._file is None:
+                return
+            self._file.close()
+            self._file = None
+            if self._write_pos <= self._read_pos:
+                try:
+                    os.remove(self.path)
+                except OSError:
+                    pass
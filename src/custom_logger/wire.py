@@ -0,0 +1,149 @@
+# src/custom_logger/wire.py
+"""
+队列模式紧凑传输格式
+
+pickle一个QueueLogEntry会在每条消息中重复类路径和字段名。紧凑格式将一批日志
+编码为一个bytes帧放入队列（bytes的pickle开销只有固定的几个字节）：
+
+    帧头:   magic(2s) 版本(u8) 记录数(u32) worker_id长度(u16) + worker_id(UTF-8)
+    每条:   级别(u8) 标志(u8) 日志行长度(u32) 异常长度(u32) 时间戳长度(u16) 模块名长度(u8)
+            [+ 序号(u64) 发送时间(i64, 纳秒)]（带FLAG_ORDER时）
+            + 日志行 + 异常信息 + 时间戳 + 模块名（均为UTF-8）
+
+版本1的记录没有模块名字段，版本2的记录没有序号和发送时间，解码时仍然支持。
+发送端控制记录（心跳、状态等）单独成帧，帧头magic为CONTROL_MAGIC：不认识控制帧的旧接收端
+按未知对象忽略，不会把控制记录当作日志写入文件。
+模块名超过255字节（UTF-8）时按字符边界截断，不影响同一帧中的其他记录。
+
+接收端用decode_frame还原为QueueLogEntry，保持与原有接收逻辑兼容。
+"""
+from __future__ import annotations
+
+import struct
+from typing import Iterable, List, Optional
+
+WIRE_MAGIC = b'CL'
+CONTROL_MAGIC = b'CC'
+WIRE_VERSION = 3
+
+FRAME_HEADER = struct.Struct('<2sBIH')
+RECORD_HEADER = struct.Struct('<BBIIHB')
+RECORD_HEADER_V1 = struct.Struct('<BBIIH')
+ORDER_FIELDS = struct.Struct('<Qq')
+
+# 记录标志位
+FLAG_EXCEPTION = 1
+FLAG_TIMESTAMP = 2
+FLAG_LOGGER_NAME = 4
+FLAG_ORDER = 8
+
+# 模块名最大字节数（u8长度字段）
+MAX_LOGGER_NAME_BYTES = 0xFF
+
+# 传输格式名称
+WIRE_FORMAT_ENTRY = "entry"  # 逐条pickle QueueLogEntry（默认，兼容旧接收端）
+WIRE_FORMAT_COMPACT = "compact"  # 紧凑bytes帧
+
+
+def _truncate_utf8(data: bytes, limit: int) -> bytes:
+    """按UTF-8字符边界截断到limit字节以内"""
+    if len(data) <= limit:
+        return data
+    return data[:limit].decode('utf-8', 'ignore').encode('utf-8')
+
+
+def encode_entries(entries: Iterable, worker_id: Optional[str] = None, control: bool = False) -> bytes:
+    """将QueueLogEntry序列编码为一个帧
+
+    Args:
+        entries: QueueLogEntry序列（同一worker）
+        worker_id: worker标识，缺省时取第一条记录的worker_id
+        control: 是否为控制帧（只包含控制记录）
+    """
+    parts: List[bytes] = []
+    count = 0
+    for entry in entries:
+        if worker_id is None:
+            worker_id = entry.worker_id
+        line = entry.log_line.encode('utf-8')
+        exception = entry.exception_info.encode('utf-8') if entry.exception_info else b''
+        timestamp = entry.timestamp.encode('utf-8') if entry.timestamp else b''
+        logger_name = (
+            _truncate_utf8(entry.logger_name.encode('utf-8'), MAX_LOGGER_NAME_BYTES) if entry.logger_name else b''
+        )
+        ordered = entry.sequence is not None and entry.created_ns is not None
+        flags = (
+            (FLAG_EXCEPTION if entry.exception_info is not None else 0) |
+            (FLAG_TIMESTAMP if entry.timestamp is not None else 0) |
+            (FLAG_LOGGER_NAME if entry.logger_name is not None else 0) |
+            (FLAG_ORDER if ordered else 0)
+        )
+        parts.append(RECORD_HEADER.pack(
+            min(max(entry.level_value, 0), 0xFF), flags, len(line), len(exception), len(timestamp), len(logger_name)
+        ))
+        if ordered:
+            parts.append(ORDER_FIELDS.pack(entry.sequence, entry.created_ns))
+        parts.append(line)
+        parts.append(exception)
+        parts.append(timestamp)
+        parts.append(logger_name)
+        count += 1
+
+    worker = (worker_id or "").encode('utf-8')
+    header = FRAME_HEADER.pack(CONTROL_MAGIC if control else WIRE_MAGIC, WIRE_VERSION, count, len(worker))
+    return b''.join([header, worker] + parts)
+
+
+def is_frame(data: object) -> bool:
+    """判断对象是否为紧凑帧（包括控制帧）"""
+    return isinstance(data, (bytes, bytearray)) and data[:2] in (WIRE_MAGIC, CONTROL_MAGIC)
+
+
+def decode_frame(data: bytes) -> list:
+    """将帧解码为QueueLogEntry列表"""
+    from .queue_writer import QueueLogEntry
+
+    view = memoryview(data)
+    magic, version, count, worker_len = FRAME_HEADER.unpack_from(view, 0)
+    if magic not in (WIRE_MAGIC, CONTROL_MAGIC) or version not in (1, 2, WIRE_VERSION):
+        raise ValueError(f"无法识别的日志帧: magic={magic!r}, version={version}")
+
+    position = FRAME_HEADER.size
+    worker_id = bytes(view[position:position + worker_len]).decode('utf-8') or None
+    position += worker_len
+
+    entries = []
+    record_header = RECORD_HEADER if version >= 2 else RECORD_HEADER_V1
+    header_size = record_header.size
+    for _ in range(count):
+        fields = record_header.unpack_from(view, position)
+        level_value, flags, line_len, exception_len, timestamp_len = fields[:5]
+        name_len = fields[5] if len(fields) > 5 else 0
+        position += header_size
+        sequence = created_ns = None
+        if flags & FLAG_ORDER:
+            sequence, created_ns = ORDER_FIELDS.unpack_from(view, position)
+            position += ORDER_FIELDS.size
+        log_line = bytes(view[position:position + line_len]).decode('utf-8')
+        position += line_len
+        exception_info = (
+            bytes(view[position:position + exception_len]).decode('utf-8') if flags & FLAG_EXCEPTION else None
+        )
+        position += exception_len
+        timestamp = (
+            bytes(view[position:position + timestamp_len]).decode('utf-8') if flags & FLAG_TIMESTAMP else None
+        )
+        position += timestamp_len
+        logger_name = bytes(view[position:position + name_len]).decode('utf-8') if flags & FLAG_LOGGER_NAME else None
+        position += name_len
+        entries.append(QueueLogEntry(
+            log_line=log_line,
+            level_value=level_value,
+            exception_info=exception_info,
+            worker_id=worker_id,
+            timestamp=timestamp,
+            logger_name=logger_name,
+            sequence=sequence,
+            created_ns=created_ns,
+        ))
+    return entries
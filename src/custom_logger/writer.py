@@ -7,8 +7,13 @@ import threading
 import queue
 import time
 import signal
-from typing import Optional, TextIO
+from collections import OrderedDict
+from typing import Callable, Optional
 from .types import WARNING
+from .log_file import LogFile, encode_text
+from .log_index import LogIndexWriter
+from .compression import SegmentCompressor, create_compressor
+from .shards import shard_file_name
 
 start_time = datetime.now()
 
@@ -20,29 +25,138 @@ _stop_event: Optional[threading.Event] = None
 # 队列结束标记
 QUEUE_SENTINEL = object()
 
+# 默认同时打开的模块文件组上限（每组包含full和warning两个句柄）
+DEFAULT_MAX_MODULE_FILES = 64
+
+# 当前写入线程使用的文件写入器（用于统计查询）
+_file_writer: Optional["FileWriter"] = None
+
+
+# 写入线程每批最多取出的日志条数
+DEFAULT_WRITE_BATCH = 256
+
+# 按worker分文件时在句柄缓存中使用的键前缀
+WORKER_GROUP_PREFIX = "worker:"
+
 
 class LogEntry:
     """日志条目"""
 
-    def __init__(self, log_line: str, level_value: int, logger_name: str, exception_info: Optional[str] = None):
+    def __init__(
+            self,
+            log_line: str,
+            level_value: int,
+            logger_name: Optional[str],
+            exception_info: Optional[str] = None,
+            worker_id: Optional[str] = None
+    ):
         self.log_line = log_line
         self.level_value = level_value
         self.logger_name = logger_name
         self.exception_info = exception_info
+        self.worker_id = worker_id
         pass
 
 
-class FileWriter:
-    """文件写入器"""
+def _entry_text(entry: LogEntry) -> str:
+    """日志条目写入文件的文本（含异常信息）"""
+    if entry.exception_info:
+        return f"{entry.log_line}\n{entry.exception_info}\n"
+    return entry.log_line + '\n'
+
+
+def _worker_file_name(worker_id: str) -> str:
+    """worker日志文件名（去掉路径分隔符）"""
+    safe_id = str(worker_id).replace('/', '_').replace('\\', '_')
+    return f"worker_{safe_id}.log"
 
-    def __init__(self, session_dir: str):
+
+class FileWriter:
+    """文件写入器
+
+    模块文件句柄按LRU方式缓存：同时打开的模块数超过max_module_files时，
+    关闭最久未使用模块的文件，之后再次写入该模块时以追加模式重新打开。
+
+    索引模式（index_mode=True）下每条日志只写入一次full.log，warning.log和
+    模块日志改为在full.idx中记录偏移，由log_index.LogIndexReader按需重建。
+
+    所有文件（包括模块文件）按rotation_max_bytes/rotation_interval轮转为
+    {stem}.{序号:04d}.log，轮转在写入线程内完成，不增加同时打开的句柄数。
+    传入compressor时，轮转产生的分段提交到压缩进程池后台压缩。
+
+    write_batch把一批日志按目标文件合并，每个文件只写入和刷新一次；普通模式的
+    写入线程和队列模式的接收器共用该写入路径和句柄缓存。worker_files=True时
+    另外按LogEntry.worker_id写入worker_{id}.log，与模块文件共用LRU缓存。
+
+    指定shard_id时为worker分片模式：只写入full.w{shard_id}.log，warning.log由
+    shards.merge_shards合并时生成，不写模块文件、不使用索引和轮转。
+    """
+
+    def __init__(
+            self,
+            session_dir: str,
+            max_module_files: int = DEFAULT_MAX_MODULE_FILES,
+            index_mode: bool = False,
+            rotation_max_bytes: int = 0,
+            rotation_interval: float = 0.0,
+            compressor: Optional[SegmentCompressor] = None,
+            wait_compression_on_close: bool = True,
+            worker_files: bool = False,
+            shard_id: Optional[str] = None
+    ):
         self.session_dir = session_dir
-        self.full_log_file: Optional[TextIO] = None
-        self.warning_log_file: Optional[TextIO] = None
-        self.module_files: dict[str, dict[str, TextIO]] = {}  # {logger_name: {"full": file, "warning": file}}
+        self.shard_id = shard_id
+        self.max_module_files = max_module_files  # 0或负数表示不限制
+        # 分片只在合并后才是完整日志，合并按单个文件读取，不建索引也不轮转
+        self.index_mode = index_mode and shard_id is None
+        self.rotation_max_bytes = rotation_max_bytes if shard_id is None else 0  # 0表示不按大小轮转
+        self.rotation_interval = rotation_interval if shard_id is None else 0.0  # 秒，0表示不按时间轮转
+        self.compressor = compressor
+        self.wait_compression_on_close = wait_compression_on_close
+        self.worker_files = worker_files
+        self.index_writer: Optional[LogIndexWriter] = None
+        self.full_log_file: Optional[LogFile] = None
+        self.warning_log_file: Optional[LogFile] = None
+        # {logger_name: {"full": file, "warning": file}}，按最近使用顺序排列；
+        # worker文件以"worker:{id}"为键、只有"full"句柄
+        self.module_files: OrderedDict[str, dict[str, LogFile]] = OrderedDict()
+        # 句柄统计，用于调整max_module_files和轮转参数
+        self.handle_stats = {"opens": 0, "module_reopens": 0, "module_evictions": 0, "rotations": 0}
+        self._opened_modules: set[str] = set()
+        # 索引模式下已写入数据、尚未写入索引的记录
+        self._pending_index: list[bytes] = []
         self._init_files()
         pass
 
+    def _open_file(self, path: str, on_rotate: Optional[Callable[[str, int], None]] = None) -> LogFile:
+        """以追加模式打开日志文件并计数"""
+        file = LogFile(
+            path,
+            max_bytes=self.rotation_max_bytes,
+            interval=self.rotation_interval,
+            on_rotate=on_rotate or self._on_rotate
+        )
+        self.handle_stats["opens"] += 1
+        return file
+
+    def _on_rotate(self, rotated_path: str, number: int) -> None:
+        """文件轮转回调：计数并提交后台压缩"""
+        self.handle_stats["rotations"] += 1
+        if self.compressor is not None:
+            self.compressor.submit(rotated_path)
+        return
+
+    def _on_full_rotate_indexed(self, rotated_path: str, number: int) -> None:
+        """索引模式下full.log轮转时同步轮转索引文件"""
+        self._on_rotate(rotated_path, number)
+        if self.index_writer:
+            # 旧分段已随关闭落盘，先写入属于旧分段的索引记录再轮转索引文件
+            if self._pending_index:
+                self.index_writer.write(b''.join(self._pending_index))
+                self._pending_index.clear()
+            self.index_writer.rotate(number)
+        return
+
     def _init_files(self) -> None:
         """初始化日志文件"""
         try:
@@ -50,11 +164,22 @@ class FileWriter:
             normalized_session_dir = os.path.normpath(self.session_dir)
             os.makedirs(normalized_session_dir, exist_ok=True)
 
+            if self.shard_id is not None:
+                self.full_log_file = self._open_file(
+                    os.path.join(normalized_session_dir, shard_file_name(self.shard_id))
+                )
+                return
+
             full_log_path = os.path.join(normalized_session_dir, "full.log")
             warning_log_path = os.path.join(normalized_session_dir, "warning.log")
 
-            self.full_log_file = open(full_log_path, 'a', encoding='utf-8', buffering=1)
-            self.warning_log_file = open(warning_log_path, 'a', encoding='utf-8', buffering=1)
+            if self.index_mode:
+                self.index_writer = LogIndexWriter(normalized_session_dir)
+                self.full_log_file = self._open_file(full_log_path, on_rotate=self._on_full_rotate_indexed)
+                return
+
+            self.full_log_file = self._open_file(full_log_path)
+            self.warning_log_file = self._open_file(warning_log_path)
 
         except Exception as e:
             try:
@@ -65,74 +190,175 @@ class FileWriter:
         return
 
     def _ensure_module_files(self, logger_name: str) -> None:
-        """确保指定模块的日志文件已创建"""
-        if logger_name in self.module_files:
-            return  # 文件已经创建
+        """确保指定模块的日志文件已打开，并更新LRU顺序"""
+        self._ensure_handle_group(logger_name, {
+            "full": f"{logger_name}_full.log",
+            "warning": f"{logger_name}_warning.log",
+        })
+        return
+
+    def _ensure_worker_file(self, worker_id: str) -> Optional[str]:
+        """确保指定worker的日志文件已打开，返回其在句柄缓存中的键"""
+        key = WORKER_GROUP_PREFIX + str(worker_id)
+        self._ensure_handle_group(key, {"full": _worker_file_name(worker_id)})
+        return key if key in self.module_files else None
+
+    def _ensure_handle_group(self, key: str, file_names: dict[str, str]) -> None:
+        """确保一组文件句柄已打开（模块文件与worker文件共用），并更新LRU顺序"""
+        if key in self.module_files:
+            self.module_files.move_to_end(key)
+            return  # 文件已经打开
+
+        # 超出上限时淘汰最久未使用的文件组
+        if self.max_module_files > 0:
+            while len(self.module_files) >= self.max_module_files:
+                evicted_name, evicted_handles = self.module_files.popitem(last=False)
+                self._close_module_handles(evicted_name, evicted_handles)
+                self.handle_stats["module_evictions"] += 1
         
+        handles: dict[str, LogFile] = {}
         try:
             # 规范化路径，确保使用正确的分隔符
             normalized_session_dir = os.path.normpath(self.session_dir)
             
-            full_log_path = os.path.join(normalized_session_dir, f"{logger_name}_full.log")
-            warning_log_path = os.path.join(normalized_session_dir, f"{logger_name}_warning.log")
-            
             # 创建文件句柄
-            full_file = open(full_log_path, 'a', encoding='utf-8', buffering=1)
-            warning_file = open(warning_log_path, 'a', encoding='utf-8', buffering=1)
+            for kind, file_name in file_names.items():
+                handles[kind] = self._open_file(os.path.join(normalized_session_dir, file_name))
             
             # 存储到module_files字典
-            self.module_files[logger_name] = {
-                "full": full_file,
-                "warning": warning_file
-            }
+            self.module_files[key] = handles
+
+            if key in self._opened_modules:
+                self.handle_stats["module_reopens"] += 1
+            else:
+                self._opened_modules.add(key)
             
         except Exception as e:
+            for handle in handles.values():
+                handle.close()
             try:
-                print(f"无法创建模块日志文件 {logger_name}: {e}", file=sys.stderr)
+                print(f"无法创建模块日志文件 {key}: {e}", file=sys.stderr)
             except (ValueError, AttributeError):
                 pass
         
         return
 
+    def _close_module_handles(self, logger_name: str, file_handles: dict[str, LogFile]) -> None:
+        """关闭单个模块的文件句柄"""
+        try:
+            for kind in ("full", "warning"):
+                handle = file_handles.get(kind)
+                if handle:
+                    try:
+                        handle.flush()  # 确保数据写入
+                        handle.close()
+                    except Exception:
+                        pass
+        except Exception as e:
+            try:
+                print(f"关闭模块文件失败 {logger_name}: {e}", file=sys.stderr)
+            except (ValueError, AttributeError):
+                pass
+        return
+
+    def get_stats(self) -> dict:
+        """获取句柄统计信息"""
+        stats = dict(self.handle_stats)
+        stats["open_modules"] = len(self.module_files)
+        stats["max_module_files"] = self.max_module_files
+        return stats
+
+    def _write_indexed(self, entry: LogEntry, flush: bool = True) -> None:
+        """索引模式：写入full.log一次并记录索引"""
+        if not self.full_log_file or not self.index_writer:
+            return
+
+        data = encode_text(_entry_text(entry))
+
+        # 轮转检查只做一次，偏移取写入时实际所在的分段（轮转回调已写出旧分段的索引）
+        offset = self.full_log_file.write_bytes(data)
+        record = self.index_writer.pack(offset, len(data), entry.level_value, entry.logger_name)
+        self._pending_index.append(record)
+        if flush:
+            self._flush_index()
+        return
+
+    def _flush_index(self) -> None:
+        """刷新full.log后写入待写索引记录，保证索引指向的数据已落盘"""
+        if not self._pending_index:
+            return
+        if self.full_log_file:
+            self.full_log_file.flush()
+        if self.index_writer:
+            self.index_writer.write(b''.join(self._pending_index))
+        self._pending_index.clear()
+        return
+
+    @staticmethod
+    def _write_parts(handle: Optional[LogFile], parts: list[str]) -> None:
+        """将多条文本合并写入并刷新（按大小轮转时在记录边界拆分）"""
+        if handle and parts:
+            handle.write_records(parts)
+            handle.flush()
+        return
+
     def write_log(self, entry: LogEntry) -> None:
         """写入日志条目"""
+        self.write_batch((entry,))
+        return
+
+    def write_batch(self, entries) -> None:
+        """批量写入日志条目，每个目标文件只写入和刷新一次"""
         try:
-            # 确保模块文件存在
-            self._ensure_module_files(entry.logger_name)
-            
-            # 1. 写入全局完整日志
-            if self.full_log_file:
-                self.full_log_file.write(entry.log_line + '\n')
-                if entry.exception_info:
-                    self.full_log_file.write(entry.exception_info + '\n')
-                self.full_log_file.flush()
-
-            # 2. 写入全局警告日志（WARNING及以上级别）
-            if entry.level_value >= WARNING and self.warning_log_file:
-                self.warning_log_file.write(entry.log_line + '\n')
-                if entry.exception_info:
-                    self.warning_log_file.write(entry.exception_info + '\n')
-                self.warning_log_file.flush()
-            
-            # 3. 写入模块文件
-            if entry.logger_name in self.module_files:
-                module_file_handles = self.module_files[entry.logger_name]
-                
-                # 写入模块完整日志
-                if "full" in module_file_handles and module_file_handles["full"]:
-                    module_file_handles["full"].write(entry.log_line + '\n')
-                    if entry.exception_info:
-                        module_file_handles["full"].write(entry.exception_info + '\n')
-                    module_file_handles["full"].flush()
-                
-                # 写入模块警告日志（WARNING及以上级别）
-                if (entry.level_value >= WARNING and 
-                    "warning" in module_file_handles and 
-                    module_file_handles["warning"]):
-                    module_file_handles["warning"].write(entry.log_line + '\n')
-                    if entry.exception_info:
-                        module_file_handles["warning"].write(entry.exception_info + '\n')
-                    module_file_handles["warning"].flush()
+            if self.index_mode:
+                for entry in entries:
+                    self._write_indexed(entry, flush=False)
+                self._flush_index()
+                return
+
+            full_parts: list[str] = []
+            warning_parts: list[str] = []
+            # {句柄缓存键: {"full": [...], "warning": [...]}}，保持首次出现顺序
+            group_parts: dict[str, dict[str, list[str]]] = {}
+            worker_groups: dict[str, str] = {}
+
+            for entry in entries:
+                text = _entry_text(entry)
+                is_warning = entry.level_value >= WARNING
+
+                # 1. 全局完整日志与警告日志（WARNING及以上级别）
+                full_parts.append(text)
+                if is_warning:
+                    warning_parts.append(text)
+
+                # 2. 模块文件（分片模式不写）
+                if entry.logger_name is not None and self.shard_id is None:
+                    parts = group_parts.setdefault(entry.logger_name, {"full": [], "warning": []})
+                    parts["full"].append(text)
+                    if is_warning:
+                        parts["warning"].append(text)
+
+                # 3. worker文件
+                worker_id = getattr(entry, 'worker_id', None)
+                if self.worker_files and worker_id:
+                    key = WORKER_GROUP_PREFIX + str(worker_id)
+                    worker_groups[key] = worker_id
+                    group_parts.setdefault(key, {"full": []})["full"].append(text)
+
+            self._write_parts(self.full_log_file, full_parts)
+            self._write_parts(self.warning_log_file, warning_parts)
+
+            # 逐组打开并写入，批内模块数超过上限时已写完的组可被安全淘汰
+            for key, parts in group_parts.items():
+                if key in worker_groups:
+                    self._ensure_worker_file(worker_groups[key])
+                else:
+                    self._ensure_module_files(key)
+                handles = self.module_files.get(key)
+                if not handles:
+                    continue
+                for kind, kind_parts in parts.items():
+                    self._write_parts(handles.get(kind), kind_parts)
 
         except Exception as e:
             try:
@@ -145,6 +371,8 @@ class FileWriter:
     def close(self) -> None:
         """关闭文件"""
         try:
+            self._flush_index()
+
             # 关闭全局文件
             if self.full_log_file:
                 try:
@@ -161,30 +389,21 @@ class FileWriter:
                 except Exception:
                     pass
                 self.warning_log_file = None
+
+            if self.index_writer:
+                self.index_writer.close()
+                self.index_writer = None
             
             # 关闭所有模块文件
             for logger_name, file_handles in self.module_files.items():
-                try:
-                    if "full" in file_handles and file_handles["full"]:
-                        try:
-                            file_handles["full"].flush()  # 确保数据写入
-                            file_handles["full"].close()
-                        except Exception:
-                            pass
-                    if "warning" in file_handles and file_handles["warning"]:
-                        try:
-                            file_handles["warning"].flush()  # 确保数据写入
-                            file_handles["warning"].close()
-                        except Exception:
-                            pass
-                except Exception as e:
-                    try:
-                        print(f"关闭模块文件失败 {logger_name}: {e}", file=sys.stderr)
-                    except (ValueError, AttributeError):
-                        pass
+                self._close_module_handles(logger_name, file_handles)
             
             # 清空模块文件字典
             self.module_files.clear()
+
+            # 等待后台压缩完成，或在清单中保留未完成的分段
+            if self.compressor is not None:
+                self.compressor.shutdown(wait=self.wait_compression_on_close)
             
             # 在Windows环境下，额外等待确保文件句柄释放
             if sys.platform.startswith('win'):
@@ -199,10 +418,12 @@ class FileWriter:
         return
 
 
-def _writer_thread_func() -> None:
+def _writer_thread_func(shard_id: Optional[str] = None) -> None:
     """写入线程主函数"""
+    global _file_writer
+
     try:
-        from .config import get_root_config
+        from .config import get_root_config, get_logger_option
         cfg = get_root_config()
         
         # 优先从paths配置中获取日志目录
@@ -224,7 +445,19 @@ def _writer_thread_func() -> None:
             print("无法获取会话目录", file=sys.stderr)
             raise Exception("无法获取会话目录")
 
-        writer = FileWriter(session_dir)
+        max_module_files = get_logger_option(cfg, 'max_module_files', DEFAULT_MAX_MODULE_FILES)
+        writer = FileWriter(
+            session_dir,
+            max_module_files=max_module_files,
+            index_mode=get_logger_option(cfg, 'index_mode', False),
+            rotation_max_bytes=get_logger_option(cfg, 'rotation_max_bytes', 0),
+            rotation_interval=get_logger_option(cfg, 'rotation_interval', 0.0),
+            compressor=create_compressor(cfg, session_dir),
+            wait_compression_on_close=get_logger_option(cfg, 'compression_wait_on_close', True),
+            shard_id=shard_id
+        )
+        write_batch_size = max(1, get_logger_option(cfg, 'write_batch_size', DEFAULT_WRITE_BATCH))
+        _file_writer = writer
     except Exception as e:
         try:
             print(f"初始化文件写入器失败: {e}", file=sys.stderr)
@@ -235,15 +468,28 @@ def _writer_thread_func() -> None:
     try:
         while True:
             try:
-                # 从队列获取日志条目
+                # 阻塞等待第一条，再非阻塞取出已排队的日志组成一批
                 entry = _log_queue.get(timeout=1.0)
-
-                # 检查结束标记
-                if entry is QUEUE_SENTINEL:
-                    break
+                batch = []
+                stop = False
+                while True:
+                    # 检查结束标记
+                    if entry is QUEUE_SENTINEL:
+                        stop = True
+                        break
+                    batch.append(entry)
+                    if len(batch) >= write_batch_size:
+                        break
+                    try:
+                        entry = _log_queue.get_nowait()
+                    except queue.Empty:
+                        break
 
                 # 写入日志
-                writer.write_log(entry)
+                if batch:
+                    writer.write_batch(batch)
+                if stop:
+                    break
 
             except queue.Empty:
                 # 检查停止事件
@@ -255,12 +501,18 @@ def _writer_thread_func() -> None:
 
     finally:
         writer.close()
+        if _file_writer is writer:
+            _file_writer = None
 
     return
 
 
-def init_writer() -> None:
-    """初始化异步写入器"""
+def init_writer(shard_id: Optional[str] = None) -> None:
+    """初始化异步写入器
+
+    Args:
+        shard_id: worker分片模式下的worker标识，写入full.w{shard_id}.log
+    """
     global _log_queue, _writer_thread, _stop_event
 
     if _log_queue is not None:
@@ -269,7 +521,7 @@ def init_writer() -> None:
     try:
         _log_queue = queue.Queue(maxsize=1_000)
         _stop_event = threading.Event()
-        _writer_thread = threading.Thread(target=_writer_thread_func, daemon=True)
+        _writer_thread = threading.Thread(target=_writer_thread_func, args=(shard_id,), daemon=True)
         _writer_thread.start()
 
         # 设置信号处理器增强清理机制
@@ -309,6 +561,18 @@ def write_log_async(log_line: str, level_value: int, logger_name: str, exception
     return
 
 
+def get_writer_stats() -> dict:
+    """获取异步写入器的文件句柄统计信息
+
+    Returns:
+        dict: 句柄打开次数、模块重新打开次数、LRU淘汰次数等；未初始化时返回空字典
+    """
+    writer = _file_writer
+    if writer is None:
+        return {}
+    return writer.get_stats()
+
+
 def flush_writer() -> None:
     """刷新写入器，确保所有队列中的数据都被写入文件"""
     global _log_queue, _writer_thread
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+worker配置传递基准测试
+
+比较两种方式传给worker的配置：
+1. 完整配置：整个config对象（模拟config_manager配置：logger之外还有训练、数据等配置节）
+2. 配置快照：get_serializable_config()返回的扁平字典
+
+分别测量pickle字节数、反序列化耗时、进程内反序列化+初始化+关闭的耗时，以及spawn worker从
+Process.start()到日志系统初始化完成的耗时。
+"""
+from __future__ import annotations
+
+import multiprocessing as mp
+import pickle
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+# 添加src目录到Python路径
+src_root = Path(__file__).parent.parent
+sys.path.insert(0, str(src_root))
+
+from custom_logger import (
+    get_serializable_config,
+    init_custom_logger_system,
+    init_custom_logger_system_for_worker,
+    init_custom_logger_system_from_serializable_config,
+    tear_down_custom_logger_system,
+)
+
+IN_PROCESS_ROUNDS = 200
+SPAWN_ROUNDS = 5
+
+
+def build_full_config(log_dir: str) -> SimpleNamespace:
+    """构造接近实际项目规模的完整配置对象"""
+    return SimpleNamespace(
+        project_name="benchmark",
+        experiment_name="config_snapshot",
+        base_dir=log_dir,
+        first_start_time=datetime.now(),
+        paths=SimpleNamespace(log_dir=log_dir, data_dir=f"{log_dir}/data", model_dir=f"{log_dir}/models"),
+        logger=SimpleNamespace(
+            global_console_level="error", global_file_level="debug", module_levels={},
+            show_call_chain=False, show_debug_call_stack=False, queue_batch_size=64,
+        ),
+        training=SimpleNamespace(
+            learning_rate=1e-3, batch_size=256, epochs=100,
+            schedule=[{'epoch': i, 'lr': 1e-3 * 0.95 ** i} for i in range(100)],
+            layers=[SimpleNamespace(name=f"layer_{i}", units=512, activation="relu") for i in range(48)],
+        ),
+        data=SimpleNamespace(
+            files=[f"{log_dir}/data/shard_{i:05d}.parquet" for i in range(2000)],
+            columns={f"feature_{i}": "float32" for i in range(300)},
+        ),
+    )
+
+
+def _loads(payload: bytes) -> float:
+    """反序列化的平均耗时（微秒）"""
+    rounds = IN_PROCESS_ROUNDS * 10
+    started = time.perf_counter()
+    for _ in range(rounds):
+        pickle.loads(payload)
+    return (time.perf_counter() - started) / rounds * 1_000_000
+
+
+def _in_process(payload: bytes, snapshot: bool) -> float:
+    """反序列化并初始化/关闭日志系统的平均耗时（毫秒）"""
+    started = time.perf_counter()
+    for _ in range(IN_PROCESS_ROUNDS):
+        config = pickle.loads(payload)
+        if snapshot:
+            init_custom_logger_system_from_serializable_config(config, "bench")
+        else:
+            init_custom_logger_system_for_worker(config, "bench")
+        tear_down_custom_logger_system()
+    return (time.perf_counter() - started) / IN_PROCESS_ROUNDS * 1000
+
+
+def _spawn_worker(config, snapshot: bool, ready) -> None:
+    if snapshot:
+        init_custom_logger_system_from_serializable_config(config, "bench")
+    else:
+        init_custom_logger_system_for_worker(config, "bench")
+    ready.set()
+    tear_down_custom_logger_system()
+
+
+def _spawn(config, snapshot: bool) -> float:
+    """spawn worker启动到初始化完成的中位耗时（毫秒）"""
+    context = mp.get_context("spawn")
+    samples = []
+    for _ in range(SPAWN_ROUNDS):
+        ready = context.Event()
+        process = context.Process(target=_spawn_worker, args=(config, snapshot, ready))
+        started = time.perf_counter()
+        process.start()
+        ready.wait(60)
+        samples.append((time.perf_counter() - started) * 1000)
+        process.join()
+    return statistics.median(samples)
+
+
+def main() -> None:
+    """主函数"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        full_config = build_full_config(temp_dir)
+        init_custom_logger_system(full_config)
+        snapshot = get_serializable_config()
+        tear_down_custom_logger_system()
+
+        full_payload = pickle.dumps(full_config)
+        snapshot_payload = pickle.dumps(snapshot)
+
+        rows = [
+            ("完整配置", len(full_payload), _loads(full_payload), _in_process(full_payload, False),
+             _spawn(full_config, False)),
+            ("配置快照", len(snapshot_payload), _loads(snapshot_payload), _in_process(snapshot_payload, True),
+             _spawn(snapshot, True)),
+        ]
+
+    print(f"{'方式':<10}{'pickle字节':>14}{'反序列化 微秒':>16}{'进程内 毫秒':>14}{'spawn启动 毫秒':>18}")
+    for name, size, loads_us, in_process_ms, spawn_ms in rows:
+        print(f"{name:<10}{size:>14,}{loads_us:>16.1f}{in_process_ms:>14.3f}{spawn_ms:>18.1f}")
+
+
+if __name__ == "__main__":
+    main()
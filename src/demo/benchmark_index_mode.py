@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+索引模式基准测试
+
+对比普通模式（full/warning/模块文件重复写入）与索引模式（只写full.log + full.idx）：
+1. 写入耗时
+2. 磁盘写入字节数
+3. 打开的文件句柄数与写入过程中的内存峰值
+"""
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+# 添加src目录到Python路径
+src_root = Path(__file__).parent.parent
+sys.path.insert(0, str(src_root))
+
+from custom_logger.writer import FileWriter, LogEntry
+from custom_logger.log_index import LogIndexReader
+from custom_logger.types import INFO, WARNING, ERROR
+
+
+def _dir_size(path: str) -> int:
+    """统计目录下所有文件字节数"""
+    return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+
+
+def _make_entries(count: int, module_count: int) -> list:
+    """构造测试日志，约20%为WARNING及以上"""
+    entries = []
+    for i in range(count):
+        if i % 10 == 0:
+            level = ERROR
+        elif i % 10 == 5:
+            level = WARNING
+        else:
+            level = INFO
+        line = f"[ 12345 | bench : {i % 9999:>4}] 2025-01-01 00:00:00 - 0:00:01.00 - {'INFO':^10} - 训练步骤 {i} loss=0.{i % 997:03d}"
+        entries.append(LogEntry(line, level, f"mod_{i % module_count}"))
+    return entries
+
+
+def run_case(entries: list, index_mode: bool) -> dict:
+    """运行单个模式的基准"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        tracemalloc.start()
+        started = time.perf_counter()
+
+        writer = FileWriter(temp_dir, max_module_files=0, index_mode=index_mode)
+        for entry in entries:
+            writer.write_log(entry)
+        open_handles = writer.get_stats()["opens"]
+        writer.close()
+
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        result = {
+            "elapsed": elapsed,
+            "bytes": _dir_size(temp_dir),
+            "handles": open_handles,
+            "peak_kb": peak / 1024,
+        }
+
+        if index_mode:
+            started = time.perf_counter()
+            LogIndexReader(temp_dir).rebuild_warning_log(os.path.join(temp_dir, "warning.rebuilt.log"))
+            result["rebuild_warning"] = time.perf_counter() - started
+        return result
+
+
+def main() -> None:
+    """主函数"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    module_count = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    entries = _make_entries(count, module_count)
+
+    normal = run_case(entries, index_mode=False)
+    indexed = run_case(entries, index_mode=True)
+
+    print(f"记录数: {count}, 模块数: {module_count}")
+    print(f"{'模式':<8}{'耗时(s)':>10}{'磁盘字节':>14}{'打开句柄':>10}{'内存峰值(KB)':>14}")
+    for name, result in (("普通", normal), ("索引", indexed)):
+        print(f"{name:<8}{result['elapsed']:>10.3f}{result['bytes']:>14,}{result['handles']:>10}{result['peak_kb']:>14.1f}")
+    print(f"磁盘写入节省: {1 - indexed['bytes'] / normal['bytes']:.1%}")
+    print(f"按需重建warning.log耗时: {indexed['rebuild_warning']:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
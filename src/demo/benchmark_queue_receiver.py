@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+队列模式接收端吞吐基准测试
+
+启动8/32/128个worker进程经mp.Queue发送日志，主进程用QueueLogReceiver写入文件，
+统计从worker启动到全部日志落盘的持续吞吐（条/秒）：
+1. 单队列：所有worker共用一个队列
+2. 多队列：worker按worker_id分到4个队列，每个队列独立出队
+worker端使用批量发送和紧凑格式（queue_batch_size=64, queue_wire_format="compact"）。
+"""
+from __future__ import annotations
+
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 添加src目录到Python路径
+src_root = Path(__file__).parent.parent
+sys.path.insert(0, str(src_root))
+
+from custom_logger.queue_writer import QueueLogReceiver, QueueLogSender, select_queue
+from custom_logger.wire import WIRE_FORMAT_COMPACT
+from custom_logger.types import INFO
+
+SAMPLE_LINE = "[ 12345 |  trainer : 128] 2025-01-01 12:00:00 - 0:12:34.56 -    INFO    - worker={} step={:06d} loss=0.1234"
+WORKER_COUNTS = [8, 32, 128]
+QUEUE_GROUPS = [1, 4]
+
+
+def _worker(log_queue, worker_id: str, count: int) -> None:
+    sender = QueueLogSender(
+        log_queue, worker_id, batch_size=64, batch_interval=0.05, wire_format=WIRE_FORMAT_COMPACT
+    )
+    for i in range(count):
+        sender.send_log(SAMPLE_LINE.format(worker_id, i), INFO, logger_name="trainer")
+    sender.close()
+
+
+def records_per_second(workers: int, groups: int, total: int) -> float:
+    """测量持续吞吐"""
+    per_worker = total // workers
+    queues = [mp.Queue(maxsize=10_000) for _ in range(groups)]
+    with tempfile.TemporaryDirectory() as temp_dir:
+        receiver = QueueLogReceiver(queues if groups > 1 else queues[0], temp_dir)
+        started = time.perf_counter()
+        receiver.start_receiving()
+
+        processes = []
+        for index in range(workers):
+            worker_id = f"w{index}"
+            process = mp.Process(target=_worker, args=(select_queue(queues, worker_id), worker_id, per_worker))
+            process.start()
+            processes.append(process)
+        for process in processes:
+            process.join()
+        receiver.stop_receiving()
+        elapsed = time.perf_counter() - started
+
+        with open(os.path.join(temp_dir, "full.log"), 'rb') as f:
+            written = sum(1 for _ in f)
+    if written != per_worker * workers:
+        print(f"警告: 写入 {written} 条，预期 {per_worker * workers} 条")
+    return written / elapsed
+
+
+def main() -> None:
+    """主函数"""
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 256_000
+    print(f"总记录数: {total}, CPU数: {os.cpu_count()}")
+    print(f"{'worker数':<10}" + "".join(f"{f'{groups}个队列 条/秒':>18}" for groups in QUEUE_GROUPS))
+    for workers in WORKER_COUNTS:
+        rates = [records_per_second(workers, groups, total) for groups in QUEUE_GROUPS]
+        print(f"{workers:<10}" + "".join(f"{rate:>18,.0f}" for rate in rates))
+
+
+if __name__ == "__main__":
+    main()
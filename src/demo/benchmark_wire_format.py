@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+队列传输格式基准测试
+
+对比QueueLogEntry逐条pickle与紧凑bytes帧（wire模块）：
+1. 每条记录经队列传输的字节数（multiprocessing使用的pickle结果）
+2. 经mp.Queue从worker进程到主进程的吞吐（条/秒，含接收端解码）
+3. 同样负载经共享内存环形缓冲区（shm_ring模块）传输的吞吐
+"""
+from __future__ import annotations
+
+import multiprocessing as mp
+import sys
+import time
+from multiprocessing.reduction import ForkingPickler
+from pathlib import Path
+
+# 添加src目录到Python路径
+src_root = Path(__file__).parent.parent
+sys.path.insert(0, str(src_root))
+
+from custom_logger.queue_writer import QueueLogSender, iter_queue_entries
+from custom_logger.shm_ring import ShmLogTransport
+from custom_logger.wire import WIRE_FORMAT_COMPACT, WIRE_FORMAT_ENTRY
+from custom_logger.types import INFO
+
+SAMPLE_LINE = "[ 12345 |  trainer : 128] 2025-01-01 12:00:00 - 0:12:34.56 -    INFO    - step={:06d} loss=0.1234 lr=3e-4"
+
+CASES = [
+    ("entry", WIRE_FORMAT_ENTRY, 1),
+    ("entry x64", WIRE_FORMAT_ENTRY, 64),
+    ("compact", WIRE_FORMAT_COMPACT, 1),
+    ("compact x64", WIRE_FORMAT_COMPACT, 64),
+]
+
+
+class _CaptureQueue:
+    """记录put对象的假队列，用于统计pickle字节数"""
+
+    def __init__(self):
+        self.items = []
+
+    def put_nowait(self, item) -> None:
+        self.items.append(item)
+
+
+def bytes_per_record(wire_format: str, batch_size: int, count: int = 1024) -> float:
+    """计算每条记录的平均传输字节数"""
+    capture = _CaptureQueue()
+    sender = QueueLogSender(capture, "worker_1", batch_size=batch_size, batch_interval=3600.0, wire_format=wire_format)
+    for i in range(count):
+        # 每条内容不同，避免pickle对同一字符串对象的memo引用使结果失真
+        sender.send_log(SAMPLE_LINE.format(i), INFO)
+    sender.flush()
+    total = sum(len(ForkingPickler.dumps(item)) for item in capture.items)
+    return total / count
+
+
+def _producer(log_queue, wire_format: str, batch_size: int, count: int) -> None:
+    sender = QueueLogSender(log_queue, "worker_1", batch_size=batch_size, batch_interval=3600.0, wire_format=wire_format)
+    for i in range(count):
+        sender.send_log(SAMPLE_LINE.format(i), INFO)
+    sender.flush()
+
+
+def records_per_second(wire_format: str, batch_size: int, count: int, use_shm: bool = False) -> float:
+    """测量经mp.Queue或共享内存传输并解码的吞吐"""
+    if use_shm:
+        log_queue = ShmLogTransport(slots=4, ring_bytes=16 << 20)
+    else:
+        log_queue = mp.Queue(maxsize=100_000)
+    process = mp.Process(target=_producer, args=(log_queue, wire_format, batch_size, count))
+    started = time.perf_counter()
+    process.start()
+
+    received = 0
+    while received < count:
+        received += len(iter_queue_entries(log_queue.get()))
+    elapsed = time.perf_counter() - started
+    process.join()
+    if use_shm:
+        log_queue.close()
+        log_queue.unlink()
+    return received / elapsed
+
+
+def main() -> None:
+    """主函数"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    print(f"记录数: {count}, 日志行长度: {len(SAMPLE_LINE.format(0))}")
+    print(f"{'格式':<14}{'字节/条':>10}{'条/秒':>14}{'shm 条/秒':>14}")
+    for name, wire_format, batch_size in CASES:
+        size = bytes_per_record(wire_format, batch_size)
+        rate = records_per_second(wire_format, batch_size, count)
+        shm_rate = records_per_second(wire_format, batch_size, count, use_shm=True)
+        print(f"{name:<14}{size:>10.1f}{rate:>14,.0f}{shm_rate:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+worker分片写入吞吐基准测试
+
+启动1/2/4/8个worker进程，比较两种方式从worker启动到全部日志落盘的持续吞吐（条/秒）：
+1. 队列：worker经mp.Queue发送（批量+紧凑格式），主进程QueueLogReceiver写入full.log
+2. 分片：worker用批量写入器直接写入full.w{id}.log，结束后合并为full.log（合并时间单独列出）
+"""
+from __future__ import annotations
+
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 添加src目录到Python路径
+src_root = Path(__file__).parent.parent
+sys.path.insert(0, str(src_root))
+
+from custom_logger.queue_writer import QueueLogReceiver, QueueLogSender
+from custom_logger.shards import merge_shards
+from custom_logger.types import INFO
+from custom_logger.wire import WIRE_FORMAT_COMPACT
+from custom_logger.writer import FileWriter, LogEntry
+
+SAMPLE_LINE = "[ 12345 |  trainer : 128] 2025-01-01 12:00:00 - 0:00:{:05.2f} -    INFO    - worker={} step={:06d} loss=0.1234"
+WORKER_COUNTS = [1, 2, 4, 8]
+BATCH = 256
+
+
+def _line(worker_id: str, i: int) -> str:
+    return SAMPLE_LINE.format((i / 1000) % 60, worker_id, i)
+
+
+def _queue_worker(log_queue, worker_id: str, count: int) -> None:
+    sender = QueueLogSender(log_queue, worker_id, batch_size=64, wire_format=WIRE_FORMAT_COMPACT)
+    for i in range(count):
+        sender.send_log(_line(worker_id, i), INFO, logger_name="trainer")
+    sender.close()
+
+
+def _shard_worker(session_dir: str, worker_id: str, count: int) -> None:
+    writer = FileWriter(session_dir, shard_id=worker_id)
+    batch = []
+    for i in range(count):
+        batch.append(LogEntry(_line(worker_id, i), INFO, "trainer", worker_id=worker_id))
+        if len(batch) >= BATCH:
+            writer.write_batch(batch)
+            batch = []
+    writer.write_batch(batch)
+    writer.close()
+
+
+def measure(workers: int, total: int) -> tuple:
+    """返回(队列条/秒, 分片条/秒, 合并秒数)"""
+    per_worker = total // workers
+    written = per_worker * workers
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        log_queue = mp.Queue(maxsize=10_000)
+        receiver = QueueLogReceiver(log_queue, temp_dir)
+        receiver.start_receiving()
+        started = time.perf_counter()
+        processes = [
+            mp.Process(target=_queue_worker, args=(log_queue, f"w{index}", per_worker)) for index in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        receiver.stop_receiving()
+        queue_rate = written / (time.perf_counter() - started)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        started = time.perf_counter()
+        processes = [
+            mp.Process(target=_shard_worker, args=(temp_dir, f"{index}", per_worker)) for index in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        shard_rate = written / (time.perf_counter() - started)
+
+        started = time.perf_counter()
+        merge_shards(temp_dir)
+        merge_seconds = time.perf_counter() - started
+
+    return queue_rate, shard_rate, merge_seconds
+
+
+def main() -> None:
+    """主函数"""
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 400_000
+    print(f"总记录数: {total}, CPU数: {os.cpu_count()}")
+    print(f"{'worker数':<10}{'队列 条/秒':>16}{'分片 条/秒':>16}{'合并 秒':>12}")
+    for workers in WORKER_COUNTS:
+        queue_rate, shard_rate, merge_seconds = measure(workers, total)
+        print(f"{workers:<10}{queue_rate:>16,.0f}{shard_rate:>16,.0f}{merge_seconds:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
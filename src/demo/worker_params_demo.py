@@ -22,11 +22,11 @@ sys.path.insert(0, str(src_dir))
 
 from custom_logger import (
     init_custom_logger_system,
-    init_custom_logger_system_with_params,  # 占位函数，抛出NotImplementedError
-    init_custom_logger_system_from_serializable_config,  # 占位函数，抛出NotImplementedError
+    init_custom_logger_system_with_params,
+    init_custom_logger_system_from_serializable_config,
     get_logger,
-    get_logger_init_params,  # 占位函数，抛出NotImplementedError
-    get_serializable_config,  # 占位函数，抛出NotImplementedError
+    get_logger_init_params,
+    get_serializable_config,
     tear_down_custom_logger_system
 )
 
@@ -21,9 +21,9 @@ sys.path.insert(0, str(src_dir))
 
 from custom_logger import (
     init_custom_logger_system,
-    init_custom_logger_system_from_serializable_config,  # 占位函数，抛出NotImplementedError
+    init_custom_logger_system_from_serializable_config,
     get_logger,
-    get_serializable_config,  # 占位函数，抛出NotImplementedError
+    get_serializable_config,
     tear_down_custom_logger_system
 )
 
@@ -0,0 +1,79 @@
+# tests/test_custom_logger/test_tc0023_module_file_lru.py
+"""
+测试模块文件句柄的LRU缓存
+"""
+from __future__ import annotations
+
+import os
+import tempfile
+from types import SimpleNamespace
+
+from custom_logger.writer import FileWriter, LogEntry
+from custom_logger.config import get_logger_option
+from custom_logger.types import INFO, WARNING
+
+
+def test_tc0023_001_lru_evicts_least_recently_used():
+    """测试超过上限时淘汰最久未使用的模块"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        writer = FileWriter(temp_dir, max_module_files=2)
+
+        writer.write_log(LogEntry("a1", INFO, "mod_a"))
+        writer.write_log(LogEntry("b1", INFO, "mod_b"))
+        writer.write_log(LogEntry("a2", INFO, "mod_a"))  # mod_a变为最近使用
+        writer.write_log(LogEntry("c1", INFO, "mod_c"))  # 淘汰mod_b
+
+        assert list(writer.module_files.keys()) == ["mod_a", "mod_c"]
+        stats = writer.get_stats()
+        assert stats["module_evictions"] == 1
+        assert stats["open_modules"] == 2
+        assert stats["opens"] == 2 + 3 * 2  # 全局文件 + 三个模块各两个
+        writer.close()
+    pass
+
+
+def test_tc0023_002_reopen_appends_after_eviction():
+    """测试被淘汰的模块再次写入时以追加模式重新打开"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        writer = FileWriter(temp_dir, max_module_files=1)
+
+        writer.write_log(LogEntry("first warning", WARNING, "mod_a"))
+        writer.write_log(LogEntry("other", INFO, "mod_b"))
+        writer.write_log(LogEntry("second warning", WARNING, "mod_a"))
+        writer.close()
+
+        assert writer.handle_stats["module_reopens"] == 1
+
+        with open(os.path.join(temp_dir, "mod_a_full.log"), 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        assert lines == ["first warning", "second warning"]
+
+        with open(os.path.join(temp_dir, "mod_a_warning.log"), 'r', encoding='utf-8') as f:
+            assert f.read().splitlines() == ["first warning", "second warning"]
+    pass
+
+
+def test_tc0023_003_unlimited_when_zero():
+    """测试max_module_files为0时不限制"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        writer = FileWriter(temp_dir, max_module_files=0)
+        for i in range(10):
+            writer.write_log(LogEntry(f"line {i}", INFO, f"mod_{i}"))
+
+        assert len(writer.module_files) == 10
+        assert writer.handle_stats["module_evictions"] == 0
+        writer.close()
+    pass
+
+
+def test_tc0023_004_get_logger_option():
+    """测试logger配置项读取兼容字典和对象并校验类型"""
+    cfg_dict = SimpleNamespace(logger={'max_module_files': 8})
+    cfg_obj = SimpleNamespace(logger=SimpleNamespace(max_module_files=16))
+    cfg_bad = SimpleNamespace(logger={'max_module_files': "many"})
+
+    assert get_logger_option(cfg_dict, 'max_module_files', 64) == 8
+    assert get_logger_option(cfg_obj, 'max_module_files', 64) == 16
+    assert get_logger_option(cfg_bad, 'max_module_files', 64) == 64
+    assert get_logger_option(SimpleNamespace(), 'max_module_files', 64) == 64
+    pass
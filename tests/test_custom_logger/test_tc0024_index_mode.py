@@ -0,0 +1,153 @@
+# tests/test_custom_logger/test_tc0024_index_mode.py
+"""
+测试索引模式：只写full.log并通过偏移索引重建warning和模块视图
+"""
+from __future__ import annotations
+
+import gzip
+import os
+import shutil
+import tempfile
+
+from custom_logger.writer import FileWriter, LogEntry
+from custom_logger import log_index
+from custom_logger.log_index import (
+    LogIndexReader, LogIndexWriter, INDEX_FILE_NAME, INDEX_RECORD, OTHER_MODULE, UNNAMED_MODULE, main
+)
+from custom_logger.types import INFO, WARNING, ERROR
+
+
+def _write_sample(temp_dir: str) -> None:
+    writer = FileWriter(temp_dir, index_mode=True)
+    writer.write_log(LogEntry("info 主模块", INFO, "main"))
+    writer.write_log(LogEntry("warning 工作模块", WARNING, "worker"))
+    writer.write_log(LogEntry("error 主模块", ERROR, "main", "Traceback: boom"))
+    writer.write_log(LogEntry("info 工作模块", INFO, "worker"))
+    writer.close()
+
+
+def test_tc0024_001_index_mode_writes_full_log_once():
+    """测试索引模式只生成full.log和索引文件"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        _write_sample(temp_dir)
+
+        assert not os.path.exists(os.path.join(temp_dir, "warning.log"))
+        assert not os.path.exists(os.path.join(temp_dir, "main_full.log"))
+
+        with open(os.path.join(temp_dir, "full.log"), 'r', encoding='utf-8') as f:
+            content = f.read()
+        assert content.count("主模块") == 2
+        assert "Traceback: boom" in content
+
+        index_size = os.path.getsize(os.path.join(temp_dir, INDEX_FILE_NAME))
+        assert index_size == 4 * INDEX_RECORD.size
+    pass
+
+
+def test_tc0024_002_reader_rebuilds_views():
+    """测试读取器按级别和模块重建视图"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        _write_sample(temp_dir)
+        reader = LogIndexReader(temp_dir)
+
+        assert reader.modules == ["main", "worker"]
+
+        warning_chunks = [c.decode('utf-8') for c in reader.iter_chunks(min_level=WARNING)]
+        assert warning_chunks == ["warning 工作模块\n", "error 主模块\nTraceback: boom\n"]
+
+        full_count, warning_count = reader.rebuild_module_logs("worker")
+        assert (full_count, warning_count) == (2, 1)
+        with open(os.path.join(temp_dir, "worker_full.log"), 'r', encoding='utf-8') as f:
+            assert f.read().splitlines() == ["warning 工作模块", "info 工作模块"]
+    pass
+
+
+def test_tc0024_003_append_keeps_offsets_and_module_ids():
+    """测试重新打开会话时偏移和模块ID保持连续"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        _write_sample(temp_dir)
+
+        writer = FileWriter(temp_dir, index_mode=True)
+        writer.write_log(LogEntry("warning 追加", WARNING, "worker"))
+        writer.close()
+
+        reader = LogIndexReader(temp_dir)
+        assert reader.modules == ["main", "worker"]
+        worker_chunks = [c.decode('utf-8') for c in reader.iter_chunks(module="worker")]
+        assert worker_chunks[-1] == "warning 追加\n"
+    pass
+
+
+def test_tc0024_004_cli_rebuilds_warning_log(capsys):
+    """测试命令行重建warning.log"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        _write_sample(temp_dir)
+
+        assert main([temp_dir, "--warning", "--all-modules"]) == 0
+
+        with open(os.path.join(temp_dir, "warning.log"), 'r', encoding='utf-8') as f:
+            assert f.read().splitlines() == ["warning 工作模块", "error 主模块", "Traceback: boom"]
+        assert os.path.exists(os.path.join(temp_dir, "main_warning.log"))
+    pass
+
+
+def test_tc0024_005_unnamed_records_keep_batch():
+    """测试没有logger名称的记录使用保留的模块ID，同批记录不丢失"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        writer = FileWriter(temp_dir, index_mode=True)
+        writer.write_batch([LogEntry("a", INFO, "m"), LogEntry("b", WARNING, None), LogEntry("c", INFO, "m")])
+        writer.close()
+
+        writer = FileWriter(temp_dir, index_mode=True)
+        writer.write_log(LogEntry("d", WARNING, None))
+        writer.close()
+
+        with open(os.path.join(temp_dir, "full.log"), 'r', encoding='utf-8') as f:
+            assert f.read().splitlines() == ["a", "b", "c", "d"]
+
+        reader = LogIndexReader(temp_dir)
+        assert reader.modules == ["m", UNNAMED_MODULE]
+        assert [c.decode('utf-8') for c in reader.iter_chunks(module=UNNAMED_MODULE)] == ["b\n", "d\n"]
+
+        assert main([temp_dir, "--all-modules"]) == 0
+        assert not os.path.exists(os.path.join(temp_dir, "_full.log"))
+    pass
+
+
+def test_tc0024_006_reader_includes_rotated_segments():
+    """测试读取器按序号读取已轮转（含已压缩）的分段，重建的视图不遗漏轮转前的记录"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        writer = FileWriter(temp_dir, index_mode=True, rotation_max_bytes=40)
+        for i in range(6):
+            writer.write_log(LogEntry(f"indexed line {i:03d}", WARNING if i % 2 == 0 else INFO, "mod"))
+        writer.close()
+
+        first = os.path.join(temp_dir, "full.0001.log")
+        with open(first, 'rb') as src, gzip.open(first + ".gz", 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(first)
+
+        assert main([temp_dir, "--warning", "--module", "mod"]) == 0
+        with open(os.path.join(temp_dir, "warning.log"), 'r', encoding='utf-8') as f:
+            assert f.read().splitlines() == [f"indexed line {i:03d}" for i in (0, 2, 4)]
+        with open(os.path.join(temp_dir, "mod_full.log"), 'r', encoding='utf-8') as f:
+            assert f.read().splitlines() == [f"indexed line {i:03d}" for i in range(6)]
+    pass
+
+
+def test_tc0024_007_module_id_overflow(monkeypatch):
+    """测试模块数量超过上限时新模块记为保留ID，不抛出异常"""
+    monkeypatch.setattr(log_index, 'MAX_MODULE_ID', 2)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        writer = FileWriter(temp_dir, index_mode=True)
+        writer.write_batch([LogEntry(f"line {name}", INFO, name) for name in ("a", "b", "c", "d", "a")])
+        writer.close()
+
+        reader = LogIndexReader(temp_dir)
+        assert reader.modules == ["a", "b"]
+        assert [record[3] for record in reader.iter_records()] == ["a", "b", OTHER_MODULE, OTHER_MODULE, "a"]
+        assert [c.decode('utf-8') for c in reader.iter_chunks(module=OTHER_MODULE)] == ["line c\n", "line d\n"]
+        index_writer = LogIndexWriter(temp_dir)
+        assert index_writer.get_module_id("e") == 2
+        index_writer.close()
+    pass
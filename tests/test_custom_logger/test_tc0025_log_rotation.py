@@ -0,0 +1,150 @@
+# tests/test_custom_logger/test_tc0025_log_rotation.py
+"""
+测试日志文件按大小/时间轮转
+"""
+from __future__ import annotations
+
+import os
+import tempfile
+from unittest.mock import patch
+
+from custom_logger.log_file import LogFile, next_segment_number, segment_path
+from custom_logger.log_index import LogIndexReader
+from custom_logger.writer import FileWriter, LogEntry
+from custom_logger.types import INFO, WARNING
+
+
+def test_tc0025_001_segment_naming():
+    """测试分段命名和序号扫描"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "full.log")
+        assert segment_path(path, 1) == os.path.join(temp_dir, "full.0001.log")
+        assert next_segment_number(path) == 1
+
+        for name in ("full.0001.log", "full.0003.log.gz", "warning.0007.log"):
+            open(os.path.join(temp_dir, name), 'w').close()
+        assert next_segment_number(path) == 4
+    pass
+
+
+def test_tc0025_002_size_rotation():
+    """测试按大小轮转且当前文件名不变"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "full.log")
+        log_file = LogFile(path, max_bytes=20)
+        for i in range(5):
+            log_file.write(f"line-{i:04d}\n")  # 每行10字节
+        log_file.close()
+
+        assert log_file.rotations == 2
+        with open(os.path.join(temp_dir, "full.0001.log"), 'r', encoding='utf-8') as f:
+            assert f.read() == "line-0000\nline-0001\n"
+        with open(os.path.join(temp_dir, "full.0002.log"), 'r', encoding='utf-8') as f:
+            assert f.read() == "line-0002\nline-0003\n"
+        with open(path, 'r', encoding='utf-8') as f:
+            assert f.read() == "line-0004\n"
+    pass
+
+
+def test_tc0025_003_interval_rotation():
+    """测试按时间间隔轮转"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "full.log")
+        with patch('custom_logger.log_file.time.time', return_value=1000.0):
+            log_file = LogFile(path, interval=60)
+            log_file.write("first\n")
+            log_file.write("same interval\n")
+        with patch('custom_logger.log_file.time.time', return_value=1021.0):
+            log_file.write("next interval\n")
+        log_file.close()
+
+        assert log_file.rotations == 1
+        with open(os.path.join(temp_dir, "full.0001.log"), 'r', encoding='utf-8') as f:
+            assert f.read() == "first\nsame interval\n"
+    pass
+
+
+def test_tc0025_004_file_writer_rotates_all_files():
+    """测试FileWriter对全局文件和模块文件都进行轮转"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        writer = FileWriter(temp_dir, rotation_max_bytes=64)
+        for i in range(10):
+            writer.write_log(LogEntry(f"warning message number {i:03d}", WARNING, "mod"))
+        stats = writer.get_stats()
+        writer.close()
+
+        names = set(os.listdir(temp_dir))
+        assert {"full.0001.log", "warning.0001.log", "mod_full.0001.log", "mod_warning.0001.log"} <= names
+        assert {"full.log", "warning.log", "mod_full.log", "mod_warning.log"} <= names
+        assert stats["rotations"] > 0
+        assert stats["opens"] == 4  # 轮转不计入打开次数，句柄数保持不变
+    pass
+
+
+def test_tc0025_005_index_mode_rotates_index_with_full_log():
+    """测试索引模式下full.log和full.idx同步轮转"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        writer = FileWriter(temp_dir, index_mode=True, rotation_max_bytes=40)
+        for i in range(4):
+            writer.write_log(LogEntry(f"indexed line {i:03d}", INFO if i % 2 else WARNING, "mod"))
+        writer.close()
+
+        assert os.path.exists(os.path.join(temp_dir, "full.0001.idx"))
+        reader = LogIndexReader(temp_dir, "full.0001.log", "full.0001.idx")
+        assert [c.decode('utf-8') for c in reader.iter_chunks()] == ["indexed line 000\n", "indexed line 001\n"]
+
+        # 默认读取器依次读取各分段和当前文件
+        session = LogIndexReader(temp_dir)
+        assert [c.decode('utf-8') for c in session.iter_chunks(min_level=WARNING)] == [
+            "indexed line 000\n", "indexed line 002\n"
+        ]
+    pass
+
+
+def test_tc0025_006_batch_rotates_at_record_boundaries():
+    """测试批量写入在记录边界轮转，分段不超过max_bytes"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        writer = FileWriter(temp_dir, rotation_max_bytes=64)
+        writer.write_batch([LogEntry(f"batched message number {i:03d}", INFO, None) for i in range(10)])
+        writer.close()
+
+        segments = sorted(name for name in os.listdir(temp_dir) if name.startswith("full."))
+        assert len(segments) == 5
+        lines = []
+        for name in segments:  # full.0001.log ... full.log
+            path = os.path.join(temp_dir, name)
+            assert os.path.getsize(path) <= 64
+            with open(path, 'r', encoding='utf-8') as f:
+                lines.extend(f.read().splitlines())
+        assert lines == [f"batched message number {i:03d}" for i in range(10)]
+    pass
+
+
+def test_tc0025_007_platform_line_separator():
+    """测试换行按平台换行符写入（与文本模式一致）"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "full.log")
+        with patch('custom_logger.log_file.LINE_SEPARATOR', "\r\n"):
+            log_file = LogFile(path)
+            log_file.write_records(["line\n", "error\nTraceback\n"])
+            log_file.close()
+
+        with open(path, 'rb') as f:
+            assert f.read() == b"line\r\nerror\r\nTraceback\r\n"
+    pass
+
+
+def test_tc0025_008_index_offset_single_rotation_check():
+    """测试索引模式每条记录只做一次轮转检查，时间区间在检查之间变化时偏移仍指向实际写入的分段"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        writer = FileWriter(temp_dir, index_mode=True)
+        writer.write_log(LogEntry("first record", INFO, "mod"))
+        # 第一次检查不轮转，之后的检查（例如时间区间刚好切换）轮转
+        decisions = iter([False, True])
+        with patch.object(LogFile, '_should_rotate', lambda self, incoming: next(decisions, False)):
+            writer.write_log(LogEntry("second record", INFO, "mod"))
+        writer.close()
+
+        reader = LogIndexReader(temp_dir)
+        assert [c.decode('utf-8') for c in reader.iter_chunks()] == ["first record\n", "second record\n"]
+    pass
@@ -0,0 +1,147 @@
+# tests/test_custom_logger/test_tc0026_segment_compression.py
+"""
+测试轮转分段的后台压缩
+"""
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import tempfile
+from concurrent.futures import Future
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from custom_logger.compression import (
+    MANIFEST_FILE_NAME, SegmentCompressor, compress_segment, create_compressor, resolve_codec
+)
+from custom_logger.log_index import LogIndexReader
+from custom_logger.writer import FileWriter, LogEntry
+from custom_logger.types import WARNING
+
+
+def test_tc0026_001_compress_segment_gzip():
+    """测试压缩单个分段并删除原文件"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "full.0001.log")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("日志内容\n" * 1000)
+
+        result = compress_segment(path, "gzip")
+
+        assert not os.path.exists(path)
+        assert result["output"] == "full.0001.log.gz"
+        assert result["compressed_bytes"] < result["original_bytes"]
+        with gzip.open(os.path.join(temp_dir, result["output"]), 'rt', encoding='utf-8') as f:
+            assert f.read() == "日志内容\n" * 1000
+    pass
+
+
+def test_tc0026_002_resolve_codec():
+    """测试编解码器解析"""
+    assert resolve_codec("") is None
+    assert resolve_codec("none") is None
+    assert resolve_codec("gzip") == "gzip"
+    assert resolve_codec("zstd") in ("zstd", "gzip")
+    with pytest.raises(ValueError):
+        resolve_codec("bzip9")
+
+    cfg = SimpleNamespace(logger={'compression': 'gzip', 'compression_workers': 2})
+    with tempfile.TemporaryDirectory() as temp_dir:
+        compressor = create_compressor(cfg, temp_dir)
+        assert compressor.codec == "gzip"
+        assert compressor.max_workers == 2
+        assert create_compressor(SimpleNamespace(logger={}), temp_dir) is None
+    pass
+
+
+def test_tc0026_003_file_writer_compresses_rotated_segments():
+    """测试FileWriter轮转后在进程池中压缩并写入清单"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        compressor = SegmentCompressor(temp_dir, codec="gzip", max_workers=1)
+        writer = FileWriter(temp_dir, index_mode=True, rotation_max_bytes=64, compressor=compressor)
+        for i in range(6):
+            writer.write_log(LogEntry(f"warning message number {i:03d}", WARNING, "mod"))
+        writer.close()  # 默认等待压缩完成
+
+        names = set(os.listdir(temp_dir))
+        assert "full.0001.log.gz" in names
+        assert "full.0001.log" not in names
+
+        with open(os.path.join(temp_dir, MANIFEST_FILE_NAME), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        assert manifest["segments"]["full.0001.log"]["status"] == "done"
+
+        # 索引读取器可以直接读取已压缩的分段
+        reader = LogIndexReader(temp_dir, "full.0001.log", "full.0001.idx")
+        assert [c.decode('utf-8') for c in reader.iter_chunks()] == [
+            "warning message number 000\n", "warning message number 001\n"
+        ]
+    pass
+
+
+def test_tc0026_004_shutdown_without_wait_keeps_pending():
+    """测试不等待关闭时未完成的分段在清单中保持pending"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        compressor = SegmentCompressor(temp_dir)
+        compressor._executor = MagicMock()
+        compressor._executor.submit.return_value = MagicMock()
+
+        compressor.submit(os.path.join(temp_dir, "full.0001.log"))
+        compressor.shutdown(wait=False)
+
+        with open(os.path.join(temp_dir, MANIFEST_FILE_NAME), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        assert manifest["segments"]["full.0001.log"]["status"] == "pending"
+        assert "interrupted_at" in manifest
+    pass
+
+
+def test_tc0026_005_unknown_codec_falls_back(capsys):
+    """测试不支持的压缩格式回退为不压缩并提示，日志照常写入"""
+    from custom_logger import get_logger, init_custom_logger_system, tear_down_custom_logger_system
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        assert create_compressor(SimpleNamespace(logger={'compression': 'bzip9'}), temp_dir) is None
+        assert "不支持的压缩格式: bzip9" in capsys.readouterr().err
+
+        config = SimpleNamespace(
+            first_start_time=datetime.now(),
+            paths={'log_dir': temp_dir},
+            logger={'global_console_level': 'error', 'global_file_level': 'info', 'compression': 'bzip9'},
+        )
+        init_custom_logger_system(config)
+        try:
+            get_logger("codec").info("still written")
+        finally:
+            tear_down_custom_logger_system()
+
+        with open(os.path.join(temp_dir, "full.log"), 'r', encoding='utf-8') as f:
+            assert "still written" in f.read()
+    pass
+
+
+def test_tc0026_006_spawn_executor_and_immediate_completion():
+    """测试压缩进程以spawn方式启动，提交时已完成的分段不会残留在pending中"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        segment = os.path.join(temp_dir, "full.0001.log")
+        with open(segment, 'wb') as f:
+            f.write(b"line\n" * 100)
+
+        compressor = SegmentCompressor(temp_dir)
+        compressor.submit(segment)
+        assert compressor._executor._mp_context.get_start_method() == "spawn"
+        compressor.shutdown(wait=True)
+        assert compressor.pending() == []
+        assert os.path.exists(segment + ".gz")
+
+        done = Future()
+        done.set_result({"output": "full.0002.log.gz", "original_bytes": 1, "compressed_bytes": 1})
+        compressor._executor = MagicMock()
+        compressor._executor.submit.return_value = done
+        compressor.submit(os.path.join(temp_dir, "full.0002.log"))
+        assert compressor.pending() == []
+    pass
@@ -0,0 +1,165 @@
+# tests/test_custom_logger/test_tc0027_session_retention.py
+"""
+测试会话目录保留与清理
+"""
+from __future__ import annotations
+
+import os
+import socket
+import tempfile
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from custom_logger.retention import (
+    ACTIVE_MARKER_FILE, RetentionPolicy, apply_retention, clear_session_active, get_project_dir,
+    get_retention_policy, get_retention_report, mark_session_active, plan_retention, scan_sessions,
+    start_retention
+)
+
+
+def _make_session(project_dir: str, experiment: str, date_str: str, time_str: str, size: int) -> str:
+    session_dir = os.path.join(project_dir, experiment, date_str, time_str)
+    os.makedirs(session_dir, exist_ok=True)
+    with open(os.path.join(session_dir, "full.log"), 'wb') as f:
+        f.write(b"x" * size)
+    return session_dir
+
+
+def _build_tree(project_dir: str) -> dict:
+    return {
+        "old": _make_session(project_dir, "exp_a", "2026-01-01", "080000", 100),
+        "mid": _make_session(project_dir, "exp_a", "2026-10-01", "090000", 200),
+        "new": _make_session(project_dir, "exp_a", "2026-10-18", "100000", 300),
+        "current": _make_session(project_dir, "exp_a", "2026-10-19", "110000", 50),
+        "other": _make_session(project_dir, "exp_b", "2026-01-01", "080000", 10),
+    }
+
+
+def test_tc0027_001_scan_sessions():
+    """测试扫描会话并按实验分组"""
+    with tempfile.TemporaryDirectory() as project_dir:
+        sessions = _build_tree(project_dir)
+        os.makedirs(os.path.join(project_dir, "exp_a", "notes"))  # 非会话目录应被忽略
+
+        scanned = scan_sessions(project_dir)
+        exp_a = scanned[os.path.join(project_dir, "exp_a")]
+        assert [s.path for s in exp_a] == [sessions["old"], sessions["mid"], sessions["new"], sessions["current"]]
+        assert exp_a[0].size_bytes == 100
+        assert get_project_dir(sessions["current"]) == os.path.normpath(project_dir)
+    pass
+
+
+def test_tc0027_002_plan_rules_and_current_session():
+    """测试各规则计划删除且当前会话始终保留"""
+    with tempfile.TemporaryDirectory() as project_dir:
+        sessions = _build_tree(project_dir)
+        now = datetime(2026, 10, 19, 12, 0, 0)
+
+        by_age = plan_retention(project_dir, RetentionPolicy(max_age_days=30), sessions["current"], now)
+        assert {s.path for s in by_age.to_delete} == {sessions["old"], sessions["other"]}
+
+        by_count = plan_retention(project_dir, RetentionPolicy(max_sessions=2), sessions["current"], now)
+        assert {s.path for s in by_count.to_delete} == {sessions["old"], sessions["mid"]}
+
+        by_bytes = plan_retention(project_dir, RetentionPolicy(max_total_bytes=360), sessions["current"], now)
+        assert {s.path for s in by_bytes.to_delete} == {sessions["old"], sessions["mid"]}
+        assert by_bytes.reclaimed_bytes == 300
+
+        keep_current = plan_retention(project_dir, RetentionPolicy(max_sessions=1), sessions["current"], now)
+        assert sessions["current"] not in {s.path for s in keep_current.to_delete}
+        assert "删除会话: 3" in keep_current.format()
+    pass
+
+
+def test_tc0027_003_apply_retention_removes_dirs():
+    """测试执行计划删除会话和空日期目录，dry-run不删除"""
+    with tempfile.TemporaryDirectory() as project_dir:
+        sessions = _build_tree(project_dir)
+        report = get_retention_report(sessions["current"], RetentionPolicy(max_sessions=3))
+        assert os.path.exists(sessions["old"])  # dry-run不删除
+
+        assert apply_retention(report) == 1
+        assert not os.path.exists(sessions["old"])
+        assert not os.path.exists(os.path.dirname(sessions["old"]))
+        assert os.path.exists(sessions["mid"])
+    pass
+
+
+def test_tc0027_004_background_start_from_config():
+    """测试根据配置在后台线程执行清理"""
+    with tempfile.TemporaryDirectory() as project_dir:
+        sessions = _build_tree(project_dir)
+
+        assert start_retention(SimpleNamespace(logger={}), sessions["current"]) is None
+
+        cfg = SimpleNamespace(
+            base_dir=os.path.dirname(project_dir),
+            project_name=os.path.basename(project_dir),
+            logger={'retention_max_sessions': 1},
+        )
+        assert get_retention_policy(cfg).max_sessions == 1
+        thread = start_retention(cfg, sessions["current"])
+        thread.join(timeout=5.0)
+
+        assert os.path.exists(sessions["current"])
+        assert not os.path.exists(sessions["new"])
+        assert os.path.exists(sessions["other"])
+    pass
+
+
+def test_tc0027_005_custom_log_dir_skipped(capsys):
+    """测试会话目录不在配置的base_dir/project_name布局下时不清理"""
+    with tempfile.TemporaryDirectory() as root:
+        sessions = _build_tree(os.path.join(root, "unrelated"))
+        custom_dir = os.path.join(root, "custom_logs")
+        os.makedirs(custom_dir)
+        assert get_project_dir(custom_dir) is None
+        with pytest.raises(ValueError):
+            get_retention_report(custom_dir, RetentionPolicy(max_sessions=1))
+
+        # 目录名符合日期/时间格式，但不在配置的项目目录下
+        cfg = SimpleNamespace(base_dir=root, project_name="proj", logger={'retention_max_sessions': 1})
+        assert start_retention(cfg, custom_dir) is None
+        assert start_retention(cfg, sessions["current"]) is None
+        assert start_retention(SimpleNamespace(logger={'retention_max_sessions': 1}), sessions["current"]) is None
+        assert "跳过会话保留清理" in capsys.readouterr().err
+        assert all(os.path.exists(path) for path in sessions.values())
+    pass
+
+
+def test_tc0027_006_active_sessions_kept():
+    """测试其他进程仍在运行的会话不被删除，进程已退出时残留的标记不影响清理"""
+    with tempfile.TemporaryDirectory() as project_dir:
+        sessions = _build_tree(project_dir)
+        now = datetime(2026, 10, 19, 12, 0, 0)
+
+        mark_session_active(sessions["mid"])  # 模拟并发运行的另一个实验进程
+        with open(os.path.join(sessions["old"], ACTIVE_MARKER_FILE), 'w', encoding='utf-8') as f:
+            f.write(f"{2 ** 22 + 1} {socket.gethostname()}")  # 已退出进程残留的标记
+        try:
+            by_count = plan_retention(project_dir, RetentionPolicy(max_sessions=1), sessions["current"], now)
+            assert {s.path for s in by_count.to_delete} == {sessions["old"], sessions["new"]}
+
+            by_age = plan_retention(project_dir, RetentionPolicy(max_age_days=1), sessions["current"], now)
+            assert sessions["mid"] not in {s.path for s in by_age.to_delete}
+        finally:
+            clear_session_active()
+        assert not os.path.exists(os.path.join(sessions["mid"], ACTIVE_MARKER_FILE))
+
+        by_count = plan_retention(project_dir, RetentionPolicy(max_sessions=1), sessions["current"], now)
+        assert {s.path for s in by_count.to_delete} == {sessions["old"], sessions["mid"], sessions["new"]}
+    pass
+
+
+def test_tc0027_007_project_dir_matches_created_layout():
+    """测试get_project_log_dir与_create_log_dir使用同一项目目录"""
+    from custom_logger.config import _create_log_dir, get_project_log_dir
+
+    with tempfile.TemporaryDirectory() as base_dir:
+        cfg = SimpleNamespace(base_dir=base_dir, project_name="proj", experiment_name="exp",
+                              first_start_time="2026-10-19T11:00:00")
+        session_dir = _create_log_dir(cfg)
+        assert get_project_dir(session_dir) == os.path.normpath(get_project_log_dir(cfg))
+    pass
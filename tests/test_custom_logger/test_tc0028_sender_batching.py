@@ -0,0 +1,105 @@
+# tests/test_custom_logger/test_tc0028_sender_batching.py
+"""
+测试worker发送端批量
+"""
+from __future__ import annotations
+
+import multiprocessing as mp
+import os
+import queue
+import tempfile
+import time
+
+from custom_logger.queue_writer import QueueLogEntry, QueueLogReceiver, QueueLogSender
+from custom_logger.types import INFO, ERROR
+
+
+def _drain(log_queue: queue.Queue) -> list:
+    items = []
+    while True:
+        try:
+            items.append(log_queue.get_nowait())
+        except queue.Empty:
+            return items
+
+
+def _child_sender(log_queue) -> None:
+    sender = QueueLogSender(log_queue, "child", batch_size=100, batch_interval=60.0, heartbeat_interval=0.0)
+    sender.send_log("child line 1", INFO)
+    sender.send_log("child line 2", INFO)
+    # 不调用flush，依赖退出钩子发送尾部日志
+
+
+def test_tc0028_001_unbatched_sends_entries():
+    """测试batch_size为1时逐条发送QueueLogEntry"""
+    log_queue = queue.Queue()
+    sender = QueueLogSender(log_queue, "w1", heartbeat_interval=0.0)
+    sender.send_log("line", INFO)
+
+    items = _drain(log_queue)
+    assert len(items) == 1
+    assert isinstance(items[0], QueueLogEntry)
+    pass
+
+
+def test_tc0028_002_flush_by_count_and_error():
+    """测试按条数和ERROR级别触发发送"""
+    log_queue = queue.Queue()
+    sender = QueueLogSender(log_queue, "w1", batch_size=3, batch_interval=60.0, heartbeat_interval=0.0)
+
+    sender.send_log("a", INFO)
+    sender.send_log("b", INFO)
+    assert _drain(log_queue) == []
+
+    sender.send_log("c", INFO)
+    batches = _drain(log_queue)
+    assert [[e.log_line for e in batch] for batch in batches] == [["a", "b", "c"]]
+
+    sender.send_log("d", INFO)
+    sender.send_log("boom", ERROR, "trace")
+    batches = _drain(log_queue)
+    assert [[e.log_line for e in batch] for batch in batches] == [["d", "boom"]]
+    sender.close()
+    pass
+
+
+def test_tc0028_003_flush_by_bytes_and_timer():
+    """测试按字节数和定时器触发发送"""
+    log_queue = queue.Queue()
+    sender = QueueLogSender(log_queue, "w1", batch_size=1000, batch_bytes=10, batch_interval=60.0, heartbeat_interval=0.0)
+    sender.send_log("0123456789", INFO)
+    assert len(_drain(log_queue)) == 1
+    sender.close()
+
+    sender = QueueLogSender(log_queue, "w1", batch_size=1000, batch_interval=0.02, heartbeat_interval=0.0)
+    sender.send_log("timer", INFO)
+    deadline = time.time() + 2.0
+    items = []
+    while not items and time.time() < deadline:
+        time.sleep(0.02)
+        items = _drain(log_queue)
+    assert [e.log_line for e in items[0]] == ["timer"]
+    sender.close()
+    pass
+
+
+def test_tc0028_004_worker_exit_flushes_tail():
+    """测试worker进程退出时发送剩余日志，接收器按批写入文件"""
+    log_queue = mp.Queue()
+    process = mp.Process(target=_child_sender, args=(log_queue,))
+    process.start()
+    process.join(timeout=10.0)
+
+    batch = log_queue.get(timeout=5.0)
+    assert [e.log_line for e in batch] == ["child line 1", "child line 2"]
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        receiver = QueueLogReceiver(log_queue, temp_dir)
+        receiver.start_receiving()
+        log_queue.put(batch)
+        time.sleep(0.3)
+        receiver.stop_receiving()
+
+        with open(os.path.join(temp_dir, "full.log"), 'r', encoding='utf-8') as f:
+            assert f.read().splitlines() == ["child line 1", "child line 2"]
+    pass
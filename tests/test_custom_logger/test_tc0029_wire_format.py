@@ -0,0 +1,81 @@
+# tests/test_custom_logger/test_tc0029_wire_format.py
+"""
+测试队列模式紧凑传输格式
+"""
+from __future__ import annotations
+
+import pickle
+import queue
+
+import pytest
+
+from custom_logger.queue_writer import QueueLogEntry, QueueLogSender, iter_queue_entries
+from custom_logger.wire import WIRE_FORMAT_COMPACT, decode_frame, encode_entries, is_frame
+from custom_logger.types import INFO, ERROR
+
+
+def test_tc0029_001_round_trip():
+    """测试编码解码往返保持所有字段"""
+    entries = [
+        QueueLogEntry("普通日志", INFO, worker_id="w1"),
+        QueueLogEntry("错误日志", ERROR, exception_info="Traceback\n  boom", worker_id="w1",
+                      timestamp="2026-10-19T12:00:00"),
+        QueueLogEntry("", INFO, exception_info="", worker_id="w1"),
+    ]
+    frame = encode_entries(entries)
+
+    assert is_frame(frame)
+    assert decode_frame(frame) == entries
+    pass
+
+
+def test_tc0029_002_smaller_than_pickled_entry():
+    """测试紧凑帧比pickle QueueLogEntry更小"""
+    entry = QueueLogEntry("x" * 100, INFO, worker_id="worker_1")
+    compact = pickle.dumps(encode_entries([entry]))
+    pickled = pickle.dumps(entry)
+    assert len(compact) < len(pickled)
+    pass
+
+
+def test_tc0029_003_sender_compact_and_receiver_compat():
+    """测试发送端紧凑格式以及接收端兼容所有格式"""
+    log_queue = queue.Queue()
+    sender = QueueLogSender(log_queue, "w2", wire_format=WIRE_FORMAT_COMPACT, heartbeat_interval=0.0)
+    sender.send_log("line", INFO)
+
+    item = log_queue.get_nowait()
+    assert isinstance(item, bytes)
+    assert iter_queue_entries(item) == [QueueLogEntry("line", INFO, worker_id="w2")]
+
+    legacy = QueueLogEntry("legacy", INFO)
+    assert iter_queue_entries(legacy) == [legacy]
+    assert iter_queue_entries([legacy, "noise"]) == [legacy]
+    assert iter_queue_entries("STOP_LOGGING") == []
+    pass
+
+
+def test_tc0029_004_bad_frame_version():
+    """测试无法识别的帧版本"""
+    frame = bytearray(encode_entries([QueueLogEntry("a", INFO)]))
+    frame[2] = 99
+    with pytest.raises(ValueError):
+        decode_frame(bytes(frame))
+    pass
+
+
+def test_tc0029_005_long_logger_name_truncated():
+    """测试超过255字节的模块名按字符边界截断，同一帧的其他记录不受影响"""
+    long_name = "模块" * 100  # 600字节
+    entries = [
+        QueueLogEntry("before", INFO, logger_name="short"),
+        QueueLogEntry("long", ERROR, logger_name=long_name),
+        QueueLogEntry("after", INFO, logger_name="short"),
+    ]
+    decoded = decode_frame(encode_entries(entries, worker_id="w1"))
+
+    assert [entry.log_line for entry in decoded] == ["before", "long", "after"]
+    assert decoded[1].logger_name == "模块" * 42 + "模"
+    assert len(decoded[1].logger_name.encode('utf-8')) <= 255
+    assert decoded[2].logger_name == "short"
+    pass
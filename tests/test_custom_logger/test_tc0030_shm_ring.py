@@ -0,0 +1,194 @@
+# tests/test_custom_logger/test_tc0030_shm_ring.py
+"""
+测试共享内存环形缓冲区传输
+"""
+from __future__ import annotations
+
+import multiprocessing as mp
+import os
+import queue
+import tempfile
+import threading
+import time
+
+import pytest
+
+from custom_logger.queue_writer import QueueLogEntry, QueueLogReceiver, QueueLogSender, iter_queue_entries
+from custom_logger.shm_ring import ShmLogTransport
+from custom_logger.types import INFO
+
+
+def _child_writer(transport, worker_id: str, count: int) -> None:
+    sender = QueueLogSender(transport, worker_id, heartbeat_interval=0.0)
+    for i in range(count):
+        sender.send_log(f"{worker_id} line {i}", INFO)
+
+
+def _crashing_writer(transport, worker_id: str) -> None:
+    _child_writer(transport, worker_id, 1)
+    os._exit(0)  # 不执行atexit和Finalize，槽位不会释放
+
+
+def _holding_writer(transport, worker_id: str, ready, release) -> None:
+    _child_writer(transport, worker_id, 1)
+    ready.set()
+    release.wait(30)
+
+
+def _collect(transport: ShmLogTransport, expected: int, timeout: float = 10.0) -> list:
+    lines = []
+    deadline = time.time() + timeout
+    while len(lines) < expected and time.time() < deadline:
+        try:
+            item = transport.get(timeout=0.2)
+        except queue.Empty:
+            continue
+        lines.extend(entry.log_line for entry in iter_queue_entries(item))
+    return lines
+
+
+@pytest.fixture
+def transport():
+    transport = ShmLogTransport(slots=4, ring_bytes=4096)
+    yield transport
+    transport.close()
+    transport.unlink()
+
+
+def test_tc0030_001_round_trip_in_process(transport):
+    """测试同进程写入读取并保持字段"""
+    entry = QueueLogEntry("hello", INFO, exception_info="trace", worker_id="w1")
+    transport.put_nowait(entry)
+    transport.put_nowait([QueueLogEntry("a", INFO, worker_id="w1"), QueueLogEntry("b", INFO, worker_id="w1")])
+
+    assert iter_queue_entries(transport.get(timeout=1.0)) == [entry]
+    assert [e.log_line for e in iter_queue_entries(transport.get(timeout=1.0))] == ["a", "b"]
+    with pytest.raises(queue.Empty):
+        transport.get(timeout=0.05)
+    assert transport.empty()
+    pass
+
+
+def test_tc0030_002_wraparound_and_full(transport):
+    """测试环形回绕以及缓冲区满时抛出queue.Full"""
+    payload = "x" * 1000
+    for round_index in range(10):
+        transport.put_nowait(QueueLogEntry(f"{round_index}{payload}", INFO))
+        transport.put_nowait(QueueLogEntry(f"{round_index}{payload}", INFO))
+        lines = _collect(transport, 2, timeout=1.0)
+        assert lines == [f"{round_index}{payload}"] * 2
+
+    with pytest.raises(queue.Full):
+        for _ in range(10):
+            transport.put_nowait(QueueLogEntry(payload, INFO))
+    pass
+
+
+def test_tc0030_003_stop_signal(transport):
+    """测试停止信号"""
+    transport.put_nowait("STOP_LOGGING")
+    assert transport.get(timeout=1.0) == "STOP_LOGGING"
+    pass
+
+
+@pytest.mark.parametrize("method", ["spawn", "fork"])
+def test_tc0030_004_workers_with_start_methods(method):
+    """测试spawn和fork启动的多个worker写入，接收器写入full.log"""
+    if method not in mp.get_all_start_methods():
+        pytest.skip(f"不支持的启动方式: {method}")
+
+    context = mp.get_context(method)
+    transport = ShmLogTransport(slots=4, ring_bytes=1 << 16, context=context)
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            receiver = QueueLogReceiver(transport, temp_dir)
+            receiver.start_receiving()
+
+            processes = [context.Process(target=_child_writer, args=(transport, f"w{i}", 50)) for i in range(3)]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join(timeout=30.0)
+                assert process.exitcode == 0
+
+            time.sleep(0.5)
+            receiver.stop_receiving()
+
+            with open(os.path.join(temp_dir, "full.log"), 'r', encoding='utf-8') as f:
+                lines = f.read().splitlines()
+            assert sorted(lines) == sorted(f"w{i} line {n}" for i in range(3) for n in range(50))
+            # 子进程退出后释放槽位
+            assert all(transport._read_slot(slot)[0] == 0 for slot in range(transport.slots))
+    finally:
+        transport.close()
+        transport.unlink()
+    pass
+
+
+def test_tc0030_005_put_honours_timeout(transport):
+    """测试缓冲区满时put按timeout等待：超时抛出queue.Full，接收端取走数据后写入成功"""
+    payload = "x" * 1000
+    with pytest.raises(queue.Full):
+        for _ in range(10):
+            transport.put_nowait(QueueLogEntry(payload, INFO))
+
+    started = time.monotonic()
+    with pytest.raises(queue.Full):
+        transport.put(QueueLogEntry("late" + payload, INFO), timeout=0.2)
+    assert 0.15 <= time.monotonic() - started < 1.0
+
+    consumer = threading.Timer(0.1, transport.drain)
+    consumer.start()
+    transport.put(QueueLogEntry("late" + payload, INFO), timeout=2.0)
+    consumer.join()
+    lines = _collect(transport, 4, timeout=1.0)
+    assert lines[-1] == "late" + payload
+    pass
+
+
+def test_tc0030_006_reclaim_slot_of_dead_worker():
+    """测试异常退出的worker未释放的槽位被新进程回收，环中未读的日志保留"""
+    context = mp.get_context("spawn")
+    transport = ShmLogTransport(slots=1, ring_bytes=4096, context=context)
+    try:
+        crashed = context.Process(target=_crashing_writer, args=(transport, "dead"))
+        crashed.start()
+        crashed.join(30)
+        assert transport._read_slot(0)[0] == crashed.pid
+
+        successor = context.Process(target=_child_writer, args=(transport, "next", 2))
+        successor.start()
+        successor.join(30)
+        assert successor.exitcode == 0
+        assert _collect(transport, 3) == ["dead line 0", "next line 0", "next line 1"]
+    finally:
+        transport.close()
+        transport.unlink()
+    pass
+
+
+def test_tc0030_007_fallback_to_queue_when_slots_exhausted():
+    """测试槽位全部被存活进程占用时新进程改用后备队列，不丢弃日志"""
+    context = mp.get_context("spawn")
+    transport = ShmLogTransport(slots=1, ring_bytes=4096, context=context)
+    ready, release = context.Event(), context.Event()
+    try:
+        holder = context.Process(target=_holding_writer, args=(transport, "holder", ready, release))
+        holder.start()
+        assert ready.wait(30)
+
+        extra = context.Process(target=_child_writer, args=(transport, "extra", 3))
+        extra.start()
+        extra.join(30)
+        assert extra.exitcode == 0
+        release.set()
+        holder.join(30)
+
+        lines = _collect(transport, 4)
+        assert sorted(lines) == ["extra line 0", "extra line 1", "extra line 2", "holder line 0"]
+        assert transport.empty()
+    finally:
+        release.set()
+        transport.close()
+        transport.unlink()
+    pass
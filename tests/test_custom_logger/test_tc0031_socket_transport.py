@@ -0,0 +1,296 @@
+# tests/test_custom_logger/test_tc0031_socket_transport.py
+"""
+测试本地socket日志汇聚
+"""
+from __future__ import annotations
+
+import os
+import pickle
+import queue
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pytest
+
+from custom_logger.queue_writer import QueueLogEntry, iter_queue_entries
+from custom_logger.socket_transport import (
+    FRAME_LENGTH, SOCKET_ENV_VAR, SocketLogClient, SocketLogServer, format_address, parse_address,
+)
+from custom_logger.wire import decode_frame
+from custom_logger.types import INFO
+
+SRC_PATH = str(Path(__file__).resolve().parent.parent.parent / "src")
+
+EXTERNAL_WORKER = """
+import os
+from custom_logger.queue_writer import QueueLogSender
+from custom_logger.socket_transport import SocketLogClient
+from custom_logger.types import INFO
+
+sender = QueueLogSender(
+    SocketLogClient(os.environ["CUSTOM_LOGGER_SOCKET"]), "external", batch_size=10, heartbeat_interval=0.0
+)
+for i in range(25):
+    sender.send_log(f"external line {i}", INFO)
+sender.close()
+"""
+
+
+def _collect(server: SocketLogServer, expected: int, timeout: float = 10.0) -> list:
+    lines = []
+    deadline = time.time() + timeout
+    while len(lines) < expected and time.time() < deadline:
+        try:
+            item = server.get(timeout=0.2)
+        except queue.Empty:
+            continue
+        lines.extend(entry.log_line for entry in iter_queue_entries(item))
+    return lines
+
+
+def test_tc0031_001_address_format():
+    """测试地址解析与格式化"""
+    assert parse_address("tcp:127.0.0.1:9000")[1] == ("127.0.0.1", 9000)
+    assert format_address(*parse_address("tcp:127.0.0.1:9000")) == "tcp:127.0.0.1:9000"
+    with pytest.raises(ValueError):
+        parse_address("udp:1")
+    pass
+
+
+@pytest.mark.parametrize("address", [None, "tcp:127.0.0.1:0"])
+def test_tc0031_002_round_trip(address):
+    """测试自动选择地址与TCP地址下的收发"""
+    server = SocketLogServer(address)
+    server.start()
+    try:
+        client = pickle.loads(pickle.dumps(SocketLogClient(server.address)))
+        client.put_nowait(QueueLogEntry("single", INFO, worker_id="w1"))
+        client.put_nowait([QueueLogEntry(f"batch {i}", INFO, worker_id="w1") for i in range(3)])
+        assert _collect(server, 4) == ["single", "batch 0", "batch 1", "batch 2"]
+        client.close()
+    finally:
+        server.stop()
+    pass
+
+
+@pytest.mark.skipif(not hasattr(__import__("socket"), "AF_UNIX"), reason="需要Unix域socket")
+def test_tc0031_003_buffer_until_server_available():
+    """测试服务端未启动时本地缓冲，启动后补发并保持顺序"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        address = f"unix:{os.path.join(temp_dir, 'log.sock')}"
+        client = SocketLogClient(address, buffer_bytes=4096)
+        client.put_nowait(QueueLogEntry("early 1", INFO))
+        client.put_nowait(QueueLogEntry("early 2", INFO))
+        assert client.pending_bytes > 0
+
+        with pytest.raises(queue.Full):
+            client.put_nowait(QueueLogEntry("x" * 5000, INFO))
+
+        server = SocketLogServer(address)
+        server.start()
+        try:
+            time.sleep(0.15)
+            client.put_nowait(QueueLogEntry("after start", INFO))
+            assert client.flush()
+            assert client.pending_bytes == 0
+            assert _collect(server, 3) == ["early 1", "early 2", "after start"]
+            client.close()
+        finally:
+            server.stop()
+    pass
+
+
+def test_tc0031_004_external_process_by_env_address():
+    """测试非multiprocessing启动的进程通过环境变量中的地址发送日志"""
+    server = SocketLogServer()
+    server.start()
+    try:
+        env = dict(os.environ)
+        env[SOCKET_ENV_VAR] = server.address
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [SRC_PATH, env.get("PYTHONPATH")]))
+        result = subprocess.run([sys.executable, "-c", EXTERNAL_WORKER], env=env, timeout=60)
+        assert result.returncode == 0
+        assert _collect(server, 25) == [f"external line {i}" for i in range(25)]
+    finally:
+        server.stop()
+    pass
+
+
+def test_tc0031_005_main_process_aggregator():
+    """测试主程序启动socket汇聚，外部进程按地址写入同一会话日志"""
+    from datetime import datetime
+    from types import SimpleNamespace
+
+    from custom_logger import get_logger, init_custom_logger_system, tear_down_custom_logger_system
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config = SimpleNamespace(
+            first_start_time=datetime.now(),
+            paths={'log_dir': temp_dir},
+            logger={'global_console_level': 'error', 'global_file_level': 'debug', 'socket_aggregator': True},
+        )
+        try:
+            init_custom_logger_system(config)
+            address = config.logger['socket_address']
+            assert os.environ[SOCKET_ENV_VAR] == address
+
+            get_logger("main").info("main line")
+            env = dict(os.environ)
+            env["PYTHONPATH"] = os.pathsep.join(filter(None, [SRC_PATH, env.get("PYTHONPATH")]))
+            result = subprocess.run([sys.executable, "-c", EXTERNAL_WORKER], env=env, timeout=60)
+            assert result.returncode == 0
+            time.sleep(0.5)
+        finally:
+            tear_down_custom_logger_system()
+
+        assert SOCKET_ENV_VAR not in os.environ
+        with open(os.path.join(temp_dir, "full.log"), 'r', encoding='utf-8') as f:
+            content = f.read()
+        assert "main line" in content
+        assert all(f"external line {i}\n" in content for i in range(25))
+    pass
+
+
+class _FakeSocket:
+    """记录发送内容的socket：累计接受limit字节后抛出OSError，send可延迟"""
+
+    def __init__(self, limit=None, delay: float = 0.0):
+        self.limit = limit
+        self.delay = delay
+        self.data = bytearray()
+
+    def send(self, view) -> int:
+        time.sleep(self.delay)
+        if self.limit is not None and len(self.data) >= self.limit:
+            raise OSError("connection reset")
+        count = len(view) if self.limit is None else min(len(view), self.limit - len(self.data), 7)
+        self.data.extend(view[:count])
+        return count
+
+    def close(self) -> None:
+        pass
+
+
+def _frames(data: bytes) -> list:
+    """按长度前缀拆分完整帧（忽略不完整的尾部，与服务端一致）"""
+    lines, position = [], 0
+    while position + FRAME_LENGTH.size <= len(data):
+        length = FRAME_LENGTH.unpack_from(data, position)[0]
+        end = position + FRAME_LENGTH.size + length
+        if end > len(data):
+            break
+        lines.extend(entry.log_line for entry in decode_frame(data[position + FRAME_LENGTH.size:end]))
+        position = end
+    return lines
+
+
+def test_tc0031_006_resend_only_unsent_tail(monkeypatch):
+    """测试连接断开后只重发未完整发送的帧，已发送的帧不重复"""
+    client = SocketLogClient("tcp:127.0.0.1:1")
+    frame_size = len(client._encode(QueueLogEntry("line 0", INFO)))
+    sockets = [_FakeSocket(limit=frame_size + 5), _FakeSocket()]
+    connected = []
+
+    def fake_connect():
+        client._sock = sockets[len(connected)]
+        connected.append(client._sock)
+        return True
+
+    monkeypatch.setattr(client, '_connect', fake_connect)
+    with client._cond:
+        # 三帧一起进入缓冲，保证第一次连接时一起发送
+        for i in range(3):
+            client.put_nowait(QueueLogEntry(f"line {i}", INFO))
+    assert client.flush()
+    client.close()
+
+    assert len(connected) == 2
+    assert _frames(bytes(sockets[0].data)) == ["line 0"]
+    assert _frames(bytes(sockets[1].data)) == ["line 1", "line 2"]
+    assert client.frames_sent == 3
+    pass
+
+
+def test_tc0031_007_put_does_not_wait_for_socket(monkeypatch):
+    """测试慢速socket不阻塞调用方，缓冲已满时put按timeout等待"""
+    frame_size = len(SocketLogClient._encode(QueueLogEntry("slow", INFO)))
+    client = SocketLogClient("tcp:127.0.0.1:1", buffer_bytes=frame_size * 2)
+    slow = _FakeSocket(delay=0.3)
+
+    def fake_connect():
+        client._sock = slow
+        return True
+
+    monkeypatch.setattr(client, '_connect', fake_connect)
+    started = time.monotonic()
+    client.put_nowait(QueueLogEntry("slow", INFO))
+    client.put_nowait(QueueLogEntry("slow", INFO))
+    assert time.monotonic() - started < 0.2
+
+    started = time.monotonic()
+    client.put(QueueLogEntry("slow", INFO), timeout=10.0)
+    assert 0.1 < time.monotonic() - started < 5.0
+    assert client.flush(timeout=30.0)
+    client.close()
+    assert _frames(bytes(slow.data)) == ["slow"] * 3
+    pass
+
+
+@pytest.mark.skipif(not hasattr(__import__("socket"), "AF_UNIX"), reason="需要Unix域socket")
+def test_tc0031_008_unix_path_not_a_socket():
+    """测试配置的Unix域socket路径上是普通文件时报错且不删除，遗留的socket文件被替换"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "log.sock")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("keep me")
+        with pytest.raises(FileExistsError):
+            SocketLogServer(f"unix:{path}").start()
+        with open(path, 'r', encoding='utf-8') as f:
+            assert f.read() == "keep me"
+
+        os.remove(path)
+        stale = SocketLogServer(f"unix:{path}")
+        stale.start()
+        stale._stop_event.set()
+        stale._thread.join(timeout=5.0)
+        stale._listener.close()
+        assert os.path.exists(path)
+        server = SocketLogServer(f"unix:{path}")
+        server.start()
+        server.stop()
+    pass
+
+
+def test_tc0031_009_teardown_drains_socket(monkeypatch):
+    """测试关闭日志系统时先排空socket汇聚再停止接收器，客户端已发出的日志不丢失"""
+    from datetime import datetime
+    from types import SimpleNamespace
+
+    from custom_logger import init_custom_logger_system, tear_down_custom_logger_system
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config = SimpleNamespace(
+            first_start_time=datetime.now(),
+            paths={'log_dir': temp_dir},
+            logger={'global_console_level': 'error', 'global_file_level': 'debug', 'socket_aggregator': True},
+        )
+        # 服务端转发变慢，关闭时仍有已发出但未转发的帧
+        deliver = SocketLogServer._deliver
+        monkeypatch.setattr(SocketLogServer, '_deliver', lambda self, frame: (time.sleep(0.002), deliver(self, frame)))
+        try:
+            init_custom_logger_system(config)
+            client = SocketLogClient(config.logger['socket_address'])
+            for i in range(300):
+                client.put_nowait(QueueLogEntry(f"late line {i}", INFO, worker_id="ext"))
+            assert client.flush(timeout=10.0)
+        finally:
+            tear_down_custom_logger_system()
+        client.close(timeout=0.1)
+
+        with open(os.path.join(temp_dir, "full.log"), 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        assert lines == [f"late line {i}" for i in range(300)]
+    pass
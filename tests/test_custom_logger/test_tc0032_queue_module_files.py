@@ -0,0 +1,77 @@
+# tests/test_custom_logger/test_tc0032_queue_module_files.py
+"""
+测试队列模式接收端的模块文件与worker文件
+"""
+from __future__ import annotations
+
+import os
+import queue
+import tempfile
+import time
+from unittest.mock import patch
+
+from custom_logger.log_file import LogFile
+from custom_logger.queue_writer import QueueLogEntry, QueueLogReceiver, QueueLogSender
+from custom_logger.wire import FRAME_HEADER, RECORD_HEADER_V1, decode_frame, encode_entries
+from custom_logger.writer import FileWriter, LogEntry
+from custom_logger.types import INFO, WARNING
+
+
+def _read(path: str) -> list:
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read().splitlines()
+
+
+def test_tc0032_001_wire_logger_name_and_v1_compat():
+    """测试紧凑帧携带模块名，并兼容版本1的帧"""
+    entry = QueueLogEntry("line", INFO, worker_id="w1", logger_name="trainer")
+    assert decode_frame(encode_entries([entry])) == [entry]
+
+    line = "旧格式".encode('utf-8')
+    frame = FRAME_HEADER.pack(b'CL', 1, 1, 2) + b'w1' + RECORD_HEADER_V1.pack(INFO, 0, len(line), 0, 0) + line
+    assert decode_frame(frame) == [QueueLogEntry("旧格式", INFO, worker_id="w1")]
+    pass
+
+
+def test_tc0032_002_receiver_writes_module_and_worker_files():
+    """测试接收端生成与普通模式相同的模块文件，并按worker分文件"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        log_queue = queue.Queue()
+        receiver = QueueLogReceiver(log_queue, temp_dir, worker_files=True)
+        receiver.start_receiving()
+
+        sender_a = QueueLogSender(log_queue, "w1", batch_size=10, batch_interval=60.0)
+        sender_b = QueueLogSender(log_queue, "w2")
+        sender_a.send_log("a info", INFO, logger_name="trainer")
+        sender_a.send_log("a warning", WARNING, logger_name="loader")
+        sender_a.flush()
+        sender_b.send_log("b info", INFO, logger_name="trainer")
+        sender_b.send_log("legacy", INFO)
+        time.sleep(0.3)
+        receiver.stop_receiving()
+
+        assert _read(os.path.join(temp_dir, "full.log")) == ["a info", "a warning", "b info", "legacy"]
+        assert _read(os.path.join(temp_dir, "warning.log")) == ["a warning"]
+        assert _read(os.path.join(temp_dir, "trainer_full.log")) == ["a info", "b info"]
+        assert _read(os.path.join(temp_dir, "loader_warning.log")) == ["a warning"]
+        assert _read(os.path.join(temp_dir, "worker_w1.log")) == ["a info", "a warning"]
+        assert _read(os.path.join(temp_dir, "worker_w2.log")) == ["b info", "legacy"]
+        assert not os.path.exists(os.path.join(temp_dir, "None_full.log"))
+    pass
+
+
+def test_tc0032_003_write_batch_single_write_per_file():
+    """测试批量写入时每个文件只写入一次"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        writer = FileWriter(temp_dir)
+        entries = [LogEntry(f"line {i}", WARNING if i % 2 else INFO, "mod") for i in range(10)]
+
+        with patch.object(LogFile, '_write_chunk', autospec=True, side_effect=LogFile._write_chunk) as mock_write:
+            writer.write_batch(entries)
+        written = sorted(os.path.basename(call.args[0].path) for call in mock_write.call_args_list)
+        assert written == ["full.log", "mod_full.log", "mod_warning.log", "warning.log"]
+        writer.close()
+
+        assert _read(os.path.join(temp_dir, "mod_full.log")) == [f"line {i}" for i in range(10)]
+        assert _read(os.path.join(temp_dir, "warning.log")) == [f"line {i}" for i in range(1, 10, 2)]
+    pass
@@ -0,0 +1,80 @@
+# tests/test_custom_logger/test_tc0033_batched_receiver.py
+"""
+测试接收端批量出队与多队列接收
+"""
+from __future__ import annotations
+
+import os
+import queue
+import tempfile
+
+import pytest
+
+from custom_logger.queue_writer import QueueLogEntry, QueueLogReceiver, QueueLogSender, drain_queue, select_queue
+from custom_logger.types import INFO
+
+
+def _read(path: str) -> list:
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read().splitlines()
+
+
+def test_tc0033_001_drain_queue_greedy():
+    """测试一次阻塞get后非阻塞取出，受条数上限和停止信号限制"""
+    log_queue = queue.Queue()
+    log_queue.put([QueueLogEntry("a", INFO), QueueLogEntry("b", INFO)])
+    for name in ("c", "d", "e"):
+        log_queue.put(QueueLogEntry(name, INFO))
+    log_queue.put("STOP_LOGGING")
+    log_queue.put(QueueLogEntry("after stop", INFO))
+
+    entries, stop = drain_queue(log_queue, limit=3)
+    assert [e.log_line for e in entries] == ["a", "b", "c"] and not stop
+
+    entries, stop = drain_queue(log_queue, limit=100)
+    assert [e.log_line for e in entries] == ["d", "e"] and stop
+
+    entries, stop = drain_queue(log_queue, limit=100)
+    assert [e.log_line for e in entries] == ["after stop"] and not stop
+    with pytest.raises(queue.Empty):
+        drain_queue(log_queue, limit=100, timeout=0.01)
+    pass
+
+
+def test_tc0033_002_stop_writes_everything_queued():
+    """测试停止时写完停止信号之前已入队的日志"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        log_queue = queue.Queue()
+        receiver = QueueLogReceiver(log_queue, temp_dir, receive_batch=64)
+        receiver.start_receiving()
+        sender = QueueLogSender(log_queue, "w1")
+        for i in range(2000):
+            sender.send_log(f"line {i}", INFO)
+        receiver.stop_receiving()
+
+        assert _read(os.path.join(temp_dir, "full.log")) == [f"line {i}" for i in range(2000)]
+    pass
+
+
+def test_tc0033_003_multiple_queues():
+    """测试按worker分组的多个队列"""
+    queues = [queue.Queue() for _ in range(3)]
+    assert select_queue(queues, "w7") is select_queue(queues, "w7")
+    assert select_queue(queues[0], "w7") is queues[0]
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        receiver = QueueLogReceiver(queues, temp_dir, worker_files=True)
+        receiver.start_receiving()
+        for worker in range(6):
+            sender = QueueLogSender(select_queue(queues, f"w{worker}"), f"w{worker}", batch_size=16)
+            for i in range(100):
+                sender.send_log(f"w{worker} line {i}", INFO)
+            sender.close()
+        receiver.stop_receiving()
+
+        lines = _read(os.path.join(temp_dir, "full.log"))
+        assert sorted(lines) == sorted(f"w{worker} line {i}" for worker in range(6) for i in range(100))
+        # 同一worker的日志保持顺序
+        for worker in range(6):
+            assert _read(os.path.join(temp_dir, f"worker_w{worker}.log")) == [f"w{worker} line {i}" for i in range(100)]
+    pass
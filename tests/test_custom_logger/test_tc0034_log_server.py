@@ -0,0 +1,94 @@
+# tests/test_custom_logger/test_tc0034_log_server.py
+"""
+测试独立日志服务进程
+"""
+from __future__ import annotations
+
+import multiprocessing as mp
+import os
+import tempfile
+from datetime import datetime
+from types import SimpleNamespace
+
+from custom_logger.log_server import LogServerProcess
+from custom_logger.queue_writer import QueueLogEntry, QueueLogSender, get_receiver_logger_options
+from custom_logger.shm_ring import ShmLogTransport
+from custom_logger.types import INFO
+
+
+def _read(path: str) -> str:
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def test_tc0034_001_server_process_handshake():
+    """测试服务进程写完停止信号之前的日志后关闭"""
+    log_queue = mp.Queue()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        server = LogServerProcess(log_queue, temp_dir, get_receiver_logger_options(SimpleNamespace(logger={})))
+        server.start()
+        assert server.is_alive()
+
+        for i in range(50):
+            log_queue.put(QueueLogEntry(f"line {i}", INFO, worker_id="w1"))
+        assert server.stop()
+        assert not server.is_alive()
+
+        lines = _read(os.path.join(temp_dir, "full.log")).splitlines()
+        assert lines == [f"line {i}" for i in range(50)]
+    pass
+
+
+def test_tc0034_002_main_process_as_sender():
+    """测试启用queue_server_process时主程序日志经服务进程写入"""
+    from custom_logger import get_logger, init_custom_logger_system, tear_down_custom_logger_system
+    from custom_logger import log_server
+
+    log_queue = mp.Queue()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config = SimpleNamespace(
+            first_start_time=datetime.now(),
+            paths={'log_dir': temp_dir},
+            logger={
+                'global_console_level': 'error',
+                'global_file_level': 'debug',
+                'enable_queue_mode': True,
+                'queue_server_process': True,
+            },
+            queue_info={'log_queue': log_queue},
+        )
+        try:
+            init_custom_logger_system(config)
+            assert log_server.is_log_server_running()
+            get_logger("main").info("main via server")
+            log_queue.put(QueueLogEntry("worker via server", INFO, worker_id="w1"))
+        finally:
+            tear_down_custom_logger_system()
+
+        assert not log_server.is_log_server_running()
+        content = _read(os.path.join(temp_dir, "full.log"))
+        assert "main via server" in content
+        assert "worker via server" in content
+    pass
+
+
+def test_tc0034_003_server_process_over_shm():
+    """测试共享内存传输下主程序放入的停止信号能到达服务进程"""
+    transport = ShmLogTransport(slots=4, ring_bytes=1 << 16)
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            server = LogServerProcess(transport, temp_dir, get_receiver_logger_options(SimpleNamespace(logger={})))
+            server.start()
+
+            sender = QueueLogSender(transport, "w1")
+            for i in range(50):
+                sender.send_log(f"line {i}", INFO)
+            assert server.stop(timeout=10.0)
+            assert not server.is_alive()
+
+            lines = _read(os.path.join(temp_dir, "full.log")).splitlines()
+            assert lines == [f"line {i}" for i in range(50)]
+    finally:
+        transport.close()
+        transport.unlink()
+    pass
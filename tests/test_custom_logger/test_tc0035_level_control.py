@@ -0,0 +1,176 @@
+# tests/test_custom_logger/test_tc0035_level_control.py
+"""
+测试级别控制通道：主程序修改级别后worker原地更新
+"""
+from __future__ import annotations
+
+import multiprocessing as mp
+import os
+import tempfile
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from custom_logger.level_control import LevelControl, LevelWatcher
+
+
+def _make_config(temp_dir: str, **logger_options) -> SimpleNamespace:
+    logger = {'global_console_level': 'error', 'global_file_level': 'debug', 'module_levels': {}}
+    logger.update(logger_options)
+    return SimpleNamespace(first_start_time=datetime.now(), paths={'log_dir': temp_dir}, logger=logger)
+
+
+def _worker(config, ready, changed) -> None:
+    from custom_logger import get_logger, init_custom_logger_system_for_worker, tear_down_custom_logger_system
+
+    init_custom_logger_system_for_worker(config, "w1")
+    logger = get_logger("worker")
+    logger.debug("debug before")
+    ready.set()
+    changed.wait(10)
+    time.sleep(0.5)
+    logger.debug("debug after")
+    logger.info("info after")
+    tear_down_custom_logger_system()
+
+
+def _module_worker(config, ready, changed) -> None:
+    from custom_logger import get_logger, init_custom_logger_system_for_worker, tear_down_custom_logger_system
+
+    init_custom_logger_system_for_worker(config, "w1")
+    ready.set()
+    changed.wait(10)
+    time.sleep(0.5)
+    get_logger("db").info("db info after")
+    get_logger("db").error("db error after")
+    get_logger("api").info("api info after")
+    tear_down_custom_logger_system()
+
+
+def test_tc0035_001_watcher_applies_snapshot():
+    """测试检查线程发现新版本时原地更新配置"""
+    control = LevelControl()
+    assert control.read() == (0, {})
+
+    cfg = SimpleNamespace(logger={'global_console_level': 'info', 'global_file_level': 'debug', 'module_levels': {}})
+    module_levels = cfg.logger['module_levels']
+    watcher = LevelWatcher(control, cfg)
+    assert not watcher.check()
+
+    version = control.publish({
+        'global_console_level': 'warning',
+        'global_file_level': 'info',
+        'module_levels': {'db': {'file_level': 'error'}},
+    })
+    assert version == 1
+    assert watcher.check()
+    assert cfg.logger['global_file_level'] == 'info'
+    assert module_levels == {'db': {'file_level': 'error'}}
+    assert not watcher.check()
+
+    with pytest.raises(ValueError):
+        LevelControl(capacity=16).publish({'module_levels': {'x' * 32: {}}})
+    pass
+
+
+def test_tc0035_002_module_levels_and_set_log_levels():
+    """测试module_levels生效以及set_log_levels修改全局和模块级别"""
+    from custom_logger import DEBUG, ERROR, INFO, get_logger, init_custom_logger_system, set_log_levels
+    from custom_logger import tear_down_custom_logger_system
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config = _make_config(temp_dir, module_levels={'db': {'file_level': 'error'}})
+        try:
+            init_custom_logger_system(config)
+            assert get_logger("db").file_level == ERROR
+            assert get_logger("main").file_level == DEBUG
+
+            set_log_levels(file_level="info")
+            set_log_levels(file_level="debug", module_name="db")
+            assert get_logger("main").file_level == INFO
+            assert get_logger("db").file_level == DEBUG
+
+            with pytest.raises(ValueError):
+                set_log_levels(file_level="loud")
+            assert get_logger("main").file_level == INFO
+        finally:
+            tear_down_custom_logger_system()
+    pass
+
+
+def test_tc0035_003_create_control_channel():
+    """测试启用queue_level_control时主程序创建控制通道并写入queue_info"""
+    from custom_logger import init_custom_logger_system, tear_down_custom_logger_system
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config = _make_config(temp_dir, enable_queue_mode=True, queue_level_control=True)
+        config.queue_info = {'log_queue': mp.Queue()}
+        try:
+            init_custom_logger_system(config)
+            assert isinstance(config.queue_info['level_control'], LevelControl)
+        finally:
+            tear_down_custom_logger_system()
+    pass
+
+
+def test_tc0035_004_broadcast_to_worker():
+    """测试主程序修改级别后worker不再发送低于新级别的日志"""
+    from custom_logger import init_custom_logger_system, set_log_levels, tear_down_custom_logger_system
+
+    # spawn启动的worker不继承主程序的日志系统状态，队列和控制通道需使用同一上下文创建
+    context = mp.get_context("spawn")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config = _make_config(temp_dir, enable_queue_mode=True, level_poll_interval=0.05)
+        config.queue_info = {'log_queue': context.Queue(), 'level_control': LevelControl(context=context)}
+        ready, changed = context.Event(), context.Event()
+        try:
+            init_custom_logger_system(config)
+
+            process = context.Process(target=_worker, args=(config, ready, changed))
+            process.start()
+            assert ready.wait(30)
+            set_log_levels(file_level="info")
+            changed.set()
+            process.join(30)
+            assert process.exitcode == 0
+        finally:
+            tear_down_custom_logger_system()
+
+        with open(os.path.join(temp_dir, "full.log"), 'r', encoding='utf-8') as f:
+            content = f.read()
+        assert "debug before" in content
+        assert "info after" in content
+        assert "debug after" not in content
+    pass
+
+
+def test_tc0035_005_module_level_broadcast_to_worker():
+    """测试主程序修改单个模块的级别后worker按新级别过滤该模块，其他模块不受影响"""
+    from custom_logger import init_custom_logger_system, set_log_levels, tear_down_custom_logger_system
+
+    context = mp.get_context("spawn")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config = _make_config(temp_dir, enable_queue_mode=True, level_poll_interval=0.05)
+        config.queue_info = {'log_queue': context.Queue(), 'level_control': LevelControl(context=context)}
+        ready, changed = context.Event(), context.Event()
+        try:
+            init_custom_logger_system(config)
+
+            process = context.Process(target=_module_worker, args=(config, ready, changed))
+            process.start()
+            assert ready.wait(30)
+            set_log_levels(file_level="error", module_name="db")
+            changed.set()
+            process.join(30)
+            assert process.exitcode == 0
+        finally:
+            tear_down_custom_logger_system()
+
+        with open(os.path.join(temp_dir, "full.log"), 'r', encoding='utf-8') as f:
+            content = f.read()
+        assert "db info after" not in content
+        assert "db error after" in content
+        assert "api info after" in content
+    pass
@@ -0,0 +1,100 @@
+# tests/test_custom_logger/test_tc0036_reorder.py
+"""
+测试发送端序号/时间戳以及接收端按时间重排
+"""
+from __future__ import annotations
+
+import os
+import queue
+import tempfile
+import time
+
+from custom_logger.queue_writer import QueueLogEntry, QueueLogReceiver, QueueLogSender, ReorderBuffer
+from custom_logger.types import INFO
+from custom_logger.wire import WIRE_FORMAT_COMPACT, decode_frame, encode_entries
+
+
+def _entry(line: str, worker: str, created_ns: int, sequence: int = 0) -> QueueLogEntry:
+    return QueueLogEntry(line, INFO, worker_id=worker, sequence=sequence, created_ns=created_ns)
+
+
+def test_tc0036_001_sender_stamps_sequence_and_time():
+    """测试发送端序号单调递增、时间戳为纳秒epoch，紧凑格式保留这两个字段"""
+    log_queue = queue.Queue()
+    before = time.time_ns()
+    sender = QueueLogSender(log_queue, "w1", wire_format=WIRE_FORMAT_COMPACT, heartbeat_interval=0.0)
+    for i in range(3):
+        sender.send_log(f"line {i}", INFO)
+
+    entries = [entry for _ in range(3) for entry in decode_frame(log_queue.get_nowait())]
+    assert [entry.sequence for entry in entries] == [0, 1, 2]
+    assert all(before <= entry.created_ns <= time.time_ns() for entry in entries)
+
+    # 没有序号的记录不携带这两个字段
+    assert decode_frame(encode_entries([QueueLogEntry("x", INFO)]))[0].created_ns is None
+    pass
+
+
+def test_tc0036_002_reorder_buffer_merges_by_time():
+    """测试窗口内按发送时间归并，窗口未到期的日志暂不写出"""
+    now = time.time_ns()
+    buffer = ReorderBuffer(window=10.0)
+    buffer.push([_entry("b1", "b", now - 30_000_000_000), _entry("b2", "b", now - 10_000_000_000)])
+    buffer.push([_entry("a1", "a", now - 40_000_000_000), _entry("a2", "a", now - 20_000_000_000)])
+    buffer.push([_entry("a3", "a", now)])
+
+    assert [entry.log_line for entry in buffer.pop_ready()] == ["a1", "b1", "a2", "b2"]
+    assert len(buffer) == 1
+    assert [entry.log_line for entry in buffer.pop_ready(flush=True)] == ["a3"]
+
+    bounded = ReorderBuffer(window=10.0, max_entries=2)
+    bounded.push([_entry(f"c{i}", "c", now + i) for i in range(3)])
+    assert [entry.log_line for entry in bounded.pop_ready()] == ["c0"]
+    pass
+
+
+def test_tc0036_003_receiver_writes_in_time_order():
+    """测试启用重排时full.log按发送时间输出"""
+    log_queue = queue.Queue()
+    base = time.time_ns() - 1_000_000_000
+    # 两个worker交错到达，到达顺序与发送时间顺序不一致
+    log_queue.put([_entry(f"t{i}", "even", base + i * 1000, i) for i in range(0, 10, 2)])
+    log_queue.put([_entry(f"t{i}", "odd", base + i * 1000, i) for i in range(1, 10, 2)])
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        receiver = QueueLogReceiver(log_queue, temp_dir, reorder_window=0.2)
+        receiver.start_receiving()
+        time.sleep(0.5)
+        with open(os.path.join(temp_dir, "full.log"), 'r', encoding='utf-8') as f:
+            assert f.read().splitlines() == [f"t{i}" for i in range(10)]
+        receiver.stop_receiving()
+    pass
+
+
+def test_tc0036_004_reorder_by_sequence_within_worker():
+    """测试同一worker的日志乱序到达（例如溢出回放）时按序号写出"""
+    now = time.time_ns() - 1_000_000_000
+    buffer = ReorderBuffer(window=10.0)
+    buffer.push([_entry("w0", "w", now, 0), _entry("w3", "w", now + 30, 3)])
+    buffer.push([_entry("v0", "v", now + 15, 0)])
+    # 回放的旧日志在后续日志之后到达，发送时间也早于队首
+    buffer.push([_entry("w1", "w", now + 10, 1), _entry("w2", "w", now + 20, 2)])
+
+    lines = [entry.log_line for entry in buffer.pop_ready(flush=True)]
+    assert lines == ["w0", "w1", "v0", "w2", "w3"]
+    assert len(buffer) == 0
+    pass
+
+
+def test_tc0036_005_stats_report_sequence_gaps():
+    """测试接收端统计缺失和迟到写入的序号，发送端重启时序号从0重新开始"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        receiver = QueueLogReceiver(queue.Queue(), temp_dir, stats_interval=0)
+        now = time.time_ns()
+        receiver._deliver([_entry(f"s{i}", "w1", now, i) for i in (0, 1, 4, 5)])
+        receiver._deliver([_entry("s2", "w1", now, 2)])
+        receiver._deliver([_entry(f"r{i}", "w1", now, i) for i in (0, 1)])
+        stats = receiver.get_stats()['workers']['w1']
+        receiver._close_files()
+    assert stats['sequence_missing'] == 1 and stats['sequence_late'] == 1
+    pass
@@ -0,0 +1,77 @@
+# tests/test_custom_logger/test_tc0037_spill.py
+"""
+测试队列已满时的溢出文件与回放
+"""
+from __future__ import annotations
+
+import os
+import queue
+import tempfile
+import time
+
+from custom_logger.queue_writer import QueueLogSender, iter_queue_entries
+from custom_logger.spill import SpillFile
+from custom_logger.types import INFO
+
+
+def _drain(log_queue: queue.Queue) -> list:
+    lines = []
+    while True:
+        try:
+            lines.extend(entry.log_line for entry in iter_queue_entries(log_queue.get_nowait()))
+        except queue.Empty:
+            return lines
+
+
+def test_tc0037_001_spill_file_fifo():
+    """测试溢出文件顺序读写、全部回放后截断、上限和关闭后删除"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "spill.bin")
+        spill = SpillFile(path, max_bytes=20)
+        assert spill.append(b"first") and spill.append(b"second")
+        assert not spill.append(b"too large for the limit")
+
+        frame = spill.peek()
+        assert frame == b"first" and spill.peek() == b"first"
+        spill.consume(frame)
+        spill.consume(spill.peek())
+        assert not spill.pending and os.path.getsize(path) == 0
+
+        spill.close()
+        assert not os.path.exists(path)
+        assert not spill.append(b"after close")
+    pass
+
+
+def test_tc0037_002_replay_keeps_order():
+    """测试队列满时写入溢出文件，队列有空间后按原顺序回放"""
+    log_queue = queue.Queue(maxsize=5)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        sender = QueueLogSender(log_queue, "w1", spill_dir=temp_dir, heartbeat_interval=0.0)
+        for i in range(50):
+            sender.send_log(f"line {i}", INFO)
+        assert sender.spilled == 45 and sender.dropped == 0
+        assert any(name.startswith("spill_w1_") for name in os.listdir(temp_dir))
+
+        lines = []
+        deadline = time.time() + 10
+        while len(lines) < 50 and time.time() < deadline:
+            lines.extend(_drain(log_queue))
+            time.sleep(0.02)
+        assert lines == [f"line {i}" for i in range(50)]
+
+        sender.close()
+        assert os.listdir(temp_dir) == []
+    pass
+
+
+def test_tc0037_003_drop_counter_without_spill():
+    """测试未启用溢出时只计数丢弃"""
+    log_queue = queue.Queue(maxsize=2)
+    sender = QueueLogSender(log_queue, "w1", heartbeat_interval=0.0)
+    for i in range(5):
+        sender.send_log(f"line {i}", INFO)
+    assert sender.dropped == 3
+    assert _drain(log_queue) == ["line 0", "line 1"]
+    sender.close()
+    pass
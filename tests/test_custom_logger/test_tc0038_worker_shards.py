@@ -0,0 +1,193 @@
+# tests/test_custom_logger/test_tc0038_worker_shards.py
+"""
+测试worker分片写入与按时间合并
+"""
+from __future__ import annotations
+
+import gzip
+import multiprocessing as mp
+import os
+import tempfile
+from datetime import datetime
+from types import SimpleNamespace
+
+from custom_logger.log_index import LogIndexReader, LogIndexWriter
+from custom_logger.shards import find_shards, iter_records, merge_shards
+from custom_logger.types import INFO, WARNING, parse_level_name
+from custom_logger.writer import FileWriter, LogEntry
+
+
+def _line(elapsed: str, level: str, message: str, module: str = "worker", process: str = "12345") -> str:
+    return f"[{process:>6} | {module:^16} :   10] 2025-01-01 12:00:00 - {elapsed} - {level:^10} - {message}\n"
+
+
+def _write(path: str, text: str) -> None:
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+def _messages(text: str) -> list:
+    return [line.rsplit(" - ", 1)[-1] for line in text.splitlines() if line.startswith("[")]
+
+
+def _read(path: str) -> str:
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def _worker(config, worker_id: str) -> None:
+    from custom_logger import get_logger, init_custom_logger_system_for_worker, tear_down_custom_logger_system
+
+    init_custom_logger_system_for_worker(config, worker_id)
+    logger = get_logger("worker")
+    for i in range(20):
+        logger.info(f"{worker_id} line {i}")
+    logger.warning(f"{worker_id} done")
+    tear_down_custom_logger_system()
+
+
+def test_tc0038_001_merge_by_elapsed_time():
+    """测试分片与主程序full.log按耗时归并，异常堆栈随所属记录移动"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        with open(os.path.join(temp_dir, "full.log"), 'w', encoding='utf-8') as f:
+            f.write(_line("0:00:00.50", "INFO", "main start") + _line("0:00:03.00", "INFO", "main end"))
+        with open(os.path.join(temp_dir, "full.w1.log"), 'w', encoding='utf-8') as f:
+            f.write(_line("0:00:01.00", "INFO", "w1 a") + _line("0:00:02.50", "ERROR", "w1 b"))
+            f.write("Traceback (most recent call last):\n  boom\n")
+        with open(os.path.join(temp_dir, "full.w2.log"), 'w', encoding='utf-8') as f:
+            f.write(_line("0:00:02.00", "WARNING", "w2 a") + _line("0:00:02.50", "INFO", "w2 b"))
+
+        assert merge_shards(temp_dir) == 2
+        assert find_shards(temp_dir) == []
+
+        full = _read(os.path.join(temp_dir, "full.log"))
+        messages = [line.rsplit(" - ", 1)[-1] for line in full.splitlines() if line.startswith("[")]
+        assert messages == ["main start", "w1 a", "w2 a", "w1 b", "w2 b", "main end"]
+        assert "w1 b\nTraceback (most recent call last):\n  boom\n" in full
+
+        warning = _read(os.path.join(temp_dir, "warning.log"))
+        assert "w2 a" in warning and "boom" in warning and "w1 a" not in warning
+        assert merge_shards(temp_dir) == 0
+    pass
+
+
+def test_tc0038_002_shard_writer_files():
+    """测试分片写入器只写入full.w{id}.log"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        writer = FileWriter(temp_dir, shard_id="3")
+        writer.write_batch([LogEntry("line", INFO, "worker", worker_id="3")])
+        writer.close()
+        assert os.listdir(temp_dir) == ["full.w3.log"]
+        assert _read(os.path.join(temp_dir, "full.w3.log")) == "line\n"
+    pass
+
+
+def test_tc0038_003_workers_write_shards_and_main_merges():
+    """测试worker分片写入，主程序关闭时合并"""
+    from custom_logger import get_logger, init_custom_logger_system, tear_down_custom_logger_system
+
+    context = mp.get_context("spawn")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config = SimpleNamespace(
+            first_start_time=datetime.now(),
+            paths={'log_dir': temp_dir},
+            logger={'global_console_level': 'error', 'global_file_level': 'debug', 'worker_shards': True},
+        )
+        try:
+            init_custom_logger_system(config)
+            get_logger("main").info("main line")
+            processes = [context.Process(target=_worker, args=(config, f"w{i}")) for i in range(2)]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join(60)
+                assert process.exitcode == 0
+            assert len(find_shards(temp_dir)) == 2
+        finally:
+            tear_down_custom_logger_system()
+
+        assert find_shards(temp_dir) == []
+        full = _read(os.path.join(temp_dir, "full.log"))
+        assert "main line" in full
+        assert all(f"w{w} line {i}\n" in full for w in range(2) for i in range(20))
+        assert "w0 done" in _read(os.path.join(temp_dir, "warning.log"))
+    pass
+
+
+def test_tc0038_004_stable_order_and_rotated_segments():
+    """测试耗时相同时按主程序、分片文件名顺序排列，主程序已轮转（含已压缩）的分段一起合并"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        with gzip.open(os.path.join(temp_dir, "full.0001.log.gz"), 'wt', encoding='utf-8') as f:
+            f.write(_line("0:00:00.50", "INFO", "main seg1") + _line("0:00:01.00", "INFO", "main tie"))
+        _write(os.path.join(temp_dir, "full.0002.log"), _line("0:00:01.50", "WARNING", "main seg2"))
+        _write(os.path.join(temp_dir, "full.log"), _line("0:00:02.00", "INFO", "main current"))
+        _write(os.path.join(temp_dir, "full.w2.log"), _line("0:00:01.00", "INFO", "w2 tie"))
+        _write(os.path.join(temp_dir, "full.w1.log"), _line("0:00:01.00", "INFO", "w1 tie") + _line("0:00:01.00", "INFO", "w1 tie2"))
+
+        assert merge_shards(temp_dir) == 2
+        full = _read(os.path.join(temp_dir, "full.log"))
+        assert _messages(full) == ["main seg1", "main tie", "w1 tie", "w1 tie2", "w2 tie", "main seg2", "main current"]
+        assert _messages(_read(os.path.join(temp_dir, "warning.log"))) == ["main seg2"]
+        assert sorted(os.listdir(temp_dir)) == ["full.log", "warning.log"]
+    pass
+
+
+def test_tc0038_005_index_mode_rebuilds_index():
+    """测试索引模式下合并后重建full.idx，可按级别和模块读取，不生成warning.log"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        main_lines = [_line("0:00:00.50", "INFO", "main start", "main"), _line("0:00:03.00", "ERROR", "main fail", "main")]
+        _write(os.path.join(temp_dir, "full.log"), "".join(main_lines))
+        index_writer = LogIndexWriter(temp_dir)
+        offset = 0
+        for line, level in zip(main_lines, ("info", "error")):
+            index_writer.write(index_writer.pack(offset, len(line.encode('utf-8')), parse_level_name(level), "main"))
+            offset += len(line.encode('utf-8'))
+        index_writer.close()
+        _write(os.path.join(temp_dir, "full.w1.log"), _line("0:00:01.00", "WARNING", "w1 warn") + _line("0:00:02.00", "INFO", "w1 info"))
+
+        assert merge_shards(temp_dir) == 1
+        assert not os.path.exists(os.path.join(temp_dir, "warning.log"))
+
+        reader = LogIndexReader(temp_dir)
+        chunks = [chunk.decode('utf-8') for chunk in reader.iter_chunks()]
+        assert "".join(chunks) == _read(os.path.join(temp_dir, "full.log"))
+        assert _messages("".join(chunks)) == ["main start", "w1 warn", "w1 info", "main fail"]
+        warnings = b"".join(reader.iter_chunks(min_level=WARNING)).decode('utf-8')
+        assert _messages(warnings) == ["w1 warn", "main fail"]
+        assert _messages(b"".join(reader.iter_chunks(module="worker")).decode('utf-8')) == ["w1 warn", "w1 info"]
+        assert reader.modules == ["main", "worker"]
+    pass
+
+
+def test_tc0038_006_rotated_warning_segments_removed():
+    """测试主程序warning.log已轮转时，合并后旧warning分段被删除，警告只出现在新的warning.log中"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        old = _line("0:00:00.50", "WARNING", "old")
+        _write(os.path.join(temp_dir, "full.0001.log"), old)
+        with gzip.open(os.path.join(temp_dir, "warning.0001.log.gz"), 'wt', encoding='utf-8') as f:
+            f.write(old)
+        _write(os.path.join(temp_dir, "full.log"), _line("0:00:02.00", "INFO", "main current"))
+        _write(os.path.join(temp_dir, "warning.log"), "")
+        _write(os.path.join(temp_dir, "full.w1.log"), _line("0:00:01.00", "ERROR", "w1 error"))
+
+        assert merge_shards(temp_dir) == 1
+        assert sorted(os.listdir(temp_dir)) == ["full.log", "warning.log"]
+        assert _messages(_read(os.path.join(temp_dir, "warning.log"))) == ["old", "w1 error"]
+    pass
+
+
+def test_tc0038_007_thread_name_with_separator():
+    """测试进程字段中的线程名包含"|"时仍正确解析模块、级别和耗时"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        _write(os.path.join(temp_dir, "full.log"), _line("0:00:02.00", "INFO", "main", process="1:a | b"))
+        _write(
+            os.path.join(temp_dir, "full.w1.log"),
+            _line("0:00:01.00", "WARNING", "w1 warn", module="db", process="2:x | y : 3)")
+        )
+
+        assert merge_shards(temp_dir) == 1
+        assert _messages(_read(os.path.join(temp_dir, "full.log"))) == ["w1 warn", "main"]
+        assert _messages(_read(os.path.join(temp_dir, "warning.log"))) == ["w1 warn"]
+        records = list(iter_records(os.path.join(temp_dir, "warning.log")))
+        assert [(key, module) for key, _, module, _ in records] == [(1.0, "db")]
+    pass
@@ -0,0 +1,93 @@
+# tests/test_custom_logger/test_tc0039_pool_initializer.py
+"""
+测试进程池初始化辅助
+"""
+from __future__ import annotations
+
+import multiprocessing as mp
+import os
+import tempfile
+from datetime import datetime
+from types import SimpleNamespace
+
+from custom_logger.pool import build_worker_snapshot
+
+
+def _make_config(temp_dir: str, **logger_options) -> SimpleNamespace:
+    logger = {'global_console_level': 'error', 'global_file_level': 'debug'}
+    logger.update(logger_options)
+    return SimpleNamespace(first_start_time=datetime.now(), paths={'log_dir': temp_dir}, logger=logger)
+
+
+def _task(index: int) -> int:
+    from custom_logger import get_logger
+
+    get_logger("task").info(f"task {index}")
+    return index
+
+
+def _read(path: str) -> str:
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def test_tc0039_001_build_worker_snapshot():
+    """测试worker快照只保留需要的字段，无传输时启用分片"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config = _make_config(temp_dir, module_levels={'db': {'file_level': 'error'}})
+        config.unrelated = object()
+        snapshot = build_worker_snapshot(config)
+        assert snapshot['log_dir'] == temp_dir
+        assert snapshot['worker_shards'] is True
+        assert 'unrelated' not in snapshot
+        assert snapshot['module_levels'] == {'db': {'file_level': 'error'}}
+        assert snapshot['module_levels'] is not config.logger['module_levels']
+
+        config.queue_info = {'log_queue': mp.Queue()}
+        snapshot = build_worker_snapshot(config)
+        assert 'worker_shards' not in snapshot
+        assert snapshot['log_queue'] is config.queue_info['log_queue']
+    pass
+
+
+def test_tc0039_002_process_pool_executor_with_queue():
+    """测试ProcessPoolExecutor经队列发送，worker_id自动分配"""
+    from custom_logger import create_process_pool_executor, init_custom_logger_system, tear_down_custom_logger_system
+
+    context = mp.get_context("spawn")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config = _make_config(temp_dir, enable_queue_mode=True, queue_worker_files=True)
+        config.queue_info = {'log_queue': context.Queue()}
+        try:
+            init_custom_logger_system(config)
+            with create_process_pool_executor(max_workers=2, mp_context=context) as executor:
+                assert sorted(executor.map(_task, range(10))) == list(range(10))
+        finally:
+            tear_down_custom_logger_system()
+
+        full = _read(os.path.join(temp_dir, "full.log"))
+        assert all(f"task {i}\n" in full for i in range(10))
+        worker_logs = sorted(name for name in os.listdir(temp_dir) if name.startswith("worker_"))
+        assert worker_logs and set(worker_logs) <= {"worker_worker1.log", "worker_worker2.log"}
+    pass
+
+
+def test_tc0039_003_pool_without_transport_uses_shards():
+    """测试没有队列和socket时multiprocessing.Pool使用分片并在关闭时合并"""
+    from custom_logger import create_process_pool, init_custom_logger_system, tear_down_custom_logger_system
+
+    context = mp.get_context("spawn")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        try:
+            init_custom_logger_system(_make_config(temp_dir))
+            pool = create_process_pool(processes=2, context=context)
+            assert sorted(pool.map(_task, range(10))) == list(range(10))
+            pool.close()
+            pool.join()
+        finally:
+            tear_down_custom_logger_system()
+
+        assert not any(name.startswith("full.w") for name in os.listdir(temp_dir))
+        full = _read(os.path.join(temp_dir, "full.log"))
+        assert all(f"task {i}\n" in full for i in range(10))
+    pass
@@ -0,0 +1,114 @@
+# tests/test_custom_logger/test_tc0040_config_snapshot.py
+"""
+测试扁平的日志配置快照与worker初始化
+"""
+from __future__ import annotations
+
+import multiprocessing as mp
+import os
+import pickle
+import tempfile
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from custom_logger.snapshot import SNAPSHOT_VERSION, build_config_snapshot, config_from_snapshot
+
+
+def _worker(params: dict) -> None:
+    from custom_logger import get_logger, init_custom_logger_system_with_params, tear_down_custom_logger_system
+
+    init_custom_logger_system_with_params(worker_id="w1", **params)
+    get_logger("worker").info("worker line")
+    get_logger("db").info("db filtered")
+    tear_down_custom_logger_system()
+
+
+def test_tc0040_001_snapshot_is_flat_and_small():
+    """测试快照只保留非默认的logger配置项，pickle后只有几百字节"""
+    config = SimpleNamespace(
+        first_start_time=datetime(2025, 1, 1, 12, 0, 0),
+        paths=SimpleNamespace(log_dir="/tmp/logs/session"),
+        logger=SimpleNamespace(
+            global_console_level="warning", global_file_level="debug", module_levels={'db': {'file_level': 'error'}},
+            current_session_dir="/tmp/logs/session", queue_batch_size=64, write_batch_size=256,
+        ),
+        project_name="demo", training=SimpleNamespace(layers=list(range(1000))),
+    )
+    snapshot = build_config_snapshot(config)
+    assert snapshot == {
+        'version': SNAPSHOT_VERSION, 'log_dir': "/tmp/logs/session", 'first_start_time': datetime(2025, 1, 1, 12, 0, 0),
+        'global_console_level': "warning", 'queue_batch_size': 64, 'module_levels': {'db': {'file_level': 'error'}},
+    }
+    assert len(pickle.dumps(snapshot)) < 512
+
+    rebuilt = config_from_snapshot(pickle.loads(pickle.dumps(snapshot)))
+    assert rebuilt.paths == {'log_dir': "/tmp/logs/session"}
+    assert rebuilt.first_start_time == datetime(2025, 1, 1, 12, 0, 0)
+    assert rebuilt.logger == {
+        'global_console_level': "warning", 'queue_batch_size': 64, 'module_levels': {'db': {'file_level': 'error'}},
+    }
+    assert not hasattr(rebuilt, 'queue_info')
+    pass
+
+
+def test_tc0040_002_snapshot_validation():
+    """测试快照版本和必要字段校验"""
+    base = {'log_dir': "/tmp/logs", 'first_start_time': "2025-01-01T12:00:00"}
+    assert config_from_snapshot(base).first_start_time == datetime(2025, 1, 1, 12, 0, 0)
+
+    with pytest.raises(ValueError):
+        config_from_snapshot(dict(base, version=SNAPSHOT_VERSION + 1))
+    with pytest.raises(ValueError):
+        config_from_snapshot({'first_start_time': datetime.now()})
+    with pytest.raises(ValueError):
+        config_from_snapshot({'log_dir': "/tmp/logs"})
+    with pytest.raises(ValueError):
+        config_from_snapshot(["not", "a", "dict"])
+    pass
+
+
+def test_tc0040_003_get_serializable_config_requires_init():
+    """测试日志系统未初始化时无法获取快照"""
+    from custom_logger import get_logger_init_params, get_serializable_config, is_initialized
+
+    assert not is_initialized()
+    with pytest.raises(RuntimeError):
+        get_serializable_config()
+    with pytest.raises(RuntimeError):
+        get_logger_init_params()
+    pass
+
+
+def test_tc0040_004_worker_init_from_params():
+    """测试worker用快照参数初始化，经队列写入主程序文件并使用模块级别"""
+    from custom_logger import get_logger_init_params, init_custom_logger_system, tear_down_custom_logger_system
+
+    context = mp.get_context("spawn")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config = SimpleNamespace(
+            first_start_time=datetime.now(),
+            paths={'log_dir': temp_dir},
+            logger={
+                'global_console_level': 'error', 'global_file_level': 'debug', 'enable_queue_mode': True,
+                'module_levels': {'db': {'file_level': 'error'}},
+            },
+            queue_info={'log_queue': context.Queue()},
+        )
+        try:
+            init_custom_logger_system(config)
+            params = get_logger_init_params()
+            assert params['log_queue'] is config.queue_info['log_queue']
+            process = context.Process(target=_worker, args=(params,))
+            process.start()
+            process.join(60)
+            assert process.exitcode == 0
+        finally:
+            tear_down_custom_logger_system()
+
+        with open(os.path.join(temp_dir, "full.log"), 'r', encoding='utf-8') as f:
+            full = f.read()
+        assert "worker line" in full
+        assert "db filtered" not in full
+    pass
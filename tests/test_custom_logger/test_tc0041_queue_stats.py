@@ -0,0 +1,89 @@
+# tests/test_custom_logger/test_tc0041_queue_stats.py
+"""
+测试队列模式接收端按worker的统计
+"""
+from __future__ import annotations
+
+import json
+import os
+import queue
+import tempfile
+import time
+
+from custom_logger.queue_stats import STATS_FILE_NAME, ReceiverStats
+from custom_logger.queue_writer import (
+    QueueLogEntry, QueueLogReceiver, QueueLogSender, iter_queue_entries, make_control_entry
+)
+from custom_logger.types import INFO
+from custom_logger.wire import WIRE_FORMAT_COMPACT
+
+
+def _entry(worker_id: str, message: str, lag_ms: float = 0.0) -> QueueLogEntry:
+    return QueueLogEntry(
+        log_line=message, level_value=INFO, worker_id=worker_id, logger_name="worker",
+        sequence=0, created_ns=time.time_ns() - int(lag_ms * 1_000_000)
+    )
+
+
+def test_tc0041_001_receiver_stats_per_worker():
+    """测试按worker的条数、字节数、延迟直方图和发送端报告"""
+    stats = ReceiverStats()
+    entries = [_entry("w1", "abcd", lag_ms=3)] * 3 + [_entry("w2", "xy", lag_ms=100)]
+    control = make_control_entry("w2", "status", dropped=5, spilled=7)
+    assert stats.observe_received(entries + [control]) == [control]
+    stats.observe_written(entries)
+    stats.report_sender("w2", 5, 7)
+    stats.report_sender("w2", 2, 1)
+
+    snapshot = stats.snapshot()
+    assert snapshot['records'] == 4 and snapshot['bytes'] == 14 and snapshot['dropped'] == 5
+    w1, w2 = snapshot['workers']['w1'], snapshot['workers']['w2']
+    assert w1['records'] == 3 and w1['bytes'] == 12
+    assert w1['lag_ms']['histogram'] == {'<4': 3} and w1['lag_ms']['p99'] == 4
+    assert w2['dropped'] == 5 and w2['spilled'] == 7
+    assert w2['lag_ms']['histogram'] == {'<128': 1} and w2['lag_ms']['max'] >= 100
+    json.dumps(snapshot)
+    pass
+
+
+def test_tc0041_002_receiver_writes_stats_file_and_skips_controls():
+    """测试接收器过滤控制记录并在关闭时写入log_stats.json"""
+    log_queue = queue.Queue()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        receiver = QueueLogReceiver(log_queue, temp_dir)
+        receiver.start_receiving()
+        log_queue.put([_entry("w1", "first"), _entry("w1", "second")])
+        log_queue.put(make_control_entry("w1", "status", dropped=3, spilled=0))
+        receiver.stop_receiving()
+
+        with open(os.path.join(temp_dir, "full.log"), 'r', encoding='utf-8') as f:
+            assert f.read() == "first\nsecond\n"
+        with open(os.path.join(temp_dir, STATS_FILE_NAME), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        assert data['session_dir'] == temp_dir
+        assert data['workers']['w1']['records'] == 2
+        assert data['workers']['w1']['dropped'] == 3
+    pass
+
+
+def test_tc0041_003_sender_reports_drops():
+    """测试发送端丢弃后在下一次入队和关闭时报告累计丢弃数"""
+    log_queue = queue.Queue(maxsize=1)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        receiver = QueueLogReceiver(queue.Queue(), temp_dir, stats_interval=0)
+        sender = QueueLogSender(log_queue, "w9", wire_format=WIRE_FORMAT_COMPACT, heartbeat_interval=0.0)
+        sender.send_log("kept", INFO)
+        sender.send_log("dropped 1", INFO)
+        sender.send_log("dropped 2", INFO)
+        assert sender.dropped == 2
+
+        receiver._deliver(iter_queue_entries(log_queue.get_nowait()))
+        sender.close()
+        receiver._deliver(iter_queue_entries(log_queue.get_nowait()))
+        receiver._close_files()
+
+        with open(os.path.join(temp_dir, "full.log"), 'r', encoding='utf-8') as f:
+            assert f.read() == "kept\n"
+        assert receiver.get_stats()['workers']['w9']['dropped'] == 2
+        assert not os.path.exists(os.path.join(temp_dir, STATS_FILE_NAME))
+    pass
@@ -0,0 +1,181 @@
+# tests/test_custom_logger/test_tc0042_heartbeat.py
+"""
+测试worker心跳、静默记录和终止信号时写出剩余日志
+"""
+from __future__ import annotations
+
+import multiprocessing as mp
+import os
+import queue
+import signal
+import sys
+import tempfile
+import time
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from custom_logger.queue_writer import (
+    QueueLogEntry, QueueLogReceiver, QueueLogSender, init_queue_sender, iter_queue_entries, make_control_entry,
+    parse_control_entry, shutdown_queue_sender
+)
+from custom_logger.types import INFO
+
+
+def _worker(config, ready) -> None:
+    from custom_logger import get_logger, init_custom_logger_system_for_worker
+
+    init_custom_logger_system_for_worker(config, "w1")
+    get_logger("worker").info("batched before sigterm")
+    ready.set()
+    time.sleep(60)
+
+
+def test_tc0042_001_receiver_writes_silence_and_resume_records():
+    """测试超过3个心跳间隔没有消息的worker写入静默记录，关闭的worker不写入"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        receiver = QueueLogReceiver(queue.Queue(), temp_dir, stats_interval=0)
+        receiver._deliver([
+            make_control_entry("w1", "heartbeat", pid=123, interval=0.5),
+            make_control_entry("w2", "heartbeat", pid=456, interval=0.5),
+            make_control_entry("w2", "close", dropped=0, spilled=0),
+        ])
+        receiver._check_liveness(now=time.time() + 2)
+        receiver._check_liveness(now=time.time() + 4)
+        receiver._deliver([QueueLogEntry("back again", INFO, worker_id="w1", created_ns=time.time_ns())])
+        receiver._check_liveness()
+        stats = receiver.get_stats()['workers']
+        receiver._close_files()
+
+        with open(os.path.join(temp_dir, "full.log"), 'r', encoding='utf-8') as f:
+            full = f.read()
+        with open(os.path.join(temp_dir, "warning.log"), 'r', encoding='utf-8') as f:
+            warning = f.read()
+    assert full.count("worker w1 silent since") == 1 and "pid 123" in full
+    assert "worker w2" not in full
+    assert "worker w1 resumed" in full and "back again" in full
+    assert "worker w1 silent since" in warning and "resumed" not in warning
+    assert stats['w1']['pid'] == 123 and not stats['w1']['silent']
+    assert stats['w2']['closed']
+    pass
+
+
+def test_tc0042_002_sender_heartbeat_and_close():
+    """测试发送端启动时发送心跳，关闭时发送关闭记录"""
+    log_queue = queue.Queue()
+    sender = QueueLogSender(log_queue, "w3", heartbeat_interval=0.05)
+    deadline = time.time() + 5
+    while log_queue.empty() and time.time() < deadline:
+        time.sleep(0.01)
+    sender.send_log("line", INFO)
+    sender.close()
+
+    items = []
+    while not log_queue.empty():
+        items.extend(iter_queue_entries(log_queue.get_nowait()))
+    first = parse_control_entry(items[0])
+    assert first['kind'] == "heartbeat" and first['pid'] == os.getpid() and first['interval'] == 0.05
+    assert parse_control_entry(items[-1])['kind'] == "close"
+    assert [item.log_line for item in items if item.level_value == INFO] == ["line"]
+    pass
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="需要POSIX信号")
+def test_tc0042_003_sigterm_flushes_batched_logs():
+    """测试worker收到SIGTERM时先写出批量缓存，退出码仍为SIGTERM"""
+    from custom_logger import init_custom_logger_system, tear_down_custom_logger_system
+
+    context = mp.get_context("spawn")
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config = SimpleNamespace(
+            first_start_time=datetime.now(),
+            paths={'log_dir': temp_dir},
+            logger={
+                'global_console_level': 'error', 'global_file_level': 'debug', 'enable_queue_mode': True,
+                'queue_batch_size': 1000, 'queue_batch_interval': 60.0,
+            },
+            queue_info={'log_queue': context.Queue()},
+        )
+        try:
+            init_custom_logger_system(config)
+            ready = context.Event()
+            process = context.Process(target=_worker, args=(config, ready))
+            process.start()
+            assert ready.wait(60)
+            process.terminate()
+            process.join(30)
+            assert process.exitcode == -signal.SIGTERM
+        finally:
+            tear_down_custom_logger_system()
+
+        with open(os.path.join(temp_dir, "full.log"), 'r', encoding='utf-8') as f:
+            assert "batched before sigterm" in f.read()
+    pass
+
+
+def test_tc0042_004_control_frames_hidden_from_old_receivers():
+    """测试控制记录单独编码为控制帧，旧接收端按未知对象忽略；级别为0的普通日志照常写入"""
+    from custom_logger.config import DEFAULT_CONFIG
+    from custom_logger.wire import WIRE_MAGIC
+
+    log_queue = queue.Queue()
+    sender = QueueLogSender(log_queue, "w4")
+    assert sender.heartbeat_interval == DEFAULT_CONFIG['logger']['queue_heartbeat_interval']
+    sender.close()
+    item = log_queue.get_nowait()
+    assert not isinstance(item, QueueLogEntry) and item[:2] != WIRE_MAGIC
+    assert parse_control_entry(iter_queue_entries(item)[0])['kind'] == "heartbeat"
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        receiver = QueueLogReceiver(queue.Queue(), temp_dir, stats_interval=0)
+        receiver._deliver([QueueLogEntry("level zero line", 0, worker_id="w4", logger_name="app")])
+        receiver._close_files()
+        with open(os.path.join(temp_dir, "full.log"), 'r', encoding='utf-8') as f:
+            assert "level zero line" in f.read()
+    pass
+
+
+def test_tc0042_005_configured_sender_uses_default_interval():
+    """测试配置中没有queue_heartbeat_interval时worker发送端使用与DEFAULT_CONFIG相同的默认值"""
+    from custom_logger import queue_writer
+    from custom_logger.config import DEFAULT_CONFIG, _ensure_logger_attributes
+
+    config = SimpleNamespace(logger={'global_console_level': 'info'})
+    _ensure_logger_attributes(config)
+    assert config.logger['queue_heartbeat_interval'] == DEFAULT_CONFIG['logger']['queue_heartbeat_interval']
+
+    init_queue_sender(queue.Queue(), "w5")
+    try:
+        assert queue_writer._queue_log_sender.heartbeat_interval == DEFAULT_CONFIG['logger']['queue_heartbeat_interval']
+    finally:
+        shutdown_queue_sender()
+    pass
+
+
+def test_tc0042_006_signal_flush_bounded_and_skipped_when_empty():
+    """测试终止信号的写出等待时间很短，发送端只在有未写入管道的日志时需要等待"""
+    from custom_logger import manager
+
+    assert manager.SIGNAL_FLUSH_TIMEOUT <= 1.0
+    sender = QueueLogSender(queue.Queue(), "w6", batch_size=10, batch_interval=60.0, heartbeat_interval=0.0)
+    assert not sender.has_pending()
+    sender.send_log("buffered", INFO)
+    assert sender.has_pending()
+    sender.flush()
+    assert not sender.has_pending()
+    sender.close()
+    pass
+
+
+def test_tc0042_007_system_line_elapsed_matches_log_line():
+    """测试系统日志行与普通日志行使用同一运行时长格式"""
+    from custom_logger.formatter import create_system_log_line, format_elapsed_since
+
+    now = datetime(2026, 10, 19, 12, 0, 0)
+    start = datetime(2026, 10, 19, 10, 58, 57, 500000)
+    assert format_elapsed_since(start, now) == "1:01:02.50"
+    assert format_elapsed_since(start.isoformat(), now) == "1:01:02.50"
+    assert format_elapsed_since(None, now) == "0:00:00.00"
+    assert " - 0:00:0" in create_system_log_line("WARNING", "worker silent", datetime.now())
+    pass
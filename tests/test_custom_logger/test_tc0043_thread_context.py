@@ -0,0 +1,110 @@
+# tests/test_custom_logger/test_tc0043_thread_context.py
+"""
+测试线程字段和按线程的级别覆盖
+"""
+from __future__ import annotations
+
+import os
+import tempfile
+import threading
+from datetime import datetime
+from types import SimpleNamespace
+
+from custom_logger import get_logger, init_custom_logger_system, override_log_levels, tear_down_custom_logger_system
+from custom_logger.shards import LINE_PATTERN
+
+
+def _make_config(temp_dir: str, **logger_options) -> SimpleNamespace:
+    logger = {'global_console_level': 'error', 'global_file_level': 'info', 'module_levels': {}}
+    logger.update(logger_options)
+    return SimpleNamespace(first_start_time=datetime.now(), paths={'log_dir': temp_dir}, logger=logger)
+
+
+def _run_in_thread(target, name: str) -> None:
+    thread = threading.Thread(target=target, name=name)
+    thread.start()
+    thread.join()
+
+
+def _read_full(temp_dir: str) -> str:
+    with open(os.path.join(temp_dir, "full.log"), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def test_tc0043_001_thread_field():
+    """测试thread_field在进程字段中附加线程名和线程号"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        init_custom_logger_system(_make_config(temp_dir, thread_field="both"))
+        try:
+            native_ids = []
+
+            def target():
+                native_ids.append(threading.get_native_id())
+                get_logger("worker").info("from request thread")
+                get_logger("worker").info("second line")
+
+            _run_in_thread(target, "req]7")
+        finally:
+            tear_down_custom_logger_system()
+
+        lines = _read_full(temp_dir).splitlines()
+    assert len(lines) == 2
+    for line in lines:
+        assert line.startswith(f"[{os.getpid():>6}:req)7/{native_ids[0]} | ")
+        assert LINE_PATTERN.match(line.encode('utf-8'))
+    pass
+
+
+def test_tc0043_002_thread_field_disabled_by_default():
+    """测试默认不附加线程字段"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        init_custom_logger_system(_make_config(temp_dir))
+        try:
+            _run_in_thread(lambda: get_logger("worker").info("plain"), "req-1")
+        finally:
+            tear_down_custom_logger_system()
+
+        assert _read_full(temp_dir).startswith(f"[{os.getpid():>6} | ")
+    pass
+
+
+def test_tc0043_003_override_levels_per_thread():
+    """测试级别覆盖只作用于当前线程和指定的logger，退出后恢复"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        init_custom_logger_system(_make_config(temp_dir))
+        try:
+            api, db = get_logger("api"), get_logger("db")
+            in_override = threading.Event()
+            other_done = threading.Event()
+
+            def request_thread():
+                with override_log_levels(file_level="debug", modules=["api"]):
+                    in_override.set()
+                    api.debug("api debug in request")
+                    db.debug("db debug in request")
+                    other_done.wait(10)
+                api.debug("api debug after")
+
+            def other_thread():
+                in_override.wait(10)
+                api.debug("api debug in other thread")
+                api.info("api info in other thread")
+                other_done.set()
+
+            threads = [threading.Thread(target=request_thread), threading.Thread(target=other_thread)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            with override_log_levels(file_level="error"):
+                api.warning("warning filtered by override")
+        finally:
+            tear_down_custom_logger_system()
+
+        full = _read_full(temp_dir)
+    assert "api debug in request" in full
+    assert "api info in other thread" in full
+    for message in ("db debug in request", "api debug after", "api debug in other thread", "warning filtered"):
+        assert message not in full
+    pass
@@ -0,0 +1,105 @@
+# tests/test_custom_logger/test_tc0044_console_writer.py
+"""
+测试控制台写入线程
+"""
+from __future__ import annotations
+
+import tempfile
+import threading
+from datetime import datetime
+from types import SimpleNamespace
+
+from custom_logger.console import CONSOLE_OVERFLOW_DROP, ConsoleWriter, get_console_writer
+
+
+class _RecordingStream:
+    """记录每次write的流，第一次write阻塞到gate打开"""
+
+    def __init__(self, name: str, writes: list, gate: threading.Event):
+        self.name = name
+        self.writes = writes
+        self.gate = gate
+        self.entered = threading.Event()
+
+    def write(self, text: str) -> None:
+        self.entered.set()
+        self.gate.wait(10)
+        self.writes.append((self.name, text))
+
+    def flush(self) -> None:
+        pass
+
+
+def test_tc0044_001_coalesces_runs_and_keeps_order():
+    """测试同一流的连续行合并写出，stdout和stderr保持调用顺序"""
+    writes = []
+    gate = threading.Event()
+    out, err = _RecordingStream("out", writes, gate), _RecordingStream("err", writes, gate)
+    writer = ConsoleWriter(queue_size=100)
+    writer.write(out, "first\n")
+    assert out.entered.wait(10)
+    # 写入线程阻塞在第一次write期间，后续文本在队列中积累
+    for index in range(3):
+        writer.write(out, f"out {index}\n")
+    writer.write(err, "err 0\n")
+    writer.write(out, "\rcountdown")
+    writer.write(out, "\rcountdown 2")
+    gate.set()
+    assert writer.flush()
+    writer.close()
+
+    assert writes == [
+        ("out", "first\n"),
+        ("out", "out 0\nout 1\nout 2\n"),
+        ("err", "err 0\n"),
+        ("out", "\rcountdown\rcountdown 2"),
+    ]
+    pass
+
+
+def test_tc0044_002_drop_overflow(capsys):
+    """测试drop策略丢弃超出队列容量的文本并在stderr提示"""
+    writes = []
+    gate = threading.Event()
+    out = _RecordingStream("out", writes, gate)
+    writer = ConsoleWriter(queue_size=2, overflow=CONSOLE_OVERFLOW_DROP)
+    writer.write(out, "line 0\n")
+    assert out.entered.wait(10)
+    for index in range(1, 10):
+        writer.write(out, f"line {index}\n")
+    assert writer.dropped == 7
+    gate.set()
+    writer.close()
+
+    assert ''.join(text for _, text in writes) == "line 0\nline 1\nline 2\n"
+    assert "已丢弃7行" in capsys.readouterr().err
+    pass
+
+
+def test_tc0044_003_logger_uses_console_thread(capsys):
+    """测试启用console_thread后日志经写入线程输出，关闭时写完"""
+    from custom_logger import get_logger, init_custom_logger_system, tear_down_custom_logger_system
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config = SimpleNamespace(
+            first_start_time=datetime.now(),
+            paths={'log_dir': temp_dir},
+            logger={'global_console_level': 'info', 'global_file_level': 'debug', 'console_thread': True},
+        )
+        init_custom_logger_system(config)
+        try:
+            assert get_console_writer() is not None
+            logger = get_logger("console")
+            logger.info("info line")
+            logger.countdown_info("counting")
+            logger.countdown_end()
+            logger.warning("warning line")
+        finally:
+            tear_down_custom_logger_system()
+        assert get_console_writer() is None
+
+    captured = capsys.readouterr()
+    assert captured.out.index("info line") < captured.out.index("\r")
+    assert "counting" in captured.out and captured.out.endswith("\n")
+    assert "warning line" in captured.err
+    pass
@@ -0,0 +1,70 @@
+# tests/test_custom_logger/test_tc0045_color_detection.py
+"""
+测试按流检测控制台颜色和环境变量覆盖
+"""
+from __future__ import annotations
+
+import io
+
+import pytest
+
+import custom_logger.logger as logger_module
+from custom_logger.logger import Colors, CustomLogger
+from custom_logger.types import INFO, WARNING
+
+
+class _TtyStream(io.StringIO):
+    def isatty(self) -> bool:
+        return True
+
+
+@pytest.fixture
+def terminal(monkeypatch):
+    """普通终端环境，清空样式缓存"""
+    monkeypatch.setattr(logger_module, '_TERMINAL_TYPE', 'terminal')
+    for name in ('NO_COLOR', 'FORCE_COLOR', 'TERM'):
+        monkeypatch.delenv(name, raising=False)
+    logger_module._STREAM_STYLES.clear()
+    yield monkeypatch
+    logger_module._STREAM_STYLES.clear()
+
+
+def _print_warning(monkeypatch, stream) -> str:
+    monkeypatch.setattr('sys.stderr', stream)
+    CustomLogger("color", console_level=INFO, file_level=INFO)._print_to_console("warning line", WARNING)
+    return stream.getvalue()
+
+
+def test_tc0045_001_color_only_for_tty(terminal):
+    """测试只向TTY输出颜色，重定向时输出原始日志行"""
+    assert _print_warning(terminal, _TtyStream()) == f"{logger_module.LEVEL_COLORS[WARNING]}warning line{Colors.RESET}\n"
+    assert _print_warning(terminal, io.StringIO()) == "warning line\n"
+    assert logger_module._level_styles(_TtyStream()).get(INFO) is None
+    pass
+
+
+def test_tc0045_002_env_overrides(terminal):
+    """测试NO_COLOR、FORCE_COLOR和TERM=dumb"""
+    terminal.setenv('FORCE_COLOR', '1')
+    assert _print_warning(terminal, io.StringIO()).startswith(logger_module.LEVEL_COLORS[WARNING])
+
+    terminal.setenv('NO_COLOR', '1')
+    assert _print_warning(terminal, _TtyStream()) == "warning line\n"
+
+    terminal.delenv('NO_COLOR')
+    terminal.setenv('FORCE_COLOR', '0')
+    assert _print_warning(terminal, _TtyStream()) == "warning line\n"
+
+    terminal.delenv('FORCE_COLOR')
+    terminal.setenv('TERM', 'dumb')
+    assert _print_warning(terminal, _TtyStream()) == "warning line\n"
+    pass
+
+
+def test_tc0045_003_detection_cached_per_stream(terminal):
+    """测试检测结果按流缓存，同一流之后不再检测"""
+    stream = _TtyStream()
+    assert _print_warning(terminal, stream).startswith(logger_module.LEVEL_COLORS[WARNING])
+    terminal.setenv('NO_COLOR', '1')
+    assert _print_warning(terminal, stream).count(logger_module.LEVEL_COLORS[WARNING]) == 2
+    pass
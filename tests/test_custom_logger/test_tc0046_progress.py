@@ -0,0 +1,149 @@
+# tests/test_custom_logger/test_tc0046_progress.py
+"""
+测试倒计时限频和进度条
+"""
+from __future__ import annotations
+
+import io
+import os
+import tempfile
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+import custom_logger.progress as progress_module
+from custom_logger.logger import CustomLogger
+from custom_logger.progress import (
+    CLEAR_LINE, DEFAULT_REFRESH_RATE, ProgressBar, ProgressRenderer, get_progress_renderer
+)
+from custom_logger.types import INFO
+
+
+class _TtyStream(io.StringIO):
+    def isatty(self) -> bool:
+        return True
+
+
+def _make_config(temp_dir: str, refresh_rate: float) -> SimpleNamespace:
+    return SimpleNamespace(
+        first_start_time=datetime.now(),
+        paths={'log_dir': temp_dir},
+        logger={'global_console_level': 'info', 'global_file_level': 'info', 'console_refresh_rate': refresh_rate},
+    )
+
+
+@pytest.fixture
+def logging_system():
+    """在临时目录中初始化日志系统，结束后恢复默认刷新频率"""
+    from custom_logger import init_custom_logger_system, tear_down_custom_logger_system
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        def init(refresh_rate: float) -> str:
+            init_custom_logger_system(_make_config(temp_dir, refresh_rate))
+            return temp_dir
+
+        try:
+            yield init
+        finally:
+            tear_down_custom_logger_system()
+            get_progress_renderer().set_refresh_rate(DEFAULT_REFRESH_RATE)
+
+
+def test_tc0046_001_countdown_drops_frames(monkeypatch, logging_system):
+    """测试刷新间隔内的倒计时帧被丢弃，结束时输出最后一帧"""
+    logging_system(0.01)
+    stream = io.StringIO()
+    monkeypatch.setattr('sys.stdout', stream)
+    logger = CustomLogger("countdown", console_level=INFO, file_level=INFO)
+    for remaining in range(100, 0, -1):
+        logger.countdown_info(f"remaining {remaining}")
+    logger.countdown_end()
+
+    output = stream.getvalue()
+    assert output.count("\r") == 2
+    assert "remaining 100" in output and "remaining 1\n" in output
+    assert "remaining 50" not in output
+    pass
+
+
+def test_tc0046_002_format_rate_and_eta(monkeypatch):
+    """测试进度条显示百分比、计数、速率和剩余时间"""
+    monkeypatch.setattr('sys.stdout', io.StringIO())
+    renderer = ProgressRenderer(refresh_rate=0)
+    bar = ProgressBar(CustomLogger("bar"), total=200, description="samples", unit="s", renderer=renderer)
+    bar.n = 50
+    bar.started -= 10.0
+
+    assert abs(bar.rate - 5.0) < 0.1
+    assert 29.5 <= bar.eta <= 30.5
+    text = bar.format()
+    assert text.startswith("samples  25%|#####---------------| 50/200 [00:10<00:")
+    assert text.endswith("5.0s/s]")
+    pass
+
+
+def test_tc0046_003_concurrent_bars_on_tty(monkeypatch):
+    """测试TTY上多个进度条整块重绘，日志行写在块上方，结束时保留最终状态"""
+    stream = _TtyStream()
+    monkeypatch.setattr('sys.stdout', stream)
+    # 固定时间，使每次绘制的文本相同
+    monkeypatch.setattr(progress_module.time, 'monotonic', lambda: 100.0)
+    renderer = ProgressRenderer(refresh_rate=0)
+    logger = CustomLogger("bars")
+    first = ProgressBar(logger, total=10, description="first", renderer=renderer)
+    second = ProgressBar(logger, total=10, description="second", renderer=renderer)
+    first.update(5)
+    assert renderer.active
+    assert stream.getvalue().endswith(f"\x1b[1A\r{CLEAR_LINE}{first.format()}\n{CLEAR_LINE}{second.format()}")
+
+    assert renderer.write_above(stream, "log line\n")
+    assert stream.getvalue().endswith(f"log line\n\r{CLEAR_LINE}{first.format()}\n{CLEAR_LINE}{second.format()}")
+
+    first.close()
+    second.close()
+    assert not renderer.active
+    output = stream.getvalue()
+    # 第一个进度条结束时最终状态保留在块上方，第二个进度条随后在原位结束
+    assert output.endswith(
+        f"\x1b[1A\r{CLEAR_LINE}{first.format()}\n{CLEAR_LINE}{second.format()}\r{CLEAR_LINE}{second.format()}\n"
+    )
+    assert not renderer.write_above(stream, "plain\n")
+    pass
+
+
+def test_tc0046_004_non_tty_only_final(monkeypatch):
+    """测试stdout不是TTY时只输出最终状态"""
+    stream = io.StringIO()
+    monkeypatch.setattr('sys.stdout', stream)
+    renderer = ProgressRenderer(refresh_rate=0)
+    with ProgressBar(CustomLogger("pipe"), total=3, description="piped", renderer=renderer) as bar:
+        for _ in range(3):
+            bar.update()
+
+    assert stream.getvalue() == bar.format() + "\n"
+    assert "100%" in stream.getvalue()
+    pass
+
+
+def test_tc0046_005_final_state_logged_once(monkeypatch, logging_system):
+    """测试进度条最终状态写入文件日志一次，未关闭的进度条在关闭日志系统时结束"""
+    from custom_logger import get_logger, tear_down_custom_logger_system
+
+    monkeypatch.setattr('sys.stdout', io.StringIO())
+    temp_dir = logging_system(5)
+    assert get_progress_renderer().interval == 0.2
+    logger = get_logger("train")
+    with logger.progress(total=100, description="epoch") as bar:
+        for _ in range(100):
+            bar.update()
+    unfinished = logger.progress(description="unfinished")
+    unfinished.update(7)
+    tear_down_custom_logger_system()
+
+    with open(os.path.join(temp_dir, "full.log"), 'r', encoding='utf-8') as f:
+        full = f.read()
+    assert full.count("epoch 100%") == 1
+    assert full.count("unfinished 7 [") == 1
+    assert len(full.splitlines()) == 2
+    pass
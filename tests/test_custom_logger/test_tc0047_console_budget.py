@@ -0,0 +1,70 @@
+# tests/test_custom_logger/test_tc0047_console_budget.py
+"""
+测试控制台限流和省略汇总
+"""
+from __future__ import annotations
+
+import os
+import tempfile
+from datetime import datetime
+from types import SimpleNamespace
+
+from custom_logger.console import ConsoleBudget, check_console_budget
+
+
+def test_tc0047_001_budget_per_logger_and_window():
+    """测试每个logger每秒独立计数，新窗口恢复输出"""
+    budget = ConsoleBudget(max_lines=2, summary_interval=5.0)
+    assert [budget.check("a", "WARNING", now=0.1)[0] for _ in range(4)] == [True, True, False, False]
+    assert budget.check("b", "WARNING", now=0.2) == (True, [])
+    assert budget.check("a", "INFO", now=0.5) == (False, [])
+    assert budget.check("a", "WARNING", now=1.2) == (True, [])
+    pass
+
+
+def test_tc0047_002_summary_once_per_interval():
+    """测试第一次省略后经过汇总间隔输出一次汇总，任意logger的调用都会触发"""
+    budget = ConsoleBudget(max_lines=1, summary_interval=5.0)
+    budget.check("a", "WARNING", now=0.0)
+    for _ in range(3):
+        budget.check("a", "WARNING", now=0.5)
+    budget.check("a", "ERROR", now=0.6)
+
+    assert budget.check("b", "INFO", now=4.0) == (True, [])
+    allowed, summaries = budget.check("b", "INFO", now=5.6)
+    assert allowed and len(summaries) == 1
+    assert "a 输出过快，3条WARNING、1条ERROR未输出到控制台（完整内容见full.log）" in summaries[0]
+    assert budget.check("b", "INFO", now=20.0) == (True, [])
+    assert budget.drain() == []
+    pass
+
+
+def test_tc0047_003_flood_goes_to_file_only(capsys):
+    """测试超出限流的日志只写文件，关闭时输出剩余的汇总"""
+    from custom_logger import get_logger, init_custom_logger_system, tear_down_custom_logger_system
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        config = SimpleNamespace(
+            first_start_time=datetime.now(),
+            paths={'log_dir': temp_dir},
+            logger={'global_console_level': 'info', 'global_file_level': 'info', 'console_rate_limit': 5},
+        )
+        init_custom_logger_system(config)
+        try:
+            logger = get_logger("flood")
+            for index in range(50):
+                logger.warning("incident {}", index)
+            get_logger("quiet").warning("other logger")
+        finally:
+            tear_down_custom_logger_system()
+        assert check_console_budget("flood", "WARNING") == (True, [])
+
+        with open(os.path.join(temp_dir, "full.log"), 'r', encoding='utf-8') as f:
+            full = f.read()
+
+    err = capsys.readouterr().err
+    assert err.count("incident") == 5
+    assert "other logger" in err
+    assert "flood 输出过快，45条warning未输出到控制台" in err
+    assert full.count("incident") == 50
+    pass